@@ -16,6 +16,7 @@ from collections import defaultdict
 # Core imports
 from src.utils.event_bus import EventBus, Event, EventType
 from src.utils.metrics import MetricsCollector
+from src.agents.orchestration.symbol_pipeline import SymbolPipeline, StageConfig
 
 # All integrated services
 from src.services.trading_center import trading_center
@@ -103,7 +104,7 @@ class MasterOrchestrationAgent:
         self.health = SystemHealth()
         self.active_modules: Dict[str, bool] = {}
         self.processing_queue: asyncio.Queue = asyncio.Queue()
-        self.priority_queue: asyncio.Queue = asyncio.Queue()
+        self.my_symbols: Set[str] = set()
         
         # Configuration
         self.config = {
@@ -113,12 +114,28 @@ class MasterOrchestrationAgent:
             'rare_event_boost': 1.3,
             'max_concurrent_trades': 10,
             'risk_limit_daily': 0.02,  # 2% daily risk
-            'emergency_stop_loss': 0.05  # 5% emergency stop
+            'emergency_stop_loss': 0.05,  # 5% emergency stop
+            'collect_workers': 8,  # I/O-bound data collection
+            'analysis_workers': 2,
+            'execution_workers': 2,
+            'stage_queue_size': 50  # per stage; a full stage holds back the one before it
         }
         
         # Background tasks
         self.background_tasks: List[asyncio.Task] = []
         
+        # Staged symbol pipeline: collect -> analyze (+ decision) -> execute, My Symbols first
+        self.pipeline = SymbolPipeline(
+            collect=self._collect_comprehensive_data,
+            analyze=self._analyze_symbol,
+            execute=self._execute_trade,
+            stages={
+                'collect': StageConfig(self.config['collect_workers'], self.config['stage_queue_size']),
+                'analyze': StageConfig(self.config['analysis_workers'], self.config['stage_queue_size']),
+                'execute': StageConfig(self.config['execution_workers'], self.config['stage_queue_size'])
+            }
+        )
+        
         logger.info(f"🎯 Master Orchestration Agent initialized in {mode.value} mode")
     
     async def initialize(self) -> bool:
@@ -186,13 +203,12 @@ class MasterOrchestrationAgent:
         
         logger.info("🚀 Starting Master Orchestration Agent...")
         
+        await self.pipeline.start()
+        
         # Start background tasks
         self.background_tasks.append(
             asyncio.create_task(self._continuous_monitoring())
         )
-        self.background_tasks.append(
-            asyncio.create_task(self._process_priority_queue())
-        )
         self.background_tasks.append(
             asyncio.create_task(self._health_monitor())
         )
@@ -240,6 +256,7 @@ class MasterOrchestrationAgent:
             try:
                 my_symbols = await self.my_symbols_orchestrator.my_symbols_service.get_tradeable_symbols()
                 symbols.extend(my_symbols)
+                self.my_symbols = set(my_symbols)
                 logger.debug(f"Added {len(my_symbols)} My Symbols to monitoring")
             except:
                 pass
@@ -262,50 +279,12 @@ class MasterOrchestrationAgent:
         return symbols
     
     async def _process_symbol_batch(self, symbols: List[str]):
-        """Process a batch of symbols through the full pipeline"""
-        tasks = []
-        
-        for symbol in symbols:
-            # Check if it's a My Symbol for priority processing
-            is_my_symbol = await self._is_my_symbol(symbol)
-            
-            if is_my_symbol:
-                # Priority processing
-                await self.priority_queue.put({
-                    'symbol': symbol,
-                    'priority': 'HIGH',
-                    'timestamp': datetime.now()
-                })
-            else:
-                # Regular processing
-                tasks.append(self._process_single_symbol(symbol))
+        """Run a scan's symbols through the staged pipeline, My Symbols in the priority lane"""
+        decisions = await self.pipeline.process_batch(symbols, priority_symbols=self.my_symbols)
         
-        # Process regular symbols in parallel
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-    
-    async def _process_single_symbol(self, symbol: str):
-        """Complete processing pipeline for a single symbol"""
-        try:
-            # Step 1: Collect all data
-            signal_data = await self._collect_comprehensive_data(symbol)
-            
-            # Step 2: Analyze with all agents
-            analysis = await self._perform_multi_agent_analysis(symbol, signal_data)
-            
-            # Step 3: Make trading decision
-            decision = await self._make_trading_decision(symbol, analysis)
-            
-            # Step 4: Execute if qualified
-            if decision['should_trade']:
-                await self._execute_trade(symbol, decision)
-            
-            # Update metrics
-            if self.session:
-                self.session.signals_processed += 1
-            
-        except Exception as e:
-            logger.error(f"Error processing {symbol}: {e}")
+        # Update metrics
+        if self.session:
+            self.session.signals_processed += sum(1 for decision in decisions.values() if decision is not None)
     
     async def _collect_comprehensive_data(self, symbol: str) -> Dict[str, Any]:
         """Collect data from all sources"""
@@ -364,6 +343,11 @@ class MasterOrchestrationAgent:
         
         return analysis
     
+    async def _analyze_symbol(self, symbol: str, data: Dict) -> Dict[str, Any]:
+        """Pipeline analysis stage: multi-agent analysis, then the trading decision"""
+        analysis = await self._perform_multi_agent_analysis(symbol, data)
+        return await self._make_trading_decision(symbol, analysis)
+    
     async def _make_trading_decision(self, symbol: str, analysis: Dict) -> Dict[str, Any]:
         """Make final trading decision based on all analysis"""
         decision = {
@@ -437,24 +421,6 @@ class MasterOrchestrationAgent:
         except Exception as e:
             logger.error(f"Failed to execute trade for {symbol}: {e}")
     
-    async def _process_priority_queue(self):
-        """Process high-priority symbols from queue"""
-        while self.state == SystemState.RUNNING:
-            try:
-                # Get priority item
-                item = await self.priority_queue.get()
-                
-                logger.info(f"🎯 Processing priority symbol: {item['symbol']}")
-                
-                # Process immediately
-                await self._process_single_symbol(item['symbol'])
-                
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in priority queue: {e}")
-                await asyncio.sleep(1)
-    
     async def _health_monitor(self):
         """Monitor system health"""
         while self.state == SystemState.RUNNING:
@@ -537,14 +503,6 @@ Trades: {self.session.trades_executed}
         # For RISK_ALERT, use appropriate event type if exists
         # self.event_bus.subscribe(EventType.RISK_ALERT, on_risk_alert)
     
-    async def _is_my_symbol(self, symbol: str) -> bool:
-        """Check if symbol is in My Symbols database"""
-        try:
-            package = await self.my_symbols_orchestrator.get_my_symbol_package(symbol)
-            return package is not None
-        except:
-            return False
-    
     async def _get_pattern_analysis(self, symbol: str):
         """Get pattern analysis for symbol"""
         try:
@@ -598,6 +556,7 @@ Trades: {self.session.trades_executed}
         
         # Wait for tasks to complete
         await asyncio.gather(*self.background_tasks, return_exceptions=True)
+        await self.pipeline.stop()
         
         # Final report
         if self.session:
@@ -630,7 +589,8 @@ Symbols Monitored: {len(self.session.symbols_monitored)}
                 'errors': self.health.error_count,
                 'warnings': self.health.warning_count,
                 'last_check': self.health.last_check.isoformat()
-            }
+            },
+            'pipeline': self.pipeline.get_metrics()
         }
         
         if self.session:
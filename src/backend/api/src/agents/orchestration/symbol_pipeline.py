@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Staged Symbol Pipeline
+Bounded collect -> analyze -> execute stages for the Master Orchestration Agent
+
+Each stage has its own worker pool sized to its workload: many workers for
+I/O-bound data collection, a few for analysis, and a few for execution. Each
+stage also has a bounded priority queue. When a stage falls behind, its full
+queue blocks the stage before it and finally the submitter, so a growing
+symbol universe queues up instead of opening every symbol's requests at once.
+Priority symbols (My Symbols) go ahead of normal symbols at every stage.
+
+A symbol is in the pipeline at most once: resubmitting a symbol that is still
+in flight joins the pending run, so execution for a symbol is always
+serialized. Every stage reports throughput, queue wait and service latency.
+"""
+
+import asyncio
+import inspect
+import itertools
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_HIGH = 0    # My Symbols
+PRIORITY_NORMAL = 1
+
+LANE_NAMES = {PRIORITY_HIGH: 'priority', PRIORITY_NORMAL: 'normal'}
+
+STAGE_NAMES = ('collect', 'analyze', 'execute')
+
+
+@dataclass
+class StageConfig:
+    """Worker count and queue bound for one pipeline stage"""
+    workers: int = 4
+    maxsize: int = 100
+
+
+DEFAULT_STAGES: Dict[str, StageConfig] = {
+    'collect': StageConfig(workers=8, maxsize=100),  # I/O-bound: signal, pattern, sentiment sources
+    'analyze': StageConfig(workers=2, maxsize=50),   # scoring and risk, compute-heavy
+    'execute': StageConfig(workers=2, maxsize=20)    # trading center orders
+}
+
+
+def should_trade(decision: Optional[Dict[str, Any]]) -> bool:
+    return bool(decision and decision.get('should_trade'))
+
+
+class _PipelineItem:
+    """One symbol's run through the stages"""
+    __slots__ = ('symbol', 'priority', 'seq', 'future', 'submitted_at', 'enqueued_at', 'data', 'decision')
+
+    def __init__(self, symbol: str, priority: int, seq: int, future: asyncio.Future):
+        self.symbol = symbol
+        self.priority = priority
+        self.seq = seq
+        self.future = future
+        self.submitted_at = time.perf_counter()
+        self.enqueued_at = self.submitted_at
+        self.data: Any = None
+        self.decision: Optional[Dict[str, Any]] = None
+
+
+class _LatencyStats:
+    """Counters and recent latencies (seconds)"""
+    __slots__ = ('count', 'errors', 'total', 'wait_total', 'max', 'recent')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.wait_total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=512)
+
+    def record(self, latency: float, wait: float = 0.0, ok: bool = True):
+        self.count += 1
+        self.errors += not ok
+        self.total += latency
+        self.wait_total += wait
+        self.max = max(self.max, latency)
+        self.recent.append(latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            'processed': self.count,
+            'errors': self.errors,
+            'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'avg_wait_ms': round(self.wait_total / self.count * 1000, 3) if self.count else 0.0,
+            'p95_ms': round(p95 * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+
+class _Stage:
+    """Bounded priority queue and workers for one stage"""
+
+    def __init__(self, name: str, config: StageConfig):
+        self.name = name
+        self.config = config
+        self.queue: Optional[asyncio.PriorityQueue] = None
+        self.workers: List[asyncio.Task] = []
+        self.busy = 0
+        self.high_water = 0
+        self.latency = _LatencyStats()
+
+    async def put(self, item: _PipelineItem):
+        item.enqueued_at = time.perf_counter()
+        await self.queue.put((item.priority, item.seq, item))
+        self.high_water = max(self.high_water, self.queue.qsize())
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+
+class SymbolPipeline:
+    """
+    Runs symbols through collection, analysis and execution stages
+    """
+
+    def __init__(self, collect: Callable, analyze: Callable, execute: Callable,
+                 should_execute: Callable[[Optional[Dict[str, Any]]], bool] = should_trade,
+                 stages: Optional[Dict[str, StageConfig]] = None, executor: Optional[Executor] = None):
+        """
+        collect(symbol) -> data, analyze(symbol, data) -> decision and
+        execute(symbol, decision) may be coroutine functions or plain functions;
+        plain functions run on the executor (the loop's default when None).
+        """
+        configs = {**DEFAULT_STAGES, **(stages or {})}
+        self.stages = {name: _Stage(name, configs[name]) for name in STAGE_NAMES}
+        self.handlers = {'collect': collect, 'analyze': analyze, 'execute': execute}
+        self.should_execute = should_execute
+        self.executor = executor
+
+        self.in_flight: Dict[str, _PipelineItem] = {}
+        self.is_running = False
+        self._seq = itertools.count()
+        self._started_at = time.monotonic()
+        self._lanes = {priority: _LatencyStats() for priority in LANE_NAMES}
+
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'joined': 0,
+            'executed': 0
+        }
+
+    async def start(self):
+        """Create the queues and workers; queues bind to the running loop"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self._started_at = time.monotonic()
+        for stage in self.stages.values():
+            stage.queue = asyncio.PriorityQueue(maxsize=stage.config.maxsize)
+            stage.workers = [
+                asyncio.create_task(self._worker(stage))
+                for _ in range(max(1, stage.config.workers))
+            ]
+        logger.info("🔀 Symbol pipeline started: " + ", ".join(
+            f"{name} {stage.config.workers} workers/{stage.config.maxsize} queue" for name, stage in self.stages.items()
+        ))
+
+    async def stop(self):
+        """Cancel the workers; runs still in flight are cancelled"""
+        self.is_running = False
+        workers = [task for stage in self.stages.values() for task in stage.workers]
+        for task in workers:
+            task.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        for stage in self.stages.values():
+            stage.workers = []
+        for item in self.in_flight.values():
+            if not item.future.done():
+                item.future.cancel()
+        self.in_flight.clear()
+
+    async def submit(self, symbol: str, priority: int = PRIORITY_NORMAL) -> asyncio.Future:
+        """
+        Queue a symbol; resolves to its decision (None on failure). Waits while
+        the collection queue is full. A symbol already in flight is not queued
+        again: its pending run's future is returned.
+        """
+        existing = self.in_flight.get(symbol)
+        if existing is not None:
+            self.stats['joined'] += 1
+            return existing.future
+
+        item = _PipelineItem(symbol, priority, next(self._seq), asyncio.get_running_loop().create_future())
+        self.in_flight[symbol] = item
+        self.stats['submitted'] += 1
+        await self.stages['collect'].put(item)
+        return item.future
+
+    async def process_batch(self, symbols: Iterable[str],
+                            priority_symbols: Iterable[str] = ()) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Run a batch through the pipeline, priority symbols first, and wait for every decision"""
+        priority_symbols = set(priority_symbols)
+        ordered = sorted(dict.fromkeys(symbols), key=lambda symbol: symbol not in priority_symbols)
+        futures = {}
+        for symbol in ordered:
+            priority = PRIORITY_HIGH if symbol in priority_symbols else PRIORITY_NORMAL
+            futures[symbol] = await self.submit(symbol, priority)
+        results = await asyncio.gather(*futures.values(), return_exceptions=True)
+        return {
+            symbol: None if isinstance(result, BaseException) else result
+            for symbol, result in zip(futures, results)
+        }
+
+    async def _call(self, handler: Callable, *args):
+        if inspect.iscoroutinefunction(handler):
+            return await handler(*args)
+        result = await asyncio.get_running_loop().run_in_executor(self.executor, partial(handler, *args))
+        return await result if inspect.isawaitable(result) else result
+
+    async def _run_stage(self, stage: _Stage, item: _PipelineItem) -> Optional[str]:
+        """Run one stage for an item; returns the next stage, or None when the item is done"""
+        handler = self.handlers[stage.name]
+        if stage.name == 'collect':
+            item.data = await self._call(handler, item.symbol)
+            return 'analyze'
+        if stage.name == 'analyze':
+            item.decision = await self._call(handler, item.symbol, item.data)
+            item.data = None  # collected sources are not needed past analysis
+            return 'execute' if self.should_execute(item.decision) else None
+        await self._call(handler, item.symbol, item.decision)
+        self.stats['executed'] += 1
+        return None
+
+    async def _worker(self, stage: _Stage):
+        queue = stage.queue
+        while True:
+            _, _, item = await queue.get()
+            started = time.perf_counter()
+            stage.busy += 1
+            ok = True
+            next_stage = None
+            try:
+                next_stage = await self._run_stage(stage, item)
+            except asyncio.CancelledError:
+                stage.busy -= 1
+                queue.task_done()
+                raise
+            except Exception as e:
+                ok = False
+                logger.error(f"❌ Pipeline {stage.name} failed for {item.symbol}: {e}")
+            stage.busy -= 1
+            queue.task_done()
+            stage.latency.record(time.perf_counter() - started, started - item.enqueued_at, ok)
+
+            if next_stage is not None:
+                # Blocks while the next stage is full: backpressure up the pipeline
+                await self.stages[next_stage].put(item)
+            else:
+                self._finish(item, ok)
+
+    def _finish(self, item: _PipelineItem, ok: bool):
+        if self.in_flight.get(item.symbol) is item:
+            del self.in_flight[item.symbol]
+        self.stats['completed' if ok else 'failed'] += 1
+        self._lanes[item.priority].record(time.perf_counter() - item.submitted_at, ok=ok)
+        if not item.future.done():
+            item.future.set_result(item.decision if ok else None)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-stage throughput, queue depth and latency, plus end-to-end latency per lane"""
+        uptime = max(time.monotonic() - self._started_at, 1e-9)
+        stages = {}
+        for name, stage in self.stages.items():
+            metrics = stage.latency.to_dict()
+            metrics.update({
+                'workers': len(stage.workers),
+                'busy': stage.busy,
+                'queue_depth': stage.depth(),
+                'maxsize': stage.config.maxsize,
+                'high_water': stage.high_water,
+                'throughput_per_s': round(stage.latency.count / uptime, 3)
+            })
+            stages[name] = metrics
+        return {
+            'is_running': self.is_running,
+            'in_flight': len(self.in_flight),
+            **self.stats,
+            'stages': stages,
+            'lanes': {LANE_NAMES[priority]: lane.to_dict() for priority, lane in self._lanes.items()}
+        }
@@ -4,5 +4,6 @@ Circuit breaker and risk management system
 """
 
 from .risk_guard_agent import RiskGuardAgent
+from .portfolio_risk_state import PortfolioRiskState
 
-__all__ = ["RiskGuardAgent"] 
\ No newline at end of file
+__all__ = ["RiskGuardAgent", "PortfolioRiskState"] 
\ No newline at end of file
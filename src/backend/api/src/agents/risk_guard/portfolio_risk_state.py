@@ -0,0 +1,293 @@
+"""
+Zmart Trading Bot Platform - Portfolio Risk State
+Incrementally maintained exposure, drawdown and correlation aggregates
+
+Every position update, removal or price tick adjusts the running totals by
+that position's old and new contribution. Pre-trade checks then read the
+totals directly, and their cost does not grow with the number of positions.
+
+Correlation uses a cluster model. Two symbols in the same cluster have
+correlation intra_cluster_correlation, and symbols in different clusters
+have cross_cluster_correlation. Under that model the variance of the
+portfolio's signed exposures e_i needs only three running sums:
+
+    sum e_i^2, sum over clusters of (cluster net)^2, and the net exposure.
+
+Correlation-weighted risk is the square root of that variance, in the same
+units as position size.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional, Any, Set
+
+# Base asset -> correlation cluster; unlisted assets form a cluster of their own
+DEFAULT_CLUSTERS: Dict[str, str] = {
+    **dict.fromkeys(("BTC", "ETH"), "majors"),
+    **dict.fromkeys(("SOL", "AVAX", "ADA", "DOT", "NEAR", "ATOM", "APT", "SUI", "TRX", "TON"), "layer1"),
+    **dict.fromkeys(("ARB", "OP", "MATIC", "POL", "STRK", "IMX"), "layer2"),
+    **dict.fromkeys(("UNI", "AAVE", "LINK", "MKR", "CRV", "LDO", "SNX", "COMP"), "defi"),
+    **dict.fromkeys(("DOGE", "SHIB", "PEPE", "WIF", "BONK", "FLOKI"), "memes"),
+    **dict.fromkeys(("BNB", "OKB", "CRO"), "exchange")
+}
+
+QUOTE_ASSETS = ("USDT", "USDC", "BUSD", "FDUSD", "USD")
+
+SHORT_SIDES = ("short", "sell")
+
+
+def base_asset(symbol: str) -> str:
+    """'BTCUSDT', 'BTC/USDT' and 'BTC/USDT:USDT' -> 'BTC'"""
+    base = symbol.upper().split(":")[0].split("/")[0]
+    for quote in QUOTE_ASSETS:
+        if base.endswith(quote) and len(base) > len(quote):
+            return base[:-len(quote)]
+    return base
+
+
+class _Position:
+    """One position's contribution to the aggregates"""
+    __slots__ = ("symbol", "cluster", "direction", "quantity", "entry_price", "exposure", "unrealized_pnl")
+
+    def __init__(self, symbol: str, cluster: str, direction: int, exposure: float,
+                 quantity: Optional[float], entry_price: Optional[float], unrealized_pnl: float):
+        self.symbol = symbol
+        self.cluster = cluster
+        self.direction = direction
+        self.exposure = exposure  # signed notional: negative for shorts
+        self.quantity = quantity
+        self.entry_price = entry_price
+        self.unrealized_pnl = unrealized_pnl
+
+
+class PortfolioRiskState:
+    """
+    Running portfolio aggregates, updated in O(1) per position change or price tick
+    """
+
+    def __init__(self, clusters: Optional[Dict[str, str]] = None,
+                 intra_cluster_correlation: float = 0.8, cross_cluster_correlation: float = 0.4):
+        self.clusters = {**DEFAULT_CLUSTERS, **(clusters or {})}
+        self.intra_cluster_correlation = intra_cluster_correlation
+        self.cross_cluster_correlation = cross_cluster_correlation
+
+        self.positions: Dict[str, _Position] = {}
+        self.cluster_members: Dict[str, Set[str]] = defaultdict(set)
+        self._reset_totals()
+
+        # Running peak and drawdown survive rebuilds
+        self.peak_value = 0.0
+        self.max_drawdown_seen = 0.0
+        self._largest: Optional[str] = None
+        self._largest_stale = False
+
+        self.stats = {
+            "updates": 0,
+            "removals": 0,
+            "ticks": 0,
+            "rebuilds": 0
+        }
+
+    def _reset_totals(self):
+        self.gross_exposure = 0.0
+        self.net_exposure = 0.0
+        self.unrealized_pnl = 0.0
+        self.cluster_net: Dict[str, float] = defaultdict(float)
+        self.cluster_gross: Dict[str, float] = defaultdict(float)
+        self._sum_squares = 0.0          # sum of e_i^2
+        self._cluster_square_sum = 0.0   # sum over clusters of cluster_net^2
+
+    def cluster_of(self, symbol: str) -> str:
+        base = base_asset(symbol)
+        return self.clusters.get(base, base)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.positions
+
+    # Updates
+
+    def set_position(self, symbol: str, position_size: float, side: str = "long",
+                     quantity: Optional[float] = None, entry_price: Optional[float] = None,
+                     unrealized_pnl: float = 0.0):
+        """
+        Add or replace a position. position_size is its notional; with an
+        entry price (or quantity) the position is also revalued by price ticks.
+        """
+        direction = -1 if str(side).lower() in SHORT_SIDES else 1
+        size = abs(position_size)
+        if quantity is None and entry_price:
+            quantity = size / entry_price
+
+        old = self.positions.get(symbol)
+        if old is not None:
+            self._apply(old, -1)
+        position = _Position(symbol, self.cluster_of(symbol), direction, direction * size,
+                             quantity, entry_price, unrealized_pnl)
+        self.positions[symbol] = position
+        self._apply(position, 1)
+        self.stats["updates"] += 1
+        self._track_largest(position, abs(old.exposure) if old else 0.0)
+        self._mark()
+
+    def remove(self, symbol: str) -> bool:
+        position = self.positions.pop(symbol, None)
+        if position is None:
+            return False
+        self._apply(position, -1)
+        if not self.positions:
+            self._reset_totals()  # exact zero instead of accumulated rounding
+        if symbol == self._largest:
+            self._largest_stale = True
+        self.stats["removals"] += 1
+        self._mark()
+        return True
+
+    def update_price(self, symbol: str, price: float) -> bool:
+        """Revalue a position at a new mark price; False when it is not held or has no quantity"""
+        position = self.positions.get(symbol)
+        if position is None or not position.quantity or price <= 0:
+            return False
+        self._apply(position, -1)
+        previous = abs(position.exposure)
+        position.exposure = position.direction * position.quantity * price
+        if position.entry_price:
+            position.unrealized_pnl = position.direction * position.quantity * (price - position.entry_price)
+        self._apply(position, 1)
+        self.stats["ticks"] += 1
+        self._track_largest(position, previous)
+        self._mark()
+        return True
+
+    def _apply(self, position: _Position, sign: int):
+        """Add (sign=1) or take out (sign=-1) one position's contribution"""
+        exposure = position.exposure
+        cluster = position.cluster
+        before = self.cluster_net[cluster]
+        after = before + sign * exposure
+        self._cluster_square_sum += after * after - before * before
+        self.cluster_net[cluster] = after
+        self.cluster_gross[cluster] += sign * abs(exposure)
+        self._sum_squares += sign * exposure * exposure
+        self.gross_exposure += sign * abs(exposure)
+        self.net_exposure += sign * exposure
+        self.unrealized_pnl += sign * position.unrealized_pnl
+
+        members = self.cluster_members[cluster]
+        if sign > 0:
+            members.add(position.symbol)
+        else:
+            members.discard(position.symbol)
+            if not members:
+                del self.cluster_members[cluster]
+                self._cluster_square_sum -= self.cluster_net.pop(cluster) ** 2
+                self.cluster_gross.pop(cluster, None)
+
+    def _track_largest(self, position: _Position, previous: float):
+        if self._largest_stale:
+            return
+        largest = self.positions.get(self._largest) if self._largest else None
+        if largest is None:
+            self._largest = position.symbol
+        elif largest is position:
+            self._largest_stale = abs(position.exposure) < previous  # the largest position shrank
+        elif abs(position.exposure) > abs(largest.exposure):
+            self._largest = position.symbol
+
+    def _mark(self):
+        value = self.portfolio_value
+        if value > self.peak_value:
+            self.peak_value = value
+        self.max_drawdown_seen = max(self.max_drawdown_seen, self.drawdown)
+
+    def rebuild(self):
+        """Recompute every total from the positions, dropping floating-point drift"""
+        self._reset_totals()
+        self.cluster_members = defaultdict(set)
+        for position in self.positions.values():
+            self._apply(position, 1)
+        self._largest_stale = True
+        self.stats["rebuilds"] += 1
+
+    # Reads
+
+    @property
+    def portfolio_value(self) -> float:
+        """Sum of position sizes"""
+        return self.gross_exposure
+
+    @property
+    def drawdown(self) -> float:
+        if self.peak_value > 0:
+            return (self.peak_value - self.portfolio_value) / self.peak_value
+        return 0.0
+
+    def _variance(self, sum_squares: float, cluster_square_sum: float, net: float) -> float:
+        variance = (sum_squares
+                    + self.intra_cluster_correlation * (cluster_square_sum - sum_squares)
+                    + self.cross_cluster_correlation * (net * net - cluster_square_sum))
+        return max(variance, 0.0)
+
+    @property
+    def correlated_risk(self) -> float:
+        """Correlation-weighted exposure of the whole portfolio"""
+        return math.sqrt(self._variance(self._sum_squares, self._cluster_square_sum, self.net_exposure))
+
+    def correlated_risk_after(self, symbol: str, position_size: float, side: str = "long") -> float:
+        """Correlated risk if position_size were added to symbol on the given side"""
+        delta = (-1 if str(side).lower() in SHORT_SIDES else 1) * abs(position_size)
+        position = self.positions.get(symbol)
+        current = position.exposure if position else 0.0
+        cluster_net = self.cluster_net.get(self.cluster_of(symbol), 0.0)
+        sum_squares = self._sum_squares + (current + delta) ** 2 - current ** 2
+        cluster_square_sum = self._cluster_square_sum + (cluster_net + delta) ** 2 - cluster_net ** 2
+        return math.sqrt(self._variance(sum_squares, cluster_square_sum, self.net_exposure + delta))
+
+    def symbol_exposure(self, symbol: str) -> float:
+        position = self.positions.get(symbol)
+        return position.exposure if position else 0.0
+
+    def cluster_exposure(self, cluster: str) -> float:
+        """Gross exposure of one cluster"""
+        return self.cluster_gross.get(cluster, 0.0)
+
+    def concentration(self, position_size: float) -> float:
+        """Share of gross exposure a new position of this size would hold"""
+        total = self.gross_exposure + abs(position_size)
+        return abs(position_size) / total if total > 0 else 0.0
+
+    def cluster_peer_count(self, symbol: str) -> int:
+        """Other held symbols in symbol's cluster"""
+        members = self.cluster_members.get(self.cluster_of(symbol), ())
+        return len(members) - (symbol in members)
+
+    def cluster_peers(self, symbol: str, limit: int = 10) -> List[str]:
+        members = self.cluster_members.get(self.cluster_of(symbol), ())
+        return list(islice((member for member in members if member != symbol), limit))
+
+    def largest_position(self) -> float:
+        """Largest absolute exposure; rescans only after the largest position shrank or closed"""
+        if self._largest_stale:
+            largest = max(self.positions.values(), key=lambda position: abs(position.exposure), default=None)
+            self._largest = largest.symbol if largest else None
+            self._largest_stale = False
+        position = self.positions.get(self._largest) if self._largest else None
+        return abs(position.exposure) if position else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "positions": len(self.positions),
+            "gross_exposure": self.gross_exposure,
+            "net_exposure": self.net_exposure,
+            "unrealized_pnl": self.unrealized_pnl,
+            "correlated_risk": self.correlated_risk,
+            "cluster_exposure": dict(self.cluster_gross),
+            "peak_value": self.peak_value,
+            "drawdown": self.drawdown,
+            "max_drawdown_seen": self.max_drawdown_seen,
+            "stats": dict(self.stats),
+            "timestamp": datetime.now().isoformat()
+        }
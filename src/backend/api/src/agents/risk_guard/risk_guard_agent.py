@@ -12,6 +12,7 @@ from enum import Enum
 from src.config.settings import settings
 from src.utils.event_bus import EventBus, EventType, Event
 from src.utils.metrics import MetricsCollector
+from src.agents.risk_guard.portfolio_risk_state import PortfolioRiskState
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +92,9 @@ class RiskGuardAgent:
         self.peak_portfolio_value = 0.0
         self.current_portfolio_value = 0.0
         
+        # Exposure, drawdown and correlation aggregates, updated per position change
+        self.portfolio = PortfolioRiskState()
+        
         # Risk metrics
         self.risk_metrics = {
             "total_positions": 0,
@@ -100,6 +104,10 @@ class RiskGuardAgent:
             "portfolio_beta": 0.0,
             "var_95": 0.0,  # Value at Risk (95%)
             "max_drawdown_current": 0.0,
+            "gross_exposure": 0.0,
+            "net_exposure": 0.0,
+            "correlated_risk": 0.0,
+            "cluster_exposure": {},
             "last_updated": datetime.now()
         }
         
@@ -242,7 +250,7 @@ class RiskGuardAgent:
             }
         
         # Check drawdown limits
-        current_drawdown = await self._calculate_drawdown()
+        current_drawdown = self.portfolio.drawdown
         if current_drawdown > self.max_drawdown:
             return {
                 "approved": False,
@@ -278,6 +286,9 @@ class RiskGuardAgent:
             "approved": True,
             "risk_level": RiskLevel.LOW,
             "risk_score": await self._calculate_trade_risk_score(trade_data),
+            "correlated_risk_after": self.portfolio.correlated_risk_after(
+                symbol, position_size, trade_data.get("side", "long")
+            ) if symbol is not None else self.portfolio.correlated_risk,
             "timestamp": datetime.now().isoformat()
         }
     
@@ -297,6 +308,14 @@ class RiskGuardAgent:
             )
             
             self.active_positions[symbol] = position_risk
+            self.portfolio.set_position(
+                symbol,
+                position_risk.position_size,
+                side=position_data.get("side", "long"),
+                quantity=position_data.get("quantity"),
+                entry_price=position_data.get("entry_price"),
+                unrealized_pnl=position_risk.unrealized_pnl
+            )
             
             # Update portfolio value
             await self._update_portfolio_value()
@@ -307,9 +326,23 @@ class RiskGuardAgent:
         """Remove a position from risk monitoring"""
         if symbol in self.active_positions:
             del self.active_positions[symbol]
+            self.portfolio.remove(symbol)
             await self._update_portfolio_value()
             logger.info(f"Removed position risk monitoring for {symbol}")
     
+    async def update_price(self, symbol: str, price: float) -> bool:
+        """Revalue a held position at a new mark price"""
+        if not self.portfolio.update_price(symbol, price):
+            return False
+        
+        position_risk = self.active_positions.get(symbol)
+        if position_risk is not None:
+            position_risk.position_size = abs(self.portfolio.symbol_exposure(symbol))
+            position_risk.unrealized_pnl = self.portfolio.positions[symbol].unrealized_pnl
+        
+        await self._update_portfolio_value()
+        return True
+    
     async def get_risk_status(self) -> Dict[str, Any]:
         """Get current risk status and metrics"""
         return {
@@ -321,6 +354,7 @@ class RiskGuardAgent:
             "active_positions": len(self.active_positions),
             "daily_pnl": self.daily_pnl,
             "current_drawdown": await self._calculate_drawdown(),
+            "portfolio": self.portfolio.to_dict(),
             "recent_alerts": [
                 {
                     "alert_id": alert.alert_id,
@@ -480,7 +514,7 @@ class RiskGuardAgent:
             return
         
         # Check portfolio concentration
-        total_exposure = sum(pos.position_size for pos in self.active_positions.values())
+        total_exposure = self.portfolio.gross_exposure
         if total_exposure > self.current_portfolio_value * 0.8:  # 80% exposure
             await self._trigger_circuit_breaker("Portfolio concentration threshold exceeded")
             return
@@ -539,20 +573,26 @@ class RiskGuardAgent:
                 pass
     
     async def _update_risk_metrics(self):
-        """Update basic risk metrics"""
-        self.risk_metrics["total_positions"] = len(self.active_positions)
-        self.risk_metrics["total_exposure"] = sum(pos.position_size for pos in self.active_positions.values())
-        self.risk_metrics["largest_position"] = max((pos.position_size for pos in self.active_positions.values()), default=0.0)
+        """Update basic risk metrics from the running aggregates"""
+        self.risk_metrics["total_positions"] = len(self.portfolio)
+        self.risk_metrics["total_exposure"] = self.portfolio.gross_exposure
+        self.risk_metrics["largest_position"] = self.portfolio.largest_position()
         self.risk_metrics["average_position_size"] = self.risk_metrics["total_exposure"] / max(self.risk_metrics["total_positions"], 1)
+        self.risk_metrics["gross_exposure"] = self.portfolio.gross_exposure
+        self.risk_metrics["net_exposure"] = self.portfolio.net_exposure
+        self.risk_metrics["correlated_risk"] = self.portfolio.correlated_risk
         self.risk_metrics["last_updated"] = datetime.now()
     
     async def _update_comprehensive_metrics(self):
         """Update comprehensive risk metrics including VaR and Beta"""
+        # Recompute the running sums once a minute so floating-point drift cannot build up
+        self.portfolio.rebuild()
+        self.risk_metrics["cluster_exposure"] = dict(self.portfolio.cluster_gross)
+        
         # Calculate Value at Risk (simplified)
-        position_values = [pos.position_size for pos in self.active_positions.values()]
-        if position_values:
+        if len(self.portfolio):
             # Simple VaR calculation (95% confidence)
-            self.risk_metrics["var_95"] = sum(position_values) * 0.05  # 5% of total exposure
+            self.risk_metrics["var_95"] = self.portfolio.gross_exposure * 0.05  # 5% of total exposure
         
         # Calculate current drawdown
         self.risk_metrics["max_drawdown_current"] = await self._calculate_drawdown()
@@ -562,36 +602,28 @@ class RiskGuardAgent:
     
     async def _calculate_drawdown(self) -> float:
         """Calculate current portfolio drawdown"""
-        if self.peak_portfolio_value > 0:
-            return (self.peak_portfolio_value - self.current_portfolio_value) / self.peak_portfolio_value
-        return 0.0
+        return self.portfolio.drawdown
     
     async def _update_portfolio_value(self):
-        """Update current portfolio value"""
-        total_value = sum(pos.position_size for pos in self.active_positions.values())
-        self.current_portfolio_value = total_value
-        
-        if self.current_portfolio_value > self.peak_portfolio_value:
-            self.peak_portfolio_value = self.current_portfolio_value
+        """Update current portfolio value from the running aggregates"""
+        self.current_portfolio_value = self.portfolio.portfolio_value
+        self.peak_portfolio_value = self.portfolio.peak_value
     
     async def _check_correlation_risk(self, symbol: str, position_size: float) -> Dict[str, Any]:
-        """Check correlation risk with existing positions"""
-        # Simplified correlation check
-        correlated_symbols = []
-        for existing_symbol in self.active_positions.keys():
-            if existing_symbol != symbol:
-                # Simple correlation check (placeholder)
-                correlated_symbols.append(existing_symbol)
+        """Check correlation risk with existing positions in the same cluster"""
+        peer_count = self.portfolio.cluster_peer_count(symbol)
+        high_correlation = peer_count > 2
         
         return {
-            "high_correlation": len(correlated_symbols) > 2,
-            "correlated_symbols": correlated_symbols
+            "high_correlation": high_correlation,
+            "correlated_symbols": self.portfolio.cluster_peers(symbol) if high_correlation else [],
+            "cluster": self.portfolio.cluster_of(symbol),
+            "correlated_risk_after": self.portfolio.correlated_risk_after(symbol, position_size)
         }
     
     async def _check_concentration_risk(self, symbol: str, position_size: float) -> Dict[str, Any]:
         """Check portfolio concentration risk"""
-        total_exposure = sum(pos.position_size for pos in self.active_positions.values()) + position_size
-        concentration = position_size / total_exposure if total_exposure > 0 else 0
+        concentration = self.portfolio.concentration(position_size)
         
         return {
             "over_concentrated": concentration > 0.3,  # 30% threshold
@@ -688,5 +720,9 @@ class RiskGuardAgent:
     
     async def _handle_market_data_updated(self, event: Event):
         """Handle market data updated events"""
+        market_data = event.data
+        if market_data.get("symbol") and market_data.get("price"):
+            await self.update_price(market_data["symbol"], float(market_data["price"]))
+        
         # Update risk metrics based on market data
         await self._update_risk_metrics() 
\ No newline at end of file
@@ -13,12 +13,202 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Column order of the main analysis insert
+ANALYSIS_COLUMNS = (
+    'symbol', 'score_short_term', 'score_medium_term', 'score_long_term', 'overall_score',
+    'ai_win_rate_short', 'ai_win_rate_medium', 'ai_win_rate_long', 'ai_confidence', 'ai_model_used',
+    'current_price', 'price_24h_change', 'price_7d_change', 'price_30d_change',
+    'volume_24h', 'volume_change_24h', 'market_cap', 'market_cap_rank',
+    'trend_strength', 'trend_direction', 'momentum_score', 'volatility_index',
+    'rsi', 'macd_signal', 'support_level', 'resistance_level',
+    'overall_sentiment', 'sentiment_score', 'social_volume', 'news_sentiment',
+    'long_short_ratio', 'long_percentage', 'short_percentage', 'funding_rate',
+    'open_interest', 'oi_change_24h', 'oi_change_percentage',
+    'liquidations_24h', 'long_liquidations', 'short_liquidations', 'largest_liquidation',
+    'risk_level', 'risk_score', 'drawdown_risk', 'volatility_risk',
+    'recommendation', 'position_type', 'entry_price', 'stop_loss',
+    'take_profit_1', 'take_profit_2', 'take_profit_3', 'position_size_recommendation',
+    'professional_report', 'technical_summary', 'ai_analysis', 'executive_summary',
+    'data_completeness', 'endpoints_successful', 'endpoints_failed',
+    'analysis_version', 'processing_time_ms'
+)
+ANALYSIS_DEFAULTS = {'analysis_version': '2.0', 'processing_time_ms': 0}
+
+ANALYSIS_INSERT = (
+    f"INSERT INTO cryptometer_analysis ({', '.join(ANALYSIS_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(ANALYSIS_COLUMNS))})"
+)
+ANALYSIS_INSERT_WITH_ID = (
+    f"INSERT INTO cryptometer_analysis (id, {', '.join(ANALYSIS_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(ANALYSIS_COLUMNS) + 1))})"
+)
+
+ENDPOINT_DATA_INSERT = '''
+    INSERT INTO endpoint_data (
+        analysis_id, symbol, endpoint_name, endpoint_url,
+        response_data, response_status, response_time_ms, data_quality
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+TREND_INDICATOR_INSERT = '''
+    INSERT INTO trend_indicators (
+        analysis_id, symbol, timeframe, trend_type, trend_strength,
+        trend_duration_hours, ema_9, ema_21, ema_50, ema_200,
+        macd_value, macd_signal, macd_histogram,
+        bb_upper, bb_middle, bb_lower, bb_width
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+AI_PREDICTION_INSERT = '''
+    INSERT INTO ai_predictions (
+        analysis_id, symbol, model_name, model_version,
+        prediction_timeframe, predicted_direction, predicted_price,
+        predicted_change_percent, win_probability, confidence_score,
+        pattern_detected, pattern_confidence, reasoning, key_factors
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+RAPID_MOVEMENT_INSERT = '''
+    INSERT INTO rapid_movements (
+        analysis_id, symbol, movement_type, price_start, price_end,
+        change_percentage, volume_spike, duration_minutes,
+        trigger_event, follow_through_probability
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+MARKET_PATTERN_INSERT = '''
+    INSERT INTO market_patterns (
+        analysis_id, symbol, pattern_name, pattern_type,
+        pattern_strength, pattern_confidence, timeframe,
+        formation_time, expected_move_percentage, expected_direction,
+        success_rate_historical, description
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+TRADING_SIGNAL_INSERT = '''
+    INSERT INTO trading_signals (
+        analysis_id, symbol, signal_type, signal_strength,
+        signal_source, timeframe, confidence,
+        entry_price, stop_loss, take_profit, risk_reward_ratio
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _endpoint_row(analysis_id: int, symbol: str, endpoint: Dict[str, Any]) -> Tuple:
+    return (
+        analysis_id, symbol,
+        endpoint.get('endpoint_name'),
+        endpoint.get('endpoint_url'),
+        json.dumps(endpoint.get('response_data', {})),
+        endpoint.get('response_status'),
+        endpoint.get('response_time_ms'),
+        endpoint.get('data_quality')
+    )
+
+
+def _trend_row(analysis_id: int, symbol: str, trend: Dict[str, Any]) -> Tuple:
+    return (
+        analysis_id, symbol,
+        trend.get('timeframe'),
+        trend.get('trend_type'),
+        trend.get('trend_strength'),
+        trend.get('trend_duration_hours'),
+        trend.get('ema_9'),
+        trend.get('ema_21'),
+        trend.get('ema_50'),
+        trend.get('ema_200'),
+        trend.get('macd_value'),
+        trend.get('macd_signal'),
+        trend.get('macd_histogram'),
+        trend.get('bb_upper'),
+        trend.get('bb_middle'),
+        trend.get('bb_lower'),
+        trend.get('bb_width')
+    )
+
+
+def _prediction_row(analysis_id: int, symbol: str, prediction: Dict[str, Any]) -> Tuple:
+    return (
+        analysis_id, symbol,
+        prediction.get('model_name'),
+        prediction.get('model_version'),
+        prediction.get('prediction_timeframe'),
+        prediction.get('predicted_direction'),
+        prediction.get('predicted_price'),
+        prediction.get('predicted_change_percent'),
+        prediction.get('win_probability'),
+        prediction.get('confidence_score'),
+        prediction.get('pattern_detected'),
+        prediction.get('pattern_confidence'),
+        prediction.get('reasoning'),
+        json.dumps(prediction.get('key_factors', []))
+    )
+
+
+def _movement_row(analysis_id: int, symbol: str, movement: Dict[str, Any]) -> Tuple:
+    return (
+        analysis_id, symbol,
+        movement.get('movement_type'),
+        movement.get('price_start'),
+        movement.get('price_end'),
+        movement.get('change_percentage'),
+        movement.get('volume_spike'),
+        movement.get('duration_minutes'),
+        movement.get('trigger_event'),
+        movement.get('follow_through_probability')
+    )
+
+
+def _pattern_row(analysis_id: int, symbol: str, pattern: Dict[str, Any]) -> Tuple:
+    return (
+        analysis_id, symbol,
+        pattern.get('pattern_name'),
+        pattern.get('pattern_type'),
+        pattern.get('pattern_strength'),
+        pattern.get('pattern_confidence'),
+        pattern.get('timeframe'),
+        pattern.get('formation_time'),
+        pattern.get('expected_move_percentage'),
+        pattern.get('expected_direction'),
+        pattern.get('success_rate_historical'),
+        pattern.get('description')
+    )
+
+
+def _signal_row(analysis_id: int, symbol: str, signal: Dict[str, Any]) -> Tuple:
+    return (
+        analysis_id, symbol,
+        signal.get('signal_type'),
+        signal.get('signal_strength'),
+        signal.get('signal_source'),
+        signal.get('timeframe'),
+        signal.get('confidence'),
+        signal.get('entry_price'),
+        signal.get('stop_loss'),
+        signal.get('take_profit'),
+        signal.get('risk_reward_ratio')
+    )
+
+
+# Child tables written per analysis: analysis_data key -> (insert SQL, row builder)
+CHILD_TABLES = {
+    'endpoint_data': (ENDPOINT_DATA_INSERT, _endpoint_row),
+    'trend_indicators': (TREND_INDICATOR_INSERT, _trend_row),
+    'ai_predictions': (AI_PREDICTION_INSERT, _prediction_row),
+    'rapid_movements': (RAPID_MOVEMENT_INSERT, _movement_row),
+    'market_patterns': (MARKET_PATTERN_INSERT, _pattern_row),
+    'trading_signals': (TRADING_SIGNAL_INSERT, _signal_row),
+}
+
 class CryptometerDatabase:
     """Comprehensive database for all Cryptometer analysis data"""
     
-    def __init__(self, db_path: str = "cryptometer_complete.db"):
+    def __init__(self, db_path: str = "cryptometer_complete.db", bulk_batch_size: int = 500):
         self.db_path = db_path
         self.conn = None
+        # Analyses buffered by queue_analysis until flush_analyses
+        self.bulk_batch_size = bulk_batch_size
+        self._pending_analyses: List[Dict[str, Any]] = []
         self.initialize_database()
     
     def initialize_database(self):
@@ -27,6 +217,13 @@ class CryptometerDatabase:
         self.conn.row_factory = sqlite3.Row
         cursor = self.conn.cursor()
         
+        # WAL lets readers run during ingest; NORMAL sync is durable across
+        # application crashes and only fsyncs at checkpoints
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA cache_size=-65536')  # 64 MB page cache
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        
         # Main analysis table - stores complete analysis with AI predictions
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS cryptometer_analysis (
@@ -323,6 +520,14 @@ class CryptometerDatabase:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_patterns ON market_patterns(symbol, pattern_type, timestamp DESC)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals ON trading_signals(symbol, signal_type, timeframe)')
         
+        # Read-path indexes: each matches a query's filter plus its ORDER BY so
+        # the LIMIT stops early instead of sorting every match
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_symbol_time ON trading_signals(symbol, timestamp DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_symbol_type_time ON trading_signals(symbol, signal_type, timestamp DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_crypto_timestamp ON cryptometer_analysis(timestamp DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_crypto_risk_level ON cryptometer_analysis(risk_level, timestamp DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_crypto_position_type ON cryptometer_analysis(position_type, timestamp DESC)')
+        
         self.conn.commit()
         logger.info("Cryptometer database initialized with comprehensive schema")
     
@@ -334,139 +539,17 @@ class CryptometerDatabase:
         
         try:
             # Insert main analysis
-            cursor.execute('''
-                INSERT INTO cryptometer_analysis (
-                    symbol, score_short_term, score_medium_term, score_long_term, overall_score,
-                    ai_win_rate_short, ai_win_rate_medium, ai_win_rate_long, ai_confidence, ai_model_used,
-                    current_price, price_24h_change, price_7d_change, price_30d_change,
-                    volume_24h, volume_change_24h, market_cap, market_cap_rank,
-                    trend_strength, trend_direction, momentum_score, volatility_index,
-                    rsi, macd_signal, support_level, resistance_level,
-                    overall_sentiment, sentiment_score, social_volume, news_sentiment,
-                    long_short_ratio, long_percentage, short_percentage, funding_rate,
-                    open_interest, oi_change_24h, oi_change_percentage,
-                    liquidations_24h, long_liquidations, short_liquidations, largest_liquidation,
-                    risk_level, risk_score, drawdown_risk, volatility_risk,
-                    recommendation, position_type, entry_price, stop_loss,
-                    take_profit_1, take_profit_2, take_profit_3, position_size_recommendation,
-                    professional_report, technical_summary, ai_analysis, executive_summary,
-                    data_completeness, endpoints_successful, endpoints_failed,
-                    analysis_version, processing_time_ms
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                analysis_data.get('symbol'),
-                analysis_data.get('score_short_term'),
-                analysis_data.get('score_medium_term'),
-                analysis_data.get('score_long_term'),
-                analysis_data.get('overall_score'),
-                
-                # AI predictions
-                analysis_data.get('ai_win_rate_short'),
-                analysis_data.get('ai_win_rate_medium'),
-                analysis_data.get('ai_win_rate_long'),
-                analysis_data.get('ai_confidence'),
-                analysis_data.get('ai_model_used'),
-                
-                # Market data
-                analysis_data.get('current_price'),
-                analysis_data.get('price_24h_change'),
-                analysis_data.get('price_7d_change'),
-                analysis_data.get('price_30d_change'),
-                analysis_data.get('volume_24h'),
-                analysis_data.get('volume_change_24h'),
-                analysis_data.get('market_cap'),
-                analysis_data.get('market_cap_rank'),
-                
-                # Technical
-                analysis_data.get('trend_strength'),
-                analysis_data.get('trend_direction'),
-                analysis_data.get('momentum_score'),
-                analysis_data.get('volatility_index'),
-                analysis_data.get('rsi'),
-                analysis_data.get('macd_signal'),
-                analysis_data.get('support_level'),
-                analysis_data.get('resistance_level'),
-                
-                # Sentiment
-                analysis_data.get('overall_sentiment'),
-                analysis_data.get('sentiment_score'),
-                analysis_data.get('social_volume'),
-                analysis_data.get('news_sentiment'),
-                
-                # Long/Short
-                analysis_data.get('long_short_ratio'),
-                analysis_data.get('long_percentage'),
-                analysis_data.get('short_percentage'),
-                analysis_data.get('funding_rate'),
-                
-                # Open Interest
-                analysis_data.get('open_interest'),
-                analysis_data.get('oi_change_24h'),
-                analysis_data.get('oi_change_percentage'),
-                
-                # Liquidations
-                analysis_data.get('liquidations_24h'),
-                analysis_data.get('long_liquidations'),
-                analysis_data.get('short_liquidations'),
-                analysis_data.get('largest_liquidation'),
-                
-                # Risk
-                analysis_data.get('risk_level'),
-                analysis_data.get('risk_score'),
-                analysis_data.get('drawdown_risk'),
-                analysis_data.get('volatility_risk'),
-                
-                # Trading
-                analysis_data.get('recommendation'),
-                analysis_data.get('position_type'),
-                analysis_data.get('entry_price'),
-                analysis_data.get('stop_loss'),
-                analysis_data.get('take_profit_1'),
-                analysis_data.get('take_profit_2'),
-                analysis_data.get('take_profit_3'),
-                analysis_data.get('position_size_recommendation'),
-                
-                # Reports
-                analysis_data.get('professional_report'),
-                analysis_data.get('technical_summary'),
-                analysis_data.get('ai_analysis'),
-                analysis_data.get('executive_summary'),
-                
-                # Data quality
-                analysis_data.get('data_completeness'),
-                analysis_data.get('endpoints_successful'),
-                analysis_data.get('endpoints_failed'),
-                analysis_data.get('analysis_version', '2.0'),
-                analysis_data.get('processing_time_ms', 0)
-            ))
+            cursor.execute(ANALYSIS_INSERT, self._analysis_row(analysis_data))
             
             analysis_id = cursor.lastrowid
             if analysis_id is None:
                 raise RuntimeError("Failed to get analysis ID after insert")
             
-            # Store endpoint data
-            for endpoint in analysis_data.get('endpoint_data', []):
-                self.store_endpoint_data(analysis_id, analysis_data['symbol'], endpoint)
-            
-            # Store trend indicators
-            for trend in analysis_data.get('trend_indicators', []):
-                self.store_trend_indicator(analysis_id, analysis_data['symbol'], trend)
-            
-            # Store AI predictions
-            for prediction in analysis_data.get('ai_predictions', []):
-                self.store_ai_prediction(analysis_id, analysis_data['symbol'], prediction)
-            
-            # Store rapid movements
-            for movement in analysis_data.get('rapid_movements', []):
-                self.store_rapid_movement(analysis_id, analysis_data['symbol'], movement)
-            
-            # Store market patterns
-            for pattern in analysis_data.get('market_patterns', []):
-                self.store_market_pattern(analysis_id, analysis_data['symbol'], pattern)
-            
-            # Store trading signals
-            for signal in analysis_data.get('trading_signals', []):
-                self.store_trading_signal(analysis_id, analysis_data['symbol'], signal)
+            # Store endpoint data, trend indicators, AI predictions, rapid
+            # movements, market patterns and trading signals
+            for key, (sql, row_builder) in CHILD_TABLES.items():
+                for item in analysis_data.get(key, []):
+                    cursor.execute(sql, row_builder(analysis_id, analysis_data['symbol'], item))
             
             if self.conn is not None:
                 self.conn.commit()
@@ -479,157 +562,117 @@ class CryptometerDatabase:
             logger.error(f"Error storing Cryptometer analysis: {e}")
             raise
     
+    def store_analyses_bulk(self, analyses: List[Dict[str, Any]]) -> List[int]:
+        """
+        Store many complete analyses in one transaction
+        
+        Analysis IDs are reserved up front so every table is written with a
+        single executemany instead of one INSERT per row.
+        
+        Returns:
+            Analysis IDs in the same order as the input
+        """
+        if self.conn is None:
+            raise RuntimeError("Database connection not initialized")
+        if not analyses:
+            return []
+        # The single-row store_* helpers leave an implicit transaction open;
+        # commit it so BEGIN IMMEDIATE does not fail inside it
+        if self.conn.in_transaction:
+            self.conn.commit()
+        cursor = self.conn.cursor()
+        
+        try:
+            # Take the write lock before reading the current max ID
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT MAX(id) FROM cryptometer_analysis')
+            max_id = cursor.fetchone()[0] or 0
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'cryptometer_analysis'")
+            seq = cursor.fetchone()
+            first_id = max(max_id, seq[0] if seq else 0) + 1
+            analysis_ids = list(range(first_id, first_id + len(analyses)))
+            
+            cursor.executemany(ANALYSIS_INSERT_WITH_ID, [
+                (analysis_id,) + self._analysis_row(analysis_data)
+                for analysis_id, analysis_data in zip(analysis_ids, analyses)
+            ])
+            
+            for key, (sql, row_builder) in CHILD_TABLES.items():
+                rows = [
+                    row_builder(analysis_id, analysis_data['symbol'], item)
+                    for analysis_id, analysis_data in zip(analysis_ids, analyses)
+                    for item in analysis_data.get(key, [])
+                ]
+                if rows:
+                    cursor.executemany(sql, rows)
+            
+            self.conn.commit()
+            logger.info(f"Bulk stored {len(analyses)} Cryptometer analyses (IDs {analysis_ids[0]}-{analysis_ids[-1]})")
+            return analysis_ids
+            
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Error bulk storing Cryptometer analyses: {e}")
+            raise
+    
+    def queue_analysis(self, analysis_data: Dict[str, Any]):
+        """Buffer an analysis for bulk ingest; flushes once bulk_batch_size are queued"""
+        self._pending_analyses.append(analysis_data)
+        if len(self._pending_analyses) >= self.bulk_batch_size:
+            self.flush_analyses()
+    
+    def flush_analyses(self) -> List[int]:
+        """Write all buffered analyses"""
+        pending, self._pending_analyses = self._pending_analyses, []
+        try:
+            return self.store_analyses_bulk(pending)
+        except Exception:
+            # Keep the batch so a later flush can retry it
+            self._pending_analyses = pending + self._pending_analyses
+            raise
+    
+    @staticmethod
+    def _analysis_row(analysis_data: Dict[str, Any]) -> Tuple:
+        return tuple(
+            analysis_data.get(column, ANALYSIS_DEFAULTS.get(column))
+            for column in ANALYSIS_COLUMNS
+        )
+    
     def store_endpoint_data(self, analysis_id: int, symbol: str, endpoint: Dict[str, Any]):
         """Store raw endpoint data"""
         if self.conn is None:
             raise RuntimeError("Database connection not initialized")
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO endpoint_data (
-                analysis_id, symbol, endpoint_name, endpoint_url,
-                response_data, response_status, response_time_ms, data_quality
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            analysis_id, symbol,
-            endpoint.get('endpoint_name'),
-            endpoint.get('endpoint_url'),
-            json.dumps(endpoint.get('response_data', {})),
-            endpoint.get('response_status'),
-            endpoint.get('response_time_ms'),
-            endpoint.get('data_quality')
-        ))
+        self.conn.execute(ENDPOINT_DATA_INSERT, _endpoint_row(analysis_id, symbol, endpoint))
     
     def store_trend_indicator(self, analysis_id: int, symbol: str, trend: Dict[str, Any]):
         """Store trend indicator data"""
         if self.conn is None:
             raise RuntimeError("Database connection not initialized")
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO trend_indicators (
-                analysis_id, symbol, timeframe, trend_type, trend_strength,
-                trend_duration_hours, ema_9, ema_21, ema_50, ema_200,
-                macd_value, macd_signal, macd_histogram,
-                bb_upper, bb_middle, bb_lower, bb_width
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            analysis_id, symbol,
-            trend.get('timeframe'),
-            trend.get('trend_type'),
-            trend.get('trend_strength'),
-            trend.get('trend_duration_hours'),
-            trend.get('ema_9'),
-            trend.get('ema_21'),
-            trend.get('ema_50'),
-            trend.get('ema_200'),
-            trend.get('macd_value'),
-            trend.get('macd_signal'),
-            trend.get('macd_histogram'),
-            trend.get('bb_upper'),
-            trend.get('bb_middle'),
-            trend.get('bb_lower'),
-            trend.get('bb_width')
-        ))
+        self.conn.execute(TREND_INDICATOR_INSERT, _trend_row(analysis_id, symbol, trend))
     
     def store_ai_prediction(self, analysis_id: int, symbol: str, prediction: Dict[str, Any]):
         """Store AI prediction data"""
         if self.conn is None:
             raise RuntimeError("Database connection not initialized")
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO ai_predictions (
-                analysis_id, symbol, model_name, model_version,
-                prediction_timeframe, predicted_direction, predicted_price,
-                predicted_change_percent, win_probability, confidence_score,
-                pattern_detected, pattern_confidence, reasoning, key_factors
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            analysis_id, symbol,
-            prediction.get('model_name'),
-            prediction.get('model_version'),
-            prediction.get('prediction_timeframe'),
-            prediction.get('predicted_direction'),
-            prediction.get('predicted_price'),
-            prediction.get('predicted_change_percent'),
-            prediction.get('win_probability'),
-            prediction.get('confidence_score'),
-            prediction.get('pattern_detected'),
-            prediction.get('pattern_confidence'),
-            prediction.get('reasoning'),
-            json.dumps(prediction.get('key_factors', []))
-        ))
+        self.conn.execute(AI_PREDICTION_INSERT, _prediction_row(analysis_id, symbol, prediction))
     
     def store_rapid_movement(self, analysis_id: int, symbol: str, movement: Dict[str, Any]):
         """Store rapid movement data"""
         if self.conn is None:
             raise RuntimeError("Database connection not initialized")
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO rapid_movements (
-                analysis_id, symbol, movement_type, price_start, price_end,
-                change_percentage, volume_spike, duration_minutes,
-                trigger_event, follow_through_probability
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            analysis_id, symbol,
-            movement.get('movement_type'),
-            movement.get('price_start'),
-            movement.get('price_end'),
-            movement.get('change_percentage'),
-            movement.get('volume_spike'),
-            movement.get('duration_minutes'),
-            movement.get('trigger_event'),
-            movement.get('follow_through_probability')
-        ))
+        self.conn.execute(RAPID_MOVEMENT_INSERT, _movement_row(analysis_id, symbol, movement))
     
     def store_market_pattern(self, analysis_id: int, symbol: str, pattern: Dict[str, Any]):
         """Store market pattern data"""
         if self.conn is None:
             raise RuntimeError("Database connection not initialized")
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO market_patterns (
-                analysis_id, symbol, pattern_name, pattern_type,
-                pattern_strength, pattern_confidence, timeframe,
-                formation_time, expected_move_percentage, expected_direction,
-                success_rate_historical, description
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            analysis_id, symbol,
-            pattern.get('pattern_name'),
-            pattern.get('pattern_type'),
-            pattern.get('pattern_strength'),
-            pattern.get('pattern_confidence'),
-            pattern.get('timeframe'),
-            pattern.get('formation_time'),
-            pattern.get('expected_move_percentage'),
-            pattern.get('expected_direction'),
-            pattern.get('success_rate_historical'),
-            pattern.get('description')
-        ))
+        self.conn.execute(MARKET_PATTERN_INSERT, _pattern_row(analysis_id, symbol, pattern))
     
     def store_trading_signal(self, analysis_id: int, symbol: str, signal: Dict[str, Any]):
         """Store trading signal data"""
         if self.conn is None:
             raise RuntimeError("Database connection not initialized")
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO trading_signals (
-                analysis_id, symbol, signal_type, signal_strength,
-                signal_source, timeframe, confidence,
-                entry_price, stop_loss, take_profit, risk_reward_ratio
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            analysis_id, symbol,
-            signal.get('signal_type'),
-            signal.get('signal_strength'),
-            signal.get('signal_source'),
-            signal.get('timeframe'),
-            signal.get('confidence'),
-            signal.get('entry_price'),
-            signal.get('stop_loss'),
-            signal.get('take_profit'),
-            signal.get('risk_reward_ratio')
-        ))
+        self.conn.execute(TRADING_SIGNAL_INSERT, _signal_row(analysis_id, symbol, signal))
     
     # Query methods for Q&A agent
     def get_latest_analysis(self, symbol: str) -> Optional[Dict[str, Any]]:
@@ -872,7 +915,12 @@ class CryptometerDatabase:
     def close(self):
         """Close database connection"""
         if self.conn:
-            self.conn.close()
+            try:
+                if self._pending_analyses:
+                    self.flush_analyses()
+            finally:
+                self.conn.close()
+                self.conn = None
 
 # Create global instance
 cryptometer_db = CryptometerDatabase()
\ No newline at end of file
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Columnar Feature Store for the Self-Learning System
+Fixed-width float32 feature matrices per agent, memory-mapped from disk
+
+Each agent gets a directory with:
+    schema.json   feature name -> column registry (append-only, so a name
+                  keeps its column across restarts)
+    features.f32  a 64-byte header (magic, width, row count) followed by a
+                  row-major float32 matrix that grows by doubling
+
+Values are encoded the way the learning system always has (numbers as-is,
+bools 0/1, strings as a stable crc32 code, lists as length plus mean) but
+columns are assigned by feature name instead of dict position. Training
+reads rows straight from the memmap; worker processes open the same file
+read-only via FeatureRef.
+
+Several processes may write one agent's matrix: appends, in-place rewrites
+and column registration take an exclusive flock on the agent's
+features.lock and pick up rows and columns other writers added first. On
+platforms without fcntl the store supports a single writer process.
+"""
+
+import os
+import re
+import json
+import zlib
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FEATURE_VECTOR_SIZE = 50
+HEADER_BYTES = 64
+MAGIC = 0x5A4D4653  # "ZMFS"
+INITIAL_CAPACITY = 1024
+
+
+def encode_features(features: Dict[str, Any]) -> Iterable[Tuple[str, float]]:
+    """Yield (column name, value) pairs for a feature dictionary"""
+    for key, value in features.items():
+        if isinstance(value, (int, float)):
+            yield key, float(value)
+        elif isinstance(value, str):
+            # Stable across processes, unlike the salted built-in hash()
+            yield key, float(zlib.crc32(value.encode()) % 1000) / 1000
+        elif isinstance(value, list):
+            # List features - take length and mean if numeric
+            yield f"{key}#len", float(len(value))
+            if value and isinstance(value[0], (int, float)):
+                yield f"{key}#mean", float(np.mean(value))
+            else:
+                yield f"{key}#mean", 0.0
+        else:
+            yield key, 0.0
+
+
+@dataclass(frozen=True)
+class FeatureRef:
+    """Picklable pointer to rows of an agent's matrix, for worker processes"""
+    path: str
+    width: int
+    rows: Tuple[int, ...]
+
+    def load(self) -> np.ndarray:
+        total = max(self.rows) + 1 if self.rows else 0
+        matrix = np.memmap(self.path, dtype=np.float32, mode='r', offset=HEADER_BYTES, shape=(total, self.width))
+        return np.asarray(matrix[list(self.rows)])
+
+
+class _AgentMatrix:
+    """One agent's registry and memory-mapped matrix"""
+
+    def __init__(self, directory: Path, width: int):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.schema_path = directory / "schema.json"
+        self.data_path = directory / "features.f32"
+        self.lock_path = directory / "features.lock"
+
+        self.columns: Dict[str, int] = {}
+        self.width = width
+        self._schema_mtime = None
+        self._overflow_warned = False
+        self._lock_file = None
+        self._lock_depth = 0
+
+        with self.locked():
+            self._load_schema()
+            if not self.data_path.exists():
+                with open(self.data_path, 'wb') as f:
+                    f.truncate(HEADER_BYTES + INITIAL_CAPACITY * self.width * 4)
+                header = np.memmap(self.data_path, dtype=np.int64, mode='r+', shape=(HEADER_BYTES // 8,))
+                header[:3] = (MAGIC, self.width, 0)
+                header.flush()
+                del header
+            self._map()
+
+    @contextmanager
+    def locked(self):
+        """Exclusive, re-entrant writer lock shared with other processes"""
+        if self._lock_depth == 0 and fcntl is not None:
+            self._lock_file = open(self.lock_path, 'a')
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            if self._lock_depth == 1 and hasattr(self, 'data'):
+                self._refresh()
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0 and self._lock_file is not None:
+                # Shared mappings: other processes see our rows without a flush
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                self._lock_file.close()
+                self._lock_file = None
+
+    def _load_schema(self):
+        if not self.schema_path.exists():
+            return
+        self._schema_mtime = self.schema_path.stat().st_mtime_ns
+        schema = json.loads(self.schema_path.read_text())
+        self.columns = schema.get('columns', {})
+        self.width = schema.get('width', self.width)
+
+    def _refresh(self):
+        """Pick up columns and capacity another writer added since we last held the lock"""
+        if self.schema_path.exists() and self.schema_path.stat().st_mtime_ns != self._schema_mtime:
+            self._load_schema()
+        if os.path.getsize(self.data_path) != HEADER_BYTES + self.capacity * self.width * 4:
+            self.data.flush()
+            del self.data
+            self._map()
+
+    def _map(self):
+        size = os.path.getsize(self.data_path)
+        self.capacity = (size - HEADER_BYTES) // (self.width * 4)
+        self.header = np.memmap(self.data_path, dtype=np.int64, mode='r+', shape=(HEADER_BYTES // 8,))
+        if self.header[0] != MAGIC or self.header[1] != self.width:
+            raise ValueError(f"Corrupt feature store file: {self.data_path}")
+        self.data = np.memmap(self.data_path, dtype=np.float32, mode='r+', offset=HEADER_BYTES,
+                              shape=(self.capacity, self.width))
+
+    @property
+    def rows(self) -> int:
+        return int(self.header[2])
+
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self.data.flush()
+        del self.data
+        with open(self.data_path, 'r+b') as f:
+            f.truncate(HEADER_BYTES + capacity * self.width * 4)
+        self._map()
+
+    def column(self, name: str, register: bool) -> Optional[int]:
+        column = self.columns.get(name)
+        if column is not None or not register:
+            return column
+        with self.locked():
+            # Another writer may have registered it while we waited
+            column = self.columns.get(name)
+            if column is not None:
+                return column
+            if len(self.columns) >= self.width:
+                if not self._overflow_warned:
+                    logger.warning(f"Feature store {self.directory.name} is full ({self.width} columns); "
+                                   f"ignoring new feature '{name}'")
+                    self._overflow_warned = True
+                return None
+            column = self.columns[name] = len(self.columns)
+            self._save_schema()
+        return column
+
+    def _save_schema(self):
+        tmp = self.schema_path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps({'width': self.width, 'columns': self.columns}, indent=2))
+        os.replace(tmp, self.schema_path)
+        self._schema_mtime = self.schema_path.stat().st_mtime_ns
+
+    def vectorize(self, features: Dict[str, Any], register: bool, out: Optional[np.ndarray] = None) -> np.ndarray:
+        vector = np.zeros(self.width, dtype=np.float32) if out is None else out
+        for name, value in encode_features(features):
+            column = self.column(name, register)
+            if column is not None:
+                vector[column] = value
+        return vector
+
+    def append(self, feature_rows: List[Dict[str, Any]]) -> List[int]:
+        with self.locked():
+            start = self.rows
+            if start + len(feature_rows) > self.capacity:
+                self._grow(start + len(feature_rows))
+            for offset, features in enumerate(feature_rows):
+                row = self.data[start + offset]
+                row[:] = 0.0
+                self.vectorize(features, register=True, out=row)
+            self.header[2] = start + len(feature_rows)
+        return list(range(start, start + len(feature_rows)))
+
+    def write(self, row: int, features: Dict[str, Any]):
+        with self.locked():
+            if not 0 <= row < self.rows:
+                raise IndexError(f"Feature row {row} out of range for {self.directory.name}")
+            target = self.data[row]
+            target[:] = 0.0
+            self.vectorize(features, register=True, out=target)
+
+
+class FeatureStore:
+    """
+    Per-agent columnar feature matrices with a stable name -> column registry
+    """
+
+    def __init__(self, root: str = "data/feature_store", width: int = FEATURE_VECTOR_SIZE):
+        # Agent directories are created on first use, not here
+        self.root = Path(root)
+        self.width = width
+        self._agents: Dict[str, _AgentMatrix] = {}
+
+    def _agent(self, agent_name: str) -> _AgentMatrix:
+        matrix = self._agents.get(agent_name)
+        if matrix is None:
+            safe = re.sub(r'[^A-Za-z0-9_.-]', '_', agent_name)
+            matrix = self._agents[agent_name] = _AgentMatrix(self.root / safe, self.width)
+        return matrix
+
+    def append(self, agent_name: str, features: Dict[str, Any]) -> int:
+        """Store one feature dictionary; returns its row"""
+        return self._agent(agent_name).append([features])[0]
+
+    def append_many(self, agent_name: str, feature_rows: List[Dict[str, Any]]) -> List[int]:
+        """Store many feature dictionaries; returns their rows"""
+        return self._agent(agent_name).append(feature_rows)
+
+    def write(self, agent_name: str, row: int, features: Dict[str, Any]):
+        """Overwrite a stored row in place"""
+        self._agent(agent_name).write(row, features)
+
+    def vectorize(self, agent_name: str, features: Dict[str, Any], register: bool = False) -> np.ndarray:
+        """
+        Feature vector without storing it
+
+        Names the agent has never stored are ignored unless register is set.
+        """
+        return self._agent(agent_name).vectorize(features, register=register)
+
+    def matrix(self, agent_name: str) -> np.ndarray:
+        """Zero-copy view of every stored row"""
+        agent = self._agent(agent_name)
+        return agent.data[:agent.rows]
+
+    def take(self, agent_name: str, rows: List[int]) -> np.ndarray:
+        """Rows gathered into a new array"""
+        return np.asarray(self._agent(agent_name).data[rows])
+
+    def ref(self, agent_name: str, rows: List[int]) -> FeatureRef:
+        """Pointer to rows that a worker process can load from disk"""
+        agent = self._agent(agent_name)
+        agent.data.flush()
+        agent.header.flush()
+        return FeatureRef(str(agent.data_path), agent.width, tuple(rows))
+
+    def columns(self, agent_name: str) -> Dict[str, int]:
+        return dict(self._agent(agent_name).columns)
+
+    def row_count(self, agent_name: str) -> int:
+        return self._agent(agent_name).rows
+
+    def flush(self):
+        for agent in self._agents.values():
+            agent.data.flush()
+            agent.header.flush()
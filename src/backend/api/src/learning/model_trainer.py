@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Background Model Trainer for the Self-Learning System
+Fits correction models in a process pool so training never runs on the API
+event loop
+
+Jobs are keyed by (agent, prediction_type). A trigger for a key that is
+already queued replaces the queued rows with the newer ones; a trigger for a
+key that is training queues exactly one follow-up run. The worker loads the
+feature rows from the feature store's memmap, fits the scaler and model, and
+writes the model file atomically; the parent installs the result through a
+callback on the event loop.
+
+The worker side only depends on numpy, scikit-learn and feature_store, so
+spawned workers import it cheaply.
+"""
+
+import os
+import time
+import pickle
+import asyncio
+import logging
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Callable, Union
+
+import numpy as np
+
+from src.learning.feature_store import FeatureRef
+
+logger = logging.getLogger(__name__)
+
+REGRESSION_TYPES = ('score', 'win_rate')
+
+
+def train_correction_model(model_key: str, pred_type: str, predictions: List[Tuple],
+                           features: Union[np.ndarray, FeatureRef], model_dir: Optional[str] = None,
+                           n_estimators: int = 100) -> Dict[str, Any]:
+    """
+    Fit a correction model for one (agent, prediction_type)
+
+    Runs inside a worker process. predictions are rows starting with
+    (prediction_type, predicted_value, actual_value, ...) and features holds
+    the matching feature rows, as a matrix or a FeatureRef into the store.
+    Returns the fitted model and scaler plus fit metrics, or a 'skipped'
+    reason when there are not enough samples.
+    """
+    from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+    from sklearn.metrics import mean_squared_error, accuracy_score
+    from sklearn.preprocessing import StandardScaler
+
+    started = time.perf_counter()
+    X = features.load() if isinstance(features, FeatureRef) else np.asarray(features)
+    if len(X) < 10:
+        return {'model_key': model_key, 'skipped': f"only {len(X)} valid samples"}
+    if len(X) != len(predictions):
+        raise ValueError(f"{len(X)} feature rows for {len(predictions)} predictions")
+
+    y_predicted = np.array([pred[1] for pred in predictions], dtype=float)
+    y_actual = np.array([pred[2] for pred in predictions], dtype=float)
+
+    # Train correction model (learns from prediction errors)
+    if pred_type in REGRESSION_TYPES:
+        # Regression for continuous values
+        model = RandomForestRegressor(n_estimators=n_estimators, random_state=42)
+        correction_target = y_actual - y_predicted  # Error correction
+    else:
+        # Classification for discrete values
+        model = RandomForestClassifier(n_estimators=n_estimators, random_state=42)
+        correction_target = (y_actual == y_predicted).astype(int)  # Accuracy
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    model.fit(X_scaled, correction_target)
+
+    # Evaluate model
+    predictions_corrected = model.predict(X_scaled)
+    if pred_type in REGRESSION_TYPES:
+        metric_name, metric = 'mse', float(mean_squared_error(correction_target, predictions_corrected))
+    else:
+        metric_name, metric = 'accuracy', float(accuracy_score(correction_target, predictions_corrected))
+
+    if model_dir is not None:
+        # Write then rename so readers never see a half-written model file
+        model_file = Path(model_dir) / f"{model_key}_model.pkl"
+        tmp_file = model_file.with_suffix(f".pkl.{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({
+                'model': model,
+                'scaler': scaler,
+                'feature_names': list(range(X.shape[1])),
+                'training_date': datetime.now().isoformat()
+            }, f)
+        os.replace(tmp_file, model_file)
+
+    return {
+        'model_key': model_key,
+        'model': model,
+        'scaler': scaler,
+        'feature_importances': getattr(model, 'feature_importances_', None),
+        'metric_name': metric_name,
+        'metric': metric,
+        'samples': len(X),
+        'fit_seconds': time.perf_counter() - started
+    }
+
+
+@dataclass
+class TrainingJob:
+    """A queued or running training job for one (agent, prediction_type)"""
+    agent_name: str
+    prediction_type: str
+    predictions: List[Tuple]
+    features: Union[np.ndarray, FeatureRef]
+    submitted_at: float = field(default_factory=time.perf_counter)
+    coalesced: int = 0
+    future: Optional[asyncio.Future] = None
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.agent_name, self.prediction_type)
+
+    @property
+    def model_key(self) -> str:
+        return f"{self.agent_name}_{self.prediction_type}"
+
+
+class ModelTrainer:
+    """
+    Process-pool trainer with per-key coalescing
+
+    on_complete(job, result) is called on the event loop when a fit finishes;
+    the owner installs the model there. The pool is created on the first job.
+    """
+
+    def __init__(self, on_complete: Callable[[TrainingJob, Dict[str, Any]], None],
+                 model_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                 start_method: str = 'spawn', n_estimators: int = 100):
+        self.on_complete = on_complete
+        self.model_dir = str(model_dir) if model_dir is not None else None
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) // 2))
+        self.start_method = start_method
+        self.n_estimators = n_estimators
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: "OrderedDict[Tuple[str, str], TrainingJob]" = OrderedDict()
+        self._running: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        self.stats = {
+            'submitted': 0,
+            'coalesced': 0,
+            'completed': 0,
+            'skipped': 0,
+            'failed': 0
+        }
+        self._latencies = deque(maxlen=256)   # submit -> installed
+        self._fit_times = deque(maxlen=256)   # time spent fitting in the worker
+
+    def submit(self, agent_name: str, prediction_type: str, predictions: List[Tuple],
+               features: Union[np.ndarray, FeatureRef]) -> asyncio.Future:
+        """
+        Queue a training job; returns a future resolved with the fit result
+
+        A job already waiting for the same key takes the newer rows and the
+        same future is returned to both callers.
+        """
+        key = (agent_name, prediction_type)
+        self.stats['submitted'] += 1
+        queued = self._queue.get(key)
+        if queued is not None:
+            queued.predictions = predictions
+            queued.features = features
+            queued.coalesced += 1
+            self.stats['coalesced'] += 1
+            return queued.future
+
+        job = TrainingJob(agent_name, prediction_type, predictions, features,
+                          future=asyncio.get_running_loop().create_future())
+        self._queue[key] = job
+        self._dispatch()
+        return job.future
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def is_training(self, agent_name: str, prediction_type: str) -> bool:
+        key = (agent_name, prediction_type)
+        return key in self._running or key in self._queue
+
+    async def wait_idle(self):
+        """Wait until no job is queued or running"""
+        while self._queue or self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        fit_times = list(self._fit_times)
+        return {
+            **self.stats,
+            'queue_depth': len(self._queue),
+            'running': len(self._running),
+            'max_workers': self.max_workers,
+            'avg_job_latency_ms': round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            'p95_job_latency_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+            if latencies else 0.0,
+            'avg_fit_ms': round(sum(fit_times) / len(fit_times) * 1000, 1) if fit_times else 0.0
+        }
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._executor
+
+    def _dispatch(self):
+        for key in list(self._queue):
+            if len(self._running) >= self.max_workers:
+                break
+            if key in self._running:
+                continue  # One run per key at a time; the queued job follows it
+            job = self._queue.pop(key)
+            self._running[key] = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: TrainingJob):
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self._pool(), train_correction_model,
+                job.model_key, job.prediction_type, job.predictions, job.features,
+                self.model_dir, self.n_estimators
+            )
+            if 'skipped' in result:
+                self.stats['skipped'] += 1
+                logger.warning(f"Not enough valid samples for {job.agent_name}/{job.prediction_type}: "
+                               f"{result['skipped']}")
+            else:
+                self.on_complete(job, result)
+                self.stats['completed'] += 1
+                self._fit_times.append(result['fit_seconds'])
+                self._latencies.append(time.perf_counter() - job.submitted_at)
+            if not job.future.done():
+                job.future.set_result(result)
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"Error training model for {job.agent_name}/{job.prediction_type}: {e}")
+            if isinstance(e, BrokenProcessPool):
+                self._executor = None
+            if not job.future.done():
+                job.future.set_exception(e)
+                job.future.exception()  # Mark retrieved; callers may not await it
+        finally:
+            self._running.pop(job.key, None)
+            self._dispatch()
@@ -15,14 +15,12 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 import asyncio
 from collections import defaultdict
-import pickle
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.metrics import mean_squared_error, accuracy_score, precision_score, recall_score
-from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
+from src.learning.model_trainer import ModelTrainer, TrainingJob
+from src.learning.feature_store import FeatureStore
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -62,7 +60,8 @@ class SelfLearningSystem:
     Uses machine learning to improve prediction accuracy over time
     """
     
-    def __init__(self, db_path: str = "data/learning_system.db"):
+    def __init__(self, db_path: str = "data/learning_system.db", training_workers: Optional[int] = None,
+                 feature_store_path: Optional[str] = None):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
@@ -80,6 +79,13 @@ class SelfLearningSystem:
         self.retrain_interval = 100     # Retrain after N new samples
         self.confidence_threshold = 0.7  # Minimum confidence for learning
         
+        # Feature vectors live in per-agent memory-mapped matrices, not JSON
+        self.feature_store = FeatureStore(feature_store_path or str(self.db_path.parent / "feature_store"))
+        
+        # Models are fitted in a process pool and hot-swapped in on completion
+        self.trainer = ModelTrainer(self._install_model, model_dir=self.db_path.parent,
+                                    max_workers=training_workers)
+        
         self._init_database()
         logger.info("Self-Learning System initialized")
     
@@ -104,10 +110,16 @@ class SelfLearningSystem:
                 outcome_timestamp TEXT,
                 accuracy REAL,
                 error REAL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                feature_row INTEGER
             )
         ''')
         
+        # Databases created before the feature store lack feature_row
+        cursor.execute("PRAGMA table_info(predictions)")
+        if 'feature_row' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE predictions ADD COLUMN feature_row INTEGER")
+        
         # Learning metrics table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS learning_metrics (
@@ -167,11 +179,23 @@ class SelfLearningSystem:
         cursor = conn.cursor()
         
         try:
+            # Re-recording a prediction rewrites its feature row instead of orphaning it
+            cursor.execute('''
+                SELECT feature_row FROM predictions
+                WHERE prediction_id = ? AND agent_name = ? AND feature_row IS NOT NULL
+            ''', (prediction.prediction_id, prediction.agent_name))
+            existing = cursor.fetchone()
+            if existing:
+                feature_row = existing[0]
+                self.feature_store.write(prediction.agent_name, feature_row, prediction.features)
+            else:
+                feature_row = self.feature_store.append(prediction.agent_name, prediction.features)
+            
             cursor.execute('''
                 INSERT OR REPLACE INTO predictions 
                 (prediction_id, agent_name, symbol, prediction_type, 
-                 predicted_value, confidence, features, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                 predicted_value, confidence, features, timestamp, feature_row)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 prediction.prediction_id,
                 prediction.agent_name,
@@ -180,7 +204,8 @@ class SelfLearningSystem:
                 prediction.predicted_value,
                 prediction.confidence,
                 json.dumps(prediction.features),
-                prediction.timestamp.isoformat()
+                prediction.timestamp.isoformat(),
+                feature_row
             ))
             
             conn.commit()
@@ -279,21 +304,30 @@ class SelfLearningSystem:
         
         count = cursor.fetchone()[0]
         
-        # Check if we should retrain
+        # Check if we should retrain (jobs run in the background trainer)
         if count >= self.min_samples_to_learn and count % self.retrain_interval == 0:
             logger.info(f"Triggering learning for {agent_name} with {count} samples")
             await self._train_agent_models(agent_name)
     
-    async def _train_agent_models(self, agent_name: str):
-        """Train machine learning models for an agent"""
+    async def _train_agent_models(self, agent_name: str, wait: bool = False):
+        """
+        Queue model training for every prediction type of an agent
+        
+        Fits run in the trainer's process pool; the current models keep
+        serving until the new ones are installed. Set wait to block until
+        the queued jobs finish.
+        """
+        jobs = []
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
+            self._backfill_feature_rows(conn, agent_name)
+            
             # Get completed predictions for this agent
             cursor.execute('''
                 SELECT prediction_type, predicted_value, actual_value, 
-                       confidence, features, accuracy, error
+                       confidence, features, accuracy, error, feature_row
                 FROM predictions 
                 WHERE agent_name = ? AND actual_value IS NOT NULL
                 ORDER BY timestamp DESC
@@ -316,7 +350,9 @@ class SelfLearningSystem:
                 if len(type_predictions) < 20:  # Minimum per type
                     continue
                 
-                await self._train_model_for_type(agent_name, pred_type, type_predictions)
+                rows = [pred[7] for pred in type_predictions]
+                jobs.append(self.trainer.submit(agent_name, pred_type, type_predictions,
+                                                self.feature_store.ref(agent_name, rows)))
             
             # Update learning metrics
             await self._update_learning_metrics(agent_name, predictions)
@@ -325,125 +361,77 @@ class SelfLearningSystem:
             logger.error(f"Error training models for {agent_name}: {e}")
         finally:
             conn.close()
+        
+        if wait and jobs:
+            await asyncio.gather(*jobs, return_exceptions=True)
     
     async def _train_model_for_type(self, agent_name: str, pred_type: str, 
                                   predictions: List[Tuple]):
-        """Train a specific model for prediction type"""
+        """
+        Train a specific model for prediction type and wait for it to be installed
+        
+        Rows carrying a feature_row (as selected by _train_agent_models) are
+        read from the feature store; older 7-column rows are vectorized from
+        their features JSON.
+        """
         try:
-            # Extract features and targets
-            X = []
-            y_actual = []
-            y_predicted = []
-            confidences = []
-            
-            for pred in predictions:
-                _, predicted, actual, confidence, features_json, accuracy, error = pred
-                
-                try:
-                    features = json.loads(features_json)
-                    # Convert features to numerical vector
-                    feature_vector = self._extract_feature_vector(features)
-                    
-                    X.append(feature_vector)
-                    y_actual.append(actual)
-                    y_predicted.append(predicted)
-                    confidences.append(confidence)
-                    
-                except Exception as e:
-                    logger.debug(f"Error parsing features: {e}")
-                    continue
-            
-            if len(X) < 10:
-                logger.warning(f"Not enough valid samples for {agent_name}/{pred_type}")
-                return
-            
-            X = np.array(X)
-            y_actual = np.array(y_actual)
-            y_predicted = np.array(y_predicted)
-            confidences = np.array(confidences)
-            
-            # Initialize or get existing models
-            model_key = f"{agent_name}_{pred_type}"
-            
-            # Train correction model (learns from prediction errors)
-            if pred_type in ['score', 'win_rate']:
-                # Regression for continuous values
-                model = RandomForestRegressor(n_estimators=100, random_state=42)
-                correction_target = y_actual - y_predicted  # Error correction
+            if all(len(pred) > 7 and pred[7] is not None for pred in predictions):
+                features = self.feature_store.ref(agent_name, [pred[7] for pred in predictions])
             else:
-                # Classification for discrete values
-                model = RandomForestClassifier(n_estimators=100, random_state=42)
-                correction_target = (y_actual == y_predicted).astype(int)  # Accuracy
-            
-            # Scale features
-            if model_key not in self.scalers:
-                self.scalers[model_key] = StandardScaler()
-            
-            X_scaled = self.scalers[model_key].fit_transform(X)
-            
-            # Train the model
-            model.fit(X_scaled, correction_target)
-            self.models[model_key] = model
-            
-            # Calculate feature importance
-            if hasattr(model, 'feature_importances_'):
-                self.feature_importance[agent_name][pred_type] = model.feature_importances_
-            
-            # Evaluate model
-            predictions_corrected = model.predict(X_scaled)
-            
-            if pred_type in ['score', 'win_rate']:
-                mse = mean_squared_error(correction_target, predictions_corrected)
-                logger.info(f"Trained {model_key} - MSE: {mse:.3f}")
-            else:
-                accuracy = accuracy_score(correction_target, predictions_corrected)
-                logger.info(f"Trained {model_key} - Accuracy: {accuracy:.3f}")
-            
-            # Store model to disk
-            model_file = self.db_path.parent / f"{model_key}_model.pkl"
-            with open(model_file, 'wb') as f:
-                pickle.dump({
-                    'model': model,
-                    'scaler': self.scalers[model_key],
-                    'feature_names': list(range(X.shape[1])),
-                    'training_date': datetime.now().isoformat()
-                }, f)
-            
-            logger.info(f"Trained and saved model for {agent_name}/{pred_type}")
-            
+                features = np.stack([
+                    self.feature_store.vectorize(agent_name, json.loads(pred[4]), register=True)
+                    for pred in predictions
+                ])
+            await self.trainer.submit(agent_name, pred_type, predictions, features)
         except Exception as e:
             logger.error(f"Error training model for {agent_name}/{pred_type}: {e}")
     
-    def _extract_feature_vector(self, features: Dict[str, Any]) -> List[float]:
-        """Convert feature dictionary to numerical vector"""
-        vector = []
-        
-        # Common feature extraction logic
-        for key, value in features.items():
-            if isinstance(value, (int, float)):
-                vector.append(float(value))
-            elif isinstance(value, bool):
-                vector.append(1.0 if value else 0.0)
-            elif isinstance(value, str):
-                # Simple string hashing for categorical features
-                vector.append(float(hash(value) % 1000) / 1000)
-            elif isinstance(value, list):
-                # List features - take length and mean if numeric
-                vector.append(float(len(value)))
-                if value and isinstance(value[0], (int, float)):
-                    vector.append(float(np.mean(value)))
-                else:
-                    vector.append(0.0)
-            else:
-                vector.append(0.0)
+    def _backfill_feature_rows(self, conn: sqlite3.Connection, agent_name: str):
+        """Move predictions recorded before the feature store into it (once)"""
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT prediction_id, features FROM predictions
+            WHERE agent_name = ? AND feature_row IS NULL
+            ORDER BY id
+        ''', (agent_name,))
+        legacy = cursor.fetchall()
+        if not legacy:
+            return
         
-        # Ensure consistent vector length (pad or truncate to 50)
-        if len(vector) < 50:
-            vector.extend([0.0] * (50 - len(vector)))
-        else:
-            vector = vector[:50]
+        parsed = []
+        for prediction_id, features_json in legacy:
+            try:
+                parsed.append((prediction_id, json.loads(features_json) if features_json else {}))
+            except (TypeError, ValueError):
+                parsed.append((prediction_id, {}))
+        rows = self.feature_store.append_many(agent_name, [features for _, features in parsed])
+        cursor.executemany('UPDATE predictions SET feature_row = ? WHERE prediction_id = ?',
+                           [(row, prediction_id) for row, (prediction_id, _) in zip(rows, parsed)])
+        conn.commit()
+        logger.info(f"Moved {len(rows)} feature rows for {agent_name} into the feature store")
+    
+    def _install_model(self, job: TrainingJob, result: Dict[str, Any]):
+        """
+        Swap a freshly trained model in
         
-        return vector
+        Runs on the event loop with no await, so get_learning_correction sees
+        either the old model/scaler pair or the new one, never a mix.
+        """
+        model_key = result['model_key']
+        self.scalers[model_key] = result['scaler']
+        self.models[model_key] = result['model']
+        if result.get('feature_importances') is not None:
+            self.feature_importance[job.agent_name][job.prediction_type] = result['feature_importances']
+        
+        logger.info(f"Trained {model_key} - {result['metric_name'].upper()}: {result['metric']:.3f} "
+                    f"({result['samples']} samples, {result['fit_seconds']:.2f}s)")
+    
+    def get_training_stats(self) -> Dict[str, Any]:
+        """Background trainer queue depth, job latency and counters"""
+        return {
+            **self.trainer.get_stats(),
+            'models_loaded': len(self.models)
+        }
     
     async def get_learning_correction(self, agent_name: str, prediction_type: str,
                                     features: Dict[str, Any], 
@@ -462,23 +450,24 @@ class SelfLearningSystem:
         """
         model_key = f"{agent_name}_{prediction_type}"
         
-        if model_key not in self.models:
+        # Read the pair once; a retrain in progress keeps serving these
+        model = self.models.get(model_key)
+        scaler = self.scalers.get(model_key)
+        if model is None:
             # No trained model yet, return original
             return original_prediction, 0.0
         
         try:
-            # Extract features
-            feature_vector = self._extract_feature_vector(features)
-            X = np.array([feature_vector])
+            # Columns come from the agent's feature registry
+            X = self.feature_store.vectorize(agent_name, features).reshape(1, -1)
             
             # Scale features
-            if model_key in self.scalers:
-                X_scaled = self.scalers[model_key].transform(X)
+            if scaler is not None:
+                X_scaled = scaler.transform(X)
             else:
                 X_scaled = X
             
             # Get model prediction (correction)
-            model = self.models[model_key]
             correction = model.predict(X_scaled)[0]
             
             # Calculate confidence based on model performance
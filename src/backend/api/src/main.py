@@ -22,6 +22,8 @@ from src.utils.database import init_database, close_database
 # from src.utils.monitoring import init_monitoring  # REMOVED - causing issues
 from src.agents.orchestration.orchestration_agent import OrchestrationAgent
 from src.agents.position_lifecycle_orchestrator import position_orchestrator
+from src.services.price_snapshot_service import price_snapshot_service
+from src.services.real_alert_engine import real_alert_engine
 
 # Import security modules
 from src.security.headers import SecurityHeadersMiddleware
@@ -99,6 +101,14 @@ async def lifespan(app: FastAPI):
     if orchestration_agent:
         await orchestration_agent.stop()
     
+    # Stop the alert engine and the shared ticker stream and HTTP session
+    try:
+        if real_alert_engine.is_running:
+            await real_alert_engine.stop()
+        await price_snapshot_service.close()
+    except Exception as e:
+        logger.error(f"Error closing price snapshot service: {e}")
+    
     # Close database connections
     await close_database()
     
@@ -0,0 +1,257 @@
+"""
+Sliding-Window Rate Limit Engine
+Exact per-(category, client) sliding windows kept in process
+
+Every (category, client) key owns a ring buffer of its accepted request
+times, sized to the category's limit, so a check is a couple of array reads
+with no I/O and the limit holds whether or not Redis is up. Idle keys are
+evicted periodically.
+
+When a Redis client is given, a background task syncs all active keys in
+one batched call to an atomic Lua script every sync_interval seconds: it
+adds this process's new requests to per-key time buckets and returns each
+key's total across processes, so other workers' traffic counts against the
+limit between syncs. If Redis is unreachable the engine keeps limiting
+locally and retries later.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+import weakref
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Buckets per window in Redis: cross-process counts are exact to 1/N of a window
+SYNC_BUCKETS = 10
+
+# KEYS: one hash per (category, client); ARGV: now, then window and new-request count per key
+SYNC_SCRIPT = """
+local now = tonumber(ARGV[1])
+local totals = {}
+for i, key in ipairs(KEYS) do
+    local window = tonumber(ARGV[2 * i])
+    local added = tonumber(ARGV[2 * i + 1])
+    local bucket = math.floor(now * 10 / window)
+    if added > 0 then
+        redis.call('HINCRBY', key, bucket, added)
+        redis.call('EXPIRE', key, math.ceil(window * 2))
+    end
+    local total = 0
+    local fields = redis.call('HGETALL', key)
+    for j = 1, #fields, 2 do
+        if tonumber(fields[j]) > bucket - 10 then
+            total = total + tonumber(fields[j + 1])
+        else
+            redis.call('HDEL', key, fields[j])
+        end
+    end
+    totals[i] = total
+end
+return totals
+"""
+
+_engines = weakref.WeakSet()
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of one rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+    rejected_streak: int = 0  # rejections since the key's last accepted request
+
+
+class _Window:
+    """Ring buffer of one key's accepted request times"""
+    __slots__ = ("times", "head", "size", "last", "pending", "remote", "rejected")
+
+    def __init__(self, capacity: int):
+        self.times = array("d", bytes(8 * capacity))
+        self.head = 0      # next slot to write
+        self.size = 0      # live entries, oldest at head - size
+        self.last = 0.0    # time of the last check
+        self.pending = 0   # accepted since the last Redis sync
+        self.remote = 0    # other processes' requests in the window, from the last sync
+        self.rejected = 0
+
+
+class SlidingWindowRateLimiter:
+    """
+    Exact sliding-window limits per category, synced to Redis in batches
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, int]], redis_client=None, sync_interval: float = 1.0,
+                 eviction_interval: float = 60.0, retry_seconds: float = 30.0, key_prefix: str = "rate_limit"):
+        self.limits = limits
+        self.redis_client = redis_client
+        self.sync_interval = sync_interval
+        self.eviction_interval = eviction_interval
+        self.retry_seconds = retry_seconds
+        self.key_prefix = key_prefix
+
+        self.windows: Dict[Tuple[str, str], _Window] = {}
+        self._script = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._next_eviction = 0.0  # first check schedules it on the caller's clock
+        self._redis_retry_at = 0.0
+
+        self.stats = {
+            "checks": 0,
+            "allowed": 0,
+            "rejected": 0,
+            "by_category": {category: {"allowed": 0, "rejected": 0} for category in limits},
+            "evicted_keys": 0,
+            "syncs": 0,
+            "sync_errors": 0,
+            "keys_synced": 0,
+            "last_sync_ms": 0.0,
+            "redis_available": redis_client is not None
+        }
+        _engines.add(self)
+
+    def check(self, category: str, identifier: str, now: Optional[float] = None) -> RateLimitDecision:
+        """Count a request against the key's window; rejected requests are not counted"""
+        now = time.monotonic() if now is None else now
+        limit = self.limits[category]["requests"]
+        window_seconds = self.limits[category]["window"]
+        if now >= self._next_eviction:
+            self.evict(now)
+
+        window = self.windows.get((category, identifier))
+        if window is None:
+            window = self.windows[(category, identifier)] = _Window(limit)
+        window.last = now
+
+        # Drop entries that slid out of the window (oldest first)
+        times = window.times
+        capacity = len(times)
+        cutoff = now - window_seconds
+        while window.size and times[(window.head - window.size) % capacity] <= cutoff:
+            window.size -= 1
+
+        self.stats["checks"] += 1
+        used = window.size + window.remote
+        if used >= limit:
+            window.rejected += 1
+            self.stats["rejected"] += 1
+            self.stats["by_category"][category]["rejected"] += 1
+            if window.size:
+                # The slot frees up when enough of this process's oldest entries expire
+                expiring = min(window.size, used - limit + 1)
+                retry_after = times[(window.head - window.size + expiring - 1) % capacity] + window_seconds - now
+            else:
+                retry_after = window_seconds / SYNC_BUCKETS
+            return RateLimitDecision(False, limit, 0, max(retry_after, 0.0), window.rejected)
+
+        times[window.head] = now
+        window.head = (window.head + 1) % capacity
+        window.size += 1
+        if self.redis_client is not None:
+            window.pending += 1
+        window.rejected = 0
+        self.stats["allowed"] += 1
+        self.stats["by_category"][category]["allowed"] += 1
+        return RateLimitDecision(True, limit, limit - used - 1)
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """Drop keys idle for longer than their window"""
+        now = time.monotonic() if now is None else now
+        idle = [
+            key for key, window in self.windows.items()
+            if window.last <= now - self.limits[key[0]]["window"] and not window.pending
+        ]
+        for key in idle:
+            del self.windows[key]
+        self.stats["evicted_keys"] += len(idle)
+        self._next_eviction = now + self.eviction_interval
+        return len(idle)
+
+    # Redis sync
+
+    def ensure_sync_task(self):
+        """Start the background sync from inside the event loop, once"""
+        if self.redis_client is None or (self._sync_task and not self._sync_task.done()):
+            return
+        try:
+            self._sync_task = asyncio.get_running_loop().create_task(self._sync_loop())
+        except RuntimeError:
+            pass  # no running loop; limits stay local
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+
+    async def sync(self) -> int:
+        """Push new requests for all active keys and pull cross-process totals in one script call"""
+        if self.redis_client is None or time.monotonic() < self._redis_retry_at:
+            return 0
+        batch = [
+            (key, window) for key, window in self.windows.items()
+            if window.pending or window.remote or window.size
+        ]
+        if not batch:
+            return 0
+
+        keys = [f"{self.key_prefix}:{category}:{identifier}" for (category, identifier), _ in batch]
+        args = [time.time()]
+        for (category, _), window in batch:
+            args.extend((self.limits[category]["window"], window.pending))
+        sent = [window.pending for _, window in batch]
+
+        start = time.perf_counter()
+        try:
+            if self._script is None:
+                self._script = self.redis_client.register_script(SYNC_SCRIPT)
+            totals = self._script(keys=keys, args=args)
+            if inspect.isawaitable(totals):
+                totals = await totals
+        except Exception as e:
+            self.stats["sync_errors"] += 1
+            self.stats["redis_available"] = False
+            self._redis_retry_at = time.monotonic() + self.retry_seconds
+            for _, window in batch:
+                window.remote = 0  # other processes' counts go stale; fall back to local limits
+            logger.warning(f"Rate limit sync failed, limiting in process only for {self.retry_seconds}s: {e}")
+            return 0
+
+        for (_, window), total, pushed in zip(batch, totals, sent):
+            window.pending -= pushed  # requests accepted while the script ran stay pending
+            window.remote = max(0, int(total) - window.size)
+        self.stats["syncs"] += 1
+        self.stats["keys_synced"] += len(batch)
+        self.stats["last_sync_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        self.stats["redis_available"] = True
+        return len(batch)
+
+    async def close(self):
+        if self._sync_task:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        await self.sync()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self.stats)
+        metrics["by_category"] = {category: dict(counts) for category, counts in self.stats["by_category"].items()}
+        metrics["active_keys"] = len(self.windows)
+        metrics["memory_bytes"] = sum(window.times.itemsize * len(window.times) for window in self.windows.values())
+        return metrics
+
+
+def get_rate_limit_metrics() -> Dict[str, Any]:
+    """Metrics of every live engine (one per SecurityMiddleware instance)"""
+    engines = [engine.get_metrics() for engine in _engines]
+    if len(engines) == 1:
+        return engines[0]
+    return {"engines": engines}
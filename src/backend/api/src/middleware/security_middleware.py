@@ -8,7 +8,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from typing import Dict, Any, Optional
 import time
 import json
-import re
+import math
 import logging
 from datetime import datetime, timedelta
 import hashlib
@@ -16,6 +16,8 @@ import ipaddress
 from urllib.parse import urlparse
 
 from ..cache.redis_cache import cache
+from .threat_scanner import ThreatScanner
+from .rate_limit_engine import SlidingWindowRateLimiter, get_rate_limit_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +36,13 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             "public": {"requests": 200, "window": 600}   # 200 requests per 10 minutes
         }
         
+        # Exact sliding windows in process; Redis (when up) only sees one batched sync per second
+        self.rate_limiter = SlidingWindowRateLimiter(
+            self.rate_limits,
+            redis_client=getattr(cache, "redis_client", None),
+            sync_interval=self.config.get("rate_limit_sync_interval", 1.0)
+        )
+        
         # Security patterns
         self.sql_injection_patterns = [
             r"(\bUNION\b|\bSELECT\b|\bINSERT\b|\bDELETE\b|\bUPDATE\b|\bDROP\b)",
@@ -51,6 +60,12 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             r"document\.(cookie|write|location)"
         ]
         
+        # Patterns compiled once; clean text only reaches the regexes whose literals it contains
+        self.threat_scanner = ThreatScanner(
+            {"sql_injection_attempt": self.sql_injection_patterns, "xss_attempt": self.xss_patterns},
+            max_scan_chars=self.config.get("max_scan_chars", 64 * 1024)
+        )
+        
         # Blocked IP ranges (example: known malicious IPs)
         self.blocked_ips = set()
         self.blocked_networks = [
@@ -84,6 +99,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             
             # Add security headers
             response = self.add_security_headers(response)
+            self.add_scan_timing(request, response)
             
             # Log request
             await self.log_request(request, response, client_info, time.time() - start_time)
@@ -99,10 +115,11 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                     "timestamp": datetime.now().isoformat()
                 }),
                 status_code=e.status_code,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json", **(e.headers or {})}
             )
             
             response = self.add_security_headers(response)
+            self.add_scan_timing(request, response)
             await self.log_security_event(request, client_info, e.detail, e.status_code)
             
             return response
@@ -181,10 +198,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             logger.warning(f"Invalid IP address: {client_ip}")
     
     async def check_rate_limiting(self, request: Request, client_info: Dict[str, str]):
-        """Advanced rate limiting with different limits for different endpoints"""
-        
-        if not cache.is_available():
-            return  # Skip rate limiting if Redis is not available
+        """Sliding-window rate limiting with different limits for different endpoints"""
         
         client_ip = client_info["ip"]
         path = client_info["path"]
@@ -199,75 +213,48 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         else:
             category = "public"
         
-        limits = self.rate_limits[category]
+        self.rate_limiter.ensure_sync_task()
+        decision = self.rate_limiter.check(category, client_ip)
         
-        # Create rate limiting keys
-        window_start = int(time.time() // limits["window"]) * limits["window"]
-        rate_key = f"rate_limit:{category}:{client_ip}:{window_start}"
-        
-        try:
-            # Get current count
-            current_count = cache.get(rate_key) or 0
-            
-            if current_count >= limits["requests"]:
-                # Add to suspicious activity if severely over limit
-                if current_count > limits["requests"] * 2:
-                    await self.add_suspicious_activity(client_ip, "severe_rate_limit_violation")
-                
-                raise HTTPException(
-                    status_code=429,
-                    detail=f"Rate limit exceeded for {category}. Try again in {limits['window']} seconds.",
-                    headers={"Retry-After": str(limits["window"])}
-                )
+        if not decision.allowed:
+            # Add to suspicious activity if severely over limit
+            if decision.rejected_streak > decision.limit:
+                await self.add_suspicious_activity(client_ip, "severe_rate_limit_violation")
             
-            # Increment counter
-            cache.increment(rate_key)
-            cache.set(rate_key, current_count + 1, ttl=limits["window"])
-            
-        except Exception as e:
-            logger.error(f"Rate limiting error: {e}")
+            retry_after = max(1, math.ceil(decision.retry_after))
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded for {category}. Try again in {retry_after} seconds.",
+                headers={"Retry-After": str(retry_after)}
+            )
     
     async def check_request_security(self, request: Request):
         """Check request for security threats"""
         
         # Get request body for POST/PUT requests
-        body = ""
+        body = b""
         if request.method in ["POST", "PUT", "PATCH"]:
             try:
                 # Read body (this consumes the stream, so we need to be careful)
-                body_bytes = await request.body()
-                if body_bytes:
-                    body = body_bytes.decode("utf-8")
+                body = await request.body()
+                
+                # Check body size
+                if len(body) > 10 * 1024 * 1024:  # 10MB limit
+                    raise HTTPException(status_code=413, detail="Request body too large")
                     
-                    # Check body size
-                    if len(body) > 10 * 1024 * 1024:  # 10MB limit
-                        raise HTTPException(status_code=413, detail="Request body too large")
-                        
-            except UnicodeDecodeError:
-                # Binary data is okay for file uploads
-                pass
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.warning(f"Error reading request body: {e}")
         
-        # Check for SQL injection
-        for pattern in self.sql_injection_patterns:
-            if re.search(pattern, str(request.url.query), re.IGNORECASE):
-                await self.add_suspicious_activity(getattr(request.client, 'host', 'unknown') if request.client else 'unknown', "sql_injection_attempt")
-                raise HTTPException(status_code=400, detail="Invalid request format")
-            
-            if body and re.search(pattern, body, re.IGNORECASE):
-                await self.add_suspicious_activity(getattr(request.client, 'host', 'unknown') if request.client else 'unknown', "sql_injection_attempt")
-                raise HTTPException(status_code=400, detail="Invalid request content")
-        
-        # Check for XSS
-        for pattern in self.xss_patterns:
-            if re.search(pattern, str(request.url.query), re.IGNORECASE):
-                await self.add_suspicious_activity(getattr(request.client, 'host', 'unknown') if request.client else 'unknown', "xss_attempt")
-                raise HTTPException(status_code=400, detail="Invalid request format")
-            
-            if body and re.search(pattern, body, re.IGNORECASE):
-                await self.add_suspicious_activity(getattr(request.client, 'host', 'unknown') if request.client else 'unknown', "xss_attempt")
-                raise HTTPException(status_code=400, detail="Invalid request content")
+        # Check for SQL injection and XSS: query then body, capped, binary uploads skipped
+        scan = self.threat_scanner.scan(str(request.url.query), body, request.headers.get("Content-Type"))
+        request.state.security_scan_ms = scan.duration_ms
+        
+        if scan.threat:
+            await self.add_suspicious_activity(getattr(request.client, 'host', 'unknown') if request.client else 'unknown', scan.threat)
+            detail = "Invalid request format" if scan.location == "query" else "Invalid request content"
+            raise HTTPException(status_code=400, detail=detail)
         
         # Check User-Agent
         user_agent = request.headers.get("User-Agent", "")
@@ -280,6 +267,13 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             if request.headers.get(header):
                 await self.add_suspicious_activity(getattr(request.client, 'host', 'unknown') if request.client else 'unknown', f"suspicious_header_{header}")
     
+    def add_scan_timing(self, request: Request, response: Response):
+        """Report the request's threat scan time"""
+        
+        scan_ms = getattr(request.state, "security_scan_ms", None)
+        if scan_ms is not None:
+            response.headers["Server-Timing"] = f"security-scan;dur={scan_ms:.3f}"
+    
     def add_security_headers(self, response: Response) -> Response:
         """Add comprehensive security headers"""
         
@@ -376,6 +370,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 "query": client_info["query"],
                 "status_code": response.status_code,
                 "duration_ms": round(duration * 1000, 2),
+                "security_scan_ms": round(getattr(request.state, "security_scan_ms", 0.0), 3),
                 "user_agent": client_info["user_agent"][:200],  # Truncate long user agents
                 "referer": client_info["referer"][:200],
                 "response_size": len(response.body) if hasattr(response, 'body') else 0
@@ -458,7 +453,7 @@ class SecurityMonitoringRoutes:
         """Get security metrics for dashboard"""
         
         if not cache.is_available():
-            return {"error": "Monitoring not available"}
+            return {"error": "Monitoring not available", "rate_limiting": get_rate_limit_metrics()}
         
         try:
             metrics = {
@@ -471,6 +466,7 @@ class SecurityMonitoringRoutes:
                     "4xx": sum(cache.get(f"metrics:requests:status_{code}") or 0 for code in range(400, 500)),
                     "5xx": sum(cache.get(f"metrics:requests:status_{code}") or 0 for code in range(500, 600))
                 },
+                "rate_limiting": get_rate_limit_metrics(),
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -0,0 +1,214 @@
+"""
+Request Threat Scanner
+Precompiled SQL injection / XSS matching with a literal prefilter
+
+Every pattern is compiled once and reduced to the ASCII literals one of which
+any match must contain (UNION/SELECT/..., "</script", "javascript:", ...). A
+scan lowercases the text once - after mapping the non-ASCII characters that
+re.IGNORECASE also matches to ASCII letters ("İ"/"ı" to "i", "ſ" to "s", the
+Kelvin sign to "k") - checks those literals with plain substring tests, and
+only runs the regexes whose literals are present - clean requests never
+reach the regex engine for most patterns. The query is scanned before the
+body and the scan stops at the first threat. Bodies are scanned up to
+max_scan_chars, binary and multipart bodies are skipped by content type, and
+every scan reports its own duration.
+"""
+
+import re
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+# Bodies of these types are uploads, not form or JSON input
+BINARY_CONTENT_TYPES = (
+    "multipart/",
+    "application/octet-stream",
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "image/",
+    "audio/",
+    "video/",
+    "font/"
+)
+
+
+# Non-ASCII characters that re.IGNORECASE matches against ASCII letters
+IGNORECASE_ASCII = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
+
+def normalize_case(text: str) -> str:
+    """Lowercase text so ASCII substring tests agree with re.IGNORECASE"""
+    return text.translate(IGNORECASE_ASCII).lower()
+
+
+def _selectivity(literals: FrozenSet[str]) -> Tuple[int, int]:
+    return min(len(literal) for literal in literals), -len(literals)
+
+
+def _required_literals(items) -> Optional[FrozenSet[str]]:
+    """Literals one of which every match of a parsed (sub)pattern contains; None if there are none"""
+    best = None
+    run: List[str] = []
+
+    def consider(candidate: Optional[FrozenSet[str]]):
+        nonlocal best
+        if candidate and all(candidate) and (best is None or _selectivity(candidate) > _selectivity(best)):
+            best = candidate
+
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av).lower())
+            continue
+        consider(frozenset({"".join(run)}) if run else None)
+        run = []
+        if op is sre_parse.SUBPATTERN:
+            consider(_required_literals(av[-1]))
+        elif op is sre_parse.BRANCH:
+            options = [_required_literals(branch) for branch in av[1]]
+            if all(options):
+                consider(frozenset().union(*options))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            consider(_required_literals(av[2]))
+    consider(frozenset({"".join(run)}) if run else None)
+    return best
+
+
+def prefilter_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """Lowercased ASCII prefilter literals for a pattern, or None if it must always run"""
+    try:
+        literals = _required_literals(sre_parse.parse(pattern, re.IGNORECASE))
+    except Exception as e:
+        logger.debug(f"No prefilter for pattern {pattern!r}: {e}")
+        return None
+    # normalize_case only reproduces re.IGNORECASE for ASCII literals
+    if literals is not None and not all(literal.isascii() for literal in literals):
+        return None
+    return literals
+
+
+@dataclass
+class ScanResult:
+    """Outcome of one request scan"""
+    threat: Optional[str] = None      # pattern group name, e.g. "sql_injection_attempt"
+    location: Optional[str] = None    # "query" or "body"
+    match: str = ""
+    scanned_chars: int = 0
+    patterns_run: int = 0
+    body_skipped: Optional[str] = None  # reason the body was not scanned
+    truncated: bool = False
+    duration_ms: float = 0.0
+
+
+class ThreatScanner:
+    """Scans request text against threat pattern groups, compiled once"""
+
+    def __init__(self, pattern_groups: Dict[str, List[str]], max_scan_chars: int = 64 * 1024,
+                 binary_content_types: Tuple[str, ...] = BINARY_CONTENT_TYPES, timing_window: int = 1000):
+        self.max_scan_chars = max_scan_chars
+        self.binary_content_types = binary_content_types
+
+        # (threat, compiled pattern, prefilter literals) in the groups' order
+        self.patterns: List[Tuple[str, re.Pattern, Optional[FrozenSet[str]]]] = [
+            (threat, re.compile(pattern, re.IGNORECASE), prefilter_literals(pattern))
+            for threat, patterns in pattern_groups.items()
+            for pattern in patterns
+        ]
+        self.literals = sorted({literal for _, _, literals in self.patterns if literals for literal in literals})
+
+        self._durations = deque(maxlen=timing_window)
+        self.stats = {
+            "scans": 0,
+            "threats": 0,
+            "bodies_skipped": 0,
+            "bodies_truncated": 0,
+            "chars_scanned": 0,
+            "patterns_run": 0,
+            "total_scan_ms": 0.0,
+            "max_scan_ms": 0.0
+        }
+
+    def is_binary(self, content_type: Optional[str]) -> bool:
+        return bool(content_type) and content_type.split(";", 1)[0].strip().lower().startswith(self.binary_content_types)
+
+    def decode_body(self, body: bytes, content_type: Optional[str] = None) -> Tuple[str, Optional[str], bool]:
+        """(text to scan, skip reason, truncated) for a raw body, decoding at most max_scan_chars bytes"""
+        if not body:
+            return "", None, False
+        if self.is_binary(content_type):
+            return "", "binary_content_type", False
+
+        truncated = len(body) > self.max_scan_chars
+        prefix = body[:self.max_scan_chars] if truncated else body
+        try:
+            return prefix.decode("utf-8"), None, truncated
+        except UnicodeDecodeError as e:
+            # A cut through a multi-byte character at the cap is not binary data
+            if truncated and e.start >= len(prefix) - 3 and e.reason == "unexpected end of data":
+                return prefix[:e.start].decode("utf-8"), None, truncated
+            return "", "not_utf8", False
+
+    def _scan_text(self, text: str, result: ScanResult) -> Optional[re.Match]:
+        folded = normalize_case(text)
+        present = {literal for literal in self.literals if literal in folded}
+        for threat, pattern, literals in self.patterns:
+            if literals is not None and not literals & present:
+                continue
+            result.patterns_run += 1
+            found = pattern.search(text)
+            if found:
+                result.threat = threat
+                return found
+        return None
+
+    def scan(self, query: str = "", body: bytes = b"", content_type: Optional[str] = None) -> ScanResult:
+        """Scan query then body, stopping at the first threat"""
+        start = time.perf_counter()
+        result = ScanResult()
+
+        text, result.body_skipped, result.truncated = self.decode_body(body, content_type)
+        for location, value in (("query", query[:self.max_scan_chars]), ("body", text)):
+            if not value:
+                continue
+            result.scanned_chars += len(value)
+            found = self._scan_text(value, result)
+            if found:
+                result.location = location
+                result.match = found.group(0)[:100]
+                break
+
+        result.duration_ms = (time.perf_counter() - start) * 1000
+        self._record(result)
+        return result
+
+    def _record(self, result: ScanResult):
+        self.stats["scans"] += 1
+        self.stats["threats"] += result.threat is not None
+        self.stats["bodies_skipped"] += result.body_skipped is not None
+        self.stats["bodies_truncated"] += result.truncated
+        self.stats["chars_scanned"] += result.scanned_chars
+        self.stats["patterns_run"] += result.patterns_run
+        self.stats["total_scan_ms"] += result.duration_ms
+        self.stats["max_scan_ms"] = max(self.stats["max_scan_ms"], result.duration_ms)
+        self._durations.append(result.duration_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["avg_scan_ms"] = round(stats["total_scan_ms"] / stats["scans"], 4) if stats["scans"] else 0.0
+        if self._durations:
+            recent = sorted(self._durations)
+            stats["p50_scan_ms"] = round(recent[len(recent) // 2], 4)
+            stats["p99_scan_ms"] = round(recent[min(len(recent) - 1, int(len(recent) * 0.99))], 4)
+        stats["patterns"] = len(self.patterns)
+        stats["prefiltered_patterns"] = sum(1 for _, _, literals in self.patterns if literals is not None)
+        stats["max_scan_chars"] = self.max_scan_chars
+        return stats
@@ -11,6 +11,8 @@ import json
 import os
 import numpy as np
 
+from src.services.price_snapshot_service import price_snapshot_service
+
 def calculate_obv(prices, volumes):
     """Calculate On-Balance Volume (OBV)"""
     if len(prices) != len(volumes) or len(prices) < 2:
@@ -242,12 +244,8 @@ async def update_database_with_alert_data(symbol: str, alert_type: str, timefram
 async def update_technical_indicators_data(symbol: str, timeframe: str, alert_data: dict, cursor, current_time: datetime):
     """Update technical indicators data based on alert type"""
     try:
-        # Get current market data from Binance API
-        import requests
-        
-        response = requests.get(f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}", timeout=10)
-        response.raise_for_status()
-        ticker_data = response.json()
+        # Get current market data from the shared ticker snapshot
+        ticker_data = await price_snapshot_service.get_ticker(symbol)
         
         current_price = float(ticker_data['lastPrice'])
         volume = float(ticker_data['volume'])
@@ -484,13 +482,8 @@ async def update_all_symbols_data(current_time: datetime):
 async def create_alerts_for_symbol(symbol_id, symbol, cursor):
     """Create alerts for a specific symbol"""
     try:
-        import requests
-        
-        # Get current price from Binance API
-        response = requests.get(f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}", timeout=10)
-        response.raise_for_status()
-        
-        ticker_data = response.json()
+        # Get current price from the shared ticker snapshot
+        ticker_data = await price_snapshot_service.get_ticker(symbol)
         current_price = float(ticker_data['lastPrice'])
         price_change_24h = float(ticker_data.get('priceChangePercent', 0))
         
@@ -539,7 +532,8 @@ async def refresh_alerts_with_current_prices():
     global dynamic_alerts
     
     try:
-        import requests
+        # One bulk ticker snapshot serves every alert
+        snapshot = await price_snapshot_service.get_snapshot()
         updated_count = 0
         
         for alert_key, alert in dynamic_alerts.items():
@@ -550,11 +544,10 @@ async def refresh_alerts_with_current_prices():
             condition = alert["condition"]
             
             try:
-                # Get current real-time price from Binance API
-                response = requests.get(f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}", timeout=5)
-                response.raise_for_status()
-                
-                ticker_data = response.json()
+                # Get current real-time price from the snapshot
+                ticker_data = snapshot.get(symbol)
+                if ticker_data is None:
+                    raise KeyError(f"No ticker for {symbol}")
                 current_price = float(ticker_data['lastPrice'])
                 
                 # Update alert with current price
@@ -746,10 +739,9 @@ async def sync_alerts_with_symbols():
             alert_counter += 1
             # Get real current price for threshold
             try:
-                import requests
-                response = requests.get(f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}")
-                if response.status_code == 200:
-                    current_price = float(response.json()['lastPrice'])
+                ticker_data = (await price_snapshot_service.get_snapshot()).get(symbol)
+                if ticker_data is not None:
+                    current_price = float(ticker_data['lastPrice'])
                     # Set threshold 5% above current price
                     threshold = current_price * 1.05
                 else:
@@ -850,11 +842,7 @@ async def trigger_alert_update(symbol: str, timeframe: str = "1h"):
     """Manually trigger alert-triggered update for a specific symbol (for testing)"""
     try:
         # Get current market data
-        import requests
-        
-        response = requests.get(f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}", timeout=10)
-        response.raise_for_status()
-        ticker_data = response.json()
+        ticker_data = await price_snapshot_service.get_ticker(symbol)
         
         current_price = float(ticker_data['lastPrice'])
         price_change_24h = float(ticker_data.get('priceChangePercent', 0))
@@ -937,15 +925,12 @@ async def sync_alerts_with_portfolio():
 async def get_symbol_technical_analysis(symbol: str):
     """Get comprehensive technical analysis for a specific symbol - FIXED VERSION"""
     try:
-        import requests
         import sqlite3
         import os
         from src.services.technical_analysis_service import TechnicalAnalysisService
         
         # Get current price and 24hr data
-        response = requests.get(f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}", timeout=10)
-        response.raise_for_status()
-        ticker_data = response.json()
+        ticker_data = await price_snapshot_service.get_ticker(symbol)
         
         current_price = float(ticker_data['lastPrice'])
         price_change_24h = float(ticker_data.get('priceChangePercent', 0))
@@ -77,7 +77,8 @@ async def get_update_status():
             "total_with_files": len(symbols_with_files),
             "total_without_files": len(symbols_without_files),
             "last_update": "2025-08-10T12:30:00Z",  # You can implement actual last update tracking
-            "next_scheduled": "2025-08-11T00:05:00Z"
+            "next_scheduled": "2025-08-11T00:05:00Z",
+            "sync": updater.sync_engine.get_stats()
         }
         
     except Exception as e:
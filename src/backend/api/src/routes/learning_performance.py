@@ -385,6 +385,17 @@ async def get_accuracy_by_symbol(agent_name: str) -> Dict[str, Any]:
         logger.error(f"Error getting accuracy by symbol for {agent_name}: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting symbol accuracy: {str(e)}")
 
+@router.get("/training/status")
+async def get_training_status() -> Dict[str, Any]:
+    """Get background model trainer queue depth and job latency"""
+    if not LEARNING_AVAILABLE or not learning_system:
+        raise HTTPException(status_code=503, detail="Learning system not available")
+    
+    return {
+        "training": learning_system.get_training_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @router.get("/health")
 async def get_learning_health() -> Dict[str, Any]:
     """Get comprehensive health status of learning system"""
@@ -211,10 +211,9 @@ async def update_symbol_bounds(
         
         # Update bounds in agent
         symbol = symbol.upper()
-        agent.SYMBOL_BOUNDS[symbol] = {'min': min_price, 'max': max_price}
-        success = True
+        success = await agent.update_symbol_bounds(symbol, min_price, max_price, reason)
         if not success:
-            raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
+            raise HTTPException(status_code=500, detail=f"Failed to update bounds for {symbol}")
         
         return {
             "message": f"Symbol {symbol.upper()} bounds updated successfully",
@@ -423,9 +422,10 @@ async def admin_update_symbol_bounds(symbol: str, bounds_data: dict):
             raise HTTPException(status_code=400, detail="min_price and max_price required")
         
         # Update bounds using the agent
-        # Update bounds in agent
         symbol = symbol.upper()
-        agent.SYMBOL_BOUNDS[symbol] = {'min': min_price, 'max': max_price}
+        success = await agent.update_symbol_bounds(symbol, min_price, max_price, reason)
+        if not success:
+            raise HTTPException(status_code=500, detail=f"Failed to update bounds for {symbol}")
         result = {"success": True, "message": "Bounds updated"}
         
         return {
@@ -438,6 +438,8 @@ async def admin_update_symbol_bounds(symbol: str, bounds_data: dict):
             'result': result,
             'timestamp': datetime.now().isoformat()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating bounds for {symbol}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
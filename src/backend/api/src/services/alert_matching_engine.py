@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Alert Matching Engine
+Threshold-indexed PRICE alert matching and shared TECHNICAL condition evaluation
+
+PRICE alerts are kept per symbol in sorted threshold lists, one per operator.
+A price update bisects from the previous price to the new one and returns only
+the alerts whose threshold the move crossed, so a tick costs O(log n + k)
+however many alerts a symbol has. Alerts fire when their condition becomes
+true, not again on every tick it keeps holding; alerts added since the last
+update are checked once against the new price, so a condition that already
+holds at creation still fires.
+
+TECHNICAL alerts are grouped per symbol by their condition. Each distinct
+condition is evaluated once per indicator snapshot and the verdict is shared
+by every alert in the group.
+"""
+
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRICE_OPERATORS = ('above', 'below', 'crosses', 'equals')
+
+# Same tolerance as RealAlertEngine._check_price_condition
+EQUALS_TOLERANCE = 0.01
+
+INF = float('inf')
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Exchange symbol an alert symbol trades as ('BTC/USDT:USDT' -> 'BTCUSDT')"""
+    return symbol.replace('/USDT:USDT', 'USDT').replace('/', '')
+
+
+def price_condition_met(price: float, threshold: float, operator: str,
+                        tolerance: float = EQUALS_TOLERANCE) -> bool:
+    """Whether a price satisfies a PRICE condition on its own ('crosses' needs a move)"""
+    if operator == 'above':
+        return price > threshold
+    if operator == 'below':
+        return price < threshold
+    if operator == 'equals':
+        return abs(price - threshold) < tolerance
+    return False
+
+
+def technical_condition_key(conditions: Dict[str, Any]) -> Tuple:
+    """Hashable form of the parts of a TECHNICAL condition that are evaluated"""
+    key = []
+    if 'rsi' in conditions:
+        key.append(('rsi', float(conditions['rsi'])))
+    if 'macd' in conditions:
+        key.append(('macd',))
+    return tuple(key)
+
+
+def evaluate_technical(key: Tuple, indicators: Dict[str, float]) -> bool:
+    """RSI above its threshold (overbought) or MACD above its signal line (bullish)"""
+    for condition in key:
+        if condition[0] == 'rsi' and indicators.get('rsi', 50) > condition[1]:
+            return True
+        if condition[0] == 'macd' and indicators.get('macd', 0) > indicators.get('macd_signal', 0):
+            return True
+    return False
+
+
+class ThresholdIndex:
+    """Alert IDs sorted by threshold"""
+
+    def __init__(self):
+        self.thresholds: List[float] = []
+        self.alert_ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.thresholds)
+
+    def add(self, threshold: float, alert_id: str):
+        i = bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(i, threshold)
+        self.alert_ids.insert(i, alert_id)
+
+    def remove(self, threshold: float, alert_id: str) -> bool:
+        i = bisect_left(self.thresholds, threshold)
+        while i < len(self.thresholds) and self.thresholds[i] == threshold:
+            if self.alert_ids[i] == alert_id:
+                del self.thresholds[i]
+                del self.alert_ids[i]
+                return True
+            i += 1
+        return False
+
+    def _bounds(self, low: float, high: float, include_low: bool, include_high: bool) -> Tuple[int, int]:
+        start = bisect_left(self.thresholds, low) if include_low else bisect_right(self.thresholds, low)
+        end = bisect_right(self.thresholds, high) if include_high else bisect_left(self.thresholds, high)
+        return start, end
+
+    def between(self, low: float, high: float, include_low: bool = True, include_high: bool = True) -> List[str]:
+        """Alert IDs with a threshold between low and high"""
+        start, end = self._bounds(low, high, include_low, include_high)
+        return self.alert_ids[start:end]
+
+    def items_between(self, low: float, high: float, include_low: bool = True,
+                      include_high: bool = True) -> List[Tuple[float, str]]:
+        start, end = self._bounds(low, high, include_low, include_high)
+        return list(zip(self.thresholds[start:end], self.alert_ids[start:end]))
+
+
+class _SymbolAlerts:
+    """Everything the engine keeps for one symbol"""
+    __slots__ = ('indexes', 'technical', 'count', 'last_price', 'fresh', 'fresh_technical', 'snapshot', 'verdicts')
+
+    def __init__(self):
+        self.indexes = {operator: ThresholdIndex() for operator in PRICE_OPERATORS}
+        self.technical: Dict[Tuple, Set[str]] = {}  # condition key -> alert IDs
+        self.count = 0
+        self.last_price: Optional[float] = None
+        self.fresh: List[str] = []  # PRICE alerts added since the last price update
+        self.fresh_technical: List[str] = []  # TECHNICAL alerts added since the last evaluation
+        self.snapshot: Optional[Tuple] = None  # last evaluated indicator snapshot
+        self.verdicts: Dict[Tuple, bool] = {}  # condition key -> verdict on that snapshot
+
+
+class AlertMatchingEngine:
+    """
+    Matches price ticks and indicator snapshots against indexed alerts
+    """
+
+    def __init__(self, equals_tolerance: float = EQUALS_TOLERANCE):
+        self.equals_tolerance = equals_tolerance
+        self.symbols: Dict[str, _SymbolAlerts] = {}
+        # alert_id -> (symbol, operator or 'technical', threshold or condition key)
+        self.alerts: Dict[str, Tuple[str, str, Any]] = {}
+
+        self.stats = {
+            'price_updates': 0,
+            'price_matches': 0,
+            'fresh_checks': 0,
+            'indicator_snapshots': 0,
+            'technical_evaluations': 0,
+            'technical_matches': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def _entry(self, symbol: str) -> _SymbolAlerts:
+        entry = self.symbols.get(symbol)
+        if entry is None:
+            entry = self.symbols[symbol] = _SymbolAlerts()
+        return entry
+
+    def add_price_alert(self, alert_id: str, symbol: str, threshold: float, operator: str):
+        if operator not in PRICE_OPERATORS:
+            raise ValueError(f"Unknown price operator: {operator}")
+        self.remove(alert_id)
+        symbol = normalize_symbol(symbol)
+        entry = self._entry(symbol)
+        threshold = float(threshold)
+        entry.indexes[operator].add(threshold, alert_id)
+        entry.fresh.append(alert_id)
+        entry.count += 1
+        self.alerts[alert_id] = (symbol, operator, threshold)
+
+    def add_technical_alert(self, alert_id: str, symbol: str, conditions: Dict[str, Any]):
+        self.remove(alert_id)
+        symbol = normalize_symbol(symbol)
+        entry = self._entry(symbol)
+        key = technical_condition_key(conditions)
+        entry.technical.setdefault(key, set()).add(alert_id)
+        entry.fresh_technical.append(alert_id)
+        entry.count += 1
+        self.alerts[alert_id] = (symbol, 'technical', key)
+
+    def remove(self, alert_id: str) -> bool:
+        info = self.alerts.pop(alert_id, None)
+        if info is None:
+            return False
+        symbol, kind, value = info
+        entry = self.symbols[symbol]
+        if kind == 'technical':
+            group = entry.technical[value]
+            group.discard(alert_id)
+            if not group:
+                del entry.technical[value]
+        else:
+            entry.indexes[kind].remove(value, alert_id)
+        entry.count -= 1
+        if not entry.count:
+            del self.symbols[symbol]
+        return True
+
+    def alert_count(self, symbol: str) -> int:
+        entry = self.symbols.get(normalize_symbol(symbol))
+        return entry.count if entry else 0
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        entry = self.symbols.get(normalize_symbol(symbol))
+        return entry.last_price if entry else None
+
+    def technical_symbols(self) -> List[str]:
+        return [symbol for symbol, entry in self.symbols.items() if entry.technical]
+
+    def _is_pending(self, alert_id: str, symbol: str, technical: bool) -> bool:
+        """A fresh-list entry still refers to a live alert of that kind on that symbol"""
+        info = self.alerts.get(alert_id)
+        return info is not None and info[0] == symbol and (info[1] == 'technical') == technical
+
+    def update_price(self, symbol: str, price: float) -> List[str]:
+        """PRICE alerts whose condition became true with this price"""
+        symbol = normalize_symbol(symbol)
+        entry = self.symbols.get(symbol)
+        if entry is None:
+            return []
+        self.stats['price_updates'] += 1
+        previous, entry.last_price = entry.last_price, price
+        indexes = entry.indexes
+
+        if previous is None:
+            matched = indexes['above'].between(-INF, price, True, False) + indexes['below'].between(price, INF, False, True)
+        elif price > previous:
+            # above: threshold in [previous, price); crosses upward likewise
+            matched = indexes['above'].between(previous, price, True, False) + \
+                indexes['crosses'].between(previous, price, True, False)
+        elif price < previous:
+            # below: threshold in (price, previous]; crosses downward likewise
+            matched = indexes['below'].between(price, previous, False, True) + \
+                indexes['crosses'].between(price, previous, False, True)
+        else:
+            matched = []
+
+        tolerance = self.equals_tolerance
+        if len(indexes['equals']) and price != previous:
+            for threshold, alert_id in indexes['equals'].items_between(price - tolerance, price + tolerance):
+                if abs(price - threshold) < tolerance and (previous is None or abs(previous - threshold) >= tolerance):
+                    matched.append(alert_id)
+
+        if entry.fresh:
+            if previous is not None:
+                seen = set(matched)
+                for alert_id in dict.fromkeys(entry.fresh):
+                    if alert_id in seen or not self._is_pending(alert_id, symbol, False):
+                        continue
+                    self.stats['fresh_checks'] += 1
+                    _, operator, threshold = self.alerts[alert_id]
+                    if price_condition_met(price, threshold, operator, tolerance):
+                        matched.append(alert_id)
+            entry.fresh = []
+
+        self.stats['price_matches'] += len(matched)
+        return matched
+
+    def update_indicators(self, symbol: str, indicators: Dict[str, float]) -> List[str]:
+        """TECHNICAL alerts that hold on this snapshot and were not matched on it before"""
+        symbol = normalize_symbol(symbol)
+        entry = self.symbols.get(symbol)
+        if entry is None or not entry.technical or not indicators:
+            return []
+        snapshot = tuple(sorted(indicators.items()))
+
+        if snapshot != entry.snapshot:
+            self.stats['indicator_snapshots'] += 1
+            entry.snapshot = snapshot
+            entry.verdicts = {}
+            candidates = None  # every group
+            keys = list(entry.technical)
+        else:
+            candidates = {
+                alert_id for alert_id in entry.fresh_technical
+                if self._is_pending(alert_id, symbol, True)
+            }
+            keys = {self.alerts[alert_id][2] for alert_id in candidates}
+        entry.fresh_technical = []
+
+        matched = []
+        for key in keys:
+            verdict = entry.verdicts.get(key)
+            if verdict is None:
+                verdict = entry.verdicts[key] = evaluate_technical(key, indicators)
+                self.stats['technical_evaluations'] += 1
+            if verdict:
+                group = entry.technical[key]
+                matched.extend(group if candidates is None else group & candidates)
+
+        self.stats['technical_matches'] += len(matched)
+        return matched
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['alerts'] = len(self.alerts)
+        stats['symbols'] = len(self.symbols)
+        return stats
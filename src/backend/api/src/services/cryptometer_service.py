@@ -30,6 +30,7 @@ import statistics
 
 # Import enhanced rate limiter
 from src.utils.enhanced_rate_limiter import global_rate_limiter, rate_limited_request
+from src.utils.bounded_cache import BoundedTTLCache
 
 # AI Win Rate Predictor temporarily disabled - using unified scoring system
 # from src.agents.scoring.ai_win_rate_predictor import (
@@ -546,7 +547,8 @@ class MultiTimeframeCryptometerSystem:
     Enhanced with caching and optimized rate limiting
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache_max_bytes: int = 64 * 1024 * 1024,
+                 cache_policy: str = 'lru', stale_while_revalidate: bool = True):
         # Resolve API key from explicit arg, environment, or settings
         resolved_key = (
             api_key
@@ -558,6 +560,10 @@ class MultiTimeframeCryptometerSystem:
         self.api_key = resolved_key or ""
         self.base_url = "https://api.cryptometer.io"
         self.session = requests.Session()
+        # Pool sized for concurrent collection (requests run in worker threads)
+        self.max_concurrent_requests = 16
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrent_requests)
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'User-Agent': 'Cryptometer-MultiTimeframe/1.0',
             'Accept': 'application/json'
@@ -573,7 +579,6 @@ class MultiTimeframeCryptometerSystem:
         self.ai_agent = MultiTimeframeAIAgent()
         
         # ENHANCEMENT: Add caching layer
-        self.cache = {}  # Simple memory cache
         self.cache_ttl = {
             'ticker': 30,                    # 30 seconds
             'tickerlist': 60,                 # 1 minute
@@ -587,7 +592,20 @@ class MultiTimeframeCryptometerSystem:
             'coin_info': 900,                 # 15 minutes
             'default': 60                     # Default 1 minute
         }
-        self.fallback_data = {}  # Fallback storage for rate limit scenarios
+        # Bounded cache: expired entries stay as stale fallback data (for rate
+        # limit / error scenarios) until evicted by the memory budget or aged
+        # out after cache_max_stale seconds
+        self.cache_max_stale = 6 * 3600
+        self.cache = BoundedTTLCache(max_bytes=cache_max_bytes, policy=cache_policy,
+                                     max_stale=self.cache_max_stale)
+        # Stale-while-revalidate: an entry less than one extra TTL past expiry
+        # is returned immediately while a background request refreshes it
+        self.stale_while_revalidate = stale_while_revalidate
+        
+        # In-flight upstream requests by cache key, so identical concurrent
+        # requests (same endpoint + params) share a single upstream call
+        self._inflight_requests: Dict[str, asyncio.Task] = {}
+        self.request_stats = {'upstream_requests': 0, 'coalesced_requests': 0}
         
         # All working endpoints with CORRECT parameter names from API documentation
         self.endpoints = {
@@ -693,23 +711,26 @@ class MultiTimeframeCryptometerSystem:
     
     def _get_from_cache(self, cache_key: str, endpoint_name: str) -> Optional[dict]:
         """Get data from cache if not expired"""
-        if cache_key in self.cache:
-            entry = self.cache[cache_key]
-            ttl = self.cache_ttl.get(endpoint_name, self.cache_ttl['default'])
-            age = time.time() - entry['timestamp']
-            if age < ttl:
-                logger.debug(f"Cache hit for {endpoint_name} (age: {age:.1f}s)")
-                return entry['data']
-        return None
+        return self.cache.peek(cache_key, allow_stale=False)
     
-    def _set_cache(self, cache_key: str, data: dict):
-        """Store data in cache"""
-        self.cache[cache_key] = {
-            'data': data,
-            'timestamp': time.time()
-        }
-        # Also update fallback
-        self.fallback_data[cache_key] = data
+    def _set_cache(self, cache_key: str, data: dict, endpoint_name: str):
+        """Store data in cache with the endpoint's TTL"""
+        ttl = self.cache_ttl.get(endpoint_name, self.cache_ttl['default'])
+        self.cache.set(cache_key, data, ttl)
+    
+    def _get_fallback(self, cache_key: str, endpoint_name: str, reason: str) -> Optional[dict]:
+        """Last known response for a cache key, fresh or stale"""
+        data = self.cache.get_fallback(cache_key)
+        if data is not None:
+            logger.info(f"Using fallback data for {endpoint_name} {reason}")
+        return data
+    
+    def _start_upstream_request(self, url: str, params: dict, endpoint_name: str, cache_key: str) -> asyncio.Task:
+        """Schedule an upstream call registered as in flight for its cache key"""
+        task = asyncio.ensure_future(self._upstream_request(url, dict(params), endpoint_name, cache_key))
+        self._inflight_requests[cache_key] = task
+        task.add_done_callback(lambda _: self._inflight_requests.pop(cache_key, None))
+        return task
 
     async def _safe_request(self, url: str, params: dict, endpoint_name: str) -> Tuple[dict, bool]:
         """Make safe API request with enhanced rate limiting, caching, and error handling"""
@@ -718,16 +739,46 @@ class MultiTimeframeCryptometerSystem:
             cache_key = self._get_cache_key(endpoint_name, params)
             
             # Check cache first
-            cached_data = self._get_from_cache(cache_key, endpoint_name)
-            if cached_data is not None:
+            ttl = self.cache_ttl.get(endpoint_name, self.cache_ttl['default'])
+            cached_data, status = self.cache.get(cache_key, serve_stale_for=ttl if self.stale_while_revalidate else 0)
+            task = self._inflight_requests.get(cache_key)
+            running_here = task is not None and task.get_loop() is asyncio.get_running_loop()
+            
+            if status == 'fresh':
+                return cached_data, True
+            if status == 'stale':
+                # Serve the stale copy now and refresh it in the background
+                if not running_here:
+                    self._start_upstream_request(url, params, endpoint_name, cache_key)
                 return cached_data, True
             
+            # Join an identical request that is already in flight
+            if running_here:
+                self.request_stats['coalesced_requests'] += 1
+                return await asyncio.shield(task)
+            
+            task = self._start_upstream_request(url, params, endpoint_name, cache_key)
+            return await asyncio.shield(task)
+                
+        except Exception as e:
+            logger.error(f"Error in API request for {endpoint_name}: {e}")
+            # Try fallback on exception
+            cache_key = self._get_cache_key(endpoint_name, params)
+            data = self._get_fallback(cache_key, endpoint_name, "after exception")
+            if data is not None:
+                return data, True
+            return {}, False
+    
+    async def _upstream_request(self, url: str, params: dict, endpoint_name: str, cache_key: str) -> Tuple[dict, bool]:
+        """Single upstream call under the shared Cryptometer rate-limit budget"""
+        try:
             # Add API key to params
             params['api_key'] = self.api_key
+            self.request_stats['upstream_requests'] += 1
             
-            # Define the request function
-            def make_request():
-                return self.session.get(url, params=params, timeout=30)
+            # Blocking HTTP runs in a worker thread so concurrent requests overlap
+            async def make_request():
+                return await asyncio.to_thread(self.session.get, url, params=params, timeout=30)
             
             # Execute with enhanced rate limiting
             response, success = await rate_limited_request('cryptometer', make_request)
@@ -736,7 +787,7 @@ class MultiTimeframeCryptometerSystem:
                 try:
                     data = response.json()
                     # Cache successful response
-                    self._set_cache(cache_key, data)
+                    self._set_cache(cache_key, data, endpoint_name)
                     return data, True
                 except json.JSONDecodeError as e:
                     logger.error(f"JSON decode error for {endpoint_name}: {e}")
@@ -744,28 +795,43 @@ class MultiTimeframeCryptometerSystem:
             elif response and response.status_code == 429:
                 logger.warning(f"Rate limited for {endpoint_name} (429), checking fallback")
                 # Try fallback data
-                if cache_key in self.fallback_data:
-                    logger.info(f"Using fallback data for {endpoint_name}")
-                    return self.fallback_data[cache_key], True
+                data = self._get_fallback(cache_key, endpoint_name, "after rate limit")
+                if data is not None:
+                    return data, True
                 return {}, False
             else:
                 status = response.status_code if response else 'No response'
                 logger.warning(f"API request failed for {endpoint_name}: {status}")
                 # Try fallback on any failure
-                if cache_key in self.fallback_data:
-                    logger.info(f"Using fallback data for {endpoint_name} after error")
-                    return self.fallback_data[cache_key], True
+                data = self._get_fallback(cache_key, endpoint_name, "after error")
+                if data is not None:
+                    return data, True
                 return {}, False
                 
         except Exception as e:
             logger.error(f"Error in API request for {endpoint_name}: {e}")
-            # Try fallback on exception
-            cache_key = self._get_cache_key(endpoint_name, params)
-            if cache_key in self.fallback_data:
-                logger.info(f"Using fallback data for {endpoint_name} after exception")
-                return self.fallback_data[cache_key], True
+            data = self._get_fallback(cache_key, endpoint_name, "after exception")
+            if data is not None:
+                return data, True
             return {}, False
     
+    def _format_endpoint_params(self, endpoint_name: str, symbol: str) -> dict:
+        """Endpoint params with the {symbol} placeholder formatted for that endpoint"""
+        params = self.endpoints[endpoint_name]['params'].copy()
+        
+        for key, value in params.items():
+            if isinstance(value, str) and '{symbol}' in value:
+                # Special handling for different endpoints
+                if endpoint_name in ('liquidation_data_v2', 'ls_ratio'):
+                    # Use lowercase symbol only (btc, eth, etc.)
+                    formatted_symbol = symbol.lower()
+                else:
+                    # Default to uppercase (BTCUSDT format for futures)
+                    formatted_symbol = symbol.upper()
+                params[key] = value.replace('{symbol}', formatted_symbol)
+        
+        return params
+    
     async def collect_symbol_data(self, symbol: str) -> Dict[str, Any]:
         """Collect comprehensive data for a symbol from all endpoints"""
         try:
@@ -830,14 +896,20 @@ class MultiTimeframeCryptometerSystem:
                 'timestamp': datetime.utcnow().isoformat()
             }
     
-    async def batch_collect_symbols(self, symbols: List[str], priority_endpoints: Optional[List[str]] = None) -> Dict[str, Any]:
+    async def batch_collect_symbols(self, symbols: List[str], priority_endpoints: Optional[List[str]] = None,
+                                    concurrent: bool = False) -> Dict[str, Any]:
         """
         Batch collect data for multiple symbols with intelligent caching
         
         Args:
             symbols: List of symbols to process
             priority_endpoints: Optional list of specific endpoints to use
+            concurrent: Fan out all endpoints for all symbols at once under the
+                shared rate-limit budget instead of one request at a time
         """
+        if concurrent:
+            return await self.concurrent_collect_symbols(symbols, priority_endpoints)
+        
         results: Dict[str, Any] = {}
         
         # Use priority endpoints if specified, otherwise use all
@@ -852,25 +924,7 @@ class MultiTimeframeCryptometerSystem:
                     
                 config = self.endpoints[endpoint_name]
                 url = f"{self.base_url}/{config['url']}"
-                params = config['params'].copy()
-                
-                # Replace symbol placeholder with proper formatting
-                for key, value in params.items():
-                    if isinstance(value, str) and '{symbol}' in value:
-                        # Special handling for different endpoints
-                        if endpoint_name == 'liquidation_data_v2':
-                            # Use lowercase symbol only (btc, eth, etc.)
-                            formatted_symbol = symbol.lower()
-                        elif endpoint_name == 'ls_ratio':
-                            # Use lowercase for ls_ratio
-                            formatted_symbol = symbol.lower()
-                        elif endpoint_name == 'open_interest':
-                            # Use uppercase for futures (BTCUSDT format)
-                            formatted_symbol = symbol.upper()
-                        else:
-                            # Default to uppercase
-                            formatted_symbol = symbol.upper()
-                        params[key] = value.replace('{symbol}', formatted_symbol)
+                params = self._format_endpoint_params(endpoint_name, symbol)
                 
                 # This will use cache if available
                 data, success = await self._safe_request(url, params, endpoint_name)
@@ -891,64 +945,90 @@ class MultiTimeframeCryptometerSystem:
         
         return results
     
-    def get_cache_stats(self) -> Dict[str, Any]:
-        """Get cache statistics"""
-        total_entries = len(self.cache)
-        fallback_entries = len(self.fallback_data)
+    async def concurrent_collect_symbols(self, symbols: List[str], endpoints: Optional[List[str]] = None,
+                                         max_concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Collect all endpoints for all symbols concurrently
+        
+        Requests with identical endpoint + params (e.g. coinlist, ai_screener)
+        are issued once and shared by every symbol. Wall time is bounded by the
+        Cryptometer rate limit rather than the sum of request latencies.
+        """
+        endpoints_to_use = [e for e in (endpoints or list(self.endpoints.keys())) if e in self.endpoints]
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrent_requests)
         
-        # Count fresh vs stale entries
-        fresh = 0
-        stale = 0
-        current_time = time.time()
+        # One request per distinct cache key; symbols map onto the shared results
+        requests_by_key: Dict[str, Tuple[str, str, dict]] = {}
+        assignments: List[Tuple[str, str, str]] = []
+        for symbol in symbols:
+            for endpoint_name in endpoints_to_use:
+                params = self._format_endpoint_params(endpoint_name, symbol)
+                cache_key = self._get_cache_key(endpoint_name, params)
+                if cache_key not in requests_by_key:
+                    url = f"{self.base_url}/{self.endpoints[endpoint_name]['url']}"
+                    requests_by_key[cache_key] = (url, endpoint_name, params)
+                assignments.append((symbol, endpoint_name, cache_key))
         
-        for key, entry in self.cache.items():
-            # Try to determine endpoint from key
-            endpoint = 'default'
-            for ep_name in self.endpoints.keys():
-                if ep_name in str(key):
-                    endpoint = ep_name
-                    break
-            
-            ttl = self.cache_ttl.get(endpoint, self.cache_ttl['default'])
-            age = current_time - entry['timestamp']
-            
-            if age < ttl:
-                fresh += 1
-            else:
-                stale += 1
+        async def fetch(cache_key: str) -> Tuple[dict, bool, bool]:
+            url, endpoint_name, params = requests_by_key[cache_key]
+            cached = self._get_from_cache(cache_key, endpoint_name) is not None
+            if cached:
+                data, success = await self._safe_request(url, params, endpoint_name)
+                return data, success, True
+            async with semaphore:
+                data, success = await self._safe_request(url, params, endpoint_name)
+            return data, success, False
+        
+        keys = list(requests_by_key.keys())
+        outcomes = await asyncio.gather(*(fetch(key) for key in keys), return_exceptions=True)
+        fetched = dict(zip(keys, outcomes))
+        
+        results: Dict[str, Any] = {symbol: {'symbol': symbol} for symbol in symbols}
+        for symbol, endpoint_name, cache_key in assignments:
+            outcome = fetched[cache_key]
+            if isinstance(outcome, BaseException):
+                logger.warning(f"Error collecting {endpoint_name} for {symbol}: {outcome}")
+                results[symbol][endpoint_name] = {'success': False, 'data': {}, 'cached': False,
+                                                  'error': str(outcome)}
+                continue
+            data, success, cached = outcome
+            results[symbol][endpoint_name] = {
+                'success': success,
+                'data': data if success else {},
+                'cached': cached
+            }
+        
+        logger.info(f"Concurrent collection: {len(symbols)} symbols, {len(assignments)} endpoint calls, "
+                    f"{len(keys)} distinct requests")
+        return results
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        freshness = self.cache.freshness()
+        stats = self.cache.get_stats()
         
         return {
-            'total_entries': total_entries,
-            'fresh_entries': fresh,
-            'stale_entries': stale,
-            'fallback_entries': fallback_entries,
-            'cache_hit_rate': f"{(fresh / total_entries * 100) if total_entries > 0 else 0:.1f}%"
+            'total_entries': len(self.cache),
+            'fresh_entries': freshness['fresh'],
+            'stale_entries': freshness['stale'],
+            'fallback_entries': freshness['fallback'],
+            'memory_bytes': stats['memory_bytes'],
+            'memory_budget_bytes': stats['memory_budget_bytes'],
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'stale_serves': stats['stale_serves'],
+            'fallback_serves': stats['fallback_serves'],
+            'evictions': stats['evictions'],
+            'upstream_requests': self.request_stats['upstream_requests'],
+            'coalesced_requests': self.request_stats['coalesced_requests'],
+            'cache_hit_rate': f"{stats['hit_rate'] * 100:.1f}%"
         }
     
     def clear_stale_cache(self):
-        """Remove expired cache entries"""
-        current_time = time.time()
-        keys_to_remove = []
-        
-        for key, entry in self.cache.items():
-            # Try to determine endpoint
-            endpoint = 'default'
-            for ep_name in self.endpoints.keys():
-                if ep_name in str(key):
-                    endpoint = ep_name
-                    break
-            
-            ttl = self.cache_ttl.get(endpoint, self.cache_ttl['default'])
-            age = current_time - entry['timestamp']
-            
-            if age > ttl:
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del self.cache[key]
-        
-        if keys_to_remove:
-            logger.info(f"Cleared {len(keys_to_remove)} stale cache entries")
+        """Remove cache entries past their stale-retention window"""
+        removed = self.cache.purge_expired()
+        if removed:
+            logger.info(f"Cleared {removed} stale cache entries")
 
     async def get_cryptometer_win_rate(self, symbol: str) -> Dict[str, Any]:
         """Get Cryptometer win rate prediction using AI analysis of 17 endpoints"""
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 """
 Daily Price History Updater
-Updates all symbol price history files with the latest daily data
-Runs once per day to keep all files current
+Appends the latest daily bars for every symbol to the columnar price history store
+Runs once per day to keep all series current
 """
 
 import os
@@ -18,14 +18,22 @@ from pathlib import Path
 import time
 import schedule
 
+from .price_history_store import (
+    PriceHistoryStore, price_history_store, symbol_for_csv, csv_files_by_symbol, import_csv_directory,
+    bars_from_coingecko, bars_from_binance_klines
+)
+from .price_sync_engine import PriceSyncEngine
+
 logger = logging.getLogger(__name__)
 
 class DailyPriceUpdater:
-    """Updates all symbol price history files with latest daily data"""
+    """Updates all symbol price history series with latest daily data"""
     
-    def __init__(self, history_data_path: Optional[str] = None, db_path: Optional[str] = None):
+    def __init__(self, history_data_path: Optional[str] = None, db_path: Optional[str] = None,
+                 price_store: Optional[PriceHistoryStore] = None):
         self.history_data_path = history_data_path or "/Users/dansidanutz/Desktop/ZmartBot/Symbol_Price_history_data"
         self.db_path = db_path or "/Users/dansidanutz/Desktop/ZmartBot/backend/zmart-api/my_symbols_v2.db"
+        self.price_store = price_store or price_history_store
         
         # CoinGecko API mapping
         self.symbol_to_coingecko = {
@@ -131,6 +139,14 @@ class DailyPriceUpdater:
         # Create logs directory
         self.logs_path = Path(self.history_data_path) / "logs"
         self.logs_path.mkdir(exist_ok=True)
+        
+        # Concurrent bulk sync; the checkpoint lets an interrupted morning run resume
+        self.sync_engine = PriceSyncEngine(
+            self.symbol_to_coingecko,
+            self.symbol_to_binance,
+            store=self.price_store,
+            checkpoint_path=str(self.logs_path / "sync_checkpoint.json")
+        )
     
     async def get_my_symbols(self) -> List[str]:
         """Get all symbols from My Symbols database"""
@@ -151,58 +167,53 @@ class DailyPriceUpdater:
         """Get mapping of symbols to their existing CSV files"""
         existing_files = {}
         
-        for file in os.listdir(self.history_data_path):
+        for file in sorted(os.listdir(self.history_data_path)):
             if file.endswith('.csv') and not file.startswith('.'):
-                # Extract symbol from filename
-                if 'coinmarketcap' in file:
-                    # Format: Bitcoin_7_1_2008-7_1_2025_historical_data_coinmarketcap.csv
-                    parts = file.replace('_historical_data_coinmarketcap.csv', '').split('_')
-                    if len(parts) >= 2:
-                        symbol_name = parts[0].upper()
-                        if symbol_name == 'BITCOIN':
-                            symbol = 'BTCUSDT'
-                        elif symbol_name == 'ETHEREUM':
-                            symbol = 'ETHUSDT'
-                        elif symbol_name == 'SOLANA':
-                            symbol = 'SOLUSDT'
-                        elif symbol_name == 'AVALANCHE':
-                            symbol = 'AVAXUSDT'
-                        elif symbol_name == 'CARDANO':
-                            symbol = 'ADAUSDT'
-                        elif symbol_name == 'XRP':
-                            symbol = 'XRPUSDT'
-                        elif symbol_name == 'POLKADOT':
-                            symbol = 'DOTUSDT'
-                        elif symbol_name == 'CHAINLINK':
-                            symbol = 'LINKUSDT'
-                        elif symbol_name == 'BNB':
-                            symbol = 'BNBUSDT'
-                        elif symbol_name == 'DOGECOIN':
-                            symbol = 'DOGEUSDT'
-                        elif symbol_name == 'AAVE':
-                            symbol = 'AAVEUSDT'
-                        else:
-                            symbol = f"{symbol_name}USDT"
-                        existing_files[symbol] = file
-                elif file.endswith('-usd-max.csv'):
-                    # Format: atom-usd-max.csv
-                    symbol_name = file.replace('-usd-max.csv', '').upper()
-                    if symbol_name == 'ATOM':
-                        symbol = 'ATOMUSDT'
-                    elif symbol_name == 'HBAR':
-                        symbol = 'HBARUSDT'
-                    elif symbol_name == 'MKR':
-                        symbol = 'MKRUSDT'
-                    elif symbol_name == 'TRX':
-                        symbol = 'TRXUSDT'
-                    elif symbol_name == 'XTZ':
-                        symbol = 'XTZUSDT'
-                    else:
-                        symbol = f"{symbol_name}USDT"
+                symbol = symbol_for_csv(file)
+                if symbol:
                     existing_files[symbol] = file
         
         return existing_files
     
+    def import_existing_files(self, symbols: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Merge the legacy CSV history files into the price history store
+
+        Only symbols whose files are new or changed since the last import are
+        read, so this runs before every sync: a symbol's multi-year CSV history
+        lands in the store before its first sync, and history added later is
+        merged in front of the stored bars.
+        """
+        state_path = self.logs_path / "csv_import_state.json"
+        try:
+            state = json.loads(state_path.read_text()) if state_path.exists() else {}
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable CSV import state: {e}")
+            state = {}
+        
+        wanted = {symbol.upper() for symbol in symbols} if symbols is not None else None
+        signatures = {
+            symbol: [[filename, os.path.getmtime(os.path.join(self.history_data_path, filename))] for filename in filenames]
+            for symbol, filenames in csv_files_by_symbol(self.history_data_path).items()
+            if wanted is None or symbol in wanted
+        }
+        pending = [symbol for symbol, signature in signatures.items() if state.get(symbol) != signature]
+        if not pending:
+            return {}
+        
+        imported = import_csv_directory(self.price_store, self.history_data_path, symbols=pending)
+        state.update({symbol: signatures[symbol] for symbol in pending})
+        state_path.write_text(json.dumps(state))
+        logger.info(f"📥 Imported {sum(imported.values())} bars for {len(imported)} symbols into the price history store")
+        return imported
+    
+    def _days_to_fetch(self, symbol: str, days: int) -> int:
+        """Only fetch the days after the last stored bar (plus that bar, which may be partial)"""
+        last = self.price_store.last_timestamp(symbol)
+        if last is None:
+            return days
+        return max(2, min(days, (datetime.now(last.tzinfo) - last).days + 2))
+    
     async def update_from_coingecko(self, symbol: str, days: int = 365) -> bool:
         """Update symbol data from CoinGecko API"""
         try:
@@ -211,6 +222,7 @@ class DailyPriceUpdater:
                 logger.error(f"❌ No CoinGecko ID found for {symbol}")
                 return False
             
+            days = self._days_to_fetch(symbol, days)
             url = f"https://api.coingecko.com/api/v3/coins/{coingecko_id}/market_chart"
             params = {
                 'vs_currency': 'usd',
@@ -223,19 +235,10 @@ class DailyPriceUpdater:
                     if response.status == 200:
                         data = await response.json()
                         
-                        # Create filename
-                        symbol_name = symbol.replace('USDT', '').lower()
-                        filename = f"{symbol_name.capitalize()}_coingecko_{days}d_historical_data.csv"
-                        file_path = os.path.join(self.history_data_path, filename)
+                        # Append the new daily bars
+                        added = self.price_store.append(bars_from_coingecko(symbol, data))
                         
-                        # Convert to CSV format
-                        csv_content = self._convert_coingecko_to_csv(data, symbol)
-                        
-                        # Save file
-                        with open(file_path, 'w') as f:
-                            f.write(csv_content)
-                        
-                        logger.info(f"✅ Updated {symbol} from CoinGecko: {len(data['prices'])} records")
+                        logger.info(f"✅ Updated {symbol} from CoinGecko: {len(data['prices'])} records, {added} new bars")
                         return True
                     else:
                         logger.error(f"❌ Failed to update {symbol} from CoinGecko: {response.status}")
@@ -253,6 +256,7 @@ class DailyPriceUpdater:
                 logger.error(f"❌ No Binance symbol found for {symbol}")
                 return False
             
+            days = self._days_to_fetch(symbol, days)
             # Calculate start time (days ago)
             end_time = int(time.time() * 1000)
             start_time = end_time - (days * 24 * 60 * 60 * 1000)
@@ -271,19 +275,10 @@ class DailyPriceUpdater:
                     if response.status == 200:
                         data = await response.json()
                         
-                        # Create filename
-                        symbol_name = symbol.replace('USDT', '').lower()
-                        filename = f"{symbol_name.capitalize()}_binance_{days}d_historical_data.csv"
-                        file_path = os.path.join(self.history_data_path, filename)
-                        
-                        # Convert to CSV format
-                        csv_content = self._convert_binance_to_csv(data, symbol)
+                        # Append the new daily bars
+                        added = self.price_store.append(bars_from_binance_klines(symbol, data))
                         
-                        # Save file
-                        with open(file_path, 'w') as f:
-                            f.write(csv_content)
-                        
-                        logger.info(f"✅ Updated {symbol} from Binance: {len(data)} records")
+                        logger.info(f"✅ Updated {symbol} from Binance: {len(data)} records, {added} new bars")
                         return True
                     else:
                         logger.error(f"❌ Failed to update {symbol} from Binance: {response.status}")
@@ -293,50 +288,11 @@ class DailyPriceUpdater:
             logger.error(f"❌ Error updating {symbol} from Binance: {e}")
             return False
     
-    def _convert_coingecko_to_csv(self, data: Dict, symbol: str) -> str:
-        """Convert CoinGecko data to CSV format"""
-        csv_lines = ['Date;Open;High;Low;Close;Volume;Market_Cap']
-        
-        prices = data.get('prices', [])
-        volumes = data.get('total_volumes', [])
-        market_caps = data.get('market_caps', [])
-        
-        for i, (timestamp, price) in enumerate(prices):
-            date = datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d')
-            
-            # Get volume and market cap for this date
-            volume = volumes[i][1] if i < len(volumes) else 0
-            market_cap = market_caps[i][1] if i < len(market_caps) else 0
-            
-            # For daily data, use same price for OHLC
-            csv_lines.append(f'{date};{price};{price};{price};{price};{volume};{market_cap}')
-        
-        return '\n'.join(csv_lines)
-    
-    def _convert_binance_to_csv(self, data: List, symbol: str) -> str:
-        """Convert Binance data to CSV format"""
-        csv_lines = ['Date;Open;High;Low;Close;Volume;Market_Cap']
-        
-        for candle in data:
-            # Binance klines format: [open_time, open, high, low, close, volume, close_time, ...]
-            date = datetime.fromtimestamp(candle[0] / 1000).strftime('%Y-%m-%d')
-            open_price = float(candle[1])
-            high_price = float(candle[2])
-            low_price = float(candle[3])
-            close_price = float(candle[4])
-            volume = float(candle[5])
-            
-            # Market cap not available from Binance klines, use 0
-            market_cap = 0
-            
-            csv_lines.append(f'{date};{open_price};{high_price};{low_price};{close_price};{volume};{market_cap}')
-        
-        return '\n'.join(csv_lines)
-    
     async def update_single_symbol(self, symbol: str) -> bool:
         """Update a single symbol with latest data"""
         try:
             logger.info(f"🔄 Updating {symbol}...")
+            self.import_existing_files([symbol])
             
             # Try CoinGecko first
             success = await self.update_from_coingecko(symbol, days=365)
@@ -369,13 +325,11 @@ class DailyPriceUpdater:
             
             logger.info(f"📊 Found {len(symbols)} symbols to update: {symbols}")
             
-            results = {}
-            for symbol in symbols:
-                success = await self.update_single_symbol(symbol)
-                results[symbol] = success
-                
-                # Rate limiting - CoinGecko allows 50 calls/minute
-                await asyncio.sleep(1.2)
+            # CSV history first, so the sync only fetches the days after it
+            self.import_existing_files(symbols)
+            
+            # Concurrent sync under the per-source rate budgets, resuming today's interrupted run
+            results = await self.sync_engine.sync(symbols)
             
             # Log results
             success_count = sum(1 for success in results.values() if success)
@@ -6,9 +6,13 @@ Stores and analyzes historical trading patterns with win rates across multiple t
 
 import sqlite3
 import json
+import time
+import heapq
+import atexit
 import logging
+import threading
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Set, Iterable
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -95,22 +99,116 @@ class TopPattern:
     last_success: datetime
     confidence_rating: str
 
+AggregateKey = Tuple[str, str, str]  # (symbol, direction, timeframe)
+RankKey = Tuple[float, float, int]   # (probability_score, win_rate, total_occurrences)
+
+class _TopK:
+    """
+    Min-heap of the k best pattern types for one symbol/direction/timeframe
+    
+    A member whose rank drops may be overtaken by a pattern outside the heap,
+    so that case marks the heap stale and the next read rebuilds it from the
+    group's aggregates; every other update only touches the k-entry heap.
+    """
+    
+    def __init__(self, k: int):
+        self.k = k
+        self.heap: List[Tuple[RankKey, str]] = []
+        self.members: Dict[str, RankKey] = {}
+        self.stale = False
+    
+    def offer(self, pattern_type: str, rank: RankKey) -> bool:
+        """Update a pattern's rank; returns True if the top-k may have changed"""
+        previous = self.members.get(pattern_type)
+        if previous is not None:
+            if rank < previous:
+                self.stale = True
+            else:
+                self.members[pattern_type] = rank
+                self.heap = [(rank if member == pattern_type else member_rank, member)
+                             for member_rank, member in self.heap]
+                heapq.heapify(self.heap)
+            return True
+        
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (rank, pattern_type))
+        elif (rank, pattern_type) > self.heap[0]:
+            _, evicted = heapq.heapreplace(self.heap, (rank, pattern_type))
+            del self.members[evicted]
+        else:
+            return False
+        self.members[pattern_type] = rank
+        return True
+    
+    def rebuild(self, ranked: Iterable[Tuple[RankKey, str]]):
+        self.heap = heapq.nlargest(self.k, ranked)
+        heapq.heapify(self.heap)
+        self.members = {member: rank for rank, member in self.heap}
+        self.stale = False
+    
+    def ranked(self) -> List[str]:
+        """Member pattern types, best first"""
+        return [member for _, member in sorted(self.heap, reverse=True)]
+
 class HistoricalPatternDatabase:
     """
     Advanced Historical Pattern Database for AI Learning
     Tracks successful patterns and calculates probability-based win rates
+    
+    Pattern statistics live in an in-memory aggregate index keyed by
+    (pattern_type, symbol, direction, timeframe) with a top-k heap per
+    (symbol, direction, timeframe). Stored patterns, changed statistics and
+    changed top-k rankings are written behind to SQLite in one transaction
+    per batch: when flush_batch_size patterns are queued, on every read
+    that goes to SQLite, on close() and at exit, and otherwise from a
+    background thread every flush_interval seconds. A crash therefore
+    loses at most flush_interval seconds of stored patterns. Current win and
+    loss streaks are persisted with the statistics, so max_consecutive_*
+    keep counting across restarts.
     """
     
-    def __init__(self, db_path: str = "historical_patterns.db"):
+    TOP_K = 10
+    EMA_ALPHA = 0.1
+    
+    def __init__(self, db_path: str = "historical_patterns.db", flush_batch_size: int = 256,
+                 flush_interval: float = 2.0):
         """Initialize the Historical Pattern Database"""
         self.db_path = db_path
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval
         self.pattern_cache: Dict[str, List[TopPattern]] = {}
         
+        # Aggregate index: (symbol, direction, timeframe) -> pattern_type -> statistics
+        self._aggregates: Dict[AggregateKey, Dict[str, PatternStatistics]] = {}
+        self._top: Dict[AggregateKey, _TopK] = {}
+        self._streaks: Dict[Tuple[AggregateKey, str], List[int]] = {}  # [current wins, current losses]
+        self._last_wins: Dict[Tuple[AggregateKey, str], Tuple[Dict[str, Any], datetime]] = {}
+        
+        # Write-behind queues
+        self._pending_patterns: List[Tuple] = []
+        self._dirty_statistics: Set[Tuple[AggregateKey, str]] = set()
+        self._dirty_groups: Set[AggregateKey] = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        self._stop_flusher = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.write_stats = {
+            'patterns_stored': 0,
+            'flushes': 0,
+            'rows_flushed': 0,
+            'flush_errors': 0
+        }
+        
         # Initialize database
         self._init_database()
         
-        # Load cached patterns
-        self._load_pattern_cache()
+        # Load aggregates and top patterns into memory
+        self._load_aggregates()
+        atexit.register(self.flush)
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True,
+                                             name="historical-pattern-flusher")
+            self._flusher.start()
         
         logger.info("Historical Pattern Database initialized")
     
@@ -119,6 +217,9 @@ class HistoricalPatternDatabase:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # WAL lets readers of other connections run alongside batched flushes
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
         # Historical patterns table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS historical_patterns (
@@ -164,10 +265,19 @@ class HistoricalPatternDatabase:
                 confidence_level REAL NOT NULL,
                 reliability_rating TEXT NOT NULL,
                 last_updated TEXT NOT NULL,
+                current_win_streak INTEGER NOT NULL DEFAULT 0,
+                current_loss_streak INTEGER NOT NULL DEFAULT 0,
                 UNIQUE(pattern_type, symbol, direction, timeframe)
             )
         ''')
         
+        # Databases created before streaks were persisted lack the streak columns
+        cursor.execute("PRAGMA table_info(pattern_statistics)")
+        columns = [row[1] for row in cursor.fetchall()]
+        for column in ('current_win_streak', 'current_loss_streak'):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE pattern_statistics ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        
         # Top patterns table (top 10 for each symbol/direction/timeframe)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS top_patterns (
@@ -237,17 +347,30 @@ class HistoricalPatternDatabase:
     
     def store_historical_pattern(self, pattern: HistoricalPattern):
         """Store a historical pattern with its outcome"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO historical_patterns 
-            (id, symbol, timestamp, direction, timeframe, endpoint_scores, endpoint_patterns,
-             price_at_entry, volume_data, market_conditions, price_changes, max_profit,
-             max_drawdown, final_outcome, win_rate_score, confidence_at_entry,
-             patterns_identified, trigger_conditions)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        with self._lock:
+            self._apply_pattern(pattern)
+            logger.debug(f"Stored historical pattern {pattern.id} for {pattern.symbol}")
+            
+            if len(self._pending_patterns) >= self.flush_batch_size:
+                self.flush()
+    
+    def store_historical_patterns(self, patterns: Iterable[HistoricalPattern]) -> int:
+        """Store many historical patterns, flushing once per batch; returns the count stored"""
+        stored = 0
+        with self._lock:
+            for pattern in patterns:
+                self._apply_pattern(pattern)
+                stored += 1
+                if len(self._pending_patterns) >= self.flush_batch_size:
+                    self.flush()
+            self.flush()
+        
+        logger.info(f"Stored {stored} historical patterns")
+        return stored
+    
+    def _apply_pattern(self, pattern: HistoricalPattern):
+        """Queue the pattern row and fold its outcome into the aggregate index"""
+        self._pending_patterns.append((
             pattern.id,
             pattern.symbol,
             pattern.timestamp.isoformat(),
@@ -267,95 +390,96 @@ class HistoricalPatternDatabase:
             json.dumps(pattern.patterns_identified),
             json.dumps(pattern.trigger_conditions)
         ))
+        self.write_stats['patterns_stored'] += 1
         
-        conn.commit()
-        conn.close()
-        
-        # Update statistics and top patterns
-        self._update_pattern_statistics(pattern)
-        self._update_top_patterns(pattern.symbol, pattern.direction, pattern.timeframe)
-        
-        logger.info(f"Stored historical pattern {pattern.id} for {pattern.symbol}")
-    
-    def _update_pattern_statistics(self, pattern: HistoricalPattern):
-        """Update pattern statistics based on new historical data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        group = (pattern.symbol, pattern.direction.value, pattern.timeframe.value)
         for pattern_type in pattern.patterns_identified:
-            # Get existing statistics
-            cursor.execute('''
-                SELECT * FROM pattern_statistics 
-                WHERE pattern_type = ? AND symbol = ? AND direction = ? AND timeframe = ?
-            ''', (pattern_type, pattern.symbol, pattern.direction.value, pattern.timeframe.value))
+            stats = self._update_pattern_statistics(group, pattern_type, pattern)
+            self._dirty_statistics.add((group, pattern_type))
             
-            existing = cursor.fetchone()
+            if pattern.final_outcome == 'WIN':
+                self._last_wins[(group, pattern_type)] = (pattern.trigger_conditions, pattern.timestamp)
             
-            if existing:
-                # Update existing statistics
-                _, _, _, _, _, total_occ, successful, win_rate, avg_profit, avg_loss, profit_factor, max_wins, max_losses, _, _, _, _ = existing
-                
-                total_occ += 1
-                if pattern.final_outcome == 'WIN':
-                    successful += 1
-                
-                new_win_rate = successful / total_occ
-                
-                # Update averages using exponential moving average
-                alpha = 0.1
-                if pattern.final_outcome == 'WIN':
-                    avg_profit = (1 - alpha) * avg_profit + alpha * pattern.max_profit
-                else:
-                    avg_loss = (1 - alpha) * avg_loss + alpha * abs(pattern.max_drawdown)
-                
-                new_profit_factor = avg_profit / max(avg_loss, 0.01)
-                
-                # Calculate probability score
-                probability_score = self._calculate_probability_score(new_win_rate, total_occ, new_profit_factor)
-                confidence_level = min(1.0, total_occ / 100.0)  # Confidence increases with sample size
-                reliability_rating = self._get_reliability_rating(new_win_rate, total_occ)
-                
-                cursor.execute('''
-                    UPDATE pattern_statistics 
-                    SET total_occurrences = ?, successful_trades = ?, win_rate = ?,
-                        avg_profit = ?, avg_loss = ?, profit_factor = ?,
-                        probability_score = ?, confidence_level = ?, reliability_rating = ?,
-                        last_updated = ?
-                    WHERE pattern_type = ? AND symbol = ? AND direction = ? AND timeframe = ?
-                ''', (
-                    total_occ, successful, new_win_rate, avg_profit, avg_loss, new_profit_factor,
-                    probability_score, confidence_level, reliability_rating, datetime.now().isoformat(),
-                    pattern_type, pattern.symbol, pattern.direction.value, pattern.timeframe.value
-                ))
-            else:
-                # Create new statistics entry
-                win_rate = 1.0 if pattern.final_outcome == 'WIN' else 0.0
-                avg_profit = pattern.max_profit if pattern.final_outcome == 'WIN' else 0.0
-                avg_loss = abs(pattern.max_drawdown) if pattern.final_outcome == 'LOSS' else 0.0
-                profit_factor = avg_profit / max(avg_loss, 0.01)
-                
-                probability_score = self._calculate_probability_score(win_rate, 1, profit_factor)
-                confidence_level = 0.01  # Low confidence with single sample
-                reliability_rating = 'LOW'
-                
-                cursor.execute('''
-                    INSERT INTO pattern_statistics 
-                    (id, pattern_type, symbol, direction, timeframe, total_occurrences,
-                     successful_trades, win_rate, avg_profit, avg_loss, profit_factor,
-                     max_consecutive_wins, max_consecutive_losses, probability_score,
-                     confidence_level, reliability_rating, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    f"{pattern_type}_{pattern.symbol}_{pattern.direction.value}_{pattern.timeframe.value}",
-                    pattern_type, pattern.symbol, pattern.direction.value, pattern.timeframe.value,
-                    1, 1 if pattern.final_outcome == 'WIN' else 0, win_rate,
-                    avg_profit, avg_loss, profit_factor, 1 if pattern.final_outcome == 'WIN' else 0,
-                    1 if pattern.final_outcome == 'LOSS' else 0, probability_score,
-                    confidence_level, reliability_rating, datetime.now().isoformat()
-                ))
+            top = self._top.get(group)
+            if top is None:
+                top = self._top[group] = _TopK(self.TOP_K)
+            if top.offer(pattern_type, self._rank(stats)):
+                self._dirty_groups.add(group)
+                self.pattern_cache.pop(self._cache_key(*group), None)
+    
+    def _update_pattern_statistics(self, group: AggregateKey, pattern_type: str,
+                                   pattern: HistoricalPattern) -> PatternStatistics:
+        """Update the in-memory statistics for one pattern type"""
+        win = pattern.final_outcome == 'WIN'
+        loss = pattern.final_outcome == 'LOSS'
+        now = datetime.now()
+        
+        streak = self._streaks.setdefault((group, pattern_type), [0, 0])
+        streak[0] = streak[0] + 1 if win else 0
+        streak[1] = streak[1] + 1 if loss else 0
+        
+        patterns = self._aggregates.setdefault(group, {})
+        stats = patterns.get(pattern_type)
+        
+        if stats is None:
+            # Create new statistics entry
+            avg_profit = pattern.max_profit if win else 0.0
+            avg_loss = abs(pattern.max_drawdown) if loss else 0.0
+            profit_factor = avg_profit / max(avg_loss, 0.01)
+            win_rate = 1.0 if win else 0.0
+            
+            stats = patterns[pattern_type] = PatternStatistics(
+                pattern_type=pattern_type,
+                symbol=pattern.symbol,
+                direction=pattern.direction,
+                timeframe=pattern.timeframe,
+                total_occurrences=1,
+                successful_trades=1 if win else 0,
+                win_rate=win_rate,
+                avg_profit=avg_profit,
+                avg_loss=avg_loss,
+                profit_factor=profit_factor,
+                max_consecutive_wins=streak[0],
+                max_consecutive_losses=streak[1],
+                probability_score=self._calculate_probability_score(win_rate, 1, profit_factor),
+                confidence_level=0.01,  # Low confidence with single sample
+                reliability_rating='LOW',
+                last_updated=now
+            )
+            return stats
         
-        conn.commit()
-        conn.close()
+        stats.total_occurrences += 1
+        if win:
+            stats.successful_trades += 1
+        stats.win_rate = stats.successful_trades / stats.total_occurrences
+        
+        # Update averages using exponential moving average
+        alpha = self.EMA_ALPHA
+        if win:
+            stats.avg_profit = (1 - alpha) * stats.avg_profit + alpha * pattern.max_profit
+        else:
+            stats.avg_loss = (1 - alpha) * stats.avg_loss + alpha * abs(pattern.max_drawdown)
+        
+        stats.profit_factor = stats.avg_profit / max(stats.avg_loss, 0.01)
+        stats.max_consecutive_wins = max(stats.max_consecutive_wins, streak[0])
+        stats.max_consecutive_losses = max(stats.max_consecutive_losses, streak[1])
+        
+        # Calculate probability score
+        stats.probability_score = self._calculate_probability_score(
+            stats.win_rate, stats.total_occurrences, stats.profit_factor
+        )
+        stats.confidence_level = min(1.0, stats.total_occurrences / 100.0)  # Confidence increases with sample size
+        stats.reliability_rating = self._get_reliability_rating(stats.win_rate, stats.total_occurrences)
+        stats.last_updated = now
+        return stats
+    
+    @staticmethod
+    def _rank(stats: PatternStatistics) -> RankKey:
+        return (stats.probability_score, stats.win_rate, stats.total_occurrences)
+    
+    @staticmethod
+    def _cache_key(symbol: str, direction: str, timeframe: str) -> str:
+        return f"{symbol}_{direction}_{timeframe}"
     
     def _calculate_probability_score(self, win_rate: float, sample_size: int, profit_factor: float) -> float:
         """Calculate probability score based on win rate, sample size, and profit factor"""
@@ -390,146 +514,235 @@ class HistoricalPatternDatabase:
             else:
                 return 'LOW'
     
-    def _update_top_patterns(self, symbol: str, direction: Direction, timeframe: TimeFrame):
-        """Update top 10 patterns for a symbol/direction/timeframe combination"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get all patterns for this combination, ordered by probability score
-        cursor.execute('''
-            SELECT pattern_type, win_rate, total_occurrences, avg_profit, probability_score,
-                   confidence_level, reliability_rating, last_updated
-            FROM pattern_statistics 
-            WHERE symbol = ? AND direction = ? AND timeframe = ?
-            ORDER BY probability_score DESC, win_rate DESC, total_occurrences DESC
-            LIMIT 10
-        ''', (symbol, direction.value, timeframe.value))
-        
-        top_patterns = cursor.fetchall()
-        
-        # Clear existing top patterns for this combination
-        cursor.execute('''
-            DELETE FROM top_patterns 
-            WHERE symbol = ? AND direction = ? AND timeframe = ?
-        ''', (symbol, direction.value, timeframe.value))
-        
-        # Insert new top patterns
-        for rank, (pattern_type, win_rate, total_trades, avg_profit, probability_score, confidence_level, reliability_rating, last_updated) in enumerate(top_patterns, 1):
-            
-            # Get trigger conditions for this pattern
-            cursor.execute('''
-                SELECT trigger_conditions FROM historical_patterns 
-                WHERE symbol = ? AND direction = ? AND timeframe = ? 
-                AND ? = ANY(json_extract(patterns_identified, '$[*]'))
-                AND final_outcome = 'WIN'
-                ORDER BY timestamp DESC LIMIT 1
-            ''', (symbol, direction.value, timeframe.value, pattern_type))
-            
-            trigger_result = cursor.fetchone()
-            trigger_conditions = json.loads(trigger_result[0]) if trigger_result else {}
-            
-            pattern_id = f"{symbol}_{direction.value}_{timeframe.value}_{rank}"
-            
-            cursor.execute('''
-                INSERT INTO top_patterns 
-                (id, symbol, direction, timeframe, rank, pattern_signature, win_rate,
-                 total_trades, avg_profit_percent, probability_score, trigger_conditions,
-                 last_success, confidence_rating)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                pattern_id, symbol, direction.value, timeframe.value, rank,
-                pattern_type, win_rate, total_trades, avg_profit, probability_score,
-                json.dumps(trigger_conditions), last_updated, reliability_rating
+    def _ranked_patterns(self, group: AggregateKey) -> List[PatternStatistics]:
+        """Top-k statistics for a group, best first"""
+        top = self._top.get(group)
+        if top is None:
+            return []
+        patterns = self._aggregates.get(group, {})
+        if top.stale:
+            top.rebuild((self._rank(stats), pattern_type) for pattern_type, stats in patterns.items())
+        return [patterns[pattern_type] for pattern_type in top.ranked()]
+    
+    def _build_top_patterns(self, group: AggregateKey) -> List[TopPattern]:
+        top_patterns = []
+        for rank, stats in enumerate(self._ranked_patterns(group), 1):
+            trigger_conditions, last_success = self._last_wins.get(
+                (group, stats.pattern_type), ({}, stats.last_updated)
+            )
+            top_patterns.append(TopPattern(
+                rank=rank,
+                pattern_signature=stats.pattern_type,
+                win_rate=stats.win_rate,
+                total_trades=stats.total_occurrences,
+                avg_profit_percent=stats.avg_profit,
+                probability_score=stats.probability_score,
+                trigger_conditions=trigger_conditions,
+                last_success=last_success,
+                confidence_rating=stats.reliability_rating
             ))
-        
-        conn.commit()
-        conn.close()
-        
-        # Update cache
-        cache_key = f"{symbol}_{direction.value}_{timeframe.value}"
-        self.pattern_cache[cache_key] = self._load_top_patterns(symbol, direction, timeframe)
-        
-        logger.info(f"Updated top {len(top_patterns)} patterns for {symbol} {direction.value} {timeframe.value}")
+        return top_patterns
     
     def get_top_patterns(self, symbol: str, direction: Direction, timeframe: TimeFrame) -> List[TopPattern]:
         """Get top 10 patterns for a symbol/direction/timeframe"""
-        cache_key = f"{symbol}_{direction.value}_{timeframe.value}"
-        
-        if cache_key in self.pattern_cache:
+        with self._lock:
+            cache_key = self._cache_key(symbol, direction.value, timeframe.value)
+            
+            if cache_key not in self.pattern_cache:
+                self.pattern_cache[cache_key] = self._build_top_patterns((symbol, direction.value, timeframe.value))
+            
             return self.pattern_cache[cache_key]
-        
-        return self._load_top_patterns(symbol, direction, timeframe)
     
-    def _load_top_patterns(self, symbol: str, direction: Direction, timeframe: TimeFrame) -> List[TopPattern]:
-        """Load top patterns from database"""
+    def flush(self) -> int:
+        """Write queued patterns, changed statistics and changed top patterns in one transaction"""
+        with self._lock:
+            return self._flush_locked()
+    
+    def _flush_periodically(self):
+        """Background flusher bounding how long a stored pattern stays only in memory"""
+        while not self._stop_flusher.wait(self.flush_interval):
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Error in periodic historical pattern flush: {e}")
+    
+    def _flush_locked(self) -> int:
+        if not (self._pending_patterns or self._dirty_statistics or self._dirty_groups):
+            return 0
+        
+        patterns = self._pending_patterns
+        changed = [(group, pattern_type, self._aggregates[group][pattern_type])
+                   for group, pattern_type in self._dirty_statistics]
+        groups = list(self._dirty_groups)
+        
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            with conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO historical_patterns
+                    (id, symbol, timestamp, direction, timeframe, endpoint_scores, endpoint_patterns,
+                     price_at_entry, volume_data, market_conditions, price_changes, max_profit,
+                     max_drawdown, final_outcome, win_rate_score, confidence_at_entry,
+                     patterns_identified, trigger_conditions)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', patterns)
+                
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO pattern_statistics
+                    (id, pattern_type, symbol, direction, timeframe, total_occurrences,
+                     successful_trades, win_rate, avg_profit, avg_loss, profit_factor,
+                     max_consecutive_wins, max_consecutive_losses, probability_score,
+                     confidence_level, reliability_rating, last_updated,
+                     current_win_streak, current_loss_streak)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(
+                    f"{s.pattern_type}_{s.symbol}_{s.direction.value}_{s.timeframe.value}",
+                    s.pattern_type, s.symbol, s.direction.value, s.timeframe.value,
+                    s.total_occurrences, s.successful_trades, s.win_rate, s.avg_profit, s.avg_loss,
+                    s.profit_factor, s.max_consecutive_wins, s.max_consecutive_losses,
+                    s.probability_score, s.confidence_level, s.reliability_rating, s.last_updated.isoformat(),
+                    *self._streaks.get((group, pattern_type), (0, 0))
+                ) for group, pattern_type, s in changed])
+                
+                top_rows = []
+                for group in groups:
+                    self._resolve_last_wins(cursor, group)
+                    symbol, direction, timeframe = group
+                    cursor.execute('''
+                        DELETE FROM top_patterns
+                        WHERE symbol = ? AND direction = ? AND timeframe = ?
+                    ''', group)
+                    top_rows.extend((
+                        f"{symbol}_{direction}_{timeframe}_{top.rank}",
+                        symbol, direction, timeframe, top.rank, top.pattern_signature, top.win_rate,
+                        top.total_trades, top.avg_profit_percent, top.probability_score,
+                        json.dumps(top.trigger_conditions), top.last_success.isoformat(), top.confidence_rating
+                    ) for top in self._build_top_patterns(group))
+                cursor.executemany('''
+                    INSERT INTO top_patterns
+                    (id, symbol, direction, timeframe, rank, pattern_signature, win_rate,
+                     total_trades, avg_profit_percent, probability_score, trigger_conditions,
+                     last_success, confidence_rating)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', top_rows)
+        except sqlite3.Error as e:
+            # Keep everything queued; the next flush retries
+            self.write_stats['flush_errors'] += 1
+            logger.error(f"Error flushing historical patterns: {e}")
+            return 0
+        finally:
+            if conn is not None:
+                conn.close()
+            self._last_flush = time.monotonic()
+        
+        self._pending_patterns = []
+        self._dirty_statistics.clear()
+        self._dirty_groups.clear()
+        rows = len(patterns) + len(changed) + len(top_rows)
+        self.write_stats['flushes'] += 1
+        self.write_stats['rows_flushed'] += rows
+        
+        logger.debug(f"Flushed {len(patterns)} patterns, {len(changed)} statistics, {len(groups)} top pattern groups")
+        return rows
+    
+    def _resolve_last_wins(self, cursor: sqlite3.Cursor, group: AggregateKey):
+        """Look up the latest winning trigger conditions for top patterns loaded without one"""
+        for stats in self._ranked_patterns(group):
+            pattern_type = stats.pattern_type
+            if (group, pattern_type) in self._last_wins:
+                continue
+            cursor.execute('''
+                SELECT trigger_conditions, timestamp FROM historical_patterns, json_each(patterns_identified)
+                WHERE symbol = ? AND direction = ? AND timeframe = ?
+                AND json_each.value = ? AND final_outcome = 'WIN'
+                ORDER BY timestamp DESC LIMIT 1
+            ''', (*group, pattern_type))
+            result = cursor.fetchone()
+            if result:
+                self._last_wins[(group, pattern_type)] = (json.loads(result[0]), datetime.fromisoformat(result[1]))
+                self.pattern_cache.pop(self._cache_key(*group), None)
+    
+    def close(self):
+        """Stop the background flusher and flush anything still queued"""
+        self._stop_flusher.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        atexit.unregister(self.flush)
+    
+    def _load_aggregates(self):
+        """Load pattern statistics and the stored top patterns into memory"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT rank, pattern_signature, win_rate, total_trades, avg_profit_percent,
-                   probability_score, trigger_conditions, last_success, confidence_rating
-            FROM top_patterns 
-            WHERE symbol = ? AND direction = ? AND timeframe = ?
-            ORDER BY rank
-        ''', (symbol, direction.value, timeframe.value))
-        
-        patterns = []
+            SELECT pattern_type, symbol, direction, timeframe, total_occurrences, successful_trades,
+                   win_rate, avg_profit, avg_loss, profit_factor, max_consecutive_wins,
+                   max_consecutive_losses, probability_score, confidence_level, reliability_rating,
+                   last_updated, current_win_streak, current_loss_streak
+            FROM pattern_statistics
+        ''')
         for row in cursor.fetchall():
-            rank, pattern_sig, win_rate, total_trades, avg_profit, prob_score, trigger_cond, last_success, confidence = row
-            
-            patterns.append(TopPattern(
-                rank=rank,
-                pattern_signature=pattern_sig,
+            (pattern_type, symbol, direction, timeframe, total_occ, successful, win_rate, avg_profit,
+             avg_loss, profit_factor, max_wins, max_losses, prob_score, confidence, reliability, last_updated,
+             win_streak, loss_streak) = row
+            if win_streak or loss_streak:
+                self._streaks[((symbol, direction, timeframe), pattern_type)] = [win_streak, loss_streak]
+            self._aggregates.setdefault((symbol, direction, timeframe), {})[pattern_type] = PatternStatistics(
+                pattern_type=pattern_type,
+                symbol=symbol,
+                direction=Direction(direction),
+                timeframe=TimeFrame(timeframe),
+                total_occurrences=total_occ,
+                successful_trades=successful,
                 win_rate=win_rate,
-                total_trades=total_trades,
-                avg_profit_percent=avg_profit,
+                avg_profit=avg_profit,
+                avg_loss=avg_loss,
+                profit_factor=profit_factor,
+                max_consecutive_wins=max_wins,
+                max_consecutive_losses=max_losses,
                 probability_score=prob_score,
-                trigger_conditions=json.loads(trigger_cond),
-                last_success=datetime.fromisoformat(last_success),
-                confidence_rating=confidence
-            ))
-        
-        conn.close()
-        return patterns
-    
-    def _load_pattern_cache(self):
-        """Load all top patterns into cache"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT DISTINCT symbol, direction, timeframe FROM top_patterns')
-        combinations = cursor.fetchall()
+                confidence_level=confidence,
+                reliability_rating=reliability,
+                last_updated=datetime.fromisoformat(last_updated)
+            )
         
-        for symbol, direction, timeframe in combinations:
-            cache_key = f"{symbol}_{direction}_{timeframe}"
-            self.pattern_cache[cache_key] = self._load_top_patterns(
-                symbol, Direction(direction), TimeFrame(timeframe)
+        # Stored top patterns carry the last winning trigger conditions
+        cursor.execute('''
+            SELECT symbol, direction, timeframe, pattern_signature, trigger_conditions, last_success
+            FROM top_patterns
+        ''')
+        for symbol, direction, timeframe, pattern_type, trigger_cond, last_success in cursor.fetchall():
+            self._last_wins[((symbol, direction, timeframe), pattern_type)] = (
+                json.loads(trigger_cond), datetime.fromisoformat(last_success)
             )
         
         conn.close()
-        logger.info(f"Loaded {len(self.pattern_cache)} pattern combinations into cache")
+        
+        for group, patterns in self._aggregates.items():
+            top = self._top[group] = _TopK(self.TOP_K)
+            top.rebuild((self._rank(stats), pattern_type) for pattern_type, stats in patterns.items())
+        
+        logger.info(f"Loaded {sum(len(p) for p in self._aggregates.values())} pattern statistics "
+                    f"across {len(self._aggregates)} pattern combinations")
     
     def get_pattern_probability_score(self, symbol: str, patterns: List[str], direction: Direction, timeframe: TimeFrame) -> float:
         """Get probability score for a set of patterns"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        aggregates = self._aggregates.get((symbol, direction.value, timeframe.value), {})
         
         probability_scores = []
         
-        for pattern in patterns:
-            cursor.execute('''
-                SELECT probability_score, confidence_level FROM pattern_statistics
-                WHERE pattern_type = ? AND symbol = ? AND direction = ? AND timeframe = ?
-            ''', (pattern, symbol, direction.value, timeframe.value))
-            
-            result = cursor.fetchone()
-            if result:
-                prob_score, confidence = result
-                # Weight by confidence level
-                weighted_score = prob_score * confidence
-                probability_scores.append(weighted_score)
-        
-        conn.close()
+        with self._lock:
+            for pattern in patterns:
+                stats = aggregates.get(pattern)
+                if stats:
+                    # Weight by confidence level
+                    weighted_score = stats.probability_score * stats.confidence_level
+                    probability_scores.append(weighted_score)
         
         if probability_scores:
             # Use weighted average of pattern probabilities
@@ -565,24 +778,19 @@ class HistoricalPatternDatabase:
     
     def _get_timeframe_statistics(self, symbol: str, timeframe: TimeFrame) -> Dict[str, Any]:
         """Get statistics for a specific timeframe"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT COUNT(*), AVG(win_rate), AVG(probability_score), AVG(confidence_level)
-            FROM pattern_statistics 
-            WHERE symbol = ? AND timeframe = ?
-        ''', (symbol, timeframe.value))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result and result[0] > 0:
+        with self._lock:
+            timeframe_stats = [
+                stats
+                for direction in Direction
+                for stats in self._aggregates.get((symbol, direction.value, timeframe.value), {}).values()
+            ]
+        
+        if timeframe_stats:
             return {
-                'total_patterns': result[0],
-                'avg_win_rate': result[1],
-                'avg_probability_score': result[2],
-                'avg_confidence_level': result[3]
+                'total_patterns': len(timeframe_stats),
+                'avg_win_rate': float(np.mean([s.win_rate for s in timeframe_stats])),
+                'avg_probability_score': float(np.mean([s.probability_score for s in timeframe_stats])),
+                'avg_confidence_level': float(np.mean([s.confidence_level for s in timeframe_stats]))
             }
         
         return {
@@ -594,6 +802,7 @@ class HistoricalPatternDatabase:
     
     def _calculate_overall_statistics(self, symbol: str) -> Dict[str, Any]:
         """Calculate overall statistics for a symbol"""
+        self.flush()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -625,18 +834,12 @@ class HistoricalPatternDatabase:
     
     def _assess_symbol_reliability(self, symbol: str) -> Dict[str, Any]:
         """Assess the reliability of historical data for a symbol"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Get reliability distribution
-        cursor.execute('''
-            SELECT reliability_rating, COUNT(*) 
-            FROM pattern_statistics 
-            WHERE symbol = ? 
-            GROUP BY reliability_rating
-        ''', (symbol,))
-        
-        reliability_dist = dict(cursor.fetchall())
+        reliability_dist: Dict[str, int] = {}
+        for (group_symbol, _, _), patterns in self._aggregates.items():
+            if group_symbol == symbol:
+                for stats in patterns.values():
+                    reliability_dist[stats.reliability_rating] = reliability_dist.get(stats.reliability_rating, 0) + 1
         
         # Calculate reliability score
         total_patterns = sum(reliability_dist.values())
@@ -649,8 +852,6 @@ class HistoricalPatternDatabase:
             
             reliability_score = (high_weight + medium_weight + low_weight) / total_patterns
         
-        conn.close()
-        
         return {
             'reliability_score': reliability_score,
             'reliability_distribution': reliability_dist,
@@ -682,6 +883,7 @@ class HistoricalPatternDatabase:
     
     def get_database_stats(self) -> Dict[str, Any]:
         """Get comprehensive database statistics"""
+        self.flush()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
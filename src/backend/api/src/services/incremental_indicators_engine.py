@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Incremental Indicators Engine
+Streaming (O(1) per closed candle) EMA, RSI, MACD, Bollinger, OBV and Stochastic RSI
+
+Keeps running indicator state per (symbol, timeframe) so a new candle updates
+every indicator without recomputing the lookback window. Formulas match the
+pandas fallbacks in TechnicalIndicatorsEngine. State serializes to JSON so a
+restart resumes without a full warm-up.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+
+
+class RunningEMA:
+    """EMA with adjust=False semantics (seeded with the first value)"""
+
+    def __init__(self, span: int, value: Optional[float] = None, previous: Optional[float] = None):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.value = value
+        self.previous = previous
+
+    def update(self, x: float) -> float:
+        self.previous = self.value
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'span': self.span, 'value': self.value, 'previous': self.previous}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningEMA':
+        return cls(data['span'], data['value'], data['previous'])
+
+
+class RollingWindow:
+    """
+    Fixed-size window with running sum / sum of squares
+
+    The sums are re-derived from the buffer once per full rotation so floating
+    point drift stays bounded while updates remain amortized O(1).
+    """
+
+    def __init__(self, size: int, values: Optional[Iterable[float]] = None):
+        self.size = size
+        self.values: Deque[float] = deque(values or [], maxlen=size)
+        self._since_resum = 0
+        self._resum()
+
+    def _resum(self):
+        self.total = sum(self.values)
+        self.total_sq = sum(v * v for v in self.values)
+        self._since_resum = 0
+
+    def update(self, x: float):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        self._since_resum += 1
+        if self._since_resum >= self.size:
+            self._resum()
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.size if self.full else None
+
+    def std(self) -> Optional[float]:
+        """Sample standard deviation (ddof=1), like pandas rolling().std()"""
+        if not self.full or self.size < 2:
+            return None
+        variance = (self.total_sq - self.total * self.total / self.size) / (self.size - 1)
+        return max(variance, 0.0) ** 0.5
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'size': self.size, 'values': list(self.values), 'total': self.total,
+                'total_sq': self.total_sq, 'since_resum': self._since_resum}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RollingWindow':
+        window = cls(data['size'], data['values'])
+        # Restore the running sums as-is so a resumed stream is bit-identical
+        window.total = data['total']
+        window.total_sq = data['total_sq']
+        window._since_resum = data['since_resum']
+        return window
+
+
+class RollingExtremes:
+    """Rolling min/max via monotonic deques (amortized O(1) per update)"""
+
+    def __init__(self, size: int, count: int = 0,
+                 minima: Optional[List[Tuple[int, float]]] = None,
+                 maxima: Optional[List[Tuple[int, float]]] = None):
+        self.size = size
+        self.count = count
+        self.minima: Deque[Tuple[int, float]] = deque(tuple(m) for m in (minima or []))
+        self.maxima: Deque[Tuple[int, float]] = deque(tuple(m) for m in (maxima or []))
+
+    def update(self, x: float):
+        index = self.count
+        self.count += 1
+        while self.minima and self.minima[-1][1] >= x:
+            self.minima.pop()
+        self.minima.append((index, x))
+        while self.maxima and self.maxima[-1][1] <= x:
+            self.maxima.pop()
+        self.maxima.append((index, x))
+        oldest = index - self.size + 1
+        while self.minima[0][0] < oldest:
+            self.minima.popleft()
+        while self.maxima[0][0] < oldest:
+            self.maxima.popleft()
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.size
+
+    def reset(self):
+        self.count = 0
+        self.minima.clear()
+        self.maxima.clear()
+
+    def min(self) -> Optional[float]:
+        return self.minima[0][1] if self.full else None
+
+    def max(self) -> Optional[float]:
+        return self.maxima[0][1] if self.full else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'size': self.size, 'count': self.count,
+                'minima': list(self.minima), 'maxima': list(self.maxima)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RollingExtremes':
+        return cls(data['size'], data['count'], data['minima'], data['maxima'])
+
+
+class IndicatorState:
+    """Running state of every streaming indicator for one (symbol, timeframe)"""
+
+    EMA_SPANS = (9, 21, 50, 200)
+
+    def __init__(self):
+        self.candles = 0
+        self.last_timestamp: Optional[float] = None
+        self.last_close: Optional[float] = None
+        self.emas = {span: RunningEMA(span) for span in self.EMA_SPANS}
+        self.macd_fast = RunningEMA(12)
+        self.macd_slow = RunningEMA(26)
+        self.macd_signal = RunningEMA(9)
+        self.macd_previous: Optional[float] = None
+        self.rsi_gain = RollingWindow(14)
+        self.rsi_loss = RollingWindow(14)
+        self.rsi_previous: Optional[float] = None
+        self.bollinger = RollingWindow(20)
+        self.obv = 0.0
+        self.volume = RollingWindow(20)
+        self.stoch_range = RollingExtremes(14)
+        self.stoch_k_window = RollingWindow(3)
+        self.stoch_d_window = RollingWindow(3)
+        self.stoch_previous: Tuple[Optional[float], Optional[float]] = (None, None)
+
+    def update(self, candle: Dict[str, Any]) -> bool:
+        """Apply one closed candle; returns False for duplicate / out-of-order candles"""
+
+        timestamp = candle.get('timestamp')
+        if timestamp is not None:
+            if isinstance(timestamp, datetime):
+                timestamp = timestamp.timestamp()
+            timestamp = float(timestamp)
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return False
+            self.last_timestamp = timestamp
+
+        close = float(candle['close'])
+        volume = float(candle.get('volume', 0.0))
+        previous_close = self.last_close
+
+        for ema in self.emas.values():
+            ema.update(close)
+
+        self.macd_previous = self.macd_value
+        self.macd_fast.update(close)
+        self.macd_slow.update(close)
+        self.macd_signal.update(self.macd_value)  # type: ignore[arg-type]
+
+        self.rsi_previous = self.rsi_value
+        if previous_close is None:
+            self.rsi_gain.update(0.0)
+            self.rsi_loss.update(0.0)
+        else:
+            delta = close - previous_close
+            self.rsi_gain.update(delta if delta > 0 else 0.0)
+            self.rsi_loss.update(-delta if delta < 0 else 0.0)
+
+        self.bollinger.update(close)
+
+        if previous_close is not None:
+            if close > previous_close:
+                self.obv += volume
+            elif close < previous_close:
+                self.obv -= volume
+        self.volume.update(volume)
+
+        self._update_stoch_rsi()
+
+        self.last_close = close
+        self.candles += 1
+        return True
+
+    def _update_stoch_rsi(self):
+        self.stoch_previous = (self.stoch_k_window.mean(), self.stoch_d_window.mean())
+        rsi = self.rsi_value
+        if rsi is None:
+            # Mirrors pandas: NaN RSI values poison the windows that contain them
+            self.stoch_range.reset()
+            return
+        self.stoch_range.update(rsi)
+        low, high = self.stoch_range.min(), self.stoch_range.max()
+        if low is None or high is None or high == low:
+            return
+        self.stoch_k_window.update((rsi - low) / (high - low) * 100)
+        k = self.stoch_k_window.mean()
+        if k is not None:
+            self.stoch_d_window.update(k)
+
+    @property
+    def macd_value(self) -> Optional[float]:
+        if self.macd_fast.value is None or self.macd_slow.value is None:
+            return None
+        return self.macd_fast.value - self.macd_slow.value
+
+    @property
+    def rsi_value(self) -> Optional[float]:
+        gain, loss = self.rsi_gain.mean(), self.rsi_loss.mean()
+        if gain is None or loss is None:
+            return None
+        if loss == 0:
+            return 100.0 if gain > 0 else None
+        return 100 - (100 / (1 + gain / loss))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values and cross signals, keyed like TechnicalIndicatorsEngine results"""
+
+        close = self.last_close
+        e9, e21, e50, e200 = (self.emas[s] for s in self.EMA_SPANS)
+        snapshot: Dict[str, Any] = {'candles': self.candles, 'price': close}
+
+        ema: Dict[str, Any] = {
+            'values': {'ema_9': e9.value, 'ema_21': e21.value, 'ema_50': e50.value,
+                       'ema_200': e200.value if self.candles >= 200 else None}
+        }
+        if e9.previous is not None and e21.previous is not None:
+            if e9.value > e21.value and e9.previous <= e21.previous:
+                ema['short_signal'] = 'bullish_cross'
+            elif e9.value < e21.value and e9.previous >= e21.previous:
+                ema['short_signal'] = 'bearish_cross'
+        if self.candles >= 200 and e50.previous is not None and e200.previous is not None:
+            if e50.value > e200.value and e50.previous <= e200.previous:
+                ema['signal'] = 'golden_cross'
+            elif e50.value < e200.value and e50.previous >= e200.previous:
+                ema['signal'] = 'death_cross'
+        if e9.value is not None:
+            if e9.value > e21.value > e50.value:
+                ema['trend'] = 'strong_uptrend'
+            elif e9.value < e21.value < e50.value:
+                ema['trend'] = 'strong_downtrend'
+            else:
+                ema['trend'] = 'neutral'
+        snapshot['ema'] = ema
+
+        rsi = self.rsi_value
+        rsi_result: Dict[str, Any] = {'rsi_current': rsi, 'previous': self.rsi_previous}
+        if rsi is not None:
+            rsi_result['signal'] = 'overbought' if rsi >= 70 else 'oversold' if rsi <= 30 else 'neutral'
+        snapshot['rsi'] = rsi_result
+
+        macd, signal = self.macd_value, self.macd_signal.value
+        macd_result: Dict[str, Any] = {
+            'values': {'macd': macd, 'signal': signal,
+                       'histogram': macd - signal if macd is not None and signal is not None else None},
+            'cross_signal': 'none',
+            'zero_cross': 'none'
+        }
+        prev_macd, prev_signal = self.macd_previous, self.macd_signal.previous
+        if prev_macd is not None and prev_signal is not None:
+            if macd > signal and prev_macd <= prev_signal:
+                macd_result['cross_signal'] = 'bullish_cross'
+            elif macd < signal and prev_macd >= prev_signal:
+                macd_result['cross_signal'] = 'bearish_cross'
+            if macd > 0 and prev_macd <= 0:
+                macd_result['zero_cross'] = 'bullish'
+            elif macd < 0 and prev_macd >= 0:
+                macd_result['zero_cross'] = 'bearish'
+        snapshot['macd'] = macd_result
+
+        middle, std = self.bollinger.mean(), self.bollinger.std()
+        bollinger: Dict[str, Any] = {'values': {'upper': None, 'middle': middle, 'lower': None}}
+        if middle is not None and std is not None:
+            upper, lower = middle + 2 * std, middle - 2 * std
+            bollinger['values'].update({'upper': upper, 'lower': lower})
+            bollinger['band_width'] = (upper - lower) / middle if middle else None
+            if upper > lower:
+                position = (close - lower) / (upper - lower)
+                bollinger['values']['position_in_band'] = position
+                if position > 1:
+                    bollinger['signal'] = 'above_upper'
+                elif position < 0:
+                    bollinger['signal'] = 'below_lower'
+                elif position > 0.8:
+                    bollinger['signal'] = 'near_upper'
+                elif position < 0.2:
+                    bollinger['signal'] = 'near_lower'
+                else:
+                    bollinger['signal'] = 'middle_band'
+        snapshot['bollinger'] = bollinger
+
+        volume_sma = self.volume.mean()
+        last_volume = self.volume.values[-1] if self.volume.values else None
+        snapshot['volume'] = {
+            'values': {'obv': self.obv, 'volume': last_volume, 'volume_sma': volume_sma,
+                       'volume_ratio': last_volume / volume_sma if volume_sma else None}
+        }
+
+        k, d = self.stoch_k_window.mean(), self.stoch_d_window.mean()
+        stoch: Dict[str, Any] = {'values': {'k': k, 'd': d}, 'crossover': 'none'}
+        if k is not None:
+            stoch['signal'] = 'overbought' if k >= 80 else 'oversold' if k <= 20 else 'neutral'
+        prev_k, prev_d = self.stoch_previous
+        if None not in (k, d, prev_k, prev_d):
+            if k > d and prev_k <= prev_d:
+                stoch['crossover'] = 'bullish'
+            elif k < d and prev_k >= prev_d:
+                stoch['crossover'] = 'bearish'
+        snapshot['stoch_rsi'] = stoch
+
+        return snapshot
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'candles': self.candles,
+            'last_timestamp': self.last_timestamp,
+            'last_close': self.last_close,
+            'emas': [ema.to_dict() for ema in self.emas.values()],
+            'macd_fast': self.macd_fast.to_dict(),
+            'macd_slow': self.macd_slow.to_dict(),
+            'macd_signal': self.macd_signal.to_dict(),
+            'macd_previous': self.macd_previous,
+            'rsi_gain': self.rsi_gain.to_dict(),
+            'rsi_loss': self.rsi_loss.to_dict(),
+            'rsi_previous': self.rsi_previous,
+            'bollinger': self.bollinger.to_dict(),
+            'obv': self.obv,
+            'volume': self.volume.to_dict(),
+            'stoch_range': self.stoch_range.to_dict(),
+            'stoch_k_window': self.stoch_k_window.to_dict(),
+            'stoch_d_window': self.stoch_d_window.to_dict(),
+            'stoch_previous': list(self.stoch_previous),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'IndicatorState':
+        state = cls()
+        state.candles = data['candles']
+        state.last_timestamp = data['last_timestamp']
+        state.last_close = data['last_close']
+        state.emas = {e['span']: RunningEMA.from_dict(e) for e in data['emas']}
+        state.macd_fast = RunningEMA.from_dict(data['macd_fast'])
+        state.macd_slow = RunningEMA.from_dict(data['macd_slow'])
+        state.macd_signal = RunningEMA.from_dict(data['macd_signal'])
+        state.macd_previous = data['macd_previous']
+        state.rsi_gain = RollingWindow.from_dict(data['rsi_gain'])
+        state.rsi_loss = RollingWindow.from_dict(data['rsi_loss'])
+        state.rsi_previous = data['rsi_previous']
+        state.bollinger = RollingWindow.from_dict(data['bollinger'])
+        state.obv = data['obv']
+        state.volume = RollingWindow.from_dict(data['volume'])
+        state.stoch_range = RollingExtremes.from_dict(data['stoch_range'])
+        state.stoch_k_window = RollingWindow.from_dict(data['stoch_k_window'])
+        state.stoch_d_window = RollingWindow.from_dict(data['stoch_d_window'])
+        state.stoch_previous = tuple(data['stoch_previous'])  # type: ignore[assignment]
+        return state
+
+
+class IncrementalIndicatorsEngine:
+    """
+    Streaming indicator engine keyed by (symbol, timeframe)
+
+    Feed closed candles through update(); each call costs O(1) regardless of
+    history length. Use warm_up() once with history for a new key, then
+    save_state()/load_state() to survive restarts.
+    """
+
+    def __init__(self, state_path: Optional[str] = None):
+        self.state_path = state_path
+        self.states: Dict[Tuple[str, str], IndicatorState] = {}
+
+        if state_path and os.path.exists(state_path):
+            self.load_state(state_path)
+
+        logger.info("Incremental Indicators Engine initialized")
+
+    def update(self, symbol: str, timeframe: str, candle: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply one closed candle and return the indicator snapshot
+
+        Args:
+            candle: Dict with close (required), volume and optional timestamp
+
+        Returns:
+            The new snapshot, or None if the candle was not newer than the
+            last one and was ignored (state is unchanged)
+        """
+
+        key = (symbol, timeframe)
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = IndicatorState()
+        if not state.update(candle):
+            return None
+        return state.snapshot()
+
+    def warm_up(self, symbol: str, timeframe: str, candles: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Seed a key from history (oldest first), replacing any existing state"""
+
+        state = IndicatorState()
+        for candle in candles:
+            state.update(candle)
+        self.states[(symbol, timeframe)] = state
+        return state.snapshot()
+
+    def get_snapshot(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        state = self.states.get((symbol, timeframe))
+        return state.snapshot() if state else None
+
+    def is_warm(self, symbol: str, timeframe: str, min_candles: int = 200) -> bool:
+        state = self.states.get((symbol, timeframe))
+        return bool(state and state.candles >= min_candles)
+
+    def remove(self, symbol: str, timeframe: Optional[str] = None):
+        """Drop state for a symbol (all timeframes unless one is given)"""
+
+        for key in list(self.states):
+            if key[0] == symbol and (timeframe is None or key[1] == timeframe):
+                del self.states[key]
+
+    def save_state(self, path: Optional[str] = None):
+        """Persist all running state as JSON (atomic replace)"""
+
+        path = path or self.state_path
+        if not path:
+            raise ValueError("No state path configured")
+
+        payload = {
+            'version': STATE_VERSION,
+            'saved_at': datetime.now().isoformat(),
+            'states': {f"{symbol}|{timeframe}": state.to_dict()
+                       for (symbol, timeframe), state in self.states.items()}
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    def load_state(self, path: Optional[str] = None) -> int:
+        """Restore running state saved by save_state(); returns the number of keys loaded"""
+
+        path = path or self.state_path
+        if not path:
+            raise ValueError("No state path configured")
+
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+            if payload.get('version') != STATE_VERSION:
+                logger.warning(f"Ignoring indicator state with version {payload.get('version')}")
+                return 0
+            for key, data in payload['states'].items():
+                symbol, timeframe = key.split('|', 1)
+                self.states[(symbol, timeframe)] = IndicatorState.from_dict(data)
+            return len(payload['states'])
+        except Exception as e:
+            logger.error(f"Error loading indicator state from {path}: {e}")
+            return 0
+
+
+# Global instance
+incremental_indicators_engine = IncrementalIndicatorsEngine()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Min/Max Batch Recalibration Engine
+Recomputes RiskMetric min/max bounds for the whole symbol universe at once
+
+All symbols' daily closes are loaded into one NaN-padded matrix, with each
+row right-aligned so that its latest close is in the last column. The
+log-regression, distribution and Fibonacci bounds, and the confidence score,
+are then computed for every row together with NumPy array operations.
+Support/resistance and cycle bounds still run per symbol through
+MinMaxCalculator, because their peak and FFT windows depend on each series.
+
+Recalibration also seeds the calculator's running regression sums. After
+that, update_bounds_incrementally moves the bounds in O(1) for each new
+daily close until the next batch run.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.services.min_max_calculator import MinMaxCalculator, RunningLogRegression, min_max_calculator
+
+logger = logging.getLogger(__name__)
+
+MIN_HISTORY = 100            # calculate_min_max needs this many closes
+MIN_CYCLE_REGRESSION = 100   # CowenCycleBasedCalculator.calculate_full_cycle_regression
+SECONDS_PER_DAY = 86400
+
+
+def _row_percentiles(values: np.ndarray, counts: np.ndarray, quantiles: Iterable[float]) -> List[np.ndarray]:
+    """
+    Per-row percentiles (numpy's default linear method) of a NaN-padded matrix.
+    np.sort puts NaN last, so the first counts[i] entries of row i are its sorted values.
+    """
+    ordered = np.sort(values, axis=1)
+    rows = np.arange(len(values))
+    last = np.maximum(counts - 1, 0)
+    result = []
+    for q in quantiles:
+        position = last * q
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, last)
+        fraction = position - lower
+        result.append(ordered[rows, lower] + (ordered[rows, upper] - ordered[rows, lower]) * fraction)
+    return result
+
+
+class MinMaxBatchEngine:
+    """
+    Vectorized min/max recalibration across every loaded symbol
+    """
+
+    def __init__(self, calculator: Optional[MinMaxCalculator] = None):
+        self.calculator = calculator or min_max_calculator
+        # symbol -> (closes, seconds since epoch)
+        self.histories: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.stats = {
+            'recalibrations': 0,
+            'symbols_calibrated': 0,
+            'symbols_skipped': 0,
+            'last_run_seconds': 0.0
+        }
+
+    # Loading
+
+    def add_history(self, symbol: str, price_history: List[Dict]):
+        """Load a calculate_min_max style history: dicts with 'close' and 'date'"""
+        self.add_arrays(symbol, [p['close'] for p in price_history], [p['date'] for p in price_history])
+
+    def add_arrays(self, symbol: str, closes: Iterable[float], dates: Iterable):
+        """Load closes and their dates (datetimes or datetime64), oldest first"""
+        closes = np.asarray(closes, dtype=float)
+        # pandas converts a list of datetimes several times faster than np.asarray
+        seconds = pd.to_datetime(list(dates)).values.astype('datetime64[s]').astype(np.int64)
+        if len(closes) != len(seconds):
+            raise ValueError(f"{symbol}: {len(closes)} closes but {len(seconds)} dates")
+        self.histories[symbol] = (closes, seconds)
+
+    def remove(self, symbol: str):
+        self.histories.pop(symbol, None)
+        self.calculator.regression_states.pop(symbol, None)
+
+    def _matrix(self, symbols: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Right-aligned closes and day numbers (1 = first close), NaN-padded, plus row lengths"""
+        lengths = np.array([len(self.histories[symbol][0]) for symbol in symbols])
+        width = int(lengths.max()) if len(lengths) else 0
+        closes = np.full((len(symbols), width), np.nan)
+        days = np.full((len(symbols), width), np.nan)
+        for row, symbol in enumerate(symbols):
+            prices, seconds = self.histories[symbol]
+            if len(prices):
+                closes[row, width - len(prices):] = prices
+                # Whole days since the first close, floored like timedelta.days
+                days[row, width - len(prices):] = (seconds - seconds.min()) // SECONDS_PER_DAY + 1
+        return closes, days, lengths
+
+    # Vectorized methods
+
+    def fit_regressions(self, closes: np.ndarray, days: np.ndarray) -> Dict[str, np.ndarray]:
+        """Log-log least squares per row, over closes > 0, as stats.linregress fits them"""
+        valid = np.isfinite(closes) & (closes > 0) & np.isfinite(days) & (days > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.where(valid, np.log(np.where(valid, days, 1.0)), 0.0)
+            y = np.where(valid, np.log(np.where(valid, closes, 1.0)), 0.0)
+            n = valid.sum(axis=1)
+            safe_n = np.maximum(n, 1)
+
+            sum_x, sum_y = x.sum(axis=1), y.sum(axis=1)
+            mean_x, mean_y = sum_x / safe_n, sum_y / safe_n
+            dx = np.where(valid, x - mean_x[:, None], 0.0)
+            dy = np.where(valid, y - mean_y[:, None], 0.0)
+            sxx, sxy, syy = (dx * dx).sum(axis=1), (dx * dy).sum(axis=1), (dy * dy).sum(axis=1)
+
+            slope = np.where(sxx > 0, sxy / sxx, 0.0)
+            intercept = mean_y - slope * mean_x
+            residuals = np.where(valid, y - (slope[:, None] * x + intercept[:, None]), np.nan)
+            std_residual = np.sqrt(np.nansum(residuals * residuals, axis=1) / safe_n)
+            r_squared = np.where((sxx > 0) & (syy > 0), sxy * sxy / (sxx * syy), 0.0)
+            current_day = np.nanmax(np.where(valid, days, np.nan), axis=1)
+
+        p05, p95 = _row_percentiles(residuals, n, (0.05, 0.95))
+        return {
+            'n': n,
+            'slope': slope,
+            'intercept': intercept,
+            'r_squared': r_squared,
+            'std_residual': std_residual,
+            'residual_p05': p05,
+            'residual_p95': p95,
+            'current_day': current_day,
+            'sums': (sum_x, sum_y, (x * x).sum(axis=1), (x * y).sum(axis=1), (y * y).sum(axis=1))
+        }
+
+    def regression_bounds(self, closes: np.ndarray, fit: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """MinMaxCalculator.logarithmic_regression_bounds for every row"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            central = fit['slope'] * np.log(fit['current_day']) + fit['intercept']
+            min_price = np.maximum(np.exp(central - 2 * fit['std_residual']), np.exp(central + fit['residual_p05']))
+            max_price = np.minimum(np.exp(central + 2 * fit['std_residual']), np.exp(central + fit['residual_p95']))
+        too_few = fit['n'] < 10
+        return (np.where(too_few, np.nanmin(closes, axis=1), min_price),
+                np.where(too_few, np.nanmax(closes, axis=1), max_price))
+
+    def distribution_bounds(self, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """MinMaxCalculator.statistical_distribution_bounds for every row"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_closes = np.log(np.where(closes > 0, closes, np.nan))
+            mean_log = np.nanmean(log_closes, axis=1)
+            std_log = np.nanstd(log_closes, axis=1)
+            # Rows are right-aligned, so the last 20 columns are each symbol's last 20 closes
+            volatility_factor = np.nanstd(closes[:, -20:], axis=1) / np.nanstd(closes, axis=1)
+        return (np.exp(mean_log - 2.5 * std_log) * (1 - 0.1 * volatility_factor),
+                np.exp(mean_log + 2.5 * std_log) * (1 + 0.1 * volatility_factor))
+
+    def fibonacci_bounds(self, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """MinMaxCalculator.fibonacci_bounds for every row"""
+        low, high = np.nanmin(closes, axis=1), np.nanmax(closes, axis=1)
+        return low * 0.9, high + (high - low) * 0.272
+
+    def confidence(self, closes: np.ndarray, lengths: np.ndarray,
+                   min_price: np.ndarray, max_price: np.ndarray, risk: np.ndarray) -> np.ndarray:
+        """MinMaxCalculator.calculate_confidence for every row"""
+        data_score = np.minimum(1.0, lengths / 1000)
+        position_score = 1.0 - np.abs(risk - 0.5) * 2
+        within = (closes >= min_price[:, None]) & (closes <= max_price[:, None])
+        coverage_score = within.sum(axis=1) / lengths
+        recent = closes[:, -30:]
+        stability_score = np.maximum(0, 1 - np.nanstd(recent, axis=1) / np.nanmean(recent, axis=1) * 10)
+        return np.prod([data_score, position_score, coverage_score, stability_score], axis=0) ** 0.25
+
+    # Recalibration
+
+    def recalibrate(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """
+        Recompute min/max for every loaded symbol (or the given ones), with the
+        same result fields as calculate_min_max, and seed the running sums.
+        Symbols with fewer than 100 closes get {} as calculate_min_max returns.
+        """
+        start = time.perf_counter()
+        symbols = list(self.histories if symbols is None else symbols)
+        results: Dict[str, Dict] = {symbol: {} for symbol in symbols
+                                    if len(self.histories[symbol][0]) < MIN_HISTORY}
+        symbols = [symbol for symbol in symbols if symbol not in results]
+        if not symbols:
+            return results
+
+        calculator = self.calculator
+        closes, days, lengths = self._matrix(symbols)
+        fit = self.fit_regressions(closes, days)
+        methods = {
+            'logarithmic_regression': self.regression_bounds(closes, fit),
+            'statistical_distribution': self.distribution_bounds(closes),
+            'fibonacci_levels': self.fibonacci_bounds(closes)
+        }
+
+        # Peak detection and the FFT cycle window depend on each series
+        width = closes.shape[1]
+        rows = [closes[row, width - length:] for row, length in enumerate(lengths)]
+        per_symbol = [(calculator.support_resistance_bounds(prices), calculator.cycle_analysis_bounds(prices.tolist(), None))
+                      for prices in rows]
+        methods['support_resistance'] = tuple(np.array(bounds) for bounds in zip(*(sr for sr, _ in per_symbol)))
+        methods['cycle_analysis'] = tuple(np.array(bounds) for bounds in zip(*(cycle for _, cycle in per_symbol)))
+
+        weights = calculator.methods_weights
+        combined_min = sum(methods[name][0] * weight for name, weight in weights.items())
+        combined_max = sum(methods[name][1] * weight for name, weight in weights.items())
+
+        current = closes[:, -1]
+        low, high = np.nanmin(closes, axis=1), np.nanmax(closes, axis=1)
+        final_min, final_max = np.empty(len(symbols)), np.empty(len(symbols))
+        for row in range(len(symbols)):
+            final_min[row], final_max[row] = calculator.validate_and_adjust(
+                float(combined_min[row]), float(combined_max[row]), float(current[row]), [low[row], high[row]]
+            )
+        risk = np.array([calculator.calculate_risk(*values) for values in zip(current, final_min, final_max)])
+        confidence = self.confidence(closes, lengths, final_min, final_max, risk)
+
+        now = datetime.now()
+        for row, symbol in enumerate(symbols):
+            results[symbol] = {
+                'symbol': symbol,
+                'min_price': float(final_min[row]),
+                'max_price': float(final_max[row]),
+                'current_price': float(current[row]),
+                'current_risk': float(risk[row]),
+                'methods': {
+                    name: {'min': float(bounds[0][row]), 'max': float(bounds[1][row])}
+                    for name, bounds in methods.items()
+                },
+                'confidence_score': float(confidence[row]),
+                'last_updated': now
+            }
+            calculator.regression_states[symbol] = self._running_state(symbol, rows[row], fit, row)
+
+        elapsed = time.perf_counter() - start
+        self.stats['recalibrations'] += 1
+        self.stats['symbols_calibrated'] += len(symbols)
+        self.stats['symbols_skipped'] += len(results) - len(symbols)
+        self.stats['last_run_seconds'] = round(elapsed, 3)
+        logger.info(f"Recalibrated min/max for {len(symbols)} symbols in {elapsed:.2f}s")
+        return results
+
+    def _running_state(self, symbol: str, prices: np.ndarray, fit: Dict[str, np.ndarray], row: int) -> RunningLogRegression:
+        """Seed the O(1) incremental state from the batch sums"""
+        seconds = self.histories[symbol][1]
+        state = RunningLogRegression(np.datetime64(int(seconds.min()), 's').astype(datetime))
+        valid = prices[prices > 0]
+        state.n = int(fit['n'][row])
+        state.sum_x, state.sum_y, state.sum_xx, state.sum_xy, state.sum_yy = (float(s[row]) for s in fit['sums'])
+        state.sum_p = float(valid.sum())
+        state.sum_pp = float((valid * valid).sum())
+        state.low, state.high = float(valid.min()), float(valid.max())
+        state.recent.extend(valid[-20:].tolist())
+        state.last_close = float(valid[-1])
+        state.last_day = int(fit['current_day'][row])
+        state.residual_p05 = float(fit['residual_p05'][row])
+        state.residual_p95 = float(fit['residual_p95'][row])
+        return state
+
+    def full_cycle_regressions(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """CowenCycleBasedCalculator.calculate_full_cycle_regression for every symbol at once"""
+        symbols = list(self.histories if symbols is None else symbols)
+        if not symbols:
+            return {}
+        closes, days, _ = self._matrix(symbols)
+        fit = self.fit_regressions(closes, days)
+        return {
+            symbol: {
+                'slope': float(fit['slope'][row]),
+                'intercept': float(fit['intercept'][row]),
+                'r_squared': float(fit['r_squared'][row]),
+                'std_residual': float(fit['std_residual'][row]),
+                'days_analyzed': int(fit['n'][row])
+            } if fit['n'][row] >= MIN_CYCLE_REGRESSION else {}
+            for row, symbol in enumerate(symbols)
+        }
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['symbols_loaded'] = len(self.histories)
+        stats['incremental_states'] = len(self.calculator.regression_states)
+        return stats
+
+
+# Global instance
+min_max_batch_engine = MinMaxBatchEngine()
@@ -12,10 +12,110 @@ from scipy.optimize import curve_fit
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
+from collections import deque
 import logging
 
 logger = logging.getLogger(__name__)
 
+class RunningLogRegression:
+    """
+    Running sums for one symbol's log-log regression and log-price distribution
+    Each new daily close is an O(1) update; bounds are read straight from the sums
+    """
+    
+    def __init__(self, start_date: datetime):
+        self.start_date = start_date
+        self.last_day = 0
+        self.last_close = 0.0
+        # x = log(day), y = log(price), p = price
+        self.n = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+        self.sum_yy = 0.0
+        self.sum_p = 0.0
+        self.sum_pp = 0.0
+        self.low = math.inf
+        self.high = -math.inf
+        self.recent = deque(maxlen=20)  # Bollinger window of the distribution bounds
+        # Residual percentiles from the last full recalibration
+        self.residual_p05: Optional[float] = None
+        self.residual_p95: Optional[float] = None
+    
+    def add_close(self, price: float, date: Optional[datetime] = None):
+        """Add one daily close; without a date it is taken to be the next day"""
+        day = (date - self.start_date).days + 1 if date is not None else self.last_day + 1
+        self.last_day = max(self.last_day, day)
+        if price <= 0 or day <= 0:
+            return
+        
+        x, y = math.log(day), math.log(price)
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_xy += x * y
+        self.sum_yy += y * y
+        self.sum_p += price
+        self.sum_pp += price * price
+        self.low = min(self.low, price)
+        self.high = max(self.high, price)
+        self.recent.append(price)
+        self.last_close = price
+    
+    def regression(self) -> Dict:
+        """Least-squares slope/intercept of log price on log day, as stats.linregress gives"""
+        n = self.n
+        sxx = self.sum_xx - self.sum_x * self.sum_x / n
+        sxy = self.sum_xy - self.sum_x * self.sum_y / n
+        syy = self.sum_yy - self.sum_y * self.sum_y / n
+        slope = sxy / sxx if sxx > 0 else 0.0
+        intercept = (self.sum_y - slope * self.sum_x) / n
+        # Residuals have zero mean, so their population std comes from the explained sum
+        std_residual = math.sqrt(max(syy - slope * sxy, 0.0) / n)
+        r_squared = sxy * sxy / (sxx * syy) if sxx > 0 and syy > 0 else 0.0
+        return {
+            'slope': slope,
+            'intercept': intercept,
+            'r_squared': r_squared,
+            'std_residual': std_residual,
+            'days_analyzed': n
+        }
+    
+    def regression_bounds(self) -> Tuple[float, float]:
+        """logarithmic_regression_bounds from the running sums"""
+        if self.n < 10:
+            return self.low, self.high
+        
+        fit = self.regression()
+        central_log_price = fit['slope'] * math.log(self.last_day) + fit['intercept']
+        min_price = math.exp(central_log_price - 2 * fit['std_residual'])
+        max_price = math.exp(central_log_price + 2 * fit['std_residual'])
+        
+        # Tighten with the recalibrated residual percentiles when there are any
+        if self.residual_p05 is not None:
+            min_price = max(min_price, math.exp(central_log_price + self.residual_p05))
+            max_price = min(max_price, math.exp(central_log_price + self.residual_p95))
+        return min_price, max_price
+    
+    def distribution_bounds(self) -> Tuple[float, float]:
+        """statistical_distribution_bounds from the running sums"""
+        n = self.n
+        mean_log = self.sum_y / n
+        std_log = math.sqrt(max(self.sum_yy / n - mean_log * mean_log, 0.0))
+        min_price = math.exp(mean_log - 2.5 * std_log)
+        max_price = math.exp(mean_log + 2.5 * std_log)
+        
+        mean_price = self.sum_p / n
+        std_price = math.sqrt(max(self.sum_pp / n - mean_price * mean_price, 0.0))
+        volatility_factor = float(np.std(self.recent)) / std_price if std_price > 0 else 0.0
+        return min_price * (1 - 0.1 * volatility_factor), max_price * (1 + 0.1 * volatility_factor)
+    
+    def fibonacci_bounds(self) -> Tuple[float, float]:
+        """fibonacci_bounds from the running low and high"""
+        return self.low * 0.9, self.high + (self.high - self.low) * 0.272
+
 class MinMaxCalculator:
     """
     THE KEY COMPONENT: Calculates accurate min/max values for risk bands
@@ -35,6 +135,8 @@ class MinMaxCalculator:
             'fibonacci_levels': 0.15,
             'cycle_analysis': 0.15
         }
+        # Per-symbol running sums, seeded by MinMaxBatchEngine.recalibrate
+        self.regression_states: Dict[str, RunningLogRegression] = {}
     
     def calculate_min_max(self, symbol: str, price_history: List[Dict]) -> Dict:
         """
@@ -414,11 +516,19 @@ class MinMaxCalculator:
         return float(confidence)
     
     def update_bounds_incrementally(self, symbol: str, current_bounds: Dict, 
-                                   new_prices: List[float]) -> Dict:
+                                   new_prices: List[float], new_dates: Optional[List[datetime]] = None) -> Dict:
         """
         Update min/max bounds incrementally with new price data
         This is used for continuous learning without full recalculation
+        
+        After a batch recalibration each new daily close updates the regression,
+        distribution and Fibonacci bounds from running sums in O(1); support/resistance
+        and cycle bounds keep their recalibrated values until the next batch run.
         """
+        state = self.regression_states.get(symbol)
+        if state is not None and current_bounds.get('methods'):
+            return self._update_from_running_sums(symbol, state, current_bounds, new_prices, new_dates)
+        
         current_min = current_bounds['min_price']
         current_max = current_bounds['max_price']
         
@@ -450,6 +560,37 @@ class MinMaxCalculator:
             'last_updated': datetime.now(),
             'update_type': 'incremental'
         }
+    
+    def _update_from_running_sums(self, symbol: str, state: RunningLogRegression, current_bounds: Dict,
+                                  new_prices: List[float], new_dates: Optional[List[datetime]]) -> Dict:
+        """Feed new closes into the running sums and recombine the bounds"""
+        for i, price in enumerate(new_prices):
+            state.add_close(price, new_dates[i] if new_dates else None)
+        
+        methods = dict(current_bounds['methods'])
+        for name, (low, high) in (('logarithmic_regression', state.regression_bounds()),
+                                  ('statistical_distribution', state.distribution_bounds()),
+                                  ('fibonacci_levels', state.fibonacci_bounds())):
+            methods[name] = {'min': float(low), 'max': float(high)}
+        
+        final_min = sum(methods[name]['min'] * weight for name, weight in self.methods_weights.items())
+        final_max = sum(methods[name]['max'] * weight for name, weight in self.methods_weights.items())
+        
+        # Only the historical low and high of the price list are used when adjusting
+        current_price = state.last_close
+        final_min, final_max = self.validate_and_adjust(final_min, final_max, current_price, [state.low, state.high])
+        
+        return {
+            **current_bounds,
+            'symbol': symbol,
+            'min_price': final_min,
+            'max_price': final_max,
+            'current_price': current_price,
+            'current_risk': self.calculate_risk(current_price, final_min, final_max),
+            'methods': methods,
+            'last_updated': datetime.now(),
+            'update_type': 'incremental'
+        }
 
 # Global instance
 min_max_calculator = MinMaxCalculator()
\ No newline at end of file
@@ -6,7 +6,7 @@ Manages a portfolio of up to 10 KuCoin futures symbols with REAL data and valida
 
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 import uuid
@@ -14,8 +14,8 @@ import json
 import sqlite3
 from decimal import Decimal
 import numpy as np
-import pandas as pd
 from src.utils.symbol_converter import to_kucoin, to_standard, to_binance
+from src.services.rolling_correlation_engine import RollingCorrelationEngine
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -96,6 +96,11 @@ class MySymbolsServiceV2:
         self.min_score_for_trading = 0.6  # Don't trade low scores
         self.require_binance_availability = False  # Prefer but don't require
         
+        # Rolling daily price correlations; history is fetched at most once a day per symbol,
+        # or again when a longer window than the synced one is asked for
+        self.correlation_engine = RollingCorrelationEngine()
+        self._correlation_synced: Dict[str, Tuple[date, int]] = {}
+        
         # Initialize database
         self._init_database()
         
@@ -1367,7 +1372,7 @@ class MySymbolsServiceV2:
             logger.error(f"❌ Failed to calculate position size for {symbol}: {e}")
             return 0.0
     
-    async def check_portfolio_correlation(self) -> Dict[str, Any]:
+    async def check_portfolio_correlation(self, window: int = 30) -> Dict[str, Any]:
         """Check correlation between portfolio symbols"""
         try:
             from src.services.real_time_price_service import get_real_time_price_service
@@ -1376,54 +1381,60 @@ class MySymbolsServiceV2:
             if len(portfolio) < 2:
                 return {'correlations': {}, 'warnings': []}
             
-            price_service = await get_real_time_price_service()
-            
-            # Get historical prices for correlation calculation
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=30)
-            
-            price_data = {}
-            for entry in portfolio:
-                historical = await price_service.get_historical_prices(
-                    entry.symbol, start_date, end_date
-                )
-                if historical:
-                    price_data[entry.symbol] = [h.close for h in historical]
+            symbols = [entry.symbol for entry in portfolio]
+            today = datetime.utcnow().date()
+            stale = [
+                symbol for symbol in symbols
+                if self._correlation_synced.get(symbol, (None, 0))[0] != today
+                or self._correlation_synced[symbol][1] < window
+            ]
             
-            if len(price_data) < 2:
+            if stale:
+                price_service = await get_real_time_price_service()
+                
+                # Get historical prices for correlation calculation
+                end_date = datetime.utcnow()
+                start_date = end_date - timedelta(days=window)
+                
+                for symbol in stale:
+                    historical = await price_service.get_historical_prices(symbol, start_date, end_date)
+                    if historical:
+                        self.correlation_engine.backfill(symbol, [(h.timestamp, h.close) for h in historical])
+                        self._correlation_synced[symbol] = (today, window)
+            
+            names, correlation_matrix = self.correlation_engine.correlation_matrix(window, symbols)
+            if len(names) < 2:
                 return {'correlations': {}, 'warnings': ['Insufficient price data for correlation']}
             
-            # Create DataFrame for correlation calculation
-            df = pd.DataFrame(price_data)
-            
-            # Calculate returns
-            returns = df.pct_change().dropna()
-            
-            # Calculate correlation matrix
-            correlation_matrix = returns.corr()
-            
             correlations = {}
             warnings = []
             
             # Extract correlations and check for high correlation
-            for i, symbol1 in enumerate(correlation_matrix.columns):
-                for j, symbol2 in enumerate(correlation_matrix.columns):
-                    if i < j:  # Upper triangle only
-                        # Use values array to get native Python types
-                        corr_float = float(correlation_matrix.values[i, j])
-                        pair = f"{symbol1}-{symbol2}"
-                        correlations[pair] = round(corr_float, 3)
-                        
-                        if abs(corr_float) > 0.8:
-                            warnings.append(
-                                f"⚠️ High correlation ({corr_float:.2f}) between {symbol1} and {symbol2}"
-                            )
+            rows, cols = np.triu_indices(len(names), k=1)
+            for i, j in zip(rows, cols):
+                corr_float = float(correlation_matrix[i, j])
+                if np.isnan(corr_float):
+                    continue
+                symbol1, symbol2 = names[i], names[j]
+                correlations[f"{symbol1}-{symbol2}"] = round(corr_float, 3)
+                
+                if abs(corr_float) > 0.8:
+                    warnings.append(
+                        f"⚠️ High correlation ({corr_float:.2f}) between {symbol1} and {symbol2}"
+                    )
+            
+            if not correlations:
+                return {'correlations': {}, 'warnings': ['Insufficient price data for correlation']}
             
+            values = list(correlations.values())
             return {
                 'correlations': correlations,
                 'warnings': warnings,
-                'average_correlation': round(correlation_matrix.values[correlation_matrix.values != 1].mean(), 3),
-                'max_correlation': round(correlation_matrix.values[correlation_matrix.values != 1].max(), 3),
+                'average_correlation': round(float(np.mean(values)), 3),
+                'max_correlation': round(float(np.max(values)), 3),
+                'most_correlated': self.correlation_engine.top_pairs(window, k=3, symbols=names),
+                'least_correlated': self.correlation_engine.top_pairs(window, k=3, most=False, symbols=names),
+                'window_days': window,
                 'timestamp': datetime.now().isoformat()
             }
             
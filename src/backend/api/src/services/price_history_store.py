@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Columnar Price History Store
+One memory-mapped file of typed OHLCV columns per symbol and interval
+
+Each series lives at <root>/<SYMBOL>/<interval>.bars:
+    a 64-byte header (magic, version, row count, capacity, interval seconds)
+    followed by one fixed-capacity block per column: timestamp (int64 bar
+    open, epoch seconds UTC), then open, high, low, close, volume and
+    market_cap (float64; NaN where a source has no value)
+
+Timestamps are kept sorted, so the timestamp column is its own index: a
+range read is two binary searches and a slice of each column. Updates are
+append-only - bars newer than the last stored bar are appended and a bar at
+the last timestamp replaces it (today's partial bar) - and the row count in
+the header is written last, so a crash mid-append leaves the old series.
+Files grow by doubling capacity. Older history is merged in front of a
+series by rewriting it to a temporary file that replaces the old one.
+
+The CSV importer reads the history files the updaters used to keep
+(CoinMarketCap exports, CoinGecko "-usd-max" exports and the updaters' own
+Date;Open;... files) into the store, in front of and after what is stored.
+"""
+
+import os
+import re
+import csv
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HEADER_BYTES = 64
+MAGIC = 0x5A4D5048  # "ZMPH"
+VERSION = 1
+INITIAL_CAPACITY = 1024
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'market_cap')
+COLUMNS = ('timestamp',) + PRICE_COLUMNS
+
+INTERVAL_SECONDS = {
+    '1h': 3600,
+    '4h': 4 * 3600,
+    '1d': 86400,
+    '1w': 7 * 86400
+}
+
+TimeLike = Union[datetime, int, float, str, None]
+
+
+def to_epoch_seconds(value: TimeLike) -> Optional[int]:
+    """Epoch seconds (UTC) for a datetime, epoch number (seconds or ms) or ISO date string"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value / 1000) if value > 1e11 else int(value)
+    text = str(value).strip().strip('"')
+    try:
+        return to_epoch_seconds(float(text))
+    except ValueError:
+        pass
+    text = text.replace(' UTC', '').replace('Z', '+00:00')
+    return to_epoch_seconds(datetime.fromisoformat(text))
+
+
+@dataclass
+class PriceBars:
+    """A range of bars for one symbol and interval, as parallel typed arrays"""
+    symbol: str
+    interval: str
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    market_cap: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.timestamp.astype('datetime64[s]')
+
+    def to_frame(self):
+        """pandas DataFrame indexed by bar open time"""
+        import pandas as pd
+        return pd.DataFrame({name: getattr(self, name) for name in PRICE_COLUMNS},
+                            index=pd.to_datetime(self.timestamp, unit='s', utc=True))
+
+    @classmethod
+    def from_records(cls, symbol: str, interval: str, records: List[Tuple]) -> "PriceBars":
+        """Bars from (timestamp, open, high, low, close, volume, market_cap) tuples; sorted, last duplicate wins"""
+        step = INTERVAL_SECONDS[interval]
+        if records:
+            columns = list(zip(*records))
+        else:
+            columns = [[] for _ in COLUMNS]
+        timestamp = np.asarray(columns[0], dtype=np.int64) // step * step
+        values = [np.asarray(column, dtype=np.float64) for column in columns[1:]]
+
+        # Stable sort, then keep the last bar of each timestamp
+        order = np.argsort(timestamp, kind='stable')
+        timestamp = timestamp[order]
+        keep = np.ones(len(timestamp), dtype=bool)
+        keep[:-1] = timestamp[1:] != timestamp[:-1]
+        return cls(symbol, interval, timestamp[keep], *(column[order][keep] for column in values))
+
+
+class PriceSeries:
+    """One symbol/interval file, memory-mapped"""
+
+    def __init__(self, path: Path, interval: str, create: bool = False):
+        self.path = path
+        self.interval = interval
+        if not path.exists():
+            if not create:
+                raise FileNotFoundError(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_empty(path, INITIAL_CAPACITY)
+        self._map()
+
+    def _write_empty(self, path: Path, capacity: int):
+        with open(path, 'wb') as f:
+            f.truncate(HEADER_BYTES + capacity * len(COLUMNS) * 8)
+        header = np.memmap(path, dtype=np.int64, mode='r+', shape=(HEADER_BYTES // 8,))
+        header[:5] = (MAGIC, VERSION, 0, capacity, INTERVAL_SECONDS[self.interval])
+        header.flush()
+        del header
+
+    def _map(self):
+        self.header = np.memmap(self.path, dtype=np.int64, mode='r+', shape=(HEADER_BYTES // 8,))
+        if self.header[0] != MAGIC or self.header[1] != VERSION:
+            raise ValueError(f"Corrupt price history file: {self.path}")
+        if self.header[4] != INTERVAL_SECONDS[self.interval]:
+            raise ValueError(f"{self.path} holds {self.header[4]}s bars, not {self.interval}")
+        self.capacity = int(self.header[3])
+        self.columns: Dict[str, np.memmap] = {}
+        for index, name in enumerate(COLUMNS):
+            dtype = np.int64 if name == 'timestamp' else np.float64
+            self.columns[name] = np.memmap(self.path, dtype=dtype, mode='r+', shape=(self.capacity,),
+                                           offset=HEADER_BYTES + index * self.capacity * 8)
+
+    def __len__(self) -> int:
+        return int(self.header[2])
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.columns['timestamp'][:len(self)]
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        return int(self.columns['timestamp'][0]) if len(self) else None
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.columns['timestamp'][len(self) - 1]) if len(self) else None
+
+    def bounds(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """Row range [lo, hi) of bars with start <= timestamp <= end, by binary search"""
+        timestamps = self.timestamps
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='right'))
+        return lo, max(lo, hi)
+
+    def read(self, symbol: str, start: Optional[int] = None, end: Optional[int] = None,
+             copy: bool = True) -> PriceBars:
+        """Bars in [start, end]; copy=False returns views into the map, valid until the next append"""
+        lo, hi = self.bounds(start, end)
+        take = (lambda column: np.array(column[lo:hi])) if copy else (lambda column: column[lo:hi])
+        return PriceBars(symbol, self.interval, *(take(self.columns[name]) for name in COLUMNS))
+
+    def append(self, bars: PriceBars) -> int:
+        """Append bars newer than the last stored one; a bar at the last timestamp replaces it"""
+        rows = len(self)
+        last = self.last_timestamp
+        start_row = rows
+        first = 0
+        if last is not None:
+            first = int(np.searchsorted(bars.timestamp, last, side='left'))
+            if first < len(bars) and bars.timestamp[first] == last:
+                start_row = rows - 1
+        count = len(bars) - first
+        if count <= 0:
+            return 0
+
+        needed = start_row + count
+        if needed > self.capacity:
+            self._grow(needed)
+        for name in COLUMNS:
+            self.columns[name][start_row:needed] = getattr(bars, name)[first:]
+            self.columns[name].flush()
+        # Commit point: readers only see rows below the stored count
+        self.header[2] = needed
+        self.header.flush()
+        return needed - rows
+
+    def prepend(self, bars: PriceBars) -> int:
+        """Insert bars older than the first stored one in front of the series"""
+        first = self.first_timestamp
+        if first is None:
+            return 0
+        count = int(np.searchsorted(bars.timestamp, first, side='left'))
+        if count <= 0:
+            return 0
+        head = PriceBars(bars.symbol, bars.interval, *(getattr(bars, name)[:count] for name in COLUMNS))
+        self._rewrite(self._capacity_for(len(self) + count), head)
+        return count
+
+    def _capacity_for(self, needed: int) -> int:
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        return capacity
+
+    def _grow(self, needed: int):
+        self._rewrite(self._capacity_for(needed))
+
+    def _rewrite(self, capacity: int, head: Optional[PriceBars] = None):
+        """Copy the series (after any head bars) into a new file of the given capacity and swap it in"""
+        rows = len(self)
+        offset = len(head) if head is not None else 0
+        temp_path = self.path.with_suffix('.tmp')
+        self._write_empty(temp_path, capacity)
+        for index, name in enumerate(COLUMNS):
+            target = np.memmap(temp_path, dtype=self.columns[name].dtype, mode='r+', shape=(capacity,),
+                               offset=HEADER_BYTES + index * capacity * 8)
+            if offset:
+                target[:offset] = getattr(head, name)
+            target[offset:offset + rows] = self.columns[name][:rows]
+            target.flush()
+            del target
+        header = np.memmap(temp_path, dtype=np.int64, mode='r+', shape=(HEADER_BYTES // 8,))
+        header[2] = offset + rows
+        header.flush()
+        del header
+        self.columns.clear()
+        del self.header
+        os.replace(temp_path, self.path)
+        self._map()
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+        self.header.flush()
+
+
+class PriceHistoryStore:
+    """
+    Price history for every symbol and interval, one PriceSeries file each
+    """
+
+    def __init__(self, root: str = "data/price_history"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._series: Dict[Tuple[str, str], PriceSeries] = {}
+
+    def _path(self, symbol: str, interval: str) -> Path:
+        if interval not in INTERVAL_SECONDS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', symbol.upper())
+        return self.root / safe / f"{interval}.bars"
+
+    def series(self, symbol: str, interval: str = '1d', create: bool = False) -> Optional[PriceSeries]:
+        key = (symbol.upper(), interval)
+        series = self._series.get(key)
+        if series is None:
+            path = self._path(symbol, interval)
+            if not path.exists() and not create:
+                return None
+            series = self._series[key] = PriceSeries(path, interval, create=True)
+        return series
+
+    def has(self, symbol: str, interval: str = '1d') -> bool:
+        series = self.series(symbol, interval)
+        return series is not None and len(series) > 0
+
+    def symbols(self, interval: str = '1d') -> List[str]:
+        return sorted(path.parent.name for path in self.root.glob(f"*/{interval}.bars"))
+
+    def append(self, bars: PriceBars) -> int:
+        """Append-only update of a series; returns the number of new bars"""
+        if not len(bars):
+            return 0
+        return self.series(bars.symbol, bars.interval, create=True).append(bars)
+
+    def merge(self, bars: PriceBars) -> int:
+        """Add bars older than the first stored bar and newer than the last; returns the number of new bars"""
+        if not len(bars):
+            return 0
+        series = self.series(bars.symbol, bars.interval, create=True)
+        return series.prepend(bars) + series.append(bars)
+
+    def read(self, symbol: str, start: TimeLike = None, end: TimeLike = None, interval: str = '1d',
+             copy: bool = True) -> Optional[PriceBars]:
+        """Bars with start <= bar open <= end (either bound optional); None if the symbol has no series"""
+        series = self.series(symbol, interval)
+        if series is None:
+            return None
+        return series.read(symbol.upper(), to_epoch_seconds(start), to_epoch_seconds(end), copy=copy)
+
+    def last_timestamp(self, symbol: str, interval: str = '1d') -> Optional[datetime]:
+        series = self.series(symbol, interval)
+        if series is None or series.last_timestamp is None:
+            return None
+        return datetime.fromtimestamp(series.last_timestamp, tz=timezone.utc)
+
+    def get_stats(self, interval: str = '1d') -> Dict[str, Any]:
+        stats = {}
+        for symbol in self.symbols(interval):
+            series = self.series(symbol, interval)
+            stats[symbol] = {
+                'bars': len(series),
+                'first': datetime.fromtimestamp(series.first_timestamp, tz=timezone.utc).isoformat()
+                if len(series) else None,
+                'last': datetime.fromtimestamp(series.last_timestamp, tz=timezone.utc).isoformat()
+                if len(series) else None
+            }
+        return stats
+
+    def flush(self):
+        for series in self._series.values():
+            series.flush()
+
+
+# API payloads -> bars
+
+def bars_from_coingecko(symbol: str, data: Dict[str, Any], interval: str = '1d') -> PriceBars:
+    """Bars from a CoinGecko market_chart payload (price only, so OHLC are all the price)"""
+    volumes = {int(t): v for t, v in data.get('total_volumes', [])}
+    market_caps = {int(t): v for t, v in data.get('market_caps', [])}
+    records = [
+        (int(t) // 1000, price, price, price, price, volumes.get(int(t), np.nan), market_caps.get(int(t), np.nan))
+        for t, price in data.get('prices', [])
+    ]
+    return PriceBars.from_records(symbol, interval, records)
+
+
+def bars_from_binance_klines(symbol: str, klines: List[List[Any]], interval: str = '1d') -> PriceBars:
+    """Bars from Binance klines ([open_time, open, high, low, close, volume, ...])"""
+    records = [
+        (int(k[0]) // 1000, float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]), np.nan)
+        for k in klines
+    ]
+    return PriceBars.from_records(symbol, interval, records)
+
+
+# CSV import
+
+# Names used in history file names -> trading symbol, where the ticker is not the name
+CSV_NAME_TO_SYMBOL = {
+    'BITCOIN': 'BTCUSDT',
+    'ETHEREUM': 'ETHUSDT',
+    'SOLANA': 'SOLUSDT',
+    'AVALANCHE': 'AVAXUSDT',
+    'CARDANO': 'ADAUSDT',
+    'POLKADOT': 'DOTUSDT',
+    'CHAINLINK': 'LINKUSDT',
+    'DOGECOIN': 'DOGEUSDT',
+    'LITECOIN': 'LTCUSDT',
+    'MONERO': 'XMRUSDT',
+    'STELLAR': 'XLMUSDT',
+    'VECHAIN': 'VETUSDT'
+}
+
+CSV_FILE_PATTERNS = (
+    re.compile(r'^(?P<name>[^_]+)_.*_historical_data_coinmarketcap\.csv$', re.IGNORECASE),
+    re.compile(r'^(?P<name>[^-]+)-usd-max\.csv$', re.IGNORECASE),
+    re.compile(r'^(?P<name>[^_]+)_(?:coingecko|binance)_\d+d_historical_data\.csv$', re.IGNORECASE),
+    re.compile(r'^(?P<name>[A-Z0-9]+USDT)_historical\.csv$', re.IGNORECASE)
+)
+
+# Sources with real OHLC win over price-only ones when files overlap
+CSV_SOURCE_PRIORITY = ('coinmarketcap', 'binance', 'historical.csv', 'coingecko', 'usd-max')
+
+_CSV_ALIASES = {
+    'timestamp': ('timeopen', 'date', 'snapped_at', 'timestamp', 'time'),
+    'open': ('open',),
+    'high': ('high',),
+    'low': ('low',),
+    'close': ('close', 'price'),
+    'volume': ('volume', 'total_volume'),
+    'market_cap': ('marketcap', 'market_cap')
+}
+
+
+def symbol_for_csv(filename: str) -> Optional[str]:
+    """Trading symbol of a price history file name, or None if it is not one"""
+    for pattern in CSV_FILE_PATTERNS:
+        match = pattern.match(filename)
+        if match:
+            name = match.group('name').upper()
+            if name in CSV_NAME_TO_SYMBOL:
+                return CSV_NAME_TO_SYMBOL[name]
+            return name if name.endswith('USDT') else f"{name}USDT"
+    return None
+
+
+def _source_rank(filename: str) -> int:
+    lowered = filename.lower()
+    for rank, source in enumerate(CSV_SOURCE_PRIORITY):
+        if source in lowered:
+            return rank
+    return len(CSV_SOURCE_PRIORITY)
+
+
+def _number(value: Optional[str]) -> float:
+    if value is None:
+        return np.nan
+    value = value.strip().strip('"')
+    return float(value) if value else np.nan
+
+
+def read_price_csv(path: str, symbol: str, interval: str = '1d') -> PriceBars:
+    """Parse any of the known history CSV layouts into bars"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = f.readline()
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+        f.seek(0)
+        reader = csv.reader(f, delimiter=delimiter)
+        names = [name.strip().strip('"').lower() for name in next(reader)]
+        positions = {}
+        for column, aliases in _CSV_ALIASES.items():
+            for alias in aliases:
+                if alias in names:
+                    positions[column] = names.index(alias)
+                    break
+        if 'timestamp' not in positions or 'close' not in positions:
+            raise ValueError(f"{path} has no time/close columns")
+
+        records = []
+        for row in reader:
+            if not row:
+                continue
+            get = lambda column: row[positions[column]] if column in positions and positions[column] < len(row) else None
+            close = _number(get('close'))
+            open_, high, low = (_number(get(c)) if c in positions else close for c in ('open', 'high', 'low'))
+            records.append((to_epoch_seconds(get('timestamp')), open_, high, low, close,
+                            _number(get('volume')), _number(get('market_cap'))))
+    return PriceBars.from_records(symbol, interval, records)
+
+
+def csv_files_by_symbol(directory: str) -> Dict[str, List[str]]:
+    """Recognised history CSV file names in a directory, grouped by trading symbol"""
+    by_symbol: Dict[str, List[str]] = {}
+    for filename in sorted(os.listdir(directory)):
+        symbol = symbol_for_csv(filename)
+        if symbol:
+            by_symbol.setdefault(symbol, []).append(filename)
+    return by_symbol
+
+
+def import_csv_directory(store: PriceHistoryStore, directory: str, interval: str = '1d',
+                         symbols: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Import every recognised history CSV in a directory (or only those of the given symbols)
+
+    Files for the same symbol are merged (sources with real OHLC win on
+    overlapping days) before they reach the store, so import order does not
+    matter. Days before the first stored bar are merged in front of the
+    series and days after the last one appended; re-running adds nothing.
+    """
+    by_symbol = csv_files_by_symbol(directory)
+    if symbols is not None:
+        wanted = {symbol.upper() for symbol in symbols}
+        by_symbol = {symbol: filenames for symbol, filenames in by_symbol.items() if symbol in wanted}
+
+    imported = {}
+    for symbol, filenames in by_symbol.items():
+        records = []
+        # Lowest priority first so better sources overwrite them in from_records (last duplicate wins)
+        for filename in sorted(filenames, key=_source_rank, reverse=True):
+            try:
+                bars = read_price_csv(os.path.join(directory, filename), symbol, interval)
+            except Exception as e:
+                logger.warning(f"⚠️ Skipping {filename}: {e}")
+                continue
+            records.extend(zip(*(getattr(bars, name).tolist() for name in COLUMNS)))
+        imported[symbol] = store.merge(PriceBars.from_records(symbol, interval, records))
+        logger.info(f"📥 Imported {imported[symbol]} {interval} bars for {symbol} from {len(filenames)} file(s)")
+    store.flush()
+    return imported
+
+
+# Global instance
+price_history_store = PriceHistoryStore()
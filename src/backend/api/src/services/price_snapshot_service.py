@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Price Snapshot Service
+One shared, immutable view of every Binance symbol's 24h ticker
+
+The whole market is filled with a single bulk /ticker/24hr call over a pooled
+HTTP session instead of one request per symbol. Concurrent readers of a stale
+snapshot share one refresh. Once the all-market mini-ticker stream is
+started, each message updates the symbols that changed, and the snapshot
+stays fresh without polling.
+
+Every update publishes a new PriceSnapshot. Readers get a read-only mapping
+that is never mutated underneath them, and subscribers are called with the
+snapshot and the symbols that changed.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+import aiohttp
+
+from src.utils.enhanced_rate_limiter import EnhancedRateLimiter, global_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+BINANCE_URL = "https://api.binance.com/api/v3"
+BINANCE_MINI_TICKER_STREAM = "wss://stream.binance.com:9443/ws/!miniTicker@arr"
+
+# 24hr ticker fields kept per symbol, as floats
+TICKER_FIELDS = ('lastPrice', 'openPrice', 'highPrice', 'lowPrice', 'priceChangePercent', 'volume', 'quoteVolume')
+
+
+@dataclass(frozen=True)
+class PriceSnapshot:
+    """Immutable 24h tickers for every symbol at one point in time"""
+    tickers: Mapping[str, Mapping[str, float]]
+    fetched_at: float  # unix time of the update that produced it
+    source: str  # 'rest', 'stream' or 'empty'
+    version: int = 0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def get(self, symbol: str) -> Optional[Mapping[str, float]]:
+        return self.tickers.get(symbol)
+
+    def price(self, symbol: str) -> Optional[float]:
+        ticker = self.tickers.get(symbol)
+        return ticker['lastPrice'] if ticker else None
+
+    def prices(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Last prices for the given symbols (all when None); unknown symbols are left out"""
+        if symbols is None:
+            return {symbol: ticker['lastPrice'] for symbol, ticker in self.tickers.items()}
+        return {symbol: self.tickers[symbol]['lastPrice'] for symbol in symbols if symbol in self.tickers}
+
+
+def ticker_from_rest(item: Dict[str, Any]) -> Mapping[str, float]:
+    return MappingProxyType({field: float(item[field]) for field in TICKER_FIELDS if field in item})
+
+
+def ticker_from_mini(item: Dict[str, Any]) -> Mapping[str, float]:
+    """24hr-ticker fields from a mini-ticker event (c=close, o=open, h, l, v=base, q=quote volume)"""
+    last, open_price = float(item['c']), float(item['o'])
+    return MappingProxyType({
+        'lastPrice': last,
+        'openPrice': open_price,
+        'highPrice': float(item['h']),
+        'lowPrice': float(item['l']),
+        'priceChangePercent': round((last - open_price) / open_price * 100, 3) if open_price else 0.0,
+        'volume': float(item['v']),
+        'quoteVolume': float(item['q'])
+    })
+
+
+class PriceSnapshotService:
+    """
+    Keeps the market-wide ticker snapshot fresh for every alert path
+    """
+
+    def __init__(self, base_url: str = BINANCE_URL, stream_url: str = BINANCE_MINI_TICKER_STREAM,
+                 max_age_seconds: float = 5.0, timeout_seconds: float = 10.0,
+                 rate_limiter: Optional[EnhancedRateLimiter] = None):
+        self.base_url = base_url.rstrip('/')
+        self.stream_url = stream_url
+        self.max_age_seconds = max_age_seconds
+        self.timeout_seconds = timeout_seconds
+        self.rate_limiter = rate_limiter or global_rate_limiter
+
+        self._snapshot = PriceSnapshot(MappingProxyType({}), 0.0, 'empty')
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._stream_task: Optional[asyncio.Task] = None
+        self._subscribers: List[Callable] = []
+
+        self.stats = {
+            'reads': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'coalesced_reads': 0,
+            'stream_messages': 0,
+            'stream_reconnects': 0,
+            'stream_connected': False,
+            'last_refresh_ms': 0.0
+        }
+
+    @property
+    def snapshot(self) -> PriceSnapshot:
+        """Latest snapshot, however old, without I/O"""
+        return self._snapshot
+
+    def subscribe(self, callback: Callable):
+        """Call callback(snapshot, changed_symbols) on every update; may be async"""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+        return self._session
+
+    async def get_snapshot(self, max_age: Optional[float] = None) -> PriceSnapshot:
+        """Current snapshot, refreshed with one bulk call when older than max_age seconds"""
+        self.stats['reads'] += 1
+        max_age = self.max_age_seconds if max_age is None else max_age
+        if self._snapshot.age <= max_age:
+            return self._snapshot
+        return await self.refresh()
+
+    async def get_ticker(self, symbol: str) -> Mapping[str, float]:
+        """One symbol's 24hr ticker from the shared snapshot"""
+        ticker = (await self.get_snapshot()).get(symbol)
+        if ticker is None:
+            raise KeyError(f"No ticker for {symbol}")
+        return ticker
+
+    async def refresh(self) -> PriceSnapshot:
+        """Fetch every ticker in one call; callers arriving during a refresh share it"""
+        task = self._refresh_task
+        if task is None or task.done():
+            task = self._refresh_task = asyncio.get_running_loop().create_task(self._fetch_all())
+        else:
+            self.stats['coalesced_reads'] += 1
+        return await asyncio.shield(task)
+
+    async def _fetch_all(self) -> PriceSnapshot:
+        session = await self._get_session()
+        start = time.perf_counter()
+        try:
+            await self.rate_limiter.wait_if_needed('binance')
+            async with session.get(f"{self.base_url}/ticker/24hr") as response:
+                self.rate_limiter.handle_response('binance', response.status, time.perf_counter() - start)
+                response.raise_for_status()
+                data = await response.json()
+            tickers = {item['symbol']: ticker_from_rest(item) for item in data}
+        except Exception as e:
+            self.stats['refresh_errors'] += 1
+            if not self._snapshot.tickers:
+                raise
+            logger.warning(f"⚠️ Bulk ticker refresh failed, serving the snapshot from {self._snapshot.age:.0f}s ago: {e}")
+            return self._snapshot
+
+        self.stats['refreshes'] += 1
+        self.stats['last_refresh_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return await self._publish(tickers, 'rest', list(tickers))
+
+    async def _publish(self, tickers: Dict[str, Mapping[str, float]], source: str,
+                       changed: List[str]) -> PriceSnapshot:
+        snapshot = PriceSnapshot(MappingProxyType(tickers), time.time(), source, self._snapshot.version + 1)
+        self._snapshot = snapshot
+        for callback in list(self._subscribers):
+            try:
+                result = callback(snapshot, changed)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error in price snapshot subscriber {getattr(callback, '__name__', callback)}: {e}")
+        return snapshot
+
+    async def apply_mini_tickers(self, items: List[Dict[str, Any]]) -> PriceSnapshot:
+        """Merge one all-market mini-ticker message (changed symbols only) into a new snapshot"""
+        tickers = dict(self._snapshot.tickers)
+        changed = []
+        for item in items:
+            try:
+                tickers[item['s']] = ticker_from_mini(item)
+                changed.append(item['s'])
+            except (KeyError, ValueError) as e:
+                logger.debug(f"Skipping malformed mini ticker {item}: {e}")
+        self.stats['stream_messages'] += 1
+        return await self._publish(tickers, 'stream', changed)
+
+    async def start_stream(self):
+        """Follow the all-market mini-ticker stream in the background, once"""
+        if self._stream_task and not self._stream_task.done():
+            return
+        self._stream_task = asyncio.get_running_loop().create_task(self._stream_loop())
+
+    async def _stream_loop(self):
+        backoff = 1.0
+        while True:
+            try:
+                # The stream only sends symbols that changed, so start from a full snapshot
+                if not self._snapshot.tickers or self._snapshot.age > self.max_age_seconds:
+                    await self.refresh()
+                session = await self._get_session()
+                async with session.ws_connect(self.stream_url, heartbeat=30, timeout=self.timeout_seconds) as ws:
+                    self.stats['stream_connected'] = True
+                    backoff = 1.0
+                    logger.info("📡 Following the all-market mini-ticker stream")
+                    async for message in ws:
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            await self.apply_mini_tickers(json.loads(message.data))
+                        elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                self.stats['stream_connected'] = False
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Mini-ticker stream error, reconnecting in {backoff:.0f}s: {e}")
+            self.stats['stream_connected'] = False
+            self.stats['stream_reconnects'] += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    async def stop_stream(self):
+        """Stop following the mini-ticker stream; REST snapshots keep working"""
+        if self._stream_task:
+            self._stream_task.cancel()
+            try:
+                await self._stream_task
+            except asyncio.CancelledError:
+                pass
+            self._stream_task = None
+            self.stats['stream_connected'] = False
+
+    async def close(self):
+        await self.stop_stream()
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['symbols'] = len(self._snapshot)
+        stats['snapshot_age_seconds'] = round(self._snapshot.age, 2) if self._snapshot.tickers else None
+        stats['snapshot_source'] = self._snapshot.source
+        stats['snapshot_version'] = self._snapshot.version
+        stats['subscribers'] = len(self._subscribers)
+        return stats
+
+
+# Global instance
+price_snapshot_service = PriceSnapshotService()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Bulk Price Sync Engine
+Brings the price history store up to date for many symbols at once
+
+Symbols are synced concurrently over one pooled HTTP session. Each source
+(CoinGecko, Binance) draws from its own budget in the shared rate limiter, so
+concurrency fills both budgets instead of sleeping between symbols, and a
+symbol whose preferred source is out of budget spills over to a source with
+room. Each symbol only fetches the days after its last stored bar (its
+watermark), and finished symbols are checkpointed so an interrupted run
+resumes where it stopped.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence
+
+import aiohttp
+
+from .price_history_store import PriceHistoryStore, PriceBars, price_history_store, bars_from_coingecko, bars_from_binance_klines
+from src.utils.enhanced_rate_limiter import EnhancedRateLimiter, global_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+COINGECKO_URL = "https://api.coingecko.com/api/v3"
+BINANCE_URL = "https://api.binance.com/api/v3"
+
+DAY = 86400
+BINANCE_KLINE_LIMIT = 1000
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PriceSyncEngine:
+    """
+    Concurrent, resumable, watermark-driven sync of daily bars into the store
+    """
+
+    def __init__(self,
+                 coingecko_ids: Dict[str, str],
+                 binance_symbols: Optional[Dict[str, str]] = None,
+                 store: Optional[PriceHistoryStore] = None,
+                 checkpoint_path: Optional[str] = "data/price_sync/checkpoint.json",
+                 rate_limiter: Optional[EnhancedRateLimiter] = None,
+                 concurrency: int = 8,
+                 full_history_days: int = 365,
+                 sources: Sequence[str] = ('coingecko', 'binance'),
+                 coingecko_url: str = COINGECKO_URL,
+                 binance_url: str = BINANCE_URL,
+                 timeout_seconds: float = 30.0,
+                 max_attempts: int = 3,
+                 retry_backoff_seconds: float = 1.0):
+        self.coingecko_ids = coingecko_ids
+        self.binance_symbols = binance_symbols or {}
+        self.store = store or price_history_store
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.rate_limiter = rate_limiter or global_rate_limiter
+        self.concurrency = concurrency
+        self.full_history_days = full_history_days
+        self.sources = tuple(sources)
+        self.urls = {'coingecko': coingecko_url.rstrip('/'), 'binance': binance_url.rstrip('/')}
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self.stats = {
+            'runs': 0,
+            'resumed_runs': 0,
+            'symbols_synced': 0,
+            'symbols_failed': 0,
+            'symbols_skipped': 0,
+            'requests': 0,
+            'retries': 0,
+            'spillovers': 0,
+            'bars_added': 0,
+            'by_source': {source: 0 for source in self.sources},
+            'last_run_seconds': 0.0
+        }
+
+    # Checkpoint
+
+    def _new_checkpoint(self) -> Dict[str, Any]:
+        return {'date': datetime.now(timezone.utc).date().isoformat(), 'completed': False, 'symbols': {}}
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """Today's unfinished run, if there is one"""
+        if not self.checkpoint_path or not self.checkpoint_path.exists():
+            return self._new_checkpoint()
+        try:
+            checkpoint = json.loads(self.checkpoint_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable sync checkpoint: {e}")
+            return self._new_checkpoint()
+        fresh = self._new_checkpoint()
+        if checkpoint.get('completed') or checkpoint.get('date') != fresh['date']:
+            return fresh
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]):
+        if not self.checkpoint_path:
+            return
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.checkpoint_path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps(checkpoint))
+        os.replace(temp_path, self.checkpoint_path)
+
+    # Sync
+
+    async def sync(self, symbols: List[str], resume: bool = True) -> Dict[str, bool]:
+        """Sync symbols concurrently; returns symbol -> success"""
+        start = time.perf_counter()
+        checkpoint = self._load_checkpoint() if resume else self._new_checkpoint()
+        done = {symbol for symbol, state in checkpoint['symbols'].items() if state == 'done'}
+        symbols = list(dict.fromkeys(symbols))
+        pending = [symbol for symbol in symbols if symbol not in done]
+        skipped = len(symbols) - len(pending)
+        if skipped:
+            self.stats['resumed_runs'] += 1
+            self.stats['symbols_skipped'] += skipped
+            logger.info(f"⏩ Resuming sync: {skipped} symbols already done today")
+        self.stats['runs'] += 1
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout_seconds)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async def run(symbol: str):
+                async with semaphore:
+                    success = await self.sync_symbol(session, symbol)
+                checkpoint['symbols'][symbol] = 'done' if success else 'failed'
+                self._save_checkpoint(checkpoint)
+
+            await asyncio.gather(*(run(symbol) for symbol in pending))
+
+        results = {symbol: checkpoint['symbols'].get(symbol) == 'done' for symbol in symbols}
+        checkpoint['completed'] = all(results.values())
+        self._save_checkpoint(checkpoint)
+        self.store.flush()
+
+        self.stats['last_run_seconds'] = round(time.perf_counter() - start, 3)
+        logger.info(f"✅ Price sync: {sum(results.values())}/{len(results)} symbols current "
+                    f"in {self.stats['last_run_seconds']}s")
+        return results
+
+    def _sources_for(self, symbol: str) -> List[str]:
+        """Sources that know the symbol, preferred first unless its budget is spent and another has room"""
+        mapped = [source for source in self.sources
+                  if (self.coingecko_ids if source == 'coingecko' else self.binance_symbols).get(symbol)]
+        if len(mapped) > 1:
+            remaining = {source: self.rate_limiter.get_status(source)['requests_remaining'] for source in mapped}
+            if remaining[mapped[0]] == 0:
+                spare = next((source for source in mapped[1:] if remaining[source] > 0), None)
+                if spare:
+                    self.stats['spillovers'] += 1
+                    mapped.remove(spare)
+                    mapped.insert(0, spare)
+        return mapped
+
+    async def sync_symbol(self, session: aiohttp.ClientSession, symbol: str) -> bool:
+        """Fetch the bars after the symbol's watermark and append them"""
+        last = self.store.last_timestamp(symbol)
+        watermark = int(last.timestamp()) if last else None
+
+        for source in self._sources_for(symbol):
+            try:
+                if source == 'coingecko':
+                    bars = await self._fetch_coingecko(session, symbol, watermark)
+                else:
+                    bars = await self._fetch_binance(session, symbol, watermark)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning(f"⚠️ {source} failed for {symbol}: {e}")
+                continue
+            if bars is None:
+                continue
+
+            added = self.store.append(bars)
+            self.stats['bars_added'] += added
+            self.stats['symbols_synced'] += 1
+            self.stats['by_source'][source] += 1
+            logger.info(f"✅ Synced {symbol} from {source}: {added} new bars")
+            return True
+
+        self.stats['symbols_failed'] += 1
+        logger.error(f"❌ Failed to sync {symbol} from {list(self.sources)}")
+        return False
+
+    async def _request(self, session: aiohttp.ClientSession, source: str, path: str,
+                       params: Dict[str, Any]) -> Optional[Any]:
+        """GET under the source's rate budget, retrying throttles and server errors"""
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.stats['retries'] += 1
+            await self.rate_limiter.wait_if_needed(source)
+            self.stats['requests'] += 1
+            start = time.time()
+            async with session.get(f"{self.urls[source]}{path}", params=params) as response:
+                self.rate_limiter.handle_response(source, response.status, time.time() - start)
+                if response.status == 200:
+                    return await response.json()
+                if response.status not in RETRY_STATUSES:
+                    logger.warning(f"⚠️ {source} {path} returned {response.status}")
+                    return None
+            if response.status != 429:  # 429 backoff is already applied by the limiter
+                await asyncio.sleep(min(self.retry_backoff_seconds * 2 ** attempt, 10.0))
+        return None
+
+    def _days_since(self, watermark: Optional[int]) -> int:
+        """Days to request: everything after the watermark, including its (possibly partial) bar"""
+        if watermark is None:
+            return self.full_history_days
+        return max(2, (int(time.time()) - watermark) // DAY + 1)
+
+    async def _fetch_coingecko(self, session: aiohttp.ClientSession, symbol: str,
+                               watermark: Optional[int]) -> Optional[PriceBars]:
+        params = {'vs_currency': 'usd', 'days': self._days_since(watermark), 'interval': 'daily'}
+        data = await self._request(session, 'coingecko', f"/coins/{self.coingecko_ids[symbol]}/market_chart", params)
+        if not data or not data.get('prices'):
+            return None
+        return bars_from_coingecko(symbol, data)
+
+    async def _fetch_binance(self, session: aiohttp.ClientSession, symbol: str,
+                             watermark: Optional[int]) -> Optional[PriceBars]:
+        start = watermark if watermark is not None else int(time.time()) - self.full_history_days * DAY
+        klines = []
+        while True:
+            params = {'symbol': self.binance_symbols[symbol], 'interval': '1d',
+                      'startTime': start * 1000, 'limit': BINANCE_KLINE_LIMIT}
+            page = await self._request(session, 'binance', "/klines", params)
+            if page is None:
+                return None
+            klines.extend(page)
+            if len(page) < BINANCE_KLINE_LIMIT:
+                break
+            start = int(page[-1][0]) // 1000 + DAY
+        if not klines:
+            return None
+        return bars_from_binance_klines(symbol, klines)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['by_source'] = dict(self.stats['by_source'])
+        stats['concurrency'] = self.concurrency
+        stats['rate_limits'] = {source: self.rate_limiter.get_status(source)['requests_remaining']
+                                for source in self.sources}
+        return stats
@@ -6,12 +6,15 @@ Monitors real market data and triggers alerts based on actual conditions
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
-import httpx
 from dataclasses import dataclass
 import json
 
+from src.services.alert_matching_engine import AlertMatchingEngine, evaluate_technical, normalize_symbol, technical_condition_key
+from src.services.price_snapshot_service import PriceSnapshot, PriceSnapshotService, price_snapshot_service
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -37,16 +40,20 @@ class AlertTrigger:
 class RealAlertEngine:
     """Real-time alert monitoring engine"""
     
-    def __init__(self):
+    def __init__(self, price_feed: Optional[PriceSnapshotService] = None):
         self.is_running = False
         self.active_alerts: Dict[str, AlertCondition] = {}
         self.monitored_symbols: set = set()
         self.last_check_time = datetime.now(timezone.utc)
         self.trigger_history: List[AlertTrigger] = []
         self.check_interval = 30  # Check every 30 seconds
+        self.indicator_refresh_seconds = 60  # Indicators come from the database; re-read at most once a minute
+        self.matcher = AlertMatchingEngine()
+        self._indicators: Dict[str, tuple] = {}  # symbol -> (fetched at, indicators)
+        self.price_feed = price_feed or price_snapshot_service
         
-    async def start(self):
-        """Start the alert monitoring engine"""
+    async def start(self, price_stream=None):
+        """Start the alert monitoring engine; with a price stream, price alerts are matched on every tick"""
         if self.is_running:
             logger.warning("Alert engine is already running")
             return
@@ -57,9 +64,18 @@ class RealAlertEngine:
         # Start monitoring loop
         asyncio.create_task(self._monitoring_loop())
         
+        # Price alerts are matched on every update of the shared ticker snapshot
+        self.price_feed.subscribe(self.on_snapshot)
+        await self.price_feed.start_stream()
+        
+        if price_stream is not None:
+            await price_stream.register_update_callback(self.on_market_data)
+        
     async def stop(self):
         """Stop the alert monitoring engine"""
         self.is_running = False
+        self.price_feed.unsubscribe(self.on_snapshot)
+        await self.price_feed.stop_stream()
         logger.info("🛑 Stopping Real Alert Engine...")
         
     async def add_alert(self, alert_id: str, alert_data: Dict[str, Any]):
@@ -74,6 +90,11 @@ class RealAlertEngine:
                 timeframe=alert_data['conditions'].get('timeframe', '1m')
             )
             
+            if condition.alert_type == 'PRICE':
+                self.matcher.add_price_alert(alert_id, condition.symbol, condition.threshold, condition.operator)
+            elif condition.alert_type == 'TECHNICAL':
+                self.matcher.add_technical_alert(alert_id, condition.symbol, condition.conditions)
+            
             self.active_alerts[alert_id] = condition
             self.monitored_symbols.add(alert_data['symbol'])
             
@@ -89,10 +110,13 @@ class RealAlertEngine:
         if alert_id in self.active_alerts:
             symbol = self.active_alerts[alert_id].symbol
             del self.active_alerts[alert_id]
+            self.matcher.remove(alert_id)
             
             # Remove symbol if no more alerts for it
-            if not any(alert.symbol == symbol for alert in self.active_alerts.values()):
-                self.monitored_symbols.discard(symbol)
+            if not self.matcher.alert_count(symbol):
+                key = normalize_symbol(symbol)
+                self.monitored_symbols = {s for s in self.monitored_symbols if normalize_symbol(s) != key}
+                self._indicators.pop(key, None)
                 
             logger.info(f"🗑️ Removed alert {alert_id}")
             return True
@@ -122,77 +146,89 @@ class RealAlertEngine:
         if not prices:
             return
             
-        # Check each alert
-        for alert_id, condition in self.active_alerts.items():
-            await self._check_single_alert(alert_id, condition, prices)
+        # Only the price alerts these prices crossed, then technical conditions once per snapshot
+        await self.process_prices(prices)
+        await self._check_technical_alerts()
             
     async def _fetch_current_prices(self, symbols: List[str]) -> Dict[str, float]:
-        """Fetch current prices from Binance API"""
+        """Current prices from the shared ticker snapshot (one bulk call when it is stale)"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                prices = {}
-                
-                for symbol in symbols:
-                    try:
-                        # Convert symbol format for Binance API
-                        binance_symbol = symbol.replace('/USDT:USDT', 'USDT').replace('/', '')
-                        
-                        response = await client.get(
-                            f"https://api.binance.com/api/v3/ticker/price",
-                            params={'symbol': binance_symbol}
-                        )
-                        
-                        if response.status_code == 200:
-                            data = response.json()
-                            prices[symbol] = float(data['price'])
-                        else:
-                            logger.warning(f"Failed to fetch price for {symbol}: {response.status_code}")
-                            
-                    except Exception as e:
-                        logger.error(f"Error fetching price for {symbol}: {e}")
-                        
-                return prices
-                
+            snapshot = await self.price_feed.get_snapshot()
         except Exception as e:
             logger.error(f"Error fetching prices: {e}")
             return {}
             
-    async def _check_single_alert(self, alert_id: str, condition: AlertCondition, prices: Dict[str, float]):
-        """Check if a single alert should be triggered"""
-        try:
-            current_price = prices.get(condition.symbol)
+        prices = {}
+        for symbol in symbols:
+            price = snapshot.price(normalize_symbol(symbol))
+            if price is None:
+                logger.warning(f"No ticker price for {symbol}")
+            else:
+                prices[symbol] = price
+        return prices
+            
+    async def process_prices(self, prices: Dict[str, float]) -> int:
+        """Match a batch of current prices against the price alert index"""
+        triggered = 0
+        for symbol, price in prices.items():
+            triggered += await self.on_price(symbol, price)
+        return triggered
+        
+    async def on_price(self, symbol: str, price: float) -> int:
+        """Trigger the price alerts a new price crossed"""
+        matched = self.matcher.update_price(symbol, price)
+        for alert_id in matched:
+            condition = self.active_alerts.get(alert_id)
+            if condition is None:
+                continue
+            conditions_met = {
+                'current_price': price,
+                'threshold': condition.threshold,
+                'operator': condition.operator
+            }
+            await self._trigger_alert(alert_id, condition, price, conditions_met)
+        return len(matched)
+        
+    async def on_snapshot(self, snapshot: PriceSnapshot, changed: List[str]):
+        """Price snapshot subscriber: match the changed symbols that have alerts"""
+        for symbol in changed:
+            if self.matcher.alert_count(symbol):
+                await self.on_price(symbol, snapshot.price(symbol))
+            
+    async def on_market_data(self, data_point):
+        """Update callback for RealTimeMarketDataConnector ticks"""
+        if data_point.data_type == 'price':
+            await self.on_price(data_point.symbol, data_point.price)
+            
+    async def _check_technical_alerts(self) -> int:
+        """Evaluate each distinct technical condition once per symbol and indicator snapshot"""
+        triggered = 0
+        for symbol in self.matcher.technical_symbols():
+            current_price = self.matcher.last_price(symbol)
             if current_price is None:
-                return
+                continue
                 
-            should_trigger = False
-            conditions_met = {}
-            
-            # Check different alert types
-            if condition.alert_type == 'PRICE':
-                should_trigger = self._check_price_condition(
-                    current_price, condition.threshold, condition.operator
-                )
-                conditions_met = {
-                    'current_price': current_price,
-                    'threshold': condition.threshold,
-                    'operator': condition.operator
-                }
-                
-            elif condition.alert_type == 'TECHNICAL':
-                # For technical alerts, we need to fetch more data
-                should_trigger = await self._check_technical_condition(
-                    condition.symbol, condition.conditions, current_price
-                )
+            indicators = await self._get_technical_indicators(symbol)
+            for alert_id in self.matcher.update_indicators(symbol, indicators):
+                condition = self.active_alerts.get(alert_id)
+                if condition is None:
+                    continue
                 conditions_met = {
                     'current_price': current_price,
                     'technical_conditions': condition.conditions
                 }
-                
-            if should_trigger:
                 await self._trigger_alert(alert_id, condition, current_price, conditions_met)
-                
-        except Exception as e:
-            logger.error(f"Error checking alert {alert_id}: {e}")
+                triggered += 1
+        return triggered
+        
+    async def _get_technical_indicators(self, symbol: str) -> Dict[str, float]:
+        """Indicators for a symbol, fetched at most once per indicator_refresh_seconds"""
+        cached = self._indicators.get(symbol)
+        if cached and time.monotonic() - cached[0] < self.indicator_refresh_seconds:
+            return cached[1]
+        indicators = await self._fetch_technical_indicators(symbol)
+        self._indicators[symbol] = (time.monotonic(), indicators)
+        return indicators
             
     def _check_price_condition(self, current_price: float, threshold: float, operator: str) -> bool:
         """Check if price condition is met"""
@@ -216,21 +252,8 @@ class RealAlertEngine:
             if not indicators:
                 return False
                 
-            # Check RSI conditions
-            if 'rsi' in conditions:
-                rsi_value = indicators.get('rsi', 50)
-                rsi_threshold = conditions['rsi']
-                if rsi_value > rsi_threshold:  # Overbought
-                    return True
-                    
-            # Check MACD conditions
-            if 'macd' in conditions:
-                macd_value = indicators.get('macd', 0)
-                signal_value = indicators.get('macd_signal', 0)
-                if macd_value > signal_value:  # Bullish crossover
-                    return True
-                    
-            return False
+            # RSI above its threshold (overbought) or MACD above its signal line (bullish crossover)
+            return evaluate_technical(technical_condition_key(conditions), indicators)
             
         except Exception as e:
             logger.error(f"Error checking technical conditions: {e}")
@@ -380,7 +403,8 @@ class RealAlertEngine:
             'active_alerts': len(self.active_alerts),
             'monitored_symbols': len(self.monitored_symbols),
             'last_check': self.last_check_time.isoformat(),
-            'total_triggers': len(self.trigger_history)
+            'total_triggers': len(self.trigger_history),
+            'matching': self.matcher.get_stats()
         }
         
     async def get_active_alerts_count(self) -> int:
@@ -16,6 +16,7 @@ from src.services.binance_service import BinanceService
 from src.services.kucoin_service import KuCoinService
 from src.services.cryptometer_service import MultiTimeframeCryptometerSystem
 from src.services.market_data_service import MarketDataService
+from src.services.price_history_store import price_history_store
 from src.utils.symbol_converter import SymbolConverter, to_standard, to_kucoin, to_binance
 
 logger = logging.getLogger(__name__)
@@ -252,11 +253,37 @@ class RealTimePriceService:
                                    symbol: str, 
                                    start_date: datetime,
                                    end_date: datetime) -> List[HistoricalPrice]:
-        """Get REAL historical price data from CSV files or exchange APIs"""
+        """
+        Get REAL historical price data from the price history store, CSV files or exchange APIs
+        
+        Sources are tried in that order until one covers start_date; if none
+        does, the one spanning the longest stretch of the range is returned.
+        """
         try:
             historical_prices = []
+            best_prices = []
+            
+            # First try the price history store: a binary-searched slice of the daily columns
+            bars = price_history_store.read(symbol, start_date, end_date)
+            if bars is not None and len(bars):
+                for i, timestamp in enumerate(bars.timestamp.tolist()):
+                    historical_prices.append(HistoricalPrice(
+                        symbol=symbol,
+                        timestamp=datetime.utcfromtimestamp(timestamp),
+                        open=bars.open[i],
+                        high=bars.high[i],
+                        low=bars.low[i],
+                        close=bars.close[i],
+                        volume=bars.volume[i]
+                    ))
+                
+                logger.info(f"Loaded {len(historical_prices)} historical prices from the price history store for {symbol}")
+            
+            if self._covers_start(historical_prices, start_date):
+                return historical_prices
+            best_prices, historical_prices = self._widest(best_prices, historical_prices), []
             
-            # First try to load from CSV files if available
+            # Then CSV files if available
             csv_file = os.path.join(self.historical_data_path, f"{symbol}_historical.csv")
             if os.path.exists(csv_file):
                 df = pd.read_csv(csv_file)
@@ -279,8 +306,12 @@ class RealTimePriceService:
                 
                 logger.info(f"Loaded {len(historical_prices)} historical prices from CSV for {symbol}")
             
-            # If no CSV data, fetch from Binance
-            if not historical_prices and self.binance_service:
+            if self._covers_start(historical_prices, start_date):
+                return historical_prices
+            best_prices, historical_prices = self._widest(best_prices, historical_prices), []
+            
+            # If neither covers the range, fetch from Binance
+            if self.binance_service:
                 klines = await self.binance_service.get_klines(
                     symbol=symbol,
                     interval="1h",
@@ -302,12 +333,35 @@ class RealTimePriceService:
                 
                 logger.info(f"Loaded {len(historical_prices)} historical prices from Binance for {symbol}")
             
-            return historical_prices
+            return self._widest(best_prices, historical_prices)
             
         except Exception as e:
             logger.error(f"Error getting historical prices for {symbol}: {e}")
             return []
     
+    @staticmethod
+    def _naive(value: datetime) -> datetime:
+        return value.replace(tzinfo=None) if value.tzinfo else value
+    
+    def _covers_start(self, prices: List[HistoricalPrice], start_date: datetime) -> bool:
+        """Whether prices reach back to start_date (within one daily bar)"""
+        if not prices:
+            return False
+        first = min(self._naive(price.timestamp) for price in prices)
+        return first <= self._naive(start_date) + timedelta(days=1)
+    
+    def _widest(self, best: List[HistoricalPrice], candidate: List[HistoricalPrice]) -> List[HistoricalPrice]:
+        """The price list spanning the longer stretch of time; the earlier source wins ties"""
+        def span(prices: List[HistoricalPrice]) -> timedelta:
+            timestamps = [self._naive(price.timestamp) for price in prices]
+            return max(timestamps) - min(timestamps)
+        
+        if not candidate:
+            return best
+        if not best:
+            return candidate
+        return candidate if span(candidate) > span(best) else best
+    
     async def get_multi_symbol_prices(self, symbols: List[str]) -> Dict[str, RealTimePrice]:
         """Get real-time prices for multiple symbols concurrently"""
         try:
@@ -97,6 +97,9 @@ class RiskMetricMonitoring:
         # Simple counter for total assessments
         self.total_assessments = 0
         
+        # Labelled metric children reused by record_batch_assessment
+        self._label_children: Dict[tuple, tuple] = {}
+        
         # Start time for uptime calculation
         self.start_time = datetime.now()
     
@@ -120,6 +123,40 @@ class RiskMetricMonitoring:
         )
         self.performance_history["assess_risk"].append(metric)
     
+    def record_batch_assessment(self, results: List[tuple], duration: float):
+        """
+        Record a vectorized batch of assessments
+        
+        Args:
+            results: (symbol, risk_value, risk_band) per assessed symbol
+            duration: Wall time of the whole batch
+        """
+        if not results:
+            return
+        per_symbol = duration / len(results)
+        for symbol, risk_value, risk_band in results:
+            children = self._label_children.get((symbol, risk_band))
+            if children is None:
+                children = (
+                    self.assessment_counter.labels(symbol=symbol, risk_band=risk_band),
+                    self.assessment_duration.labels(symbol=symbol),
+                    self.risk_value_gauge.labels(symbol=symbol)
+                )
+                self._label_children[(symbol, risk_band)] = children
+            counter, histogram, gauge = children
+            counter.inc()
+            histogram.observe(per_symbol)
+            gauge.set(risk_value)
+            self.symbol_access_count[symbol] += 1
+        
+        self.total_assessments += len(results)
+        self.performance_history["batch_assess"].append(PerformanceMetrics(
+            method_name="batch_assess",
+            execution_time=duration,
+            timestamp=datetime.now(),
+            success=True
+        ))
+    
     def record_cache_hit(self):
         """Record a cache hit"""
         self.cache_hits.inc()
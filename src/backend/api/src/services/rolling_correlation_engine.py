@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Rolling Correlation Engine
+Incremental N x N correlation of per-period log returns over rolling windows
+
+Observations (price or risk values) are bucketed into periods (daily by
+default); the last value in a period is its close. Each closed period adds one
+return vector and, once a window is full, removes the oldest one. Every window
+keeps pairwise co-moments (count, sums, sums of squares, cross products) so an
+update is O(N^2) and never rescans history. Pairs only use periods where both
+symbols have a return, matching pandas' pairwise-complete DataFrame.corr().
+"""
+
+import math
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOWS = (7, 30, 90)
+
+
+class PairwiseCoMoments:
+    """Running pairwise-complete co-moments for one rolling window"""
+
+    def __init__(self, size: int = 0):
+        self.n = np.zeros((size, size))
+        self.sx = np.zeros((size, size))    # sx[i, j]: sum of x_i where i and j both present
+        self.sxx = np.zeros((size, size))   # sxx[i, j]: sum of x_i^2 where both present
+        self.sxy = np.zeros((size, size))   # sxy[i, j]: sum of x_i * x_j
+
+    def resize(self, size: int):
+        old = self.n.shape[0]
+        if size <= old:
+            return
+        for name in ('n', 'sx', 'sxx', 'sxy'):
+            grown = np.zeros((size, size))
+            grown[:old, :old] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def add(self, returns: np.ndarray, sign: float = 1.0):
+        present = ~np.isnan(returns)
+        x = np.where(present, returns, 0.0)
+        mask = present.astype(float)
+        self.n += sign * np.outer(mask, mask)
+        self.sx += sign * np.outer(x, mask)
+        self.sxx += sign * np.outer(x * x, mask)
+        self.sxy += sign * np.outer(x, x)
+
+    def correlation(self, min_periods: int) -> np.ndarray:
+        n = self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_x = self.sx / n
+            mean_y = self.sx.T / n
+            cov = self.sxy / n - mean_x * mean_y
+            var_x = self.sxx / n - mean_x ** 2
+            var_y = self.sxx.T / n - mean_y ** 2
+            corr = cov / np.sqrt(var_x * var_y)
+        corr = np.clip(corr, -1.0, 1.0)
+        corr[(n < min_periods) | ~np.isfinite(corr)] = np.nan
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+
+class RollingCorrelationEngine:
+    """
+    Rolling correlation matrices for the full symbol universe
+
+    Windows are counted in periods (period_seconds, one day by default), so
+    the default windows are 7, 30 and 90 days.
+    """
+
+    def __init__(self, windows: Iterable[int] = DEFAULT_WINDOWS, period_seconds: int = 86400,
+                 min_periods: int = 3):
+        self.windows = tuple(sorted(set(windows)))
+        self.max_window = self.windows[-1]
+        self.period_seconds = period_seconds
+        self.min_periods = min_periods
+
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+
+        # Closed periods: sorted period ids and their close vectors
+        self._periods: List[int] = []
+        self._closes: Dict[int, np.ndarray] = {}
+        self._returns: deque = deque(maxlen=self.max_window + 1)
+
+        self._pending_period: Optional[int] = None
+        self._pending: Dict[str, float] = {}
+
+        self._moments = {w: PairwiseCoMoments() for w in self.windows}
+        # Rebuild from the stored closes periodically to shed add/subtract drift
+        self._updates_since_rebuild = 0
+        self._dirty = False
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    def observe(self, symbol: str, value: float, timestamp: Union[datetime, float, None] = None):
+        """Record a price/risk observation; the last value in a period is its close"""
+        period = self._period_of(timestamp)
+        self._ensure_symbol(symbol)
+
+        if self._pending_period is None:
+            self._pending_period = period
+        elif period > self._pending_period:
+            self._close_pending()
+            self._pending_period = period
+        elif period < self._pending_period:
+            # Late data for an already closed period
+            self._set_close(period, symbol, value)
+            return
+
+        self._pending[symbol] = value
+
+    def update(self, values: Dict[str, float], timestamp: Union[datetime, float, None] = None):
+        """Record observations for many symbols at the same timestamp"""
+        for symbol, value in values.items():
+            self.observe(symbol, value, timestamp)
+
+    def flush(self):
+        """Close the current period now instead of waiting for the next one"""
+        if self._pending_period is not None:
+            self._close_pending()
+            self._pending_period = None
+
+    def backfill(self, symbol: str, points: Iterable[Tuple[Union[datetime, float], float]]):
+        """Load a symbol's history (timestamp, value) and rebuild the windows once"""
+        self._ensure_symbol(symbol)
+        for timestamp, value in points:
+            period = self._period_of(timestamp)
+            if self._pending_period is not None and period >= self._pending_period:
+                if period == self._pending_period:
+                    self._pending[symbol] = value
+                continue
+            self._set_close(period, symbol, value, rebuild=False)
+        self._rebuild()
+
+    def coverage(self, symbol: str, window: int) -> int:
+        """Number of returns a symbol has in a window"""
+        i = self._index.get(symbol)
+        if i is None:
+            return 0
+        self._refresh()
+        return int(self._moments[window].n[i, i])
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def correlation_matrix(self, window: int, symbols: Optional[List[str]] = None) -> Tuple[List[str], np.ndarray]:
+        """Correlation matrix for a window (NaN where a pair lacks min_periods returns)"""
+        if window not in self._moments:
+            raise ValueError(f"Window {window} not configured (available: {self.windows})")
+        self._refresh()
+        corr = self._moments[window].correlation(self.min_periods)
+        if symbols is None:
+            return list(self.symbols), corr
+        symbols = [s for s in symbols if s in self._index]
+        idx = [self._index[s] for s in symbols]
+        return symbols, corr[np.ix_(idx, idx)]
+
+    def top_pairs(self, window: int, k: int = 5, most: bool = True,
+                  symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """The k most (or least) correlated pairs in a window"""
+        names, corr = self.correlation_matrix(window, symbols)
+        return self._top_pairs(names, corr, k, most)
+
+    @staticmethod
+    def _top_pairs(names: List[str], corr: np.ndarray, k: int, most: bool) -> List[Dict[str, Any]]:
+        rows, cols = np.triu_indices(len(names), k=1)
+        values = corr[rows, cols]
+        valid = ~np.isnan(values)
+        rows, cols, values = rows[valid], cols[valid], values[valid]
+        if len(values) == 0:
+            return []
+
+        k = min(k, len(values))
+        keyed = -values if most else values
+        top = np.argpartition(keyed, k - 1)[:k]
+        top = top[np.argsort(keyed[top])]
+        return [
+            {'pair': (names[rows[t]], names[cols[t]]), 'correlation': round(float(values[t]), 4)}
+            for t in top
+        ]
+
+    def to_dict(self, window: int, symbols: Optional[List[str]] = None, top_k: int = 5) -> Dict[str, Any]:
+        """JSON-friendly matrix plus top/bottom pairs"""
+        names, corr = self.correlation_matrix(window, symbols)
+        matrix = {
+            a: {b: (None if math.isnan(corr[i, j]) else round(float(corr[i, j]), 4)) for j, b in enumerate(names)}
+            for i, a in enumerate(names)
+        }
+        return {
+            'symbols': names,
+            'window': window,
+            'matrix': matrix,
+            'most_correlated': self._top_pairs(names, corr, top_k, True),
+            'least_correlated': self._top_pairs(names, corr, top_k, False),
+            'periods': len(self._periods)
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _period_of(self, timestamp: Union[datetime, float, None]) -> int:
+        if timestamp is None:
+            timestamp = datetime.now()
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        return int(timestamp // self.period_seconds)
+
+    def _ensure_symbol(self, symbol: str):
+        if symbol in self._index:
+            return
+        self._index[symbol] = len(self.symbols)
+        self.symbols.append(symbol)
+        for moments in self._moments.values():
+            moments.resize(len(self.symbols))
+
+    def _row(self, values: Dict[str, float]) -> np.ndarray:
+        row = np.full(len(self.symbols), np.nan)
+        for symbol, value in values.items():
+            row[self._index[symbol]] = value
+        return row
+
+    def _padded(self, row: np.ndarray) -> np.ndarray:
+        if len(row) < len(self.symbols):
+            row = np.concatenate([row, np.full(len(self.symbols) - len(row), np.nan)])
+        return row
+
+    @staticmethod
+    def _log_returns(prev: np.ndarray, curr: np.ndarray) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(curr / prev)
+        returns[~np.isfinite(returns)] = np.nan
+        return returns
+
+    def _close_pending(self):
+        self._refresh()
+        period = self._pending_period
+        row = self._row(self._pending)
+        self._pending = {}
+        if self._periods and period <= self._periods[-1]:
+            # Only happens after backfill overlapped the open period
+            for i in np.flatnonzero(~np.isnan(row)):
+                self._set_close(period, self.symbols[i], row[i])
+            return
+
+        prev = self._padded(self._closes[self._periods[-1]]) if self._periods else None
+        self._periods.append(period)
+        self._closes[period] = row
+        self._trim_closes()
+        if prev is None:
+            return
+
+        returns = self._log_returns(prev, row)
+        self._returns.append(returns)
+        for window, moments in self._moments.items():
+            moments.add(returns)
+            if len(self._returns) > window:
+                moments.add(self._padded(self._returns[-window - 1]), sign=-1.0)
+
+        self._updates_since_rebuild += 1
+        if self._updates_since_rebuild >= 4 * self.max_window:
+            self._rebuild()
+
+    def _set_close(self, period: int, symbol: str, value: float, rebuild: bool = True):
+        if period not in self._closes:
+            if self._periods and period < self._periods[0] and len(self._periods) > self.max_window:
+                return  # Older than anything the windows can reach
+            self._closes[period] = np.full(len(self.symbols), np.nan)
+            self._periods.append(period)
+            self._periods.sort()
+        row = self._padded(self._closes[period])
+        row[self._index[symbol]] = value
+        self._closes[period] = row
+        self._dirty = True
+        if rebuild:
+            self._rebuild()
+
+    def _trim_closes(self):
+        while len(self._periods) > self.max_window + 1:
+            del self._closes[self._periods.pop(0)]
+
+    def _refresh(self):
+        if self._dirty:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Recompute every window from the stored closes"""
+        self._trim_closes()
+        self._returns.clear()
+        closes = [self._padded(self._closes[p]) for p in self._periods]
+        for prev, curr in zip(closes, closes[1:]):
+            self._returns.append(self._log_returns(prev, curr))
+
+        size = len(self.symbols)
+        for window in self.windows:
+            moments = PairwiseCoMoments(size)
+            for returns in list(self._returns)[-window:]:
+                moments.add(self._padded(returns))
+            self._moments[window] = moments
+        self._updates_since_rebuild = 0
+        self._dirty = False
+
@@ -8,14 +8,19 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple, Any
 from pathlib import Path
 
+from .price_history_store import PriceHistoryStore, PriceBars, price_history_store, bars_from_coingecko, TimeLike
+from .price_sync_engine import PriceSyncEngine
+
 logger = logging.getLogger(__name__)
 
 class SymbolPriceHistoryDataManager:
     """Manages historical price data for symbols in My Symbols database"""
     
-    def __init__(self, history_data_path: Optional[str] = None, db_path: Optional[str] = None):
+    def __init__(self, history_data_path: Optional[str] = None, db_path: Optional[str] = None,
+                 price_store: Optional[PriceHistoryStore] = None):
         self.history_data_path = history_data_path or "/Users/dansidanutz/Desktop/ZmartBot/Symbol_Price_history_data"
         self.db_path = db_path or "/Users/dansidanutz/Desktop/ZmartBot/backend/zmart-api/my_symbols_v2.db"
+        self.price_store = price_store or price_history_store
         
         # Symbol to filename mapping
         self.symbol_to_file = {
@@ -99,6 +104,14 @@ class SymbolPriceHistoryDataManager:
         
         # Ensure history data directory exists
         Path(self.history_data_path).mkdir(parents=True, exist_ok=True)
+        
+        # Concurrent downloads for missing symbols (CoinGecko only, as before)
+        self.sync_engine = PriceSyncEngine(
+            self.symbol_to_coingecko,
+            store=self.price_store,
+            checkpoint_path=None,
+            sources=('coingecko',)
+        )
     
     async def get_my_symbols(self) -> List[str]:
         """Get all symbols from My Symbols database"""
@@ -116,15 +129,20 @@ class SymbolPriceHistoryDataManager:
             return []
     
     def check_existing_files(self) -> Dict[str, bool]:
-        """Check which data files exist for symbols"""
-        existing_files = {}
+        """Check which symbols have history, in the price history store or a legacy CSV file"""
+        existing_files = {symbol: True for symbol in self.price_store.symbols()}
         
         for symbol, filename in self.symbol_to_file.items():
             file_path = os.path.join(self.history_data_path, filename)
-            existing_files[symbol] = os.path.exists(file_path)
+            existing_files[symbol] = existing_files.get(symbol, False) or os.path.exists(file_path)
         
         return existing_files
     
+    def get_price_history(self, symbol: str, start: TimeLike = None, end: TimeLike = None,
+                          interval: str = '1d') -> Optional[PriceBars]:
+        """Daily bars for a symbol between start and end, straight from the store"""
+        return self.price_store.read(symbol, start, end, interval)
+    
     async def check_missing_data(self) -> Tuple[List[str], List[str]]:
         """Check which symbols are missing historical data"""
         my_symbols = await self.get_my_symbols()
@@ -162,20 +180,8 @@ class SymbolPriceHistoryDataManager:
                     if response.status == 200:
                         data = await response.json()
                         
-                        # Create filename
-                        symbol_name = symbol.replace('USDT', '').lower()
-                        filename = f"{symbol_name.capitalize()}_coingecko_{days}d_historical_data.csv"
-                        file_path = os.path.join(self.history_data_path, filename)
-                        
-                        # Convert to CSV format
-                        csv_content = self._convert_to_csv(data, symbol)
-                        
-                        # Save file
-                        with open(file_path, 'w') as f:
-                            f.write(csv_content)
-                        
-                        # Update mapping
-                        self.symbol_to_file[symbol] = filename
+                        # Append to the price history store
+                        self.price_store.append(bars_from_coingecko(symbol, data))
                         
                         logger.info(f"✅ Downloaded {symbol} data: {len(data['prices'])} records")
                         return True
@@ -187,26 +193,6 @@ class SymbolPriceHistoryDataManager:
             logger.error(f"❌ Error downloading {symbol}: {e}")
             return False
     
-    def _convert_to_csv(self, data: Dict, symbol: str) -> str:
-        """Convert CoinGecko data to CSV format"""
-        csv_lines = ['Date;Open;High;Low;Close;Volume;Market_Cap']
-        
-        prices = data.get('prices', [])
-        volumes = data.get('total_volumes', [])
-        market_caps = data.get('market_caps', [])
-        
-        for i, (timestamp, price) in enumerate(prices):
-            date = datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d')
-            
-            # Get volume and market cap for this date
-            volume = volumes[i][1] if i < len(volumes) else 0
-            market_cap = market_caps[i][1] if i < len(market_caps) else 0
-            
-            # For daily data, use same price for OHLC
-            csv_lines.append(f'{date};{price};{price};{price};{price};{volume};{market_cap}')
-        
-        return '\n'.join(csv_lines)
-    
     async def download_missing_data(self, symbols: Optional[List[str]] = None) -> Dict[str, bool]:
         """Download missing historical data for symbols"""
         if symbols is None:
@@ -220,15 +206,8 @@ class SymbolPriceHistoryDataManager:
         
         logger.info(f"📥 Downloading data for {len(missing_symbols)} symbols: {missing_symbols}")
         
-        results = {}
-        for symbol in missing_symbols:
-            success = await self.download_from_coingecko(symbol)
-            results[symbol] = success
-            
-            # Rate limiting - CoinGecko allows 50 calls/minute
-            await asyncio.sleep(1.2)
-        
-        return results
+        # Concurrent downloads under the shared CoinGecko rate budget
+        return await self.sync_engine.sync(missing_symbols, resume=False)
     
     async def ensure_data_for_symbol(self, symbol: str) -> bool:
         """Ensure historical data exists for a specific symbol"""
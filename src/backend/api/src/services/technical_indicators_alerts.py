@@ -13,6 +13,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from src.services.incremental_indicators_engine import IncrementalIndicatorsEngine
+
 logger = logging.getLogger(__name__)
 
 class AlertSeverity(Enum):
@@ -38,8 +40,10 @@ class TechnicalAlert:
     cross_value: Optional[float] = None
 
 class TechnicalIndicatorsAlertService:
-    def __init__(self, db_path: str = "my_symbols_v2.db"):
+    def __init__(self, db_path: str = "my_symbols_v2.db", streaming_state_path: Optional[str] = None):
         self.db_path = db_path
+        # Running indicator state for candle-by-candle checks (O(1) per closed candle)
+        self.streaming_engine = IncrementalIndicatorsEngine(streaming_state_path)
         self.alert_thresholds = {
             'rsi': {'oversold': 30, 'overbought': 70},
             'ema': {'cross_threshold': 0.1},
@@ -625,6 +629,114 @@ class TechnicalIndicatorsAlertService:
         
         return alerts
 
+    def process_closed_candle(self, symbol: str, timeframe: str, candle: Dict[str, Any]) -> List[TechnicalAlert]:
+        """Update streaming indicator state with one closed candle and store any triggered alerts"""
+        try:
+            snapshot = self.streaming_engine.update(symbol, timeframe, candle)
+            if snapshot is None:
+                # Replayed or out-of-order candle: its alerts already fired
+                return []
+            alerts = self._check_streaming_alerts(symbol, timeframe, snapshot)
+            if alerts:
+                self._store_alerts(alerts)
+                self._store_cross_events(alerts)
+            return alerts
+        except Exception as e:
+            logger.error(f"Error processing closed candle for {symbol} {timeframe}: {e}")
+            return []
+
+    def save_streaming_state(self, path: Optional[str] = None):
+        """Persist streaming indicator state so a restart skips the warm-up"""
+        try:
+            self.streaming_engine.save_state(path)
+        except Exception as e:
+            logger.error(f"Error saving streaming indicator state: {e}")
+
+    def _check_streaming_alerts(self, symbol: str, timeframe: str, snapshot: Dict[str, Any]) -> List[TechnicalAlert]:
+        """Evaluate RSI, EMA, MACD and Bollinger conditions on a streaming snapshot"""
+        alerts = []
+        price = snapshot['price']
+        now = datetime.now(timezone.utc)
+
+        def make_alert(indicator: str, condition: str, value: float, threshold: float,
+                       severity: AlertSeverity, message: str, cross_value: float,
+                       variant: Optional[str] = None) -> TechnicalAlert:
+            name = f"{indicator.lower().replace(' ', '_')}_{variant}" if variant else indicator.lower().replace(' ', '_')
+            return TechnicalAlert(
+                alert_id=f"{name}_{condition}_{symbol}_{timeframe}_{now.timestamp()}",
+                symbol=symbol,
+                timeframe=timeframe,
+                indicator=indicator,
+                condition=condition,
+                current_value=value,
+                threshold=threshold,
+                severity=severity,
+                message=message,
+                timestamp=now,
+                trigger_price=price,
+                cross_type=condition,
+                cross_value=cross_value
+            )
+
+        # RSI - alert on entering the zone, not on every candle spent inside it
+        rsi = snapshot['rsi']['rsi_current']
+        previous_rsi = snapshot['rsi']['previous']
+        thresholds = self.alert_thresholds['rsi']
+        if rsi is not None:
+            if rsi <= thresholds['oversold'] and (previous_rsi is None or previous_rsi > thresholds['oversold']):
+                alerts.append(make_alert(
+                    "RSI", "oversold", rsi, thresholds['oversold'], AlertSeverity.MEDIUM,
+                    f"📉 {symbol} {timeframe} RSI OVERSOLD: {rsi:.2f} (Price: ${price:,.2f})", rsi))
+            elif rsi >= thresholds['overbought'] and (previous_rsi is None or previous_rsi < thresholds['overbought']):
+                alerts.append(make_alert(
+                    "RSI", "overbought", rsi, thresholds['overbought'], AlertSeverity.MEDIUM,
+                    f"📈 {symbol} {timeframe} RSI OVERBOUGHT: {rsi:.2f} (Price: ${price:,.2f})", rsi))
+
+        # EMA crosses - 50/200 and 9/21 can cross on the same candle, so the pair is part of the alert id
+        ema = snapshot['ema']
+        for key, fast, slow in (('signal', 50, 200), ('short_signal', 9, 21)):
+            signal = ema.get(key)
+            if signal:
+                cross_type = "golden_cross" if signal in ('golden_cross', 'bullish_cross') else "death_cross"
+                alerts.append(make_alert(
+                    "EMA", cross_type, ema['values'][f'ema_{fast}'], self.alert_thresholds['ema']['cross_threshold'],
+                    AlertSeverity.HIGH,
+                    f"📊 {symbol} {timeframe} EMA {fast}/{slow} {cross_type.upper()}: {signal} (Price: ${price:,.2f})",
+                    price, variant=f"{fast}_{slow}"))
+
+        # MACD signal / zero line crosses
+        macd = snapshot['macd']
+        if macd['cross_signal'] != 'none':
+            cross_type = "signal_bullish" if macd['cross_signal'] == 'bullish_cross' else "signal_bearish"
+            alerts.append(make_alert(
+                "MACD", cross_type, 1.0, self.alert_thresholds['macd']['signal_cross_threshold'],
+                AlertSeverity.MEDIUM,
+                f"📊 {symbol} {timeframe} MACD SIGNAL CROSS: {macd['cross_signal'].upper()} (Price: ${price:,.2f})", price))
+        if macd['zero_cross'] != 'none':
+            cross_type = f"zero_line_{macd['zero_cross']}"
+            alerts.append(make_alert(
+                "MACD", cross_type, 1.0, self.alert_thresholds['macd']['zero_cross_threshold'],
+                AlertSeverity.MEDIUM,
+                f"📊 {symbol} {timeframe} MACD ZERO LINE CROSS: {macd['zero_cross'].upper()} (Price: ${price:,.2f})", price))
+
+        # Bollinger breakouts and squeeze
+        bollinger = snapshot['bollinger']
+        band_signal = bollinger.get('signal')
+        if band_signal in ('above_upper', 'below_lower'):
+            direction = "bullish" if band_signal == 'above_upper' else "bearish"
+            alerts.append(make_alert(
+                "Bollinger Bands", f"{direction}_breakout", 1.0,
+                self.alert_thresholds['bollinger_bands']['breakout_threshold'], AlertSeverity.HIGH,
+                f"💥 {symbol} {timeframe} BOLLINGER BANDS {direction.upper()} BREAKOUT! (Price: ${price:,.2f})", price))
+        band_width = bollinger.get('band_width')
+        if band_width is not None and band_width < self.alert_thresholds['bollinger_bands']['squeeze_threshold']:
+            alerts.append(make_alert(
+                "Bollinger Bands", "squeeze", 1.0, self.alert_thresholds['bollinger_bands']['squeeze_threshold'],
+                AlertSeverity.MEDIUM,
+                f"📊 {symbol} {timeframe} BOLLINGER BANDS SQUEEZE DETECTED! (Price: ${price:,.2f})", band_width))
+
+        return alerts
+
     def _store_alerts(self, alerts: List[TechnicalAlert]):
         """Store alerts in database"""
         with sqlite3.connect(self.db_path) as conn:
@@ -0,0 +1,713 @@
+#!/usr/bin/env python3
+"""
+Technical Indicators Batch Engine
+Vectorized multi-symbol version of TechnicalIndicatorsEngine.calculate_all_indicators
+
+The per-symbol engine walks one pandas DataFrame at a time. This module takes a
+panel of OHLCV series (symbol x time) and computes the same ten indicators,
+combination patterns and overall scores for every symbol at once with NumPy,
+using the pandas fallback formulas of the per-symbol engine.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+FIBONACCI_LEVELS = ('0.0', '0.236', '0.382', '0.500', '0.618', '0.786', '1.000', '1.618', '2.618')
+
+PanelInput = Union[np.ndarray, pd.DataFrame, Dict[str, pd.DataFrame]]
+
+
+def to_ohlcv_panel(panel: PanelInput,
+                   symbols: Optional[Sequence[str]] = None) -> Tuple[List[str], np.ndarray]:
+    """
+    Normalize supported panel inputs into (symbols, array[n_symbols, n_bars, 5])
+
+    Accepts:
+        - 3-D NumPy array shaped (symbols, bars, 5) in open/high/low/close/volume order
+        - DataFrame with a (symbol, timestamp) MultiIndex and OHLCV columns
+        - Dict of symbol -> OHLCV DataFrame (aligned on the most recent common length)
+    """
+
+    if isinstance(panel, np.ndarray):
+        if panel.ndim != 3 or panel.shape[2] != len(OHLCV_COLUMNS):
+            raise ValueError(f"Expected array shaped (symbols, bars, 5), got {panel.shape}")
+        names = list(symbols) if symbols is not None else [f"SYMBOL_{i}" for i in range(panel.shape[0])]
+        if len(names) != panel.shape[0]:
+            raise ValueError("Number of symbols does not match panel size")
+        return names, panel.astype(np.float64, copy=False)
+
+    if isinstance(panel, pd.DataFrame):
+        if not isinstance(panel.index, pd.MultiIndex):
+            raise ValueError("DataFrame panel must have a (symbol, timestamp) MultiIndex")
+        fields = [panel[column].unstack(level=0) for column in OHLCV_COLUMNS]
+        names = [str(s) for s in fields[0].columns]
+        if symbols is not None:
+            names = list(symbols)
+            fields = [f[names] for f in fields]
+        data = np.stack([f.to_numpy(dtype=np.float64).T for f in fields], axis=-1)
+        return names, data
+
+    if isinstance(panel, dict):
+        names = list(symbols) if symbols is not None else list(panel.keys())
+        length = min(len(panel[s]) for s in names)
+        data = np.stack([
+            panel[s][list(OHLCV_COLUMNS)].to_numpy(dtype=np.float64)[-length:]
+            for s in names
+        ])
+        return names, data
+
+    raise TypeError(f"Unsupported panel type: {type(panel).__name__}")
+
+
+def _rolling(x: np.ndarray, window: int, reducer: str, **kwargs) -> np.ndarray:
+    """Rolling reduction along the time axis, NaN-padded like pandas rolling()"""
+
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        windows = sliding_window_view(x, window, axis=1)
+        out[:, window - 1:] = getattr(windows, reducer)(axis=-1, **kwargs)
+    return out
+
+
+def _ema(x: np.ndarray, span: int) -> np.ndarray:
+    """EMA equivalent to Series.ewm(span=span, adjust=False).mean(), across all rows at once"""
+
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(x)
+    out[:, 0] = x[:, 0]
+    for t in range(1, x.shape[1]):
+        out[:, t] = alpha * x[:, t] + (1 - alpha) * out[:, t - 1]
+    return out
+
+
+def _shift(x: np.ndarray, periods: int) -> np.ndarray:
+    """Series.shift along the time axis"""
+
+    out = np.full(x.shape, np.nan)
+    if periods > 0:
+        out[:, periods:] = x[:, :-periods]
+    elif periods < 0:
+        out[:, :periods] = x[:, -periods:]
+    else:
+        out[:] = x
+    return out
+
+
+def _rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Simple-average RSI matching the engine's pandas fallback"""
+
+    delta = np.diff(close, axis=1, prepend=np.nan)
+    gain = _rolling(np.where(delta > 0, delta, 0.0), period, 'mean')
+    loss = _rolling(np.where(delta < 0, -delta, 0.0), period, 'mean')
+    return 100 - (100 / (1 + gain / loss))
+
+
+def _top_unique(values: np.ndarray, mask: np.ndarray, k: int, descending: bool) -> np.ndarray:
+    """
+    First k distinct masked values per row, sorted, padded with +/-inf
+
+    Vectorized replacement for sorted(set(levels))[:k] on every symbol.
+    """
+
+    fill = -np.inf if descending else np.inf
+    ordered = np.sort(np.where(mask, values, fill), axis=1)
+    if descending:
+        ordered = ordered[:, ::-1]
+    duplicate = np.zeros(ordered.shape, dtype=bool)
+    duplicate[:, 1:] = ordered[:, 1:] == ordered[:, :-1]
+    ordered = np.sort(np.where(duplicate, fill, ordered), axis=1)
+    if descending:
+        ordered = ordered[:, ::-1]
+    return ordered[:, :k]
+
+
+def _pick(condition_values: Sequence[Tuple[np.ndarray, Any]], default: Any, size: int) -> List[Any]:
+    """np.select for arbitrary Python objects, returned as a per-symbol list"""
+
+    out = np.empty(size, dtype=object)
+    out.fill(default)
+    for condition, value in reversed(condition_values):
+        out[condition] = value
+    return out.tolist()
+
+
+class BatchTechnicalIndicators:
+    """
+    Computes all 10 technical indicators for a whole symbol panel in one pass
+
+    Every indicator is evaluated as an (n_symbols, n_bars) array operation; the
+    only per-symbol Python work left is assembling the result dictionaries.
+    """
+
+    def __init__(self, indicator_weights: Dict[str, float]):
+        self.indicator_weights = indicator_weights
+
+    def calculate(self, panel: PanelInput,
+                  symbols: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Calculate all indicators for every symbol in the panel
+
+        Returns:
+            Dictionary of symbol -> indicator results shaped like
+            TechnicalIndicatorsEngine.calculate_all_indicators, without the
+            full-length series (only current values and signals)
+        """
+
+        names, data = to_ohlcv_panel(panel, symbols)
+        if data.shape[1] < 2:
+            raise ValueError("Panel needs at least 2 bars per symbol")
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            arrays = self._compute_arrays(data)
+
+        return self._assemble(names, arrays, data.shape[1])
+
+    def _compute_arrays(self, data: np.ndarray) -> Dict[str, Any]:
+        """Vectorized core: every entry is an array with one row/value per symbol"""
+
+        open_, high, low, close, volume = (data[:, :, i] for i in range(5))
+        n_bars = close.shape[1]
+        a: Dict[str, Any] = {}
+        price = close[:, -1]
+        prev_close = close[:, -2]
+        a['price'] = price
+
+        # 1. EMA crossovers
+        ema = {span: _ema(close, span) for span in (9, 21, 50, 200)}
+        c9, c21, c50, c200 = (ema[s][:, -1] for s in (9, 21, 50, 200))
+        p9, p21, p50, p200 = (ema[s][:, -2] for s in (9, 21, 50, 200))
+        has_200 = n_bars >= 200
+        a['ema_values'] = (c9, c21, c50, c200 if has_200 else None)
+        a['golden_cross'] = has_200 & (c200 != 0) & (c50 > c200) & (p50 <= p200)
+        a['death_cross'] = has_200 & (c200 != 0) & (c50 < c200) & (p50 >= p200)
+        a['ema_bull_cross'] = (c9 > c21) & (p9 <= p21)
+        a['ema_bear_cross'] = (c9 < c21) & (p9 >= p21)
+        a['uptrend'] = (c9 > c21) & (c21 > c50)
+        a['downtrend'] = (c9 < c21) & (c21 < c50)
+
+        # 2. RSI
+        rsi = _rsi(close)
+        rsi_now = rsi[:, -1]
+        a['rsi'] = rsi_now
+        a['rsi_overbought'] = rsi_now >= 70
+        a['rsi_oversold'] = rsi_now <= 30
+        price_up_14 = price > close[:, -14]
+        rsi_up_14 = rsi_now > rsi[:, -14]
+        a['rsi_bear_div'] = price_up_14 & ~rsi_up_14
+        a['rsi_bull_div'] = ~price_up_14 & rsi_up_14
+        a['rsi_change'] = np.abs(rsi_now - rsi[:, -5])
+
+        # 3. MACD
+        macd = _ema(close, 12) - _ema(close, 26)
+        signal = _ema(macd, 9)
+        hist = macd - signal
+        a['macd_values'] = (macd[:, -1], signal[:, -1], hist[:, -1])
+        a['macd_bull_cross'] = (macd[:, -1] > signal[:, -1]) & (macd[:, -2] <= signal[:, -2])
+        a['macd_bear_cross'] = (macd[:, -1] < signal[:, -1]) & (macd[:, -2] >= signal[:, -2])
+        a['macd_zero_bull'] = (macd[:, -1] > 0) & (macd[:, -2] <= 0)
+        a['macd_zero_bear'] = (macd[:, -1] < 0) & (macd[:, -2] >= 0)
+        a['macd_increasing'] = hist[:, -1] > hist[:, -2]
+
+        # 4. Volume / OBV
+        change = np.diff(close, axis=1, prepend=np.nan)
+        obv = np.cumsum(volume * (change > 0) - volume * (change < 0), axis=1)
+        obv_now = obv[:, -1]
+        vol_sma = _rolling(volume, 20, 'mean')[:, -1]
+        volume_ratio = volume[:, -1] / vol_sma
+        a['volume_values'] = (obv_now, volume[:, -1], vol_sma, volume_ratio)
+        a['volume_spike_strong'] = volume_ratio > 1.5
+        a['volume_spike_very_strong'] = volume_ratio > 2
+        a['obv_bullish'] = obv_now > _rolling(obv, 10, 'mean')[:, -1]
+        a['obv_up_10'] = obv_now > obv[:, -10]
+        a['price_up_10'] = price > close[:, -10]
+
+        # 5. Bollinger Bands
+        middle = _rolling(close, 20, 'mean')
+        std = _rolling(close, 20, 'std', ddof=1)
+        upper = middle + std * 2
+        lower = middle - std * 2
+        widths = (upper - lower) / middle
+        band_width = widths[:, -1]
+        avg_width = widths[:, -20:].mean(axis=1)
+        position = (price - lower[:, -1]) / (upper[:, -1] - lower[:, -1])
+        a['bollinger_values'] = (upper[:, -1], middle[:, -1], lower[:, -1], position)
+        a['band_width'] = band_width
+        a['squeeze_tight'] = band_width < avg_width * 0.7
+        a['squeeze_moderate'] = band_width < avg_width * 0.85
+        a['band_position'] = position
+
+        # 6. Fibonacci (50-bar lookback)
+        high_price = np.nanmax(high[:, -50:], axis=1)
+        low_price = np.nanmin(low[:, -50:], axis=1)
+        diff = high_price - low_price
+        ratios = np.array([0.0, 0.236, 0.382, 0.5, 0.618, 0.786])
+        levels = np.column_stack([
+            high_price[:, None] - diff[:, None] * ratios,
+            low_price,
+            low_price - diff * 0.618,
+            low_price - diff * 1.618,
+        ])
+        distances = np.abs(price[:, None] - levels)
+        nearest = np.argmin(distances, axis=1)
+        min_distance = distances[np.arange(len(price)), nearest]
+        a['fib_levels'] = levels
+        a['fib_nearest'] = nearest
+        a['fib_distance'] = min_distance
+        a['fib_at_key'] = np.isin(nearest, (2, 3, 4)) & (min_distance < diff * 0.02)
+        a['fib_above_nearest'] = price > levels[np.arange(len(price)), nearest]
+        a['fib_bullish'] = price > levels[:, 4]
+        a['fib_bearish'] = price < levels[:, 2]
+
+        # 7. Ichimoku Cloud
+        tenkan = (_rolling(high, 9, 'max') + _rolling(low, 9, 'min')) / 2
+        kijun = (_rolling(high, 26, 'max') + _rolling(low, 26, 'min')) / 2
+        span_a = _shift((tenkan + kijun) / 2, 26)
+        span_b = _shift((_rolling(high, 52, 'max') + _rolling(low, 52, 'min')) / 2, 26)
+        span_a_now = np.nan_to_num(span_a[:, -1], nan=0.0)
+        span_b_now = np.nan_to_num(span_b[:, -1], nan=0.0)
+        cloud_top = np.maximum(span_a_now, span_b_now)
+        cloud_bottom = np.minimum(span_a_now, span_b_now)
+        a['ichimoku_values'] = (tenkan[:, -1], kijun[:, -1], span_a_now, span_b_now)
+        a['tk_bull'] = (tenkan[:, -1] > kijun[:, -1]) & (tenkan[:, -2] <= kijun[:, -2])
+        a['tk_bear'] = (tenkan[:, -1] < kijun[:, -1]) & (tenkan[:, -2] >= kijun[:, -2])
+        a['above_cloud'] = price > cloud_top
+        a['below_cloud'] = price < cloud_bottom
+        a['cloud_thickness'] = cloud_top - cloud_bottom
+        if n_bars >= 26:
+            future_a, future_b = span_a[:, -26], span_b[:, -26]
+            a['future_cloud_known'] = (future_a != 0) & (future_b != 0)
+            a['future_cloud_bullish'] = future_a > future_b
+        else:
+            a['future_cloud_known'] = np.zeros(len(price), dtype=bool)
+            a['future_cloud_bullish'] = a['future_cloud_known']
+
+        # 8. Stochastic RSI
+        rsi_min = _rolling(rsi, 14, 'min')
+        stoch = (rsi - rsi_min) / (_rolling(rsi, 14, 'max') - rsi_min)
+        k_line = _rolling(stoch, 3, 'mean') * 100
+        d_line = _rolling(k_line, 3, 'mean')
+        k_now, d_now = k_line[:, -1], d_line[:, -1]
+        a['stoch_values'] = (k_now, d_now)
+        a['stoch_overbought'] = k_now >= 80
+        a['stoch_oversold'] = k_now <= 20
+        a['stoch_bull_cross'] = (k_now > d_now) & (k_line[:, -2] <= d_line[:, -2])
+        a['stoch_bear_cross'] = (k_now < d_now) & (k_line[:, -2] >= d_line[:, -2])
+
+        # 9. Divergences (14-bar lookback, RSI / MACD histogram / OBV)
+        macd_up_14 = hist[:, -1] > hist[:, -14]
+        obv_up_14 = obv_now > obv[:, -14]
+        a['div_price_up'] = price_up_14
+        a['div_rsi_up'] = rsi_up_14
+        a['div_macd_up'] = macd_up_14
+        a['div_obv_up'] = obv_up_14
+
+        # 10. Support / Resistance (20-bar pivots) + candle patterns
+        window = 20
+        highs = _rolling(high, window, 'max')
+        lows = _rolling(low, window, 'min')
+        pivot = np.zeros(high.shape, dtype=bool)
+        pivot[:, window:n_bars - window] = True
+        resistance = _top_unique(high, pivot & (high == highs), 5, descending=True)
+        support = _top_unique(low, pivot & (low == lows), 5, descending=False)
+        a['resistance'] = resistance
+        a['support'] = support
+
+        rows = np.arange(len(price))
+        nearest_res = resistance[rows, np.argmin(np.abs(resistance - price[:, None]), axis=1)]
+        nearest_sup = support[rows, np.argmin(np.abs(support - price[:, None]), axis=1)]
+        nearest_res = np.where(np.isfinite(nearest_res), nearest_res, np.nan)
+        nearest_sup = np.where(np.isfinite(nearest_sup), nearest_sup, np.nan)
+        a['nearest_resistance'] = nearest_res
+        a['nearest_support'] = nearest_sup
+        a['resistance_break'] = (nearest_res != 0) & (price > nearest_res) & (prev_close <= nearest_res)
+        a['support_break'] = (nearest_sup != 0) & (price < nearest_sup) & (prev_close >= nearest_sup)
+
+        o1, c1, h1, l1 = open_[:, -1], close[:, -1], high[:, -1], low[:, -1]
+        o0, c0 = open_[:, -2], close[:, -2]
+        body = np.abs(c1 - o1)
+        candle_range = h1 - l1
+        a['bull_engulfing'] = (c0 < o0) & (c1 > o1) & (o1 < c0) & (c1 > o0)
+        a['bear_engulfing'] = ~a['bull_engulfing'] & (c0 > o0) & (c1 < o1) & (o1 > c0) & (c1 < o0)
+        a['doji'] = (candle_range > 0) & (body / candle_range < 0.1)
+        upper_wick = h1 - np.maximum(c1, o1)
+        lower_wick = np.minimum(c1, o1) - l1
+        a['bear_pin'] = upper_wick > body * 2
+        a['bull_pin'] = ~a['bear_pin'] & (lower_wick > body * 2)
+
+        bearish_candle = a['bear_engulfing'] | a['bear_pin']
+        bullish_candle = a['bull_engulfing'] | a['bull_pin']
+        a['bear_reversal'] = bearish_candle & (np.abs(price - nearest_res) < nearest_res * 0.01)
+        a['bull_reversal'] = bullish_candle & (np.abs(price - nearest_sup) < nearest_sup * 0.01)
+
+        # Overall scores (same weighting as calculate_overall_scores)
+        weights = self.indicator_weights
+        bullish = np.zeros(len(price))
+        bearish = np.zeros(len(price))
+        if 'ema_cross' in weights:
+            w = weights['ema_cross']
+            ema_bull = np.where(a['golden_cross'], 100, np.where(
+                ~a['death_cross'] & a['uptrend'], 70, 0))
+            ema_bear = np.where(a['death_cross'], 100, np.where(
+                ~a['golden_cross'] & ~a['uptrend'] & a['downtrend'], 70, 0))
+            bullish += w * ema_bull
+            bearish += w * ema_bear
+        if 'rsi' in weights:
+            bullish += weights['rsi'] * 80 * a['rsi_oversold']
+            bearish += weights['rsi'] * 80 * (~a['rsi_oversold'] & a['rsi_overbought'])
+        if 'macd' in weights:
+            bullish += weights['macd'] * 85 * a['macd_bull_cross']
+            bearish += weights['macd'] * 85 * a['macd_bear_cross']
+        total_weight = sum(weights.values())
+        if total_weight > 0:
+            bullish = bullish / total_weight
+            bearish = bearish / total_weight
+        a['bullish_score'] = bullish
+        a['bearish_score'] = bearish
+
+        return a
+
+    def _assemble(self, names: List[str], a: Dict[str, Any], n_bars: int) -> Dict[str, Dict[str, Any]]:
+        """Turn the per-symbol arrays into calculate_all_indicators-style dictionaries"""
+
+        n = len(names)
+        lists = {
+            key: value.tolist() for key, value in a.items()
+            if isinstance(value, np.ndarray) and value.ndim == 1
+        }
+
+        def col(values: Optional[np.ndarray]) -> List[Any]:
+            return values.tolist() if values is not None else [None] * n
+
+        ema_values = [col(v) for v in a['ema_values']]
+        macd_values = [col(v) for v in a['macd_values']]
+        volume_values = [col(v) for v in a['volume_values']]
+        bollinger_values = [col(v) for v in a['bollinger_values']]
+        ichimoku_values = [col(v) for v in a['ichimoku_values']]
+        stoch_values = [col(v) for v in a['stoch_values']]
+        fib_levels = a['fib_levels'].tolist()
+        resistance = a['resistance'].tolist()
+        support = a['support'].tolist()
+
+        ema_signal = _pick([(a['golden_cross'], 'golden_cross'), (a['death_cross'], 'death_cross')], None, n)
+        short_signal = _pick([(a['ema_bull_cross'], 'bullish_cross'), (a['ema_bear_cross'], 'bearish_cross')], None, n)
+        trend = _pick([(a['uptrend'], 'strong_uptrend'), (a['downtrend'], 'strong_downtrend')], 'neutral', n)
+        rsi_signal = _pick([(a['rsi_overbought'], 'overbought'), (a['rsi_oversold'], 'oversold')], 'neutral', n)
+        macd_cross = _pick([(a['macd_bull_cross'], 'bullish_cross'), (a['macd_bear_cross'], 'bearish_cross')], 'none', n)
+        band_signal = _pick([
+            (a['band_position'] > 1, 'above_upper'),
+            (a['band_position'] < 0, 'below_lower'),
+            (a['band_position'] > 0.8, 'near_upper'),
+            (a['band_position'] < 0.2, 'near_lower'),
+        ], 'middle_band', n)
+        stoch_signal = _pick([(a['stoch_overbought'], 'overbought'), (a['stoch_oversold'], 'oversold')], 'neutral', n)
+        stoch_cross = _pick([(a['stoch_bull_cross'], 'bullish'), (a['stoch_bear_cross'], 'bearish')], 'none', n)
+        kumo = _pick([(a['above_cloud'], 'above_cloud'), (a['below_cloud'], 'below_cloud')], 'inside_cloud', n)
+
+        band_actions = {
+            'above_upper': 'overbought', 'below_lower': 'oversold', 'near_upper': 'watch_reversal',
+            'near_lower': 'watch_bounce', 'middle_band': 'neutral'
+        }
+        rsi_actions = {'overbought': 'consider_sell', 'oversold': 'consider_buy', 'neutral': 'hold'}
+        macd_actions = {'bullish_cross': 'buy', 'bearish_cross': 'sell', 'none': 'hold'}
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for i, symbol in enumerate(names):
+            L = {key: values[i] for key, values in lists.items()}
+            price = L['price']
+
+            # 1. EMA
+            ema_result: Dict[str, Any] = {
+                'trend': trend[i],
+                'values': {
+                    'ema_9': ema_values[0][i], 'ema_21': ema_values[1][i],
+                    'ema_50': ema_values[2][i], 'ema_200': ema_values[3][i]
+                }
+            }
+            if ema_signal[i]:
+                ema_result['signal'] = ema_signal[i]
+                ema_result['signal_strength'] = 'strong'
+            if short_signal[i]:
+                ema_result['short_signal'] = short_signal[i]
+                ema_result['short_strength'] = 'moderate'
+
+            # 2. RSI
+            rsi_divergence = ('bearish_divergence' if L['rsi_bear_div']
+                              else 'bullish_divergence' if L['rsi_bull_div'] else 'none')
+            rsi_result: Dict[str, Any] = {
+                'rsi_current': L['rsi'],
+                'signal': rsi_signal[i],
+                'action': rsi_actions[rsi_signal[i]],
+                'divergence': rsi_divergence,
+                'momentum': ('strong' if L['rsi_change'] > 10
+                             else 'moderate' if L['rsi_change'] > 5 else 'weak')
+            }
+            if rsi_divergence != 'none':
+                rsi_result['divergence_strength'] = 'strong'
+
+            # 3. MACD
+            macd_result = {
+                'cross_signal': macd_cross[i],
+                'action': macd_actions[macd_cross[i]],
+                'zero_cross': ('bullish' if L['macd_zero_bull']
+                               else 'bearish' if L['macd_zero_bear'] else 'none'),
+                'momentum': 'increasing' if L['macd_increasing'] else 'decreasing',
+                'values': {
+                    'macd': macd_values[0][i], 'signal': macd_values[1][i], 'histogram': macd_values[2][i]
+                }
+            }
+
+            # 4. Volume
+            obv_dir = 'up' if L['obv_up_10'] else 'down'
+            price_dir = 'up' if L['price_up_10'] else 'down'
+            volume_spike = L['volume_spike_strong']
+            volume_result = {
+                'volume_spike': volume_spike,
+                'spike_strength': ('very_strong' if L['volume_spike_very_strong']
+                                   else 'strong' if volume_spike else 'normal'),
+                'obv_trend': 'bullish' if L['obv_bullish'] else 'bearish',
+                'divergence': f"{obv_dir}_volume_{price_dir}_price" if obv_dir != price_dir else 'none',
+                'divergence_warning': obv_dir != price_dir,
+                'values': {
+                    'obv': volume_values[0][i], 'volume': volume_values[1][i],
+                    'volume_sma': volume_values[2][i], 'volume_ratio': volume_values[3][i]
+                }
+            }
+
+            # 5. Bollinger
+            bollinger_result: Dict[str, Any] = {
+                'band_width': L['band_width'],
+                'squeeze': L['squeeze_moderate'],
+                'signal': band_signal[i],
+                'action': band_actions[band_signal[i]],
+                'values': {
+                    'upper': bollinger_values[0][i], 'middle': bollinger_values[1][i],
+                    'lower': bollinger_values[2][i], 'price': price,
+                    'position_in_band': bollinger_values[3][i]
+                }
+            }
+            if L['squeeze_moderate']:
+                bollinger_result['squeeze_strength'] = 'tight' if L['squeeze_tight'] else 'moderate'
+
+            # 6. Fibonacci
+            nearest_level = FIBONACCI_LEVELS[L['fib_nearest']]
+            fibonacci_result: Dict[str, Any] = {
+                'levels': dict(zip(FIBONACCI_LEVELS, fib_levels[i])),
+                'nearest_level': nearest_level,
+                'distance_to_level': L['fib_distance'],
+                'at_key_level': L['fib_at_key'],
+                'signal': f'at_fib_{nearest_level}' if L['fib_at_key'] else 'between_levels',
+                'trend': ('bullish' if L['fib_bullish']
+                          else 'bearish' if L['fib_bearish'] else 'neutral')
+            }
+            if L['fib_at_key']:
+                fibonacci_result['action'] = 'watch_resistance' if L['fib_above_nearest'] else 'watch_support'
+
+            # 7. Ichimoku
+            ichimoku_result: Dict[str, Any] = {
+                'tk_cross': 'bullish' if L['tk_bull'] else 'bearish' if L['tk_bear'] else 'none',
+                'kumo_breakout': kumo[i],
+                'signal': {'above_cloud': 'bullish', 'below_cloud': 'bearish'}.get(kumo[i], 'neutral'),
+                'cloud_thickness': L['cloud_thickness'],
+                'values': {
+                    'price': price, 'tenkan': ichimoku_values[0][i], 'kijun': ichimoku_values[1][i],
+                    'span_a': ichimoku_values[2][i], 'span_b': ichimoku_values[3][i]
+                }
+            }
+            if L['future_cloud_known']:
+                ichimoku_result['future_cloud'] = 'bullish' if L['future_cloud_bullish'] else 'bearish'
+
+            # 8. Stochastic RSI
+            stoch_result: Dict[str, Any] = {
+                'signal': stoch_signal[i],
+                'crossover': stoch_cross[i],
+                'values': {'k': stoch_values[0][i], 'd': stoch_values[1][i]}
+            }
+            if stoch_signal[i] != 'neutral':
+                stoch_result['action'] = rsi_actions[stoch_signal[i]]
+            if stoch_cross[i] == 'bullish':
+                stoch_result['crossover_strength'] = 'strong' if stoch_values[0][i] < 20 else 'moderate'
+            elif stoch_cross[i] == 'bearish':
+                stoch_result['crossover_strength'] = 'strong' if stoch_values[0][i] > 80 else 'moderate'
+
+            # 9. Divergences
+            price_up = L['div_price_up']
+            divergences = []
+            for name, up, strength in (('RSI', L['div_rsi_up'], 'strong'),
+                                       ('MACD', L['div_macd_up'], 'moderate'),
+                                       ('OBV', L['div_obv_up'], 'strong')):
+                if price_up and not up:
+                    divergences.append({'type': 'bearish_divergence', 'indicator': name, 'strength': strength})
+                elif not price_up and up:
+                    divergences.append({'type': 'bullish_divergence', 'indicator': name, 'strength': strength})
+            divergence_result: Dict[str, Any] = {
+                'divergences': divergences,
+                'price_trend': 'up' if price_up else 'down'
+            }
+            if divergences:
+                bullish_count = sum(1 for d in divergences if 'bullish' in d['type'])
+                bearish_count = len(divergences) - bullish_count
+                if bullish_count > bearish_count:
+                    divergence_result['overall_signal'] = 'bullish_divergence'
+                    divergence_result['confidence'] = bullish_count / len(divergences)
+                elif bearish_count > bullish_count:
+                    divergence_result['overall_signal'] = 'bearish_divergence'
+                    divergence_result['confidence'] = bearish_count / len(divergences)
+                else:
+                    divergence_result['overall_signal'] = 'mixed'
+                    divergence_result['confidence'] = 0.5
+            else:
+                divergence_result['overall_signal'] = 'no_divergence'
+                divergence_result['confidence'] = 0
+
+            # 10. Support / Resistance
+            candle_patterns = []
+            if L['bull_engulfing']:
+                candle_patterns.append({'type': 'bullish_engulfing', 'strength': 'strong'})
+            elif L['bear_engulfing']:
+                candle_patterns.append({'type': 'bearish_engulfing', 'strength': 'strong'})
+            if L['doji']:
+                candle_patterns.append({'type': 'doji', 'strength': 'weak'})
+            if L['bear_pin']:
+                candle_patterns.append({'type': 'bearish_pin_bar', 'strength': 'strong'})
+            elif L['bull_pin']:
+                candle_patterns.append({'type': 'bullish_pin_bar', 'strength': 'strong'})
+
+            nearest_res = L['nearest_resistance']
+            nearest_sup = L['nearest_support']
+            sr_result: Dict[str, Any] = {
+                'resistance_levels': [v for v in resistance[i] if v != float('-inf')],
+                'support_levels': [v for v in support[i] if v != float('inf')],
+                'nearest_resistance': None if nearest_res != nearest_res else nearest_res,
+                'nearest_support': None if nearest_sup != nearest_sup else nearest_sup,
+                'breakout': ('resistance_break' if L['resistance_break']
+                             else 'support_break' if L['support_break'] else 'none'),
+                'candle_patterns': candle_patterns
+            }
+            sr_result['signal'] = {'resistance_break': 'bullish', 'support_break': 'bearish'}.get(
+                sr_result['breakout'], 'neutral')
+            if L['bull_reversal']:
+                sr_result['combined_signal'] = 'bullish_reversal_at_support'
+                sr_result['confidence'] = 'high'
+            elif L['bear_reversal']:
+                sr_result['combined_signal'] = 'bearish_reversal_at_resistance'
+                sr_result['confidence'] = 'high'
+
+            indicators = {
+                'ema': ema_result,
+                'rsi': rsi_result,
+                'macd': macd_result,
+                'volume': volume_result,
+                'bollinger': bollinger_result,
+                'fibonacci': fibonacci_result,
+                'ichimoku': ichimoku_result,
+                'stoch_rsi': stoch_result,
+                'divergence': divergence_result,
+                'support_resistance': sr_result,
+            }
+            indicators['combinations'] = self._combinations(indicators)
+            indicators['overall'] = self._overall(L['bullish_score'], L['bearish_score'], indicators)
+            results[symbol] = indicators
+
+        return results
+
+    @staticmethod
+    def _combinations(indicators: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Combination patterns from already-classified signals"""
+
+        combinations = []
+        ema, rsi, macd = indicators['ema'], indicators['rsi'], indicators['macd']
+
+        if ema.get('short_signal') == 'bullish_cross' and rsi['divergence'] == 'bullish_divergence':
+            combinations.append({
+                'name': 'EMA Cross + RSI Divergence',
+                'signal': 'strong_buy',
+                'confidence': 0.85,
+                'description': 'Reliable reversal signal - Bullish EMA cross with RSI divergence'
+            })
+        elif ema.get('short_signal') == 'bearish_cross' and rsi['divergence'] == 'bearish_divergence':
+            combinations.append({
+                'name': 'EMA Cross + RSI Divergence',
+                'signal': 'strong_sell',
+                'confidence': 0.85,
+                'description': 'Reliable reversal signal - Bearish EMA cross with RSI divergence'
+            })
+
+        if indicators['bollinger']['squeeze'] and macd['cross_signal'] != 'none':
+            combinations.append({
+                'name': 'Bollinger Squeeze + MACD Cross',
+                'signal': 'breakout_imminent',
+                'confidence': 0.80,
+                'description': f"Strong breakout signal - BB squeeze with {macd['cross_signal']}"
+            })
+
+        kumo = indicators['ichimoku']['kumo_breakout']
+        if kumo != 'inside_cloud' and indicators['volume']['volume_spike']:
+            combinations.append({
+                'name': 'Ichimoku Breakout + Volume Spike',
+                'signal': 'strong_buy' if kumo == 'above_cloud' else 'strong_sell',
+                'confidence': 0.90,
+                'description': f"Trend confirmation - Ichimoku {kumo} with volume spike"
+            })
+
+        if indicators['stoch_rsi']['signal'] == 'overbought' and any(
+                p['type'] == 'bearish_engulfing' for p in indicators['support_resistance']['candle_patterns']):
+            combinations.append({
+                'name': 'Stoch RSI OB + Bearish Engulfing',
+                'signal': 'strong_sell',
+                'confidence': 0.88,
+                'description': 'High-probability short entry - Stochastic RSI overbought with bearish engulfing'
+            })
+
+        return combinations
+
+    @staticmethod
+    def _overall(bullish_score: float, bearish_score: float, indicators: Dict[str, Any]) -> Dict[str, Any]:
+        """Overall signal from the vectorized bullish/bearish scores"""
+
+        signals = []
+        ema = indicators['ema']
+        if ema.get('signal') == 'golden_cross':
+            signals.append('Golden Cross')
+        elif ema.get('signal') == 'death_cross':
+            signals.append('Death Cross')
+        elif ema['trend'] == 'strong_uptrend':
+            signals.append('Strong Uptrend')
+        elif ema['trend'] == 'strong_downtrend':
+            signals.append('Strong Downtrend')
+
+        if indicators['rsi']['signal'] == 'oversold':
+            signals.append('RSI Oversold')
+        elif indicators['rsi']['signal'] == 'overbought':
+            signals.append('RSI Overbought')
+
+        if indicators['macd']['cross_signal'] == 'bullish_cross':
+            signals.append('MACD Bullish Cross')
+        elif indicators['macd']['cross_signal'] == 'bearish_cross':
+            signals.append('MACD Bearish Cross')
+
+        if bullish_score > bearish_score + 20:
+            overall_signal = 'STRONG_BUY'
+        elif bullish_score > bearish_score + 10:
+            overall_signal = 'BUY'
+        elif bearish_score > bullish_score + 20:
+            overall_signal = 'STRONG_SELL'
+        elif bearish_score > bullish_score + 10:
+            overall_signal = 'SELL'
+        else:
+            overall_signal = 'NEUTRAL'
+
+        return {
+            'bullish_score': round(bullish_score, 2),
+            'bearish_score': round(bearish_score, 2),
+            'overall_signal': overall_signal,
+            'active_signals': signals,
+            'confidence': abs(bullish_score - bearish_score) / 100
+        }
@@ -97,6 +97,28 @@ class TechnicalIndicatorsEngine:
         
         return indicators
     
+    def calculate_all_indicators_batch(self, panel: Any,
+                                       symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Calculate all 10 technical indicators for many symbols in one vectorized pass
+        
+        Args:
+            panel: OHLCV panel - 3-D array (symbols, bars, open/high/low/close/volume),
+                   (symbol, timestamp) MultiIndex DataFrame, or dict of symbol -> DataFrame
+            symbols: Optional symbol names / selection for the panel rows
+        
+        Returns:
+            Dictionary of symbol -> indicator signals and current values
+        """
+        
+        from src.services.technical_indicators_batch import BatchTechnicalIndicators
+        
+        try:
+            return BatchTechnicalIndicators(self.indicator_weights).calculate(panel, symbols)
+        except Exception as e:
+            logger.error(f"Error calculating batch indicators: {e}")
+            return {}
+    
     def calculate_ema_crossovers(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
         1. EMA Crossovers (Golden Cross / Death Cross)
@@ -16,8 +16,24 @@ import json
 import asyncio
 from collections import defaultdict
 
+import numpy as np
+
+from src.services.rolling_correlation_engine import RollingCorrelationEngine
+
 logger = logging.getLogger(__name__)
 
+# Lookup tables for the vectorized batch path; each mirrors the if/elif
+# cascade of the matching scalar method (edges are the '<' thresholds)
+RISK_BANDS = ("0-0.1", "0.1-0.2", "0.2-0.3", "0.3-0.4", "0.4-0.5",
+              "0.5-0.6", "0.6-0.7", "0.7-0.8", "0.8-0.9", "0.9-1")
+RISK_BAND_EDGES = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9])
+RISK_ZONES = ("🟢 LOW RISK - Accumulation Zone", "🟡 MEDIUM RISK - Neutral Zone",
+              "🟠 ELEVATED RISK - Caution Zone", "🔴 HIGH RISK - Distribution Zone")
+RISK_ZONE_EDGES = np.array([0.3, 0.5, 0.7])
+WIN_RATES = np.array([0.85, 0.75, 0.65, 0.55, 0.45, 0.35, 0.25, 0.15])
+WIN_RATE_EDGES = np.array([0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8])
+TRADING_SIGNALS = ("STRONG BUY", "STRONG SELL", "OPPORTUNITY", "BUY", "SELL", "HOLD", "NEUTRAL")
+
 @dataclass
 class RiskAssessment:
     """Risk assessment data structure"""
@@ -62,6 +78,10 @@ class UnifiedRiskMetric:
         self._momentum_history = defaultdict(list)
         self._momentum_window = 7  # days
         
+        # Rolling correlations of daily risk values (warmed from outcomes once)
+        self.correlation_engine = RollingCorrelationEngine()
+        self._correlation_warmed = False
+        
         # Alert thresholds
         self.alert_thresholds = {
             'extreme_low': 0.1,
@@ -255,6 +275,10 @@ class UnifiedRiskMetric:
                        '0.5-0.6': 400, '0.6-0.7': 200, '0.7-0.8': 100, '0.8-0.9': 50, '0.9-1': 20}
         }
         
+        # Per-symbol arrays for the vectorized batch path
+        self._build_vector_tables()
+        self._risk_grids: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        
         # Initialize database after all data is set
         self.init_database()
     
@@ -541,6 +565,90 @@ class UnifiedRiskMetric:
         else:
             return 0.15  # 15% win rate in extreme overbought
     
+    def _build_vector_tables(self):
+        """Precompute log bounds and per-band coefficients for every symbol"""
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.SYMBOL_BOUNDS)}
+        self._min_prices = np.array([b['min'] for b in self.SYMBOL_BOUNDS.values()], dtype=float)
+        self._max_prices = np.array([b['max'] for b in self.SYMBOL_BOUNDS.values()], dtype=float)
+        self._log_min = np.log(self._min_prices)
+        self._log_max = np.log(self._max_prices)
+        
+        coefficients = np.empty((len(self.SYMBOL_BOUNDS), len(RISK_BANDS)))
+        for i, (symbol, bounds) in enumerate(self.SYMBOL_BOUNDS.items()):
+            time_data = self.TIME_SPENT_DATA.get(symbol, self.TIME_SPENT_DATA['DEFAULT'])
+            life_age = bounds.get('life_age_days', 1000)
+            for j, band in enumerate(RISK_BANDS):
+                days_in_band = time_data.get(band, 100)
+                percentage = (days_in_band / life_age) * 100 if life_age > 0 else 10
+                coefficients[i, j] = self.calculate_coefficient(percentage)
+        self._band_coefficients = coefficients
+    
+    def calculate_risk_vector(self, symbol_idx: np.ndarray, prices: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Vectorized risk metrics for parallel arrays of symbol indices and prices
+        
+        Same formulas as assess_risk; band, zone and signal are returned as
+        indices into RISK_BANDS, RISK_ZONES and TRADING_SIGNALS.
+        """
+        log_min = self._log_min[symbol_idx]
+        log_max = self._log_max[symbol_idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            risk = np.clip((np.log(prices) - log_min) / (log_max - log_min), 0.0, 1.0)
+        risk = np.where(prices <= self._min_prices[symbol_idx], 0.0,
+                        np.where(prices >= self._max_prices[symbol_idx], 1.0, risk))
+        
+        band = np.searchsorted(RISK_BAND_EDGES, risk, side='right')
+        zone = np.searchsorted(RISK_ZONE_EDGES, risk, side='right')
+        coefficient = self._band_coefficients[symbol_idx, band]
+        
+        base_score = np.where(risk < 0.3, 90 - (risk * 100),
+                              np.where(risk > 0.7, 60 + ((risk - 0.7) * 133),
+                                       30 + ((risk - 0.3) * 75)))
+        score = np.clip(base_score * coefficient, 0, 100)
+        
+        signal = np.full(risk.shape, TRADING_SIGNALS.index("NEUTRAL"))
+        signal = np.where(score >= 60, np.where(risk < 0.4, 3, np.where(risk > 0.6, 4, 5)), signal)
+        signal = np.where(score >= 80, np.where(risk < 0.3, 0, np.where(risk > 0.7, 1, 2)), signal)
+        
+        win_rate = WIN_RATES[np.searchsorted(WIN_RATE_EDGES, risk, side='right')]
+        
+        return {
+            'risk_value': risk,
+            'band': band,
+            'zone': zone,
+            'coefficient': coefficient,
+            'score': score,
+            'signal': signal,
+            'win_rate': win_rate
+        }
+    
+    def get_risk_grid(self, symbol: str, points: int = 1001) -> Optional[Dict[str, Any]]:
+        """
+        Dense price -> risk lookup grid for a symbol (evenly spaced in risk,
+        so geometrically spaced in price); built once and reused until the
+        symbol bounds change
+        """
+        symbol = symbol.upper()
+        if symbol not in self._symbol_index:
+            return None
+        
+        key = (symbol, points)
+        if key not in self._risk_grids:
+            i = self._symbol_index[symbol]
+            risk_points = np.linspace(0.0, 1.0, points)
+            prices = np.exp(self._log_min[i] + risk_points * (self._log_max[i] - self._log_min[i]))
+            metrics = self.calculate_risk_vector(np.full(points, i), prices)
+            self._risk_grids[key] = {
+                "symbol": symbol,
+                "prices": prices.tolist(),
+                "risk": metrics['risk_value'].tolist(),
+                "score": metrics['score'].tolist(),
+                "coefficient": metrics['coefficient'].tolist(),
+                "signal": [TRADING_SIGNALS[s] for s in metrics['signal']],
+                "win_rate": metrics['win_rate'].tolist()
+            }
+        return self._risk_grids[key]
+    
     async def assess_risk(self, symbol: str, current_price: Optional[float] = None) -> Optional[RiskAssessment]:
         """
         Complete risk assessment for a symbol
@@ -668,21 +776,79 @@ class UnifiedRiskMetric:
         }
     
     async def batch_assess(self, symbols: List[str], prices: Optional[Dict[str, float]] = None) -> List[RiskAssessment]:
-        """Batch assessment for multiple symbols"""
-        assessments = []
+        """Batch assessment for multiple symbols in one vectorized pass"""
+        import time
+        start_time = time.time()
+        
+        try:
+            from .riskmetric_monitoring import monitoring
+        except ImportError:
+            monitoring = None
+        
+        known, indices, price_values = [], [], []
         for symbol in symbols:
+            upper = symbol.upper()
+            if upper not in self._symbol_index:
+                logger.warning(f"Symbol {upper} not found in configuration")
+                if monitoring:
+                    monitoring.record_error("invalid_symbol", f"Symbol {upper} not found")
+                continue
+            i = self._symbol_index[upper]
             price = prices.get(symbol) if prices else None
-            assessment = await self.assess_risk(symbol, price)
-            if assessment:
-                assessments.append(assessment)
+            if price is None:
+                # In production, fetch from market data service
+                price = math.sqrt(self._min_prices[i] * self._max_prices[i])  # Geometric mean
+            known.append(upper)
+            indices.append(i)
+            price_values.append(float(price))
+        
+        if not known:
+            return []
+        
+        idx = np.array(indices)
+        price_array = np.array(price_values)
+        metrics = self.calculate_risk_vector(idx, price_array)
+        timestamp = datetime.now()
+        
+        assessments = [
+            RiskAssessment(
+                symbol=symbol,
+                current_price=price_values[n],
+                min_price=self.SYMBOL_BOUNDS[symbol]['min'],
+                max_price=self.SYMBOL_BOUNDS[symbol]['max'],
+                risk_value=float(metrics['risk_value'][n]),
+                risk_band=RISK_BANDS[metrics['band'][n]],
+                risk_zone=RISK_ZONES[metrics['zone'][n]],
+                coefficient=float(metrics['coefficient'][n]),
+                score=float(metrics['score'][n]),
+                signal=TRADING_SIGNALS[metrics['signal'][n]],
+                tradeable=bool(metrics['score'][n] >= 80),
+                win_rate=float(metrics['win_rate'][n]),
+                timestamp=timestamp
+            )
+            for n, symbol in enumerate(known)
+        ]
+        
+        # Record metrics
+        if monitoring:
+            monitoring.record_batch_assessment(
+                [(a.symbol, a.risk_value, a.risk_band) for a in assessments],
+                time.time() - start_time
+            )
+        
         return assessments
     
     async def update_symbol_bounds(self, symbol: str, min_price: float, max_price: float, reason: str = "Manual update") -> bool:
         """Update symbol bounds (for when Benjamin Cowen updates his models)"""
         try:
             symbol = symbol.upper()
-            self.SYMBOL_BOUNDS[symbol]['min'] = min_price
-            self.SYMBOL_BOUNDS[symbol]['max'] = max_price
+            bounds = self.SYMBOL_BOUNDS.setdefault(symbol, {})
+            previous_min, previous_max = bounds.get('min'), bounds.get('max')
+            bounds['min'] = min_price
+            bounds['max'] = max_price
+            # batch_assess reads the vector tables, not SYMBOL_BOUNDS
+            self._build_vector_tables()
+            self._risk_grids = {k: v for k, v in self._risk_grids.items() if k[0] != symbol}
             
             # Update database
             conn = sqlite3.connect(self.db_path)
@@ -693,6 +859,11 @@ class UnifiedRiskMetric:
                 SET min_price = ?, max_price = ?, last_updated = CURRENT_TIMESTAMP
                 WHERE symbol = ?
             ''', (min_price, max_price, symbol))
+            if cursor.rowcount == 0:
+                cursor.execute('''
+                    INSERT INTO symbols (symbol, min_price, max_price)
+                    VALUES (?, ?, ?)
+                ''', (symbol, min_price, max_price))
             
             # Log manual override
             cursor.execute('''
@@ -700,8 +871,8 @@ class UnifiedRiskMetric:
                 (symbol, override_type, override_value, previous_value, override_reason)
                 VALUES (?, 'min_price', ?, ?, ?),
                        (?, 'max_price', ?, ?, ?)
-            ''', (symbol, min_price, self.SYMBOL_BOUNDS[symbol].get('min'), reason,
-                  symbol, max_price, self.SYMBOL_BOUNDS[symbol].get('max'), reason))
+            ''', (symbol, min_price, previous_min, reason,
+                  symbol, max_price, previous_max, reason))
             
             conn.commit()
             conn.close()
@@ -760,10 +931,10 @@ class UnifiedRiskMetric:
             "last_update": datetime.now().isoformat()
         }
     
-    async def get_comprehensive_screener(self) -> Dict[str, Any]:
+    async def get_comprehensive_screener(self, prices: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
         """Get comprehensive risk analysis for all symbols"""
         symbols = list(self.SYMBOL_BOUNDS.keys())
-        assessments = await self.batch_assess(symbols)
+        assessments = await self.batch_assess(symbols, prices)
         
         # Sort by risk value
         sorted_assessments = sorted(assessments, key=lambda x: x.risk_value)
@@ -871,6 +1042,9 @@ class UnifiedRiskMetric:
                 conn.commit()
                 conn.close()
                 
+                # Feed rolling correlations
+                self.correlation_engine.observe(symbol.upper(), risk_value, timestamp)
+                
                 # Update momentum history
                 self._momentum_history[symbol].append({
                     'timestamp': timestamp,
@@ -1054,34 +1228,63 @@ class UnifiedRiskMetric:
                 'error': str(e)
             }
     
-    async def get_correlation_matrix(self, symbols: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Calculate risk correlation matrix between symbols"""
-        if symbols is None:
-            symbols = list(self.SYMBOL_BOUNDS.keys())[:10]  # Top 10 for performance
+    def _warm_correlation_engine(self):
+        """Load recorded outcomes into the correlation engine (once)"""
+        self._correlation_warmed = True
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT symbol, risk_value, timestamp FROM outcomes
+                WHERE risk_value IS NOT NULL
+                ORDER BY timestamp
+            ''')
+            rows = cursor.fetchall()
+            conn.close()
+        except sqlite3.OperationalError:
+            return  # No outcomes recorded yet
         
-        correlations = {}
+        history = defaultdict(list)
+        for symbol, risk_value, timestamp in rows:
+            history[symbol].append((datetime.fromisoformat(timestamp), risk_value))
+        for symbol, points in history.items():
+            self.correlation_engine.backfill(symbol, points)
+    
+    async def get_correlation_matrix(self, symbols: Optional[List[str]] = None, window: int = 30,
+                                     top_k: int = 5) -> Dict[str, Any]:
+        """
+        Rolling correlation matrix of daily risk changes between symbols
         
-        for symbol1 in symbols:
-            correlations[symbol1] = {}
-            for symbol2 in symbols:
-                if symbol1 == symbol2:
-                    correlations[symbol1][symbol2] = 1.0
-                else:
-                    # This would calculate actual correlation from historical data
-                    # For now, return placeholder
-                    correlations[symbol1][symbol2] = 0.0
+        Args:
+            symbols: Symbols to include (default: every configured symbol)
+            window: Rolling window in days (7, 30 or 90)
+            top_k: Number of most/least correlated pairs to report
+        """
+        if not self._correlation_warmed:
+            self._warm_correlation_engine()
+        if symbols is None:
+            symbols = list(self.SYMBOL_BOUNDS.keys())
+        symbols = [s.upper() for s in symbols]
         
-        return {
-            'symbols': symbols,
-            'matrix': correlations,
-            'timestamp': datetime.now().isoformat()
-        }
+        result = self.correlation_engine.to_dict(window, symbols, top_k)
+        # Symbols without history still get a row (identity only)
+        for symbol in symbols:
+            if symbol not in result['matrix']:
+                result['matrix'][symbol] = {other: (1.0 if other == symbol else None) for other in symbols}
+        for row in result['matrix'].values():
+            for other in symbols:
+                row.setdefault(other, None)
+        
+        result['symbols'] = symbols
+        result['timestamp'] = datetime.now().isoformat()
+        return result
     
     def clear_cache(self):
         """Clear all cached data"""
         self._cache.clear()
         self._cache_timestamps.clear()
         self._cached_logarithmic_risk.cache_clear()
+        self._risk_grids.clear()
         logger.info("✅ Cache cleared")
 
 
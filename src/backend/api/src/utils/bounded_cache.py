@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Bounded TTL Cache
+In-memory cache with a memory budget, LRU/LFU eviction, per-entry TTLs and a
+stale window that backs stale-while-revalidate and error fallbacks
+"""
+
+import sys
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Entries sampled (least recently used first) when picking an LFU victim
+LFU_SAMPLE_SIZE = 16
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """Approximate deep size in bytes of JSON-like data (dict/list/str/number)"""
+    size = sys.getsizeof(obj)
+    if _depth > 32:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, _depth + 1) + estimate_size(value, _depth + 1)
+    elif isinstance(obj, (list, tuple, set)):
+        for item in obj:
+            size += estimate_size(item, _depth + 1)
+    return size
+
+
+@dataclass
+class CacheEntry:
+    """Cached value with bookkeeping"""
+    value: Any
+    size: int
+    stored_at: float
+    ttl: float
+    hits: int = 0
+    served_as_fallback: bool = False
+
+    def age(self, now: float) -> float:
+        return now - self.stored_at
+
+
+class BoundedTTLCache:
+    """
+    Memory-bounded cache with TTLs and stale retention
+
+    - Entries are fresh for their TTL, then stale for up to max_stale seconds
+      (stale entries serve stale-while-revalidate reads and error fallbacks)
+    - Total estimated size is kept under max_bytes (and optionally max_entries)
+    - Eviction policy is 'lru' or 'lfu' (approximate: least frequently used
+      among the LFU_SAMPLE_SIZE least recently used entries)
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: Optional[int] = None,
+                 policy: str = 'lru', max_stale: float = 3600.0):
+        if policy not in ('lru', 'lfu'):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.policy = policy
+        self.max_stale = max_stale
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale_serves': 0,
+            'fallback_serves': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'sets': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str, serve_stale_for: float = 0.0) -> Tuple[Optional[Any], str]:
+        """
+        Look up a key
+
+        Args:
+            serve_stale_for: Seconds past the TTL an entry may still be served
+                as 'stale' (stale-while-revalidate); 0 disables stale reads
+
+        Returns:
+            (value, status) where status is 'fresh', 'stale' or 'miss'
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None, 'miss'
+
+            age = entry.age(now)
+            if age > entry.ttl + self.max_stale:
+                self._remove(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None, 'miss'
+
+            if age < entry.ttl:
+                status = 'fresh'
+                self.stats['hits'] += 1
+            elif age < entry.ttl + serve_stale_for:
+                status = 'stale'
+                self.stats['stale_serves'] += 1
+            else:
+                self.stats['misses'] += 1
+                return None, 'miss'
+
+            entry.hits += 1
+            self._entries.move_to_end(key)
+            return entry.value, status
+
+    def peek(self, key: str, allow_stale: bool = True) -> Optional[Any]:
+        """Read without touching recency or hit/miss counters"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = entry.age(time.time())
+        if age < entry.ttl or (allow_stale and age <= entry.ttl + self.max_stale):
+            return entry.value
+        return None
+
+    def get_fallback(self, key: str) -> Optional[Any]:
+        """Last known value (fresh or stale) for use when the upstream fails"""
+        value = self.peek(key, allow_stale=True)
+        if value is not None:
+            with self._lock:
+                self.stats['fallback_serves'] += 1
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.served_as_fallback = True
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, size: Optional[int] = None):
+        """Store a value, evicting entries until the cache fits its budget"""
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.warning(f"Cache entry {key} ({size} bytes) exceeds the cache budget; not cached")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value=value, size=size, stored_at=time.time(), ttl=ttl)
+            self._bytes += size
+            self.stats['sets'] += 1
+            self._enforce_budget(protect=key)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                return True
+            return False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def purge_expired(self) -> int:
+        """Drop entries past their stale-retention horizon"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if e.age(now) > e.ttl + self.max_stale]
+            for key in expired:
+                self._remove(key)
+            self.stats['expirations'] += len(expired)
+        return len(expired)
+
+    def freshness(self) -> Dict[str, int]:
+        """Count of fresh vs stale entries, and of entries served as error fallbacks"""
+        now = time.time()
+        with self._lock:
+            fresh = sum(1 for e in self._entries.values() if e.age(now) < e.ttl)
+            fallback = sum(1 for e in self._entries.values() if e.served_as_fallback)
+        return {'fresh': fresh, 'stale': len(self._entries) - fresh, 'fallback': fallback}
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['stale_serves'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'memory_bytes': self._bytes,
+            'memory_budget_bytes': self.max_bytes,
+            'policy': self.policy,
+            'hit_rate': (self.stats['hits'] + self.stats['stale_serves']) / lookups if lookups else 0.0
+        }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _enforce_budget(self, protect: str):
+        while self._entries and (
+            self._bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            victim = self._pick_victim(protect)
+            if victim is None:
+                break
+            self._remove(victim)
+            self.stats['evictions'] += 1
+
+    def _pick_victim(self, protect: str) -> Optional[str]:
+        # Anything already past its retention horizon goes first
+        candidates = []
+        now = time.time()
+        for key, entry in self._entries.items():
+            if key == protect:
+                continue
+            if entry.age(now) > entry.ttl + self.max_stale:
+                return key
+            candidates.append((key, entry))
+            if self.policy == 'lru' or len(candidates) >= LFU_SAMPLE_SIZE:
+                break
+        if not candidates:
+            return None
+        if self.policy == 'lru':
+            return candidates[0][0]
+        return min(candidates, key=lambda item: item[1].hits)[0]
@@ -2,25 +2,47 @@
 """
 Cache Manager
 Centralized caching system for the ZmartBot platform
+
+Two tiers:
+- L1: in-process LRU of encoded entries (no I/O on hot keys)
+- L2: one SQLite file in the cache directory, indexed by key and expiry
+
+Values are stored as JSON text, as the file cache stored them, so anything
+JSON can't represent (datetimes, Decimals, ...) comes back as its str().
+Expiry and stats are answered from the SQLite index instead of scanning the
+directory.
 """
 
 import json
+import sqlite3
 import time
 import logging
-from typing import Any, Optional, Dict
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional, Dict, Tuple
 from datetime import datetime, timedelta
 import hashlib
 import os
 
 logger = logging.getLogger(__name__)
 
+CACHE_DB_FILENAME = "cache_manager.db"
+
+
 class CacheManager:
     """Centralized cache manager for ZmartBot"""
     
-    def __init__(self, cache_dir: str = "unified_cache", default_ttl: int = 3600):
+    def __init__(self, cache_dir: str = "unified_cache", default_ttl: int = 3600, l1_max_entries: int = 1024):
         self.cache_dir = cache_dir
         self.default_ttl = default_ttl
+        self.l1_max_entries = l1_max_entries
+        self._l1: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = Lock()
+        self.stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'sets': 0}
         self._ensure_cache_dir()
+        self.db_path = os.path.join(self.cache_dir, CACHE_DB_FILENAME)
+        self._init_database()
+        self._migrate_legacy_files()
         logger.info(f"Cache Manager initialized: {cache_dir}")
     
     def _ensure_cache_dir(self):
@@ -28,29 +50,83 @@ class CacheManager:
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
     
-    def _get_cache_path(self, key: str) -> str:
-        """Get cache file path for a key"""
-        # Create a safe filename from the key
-        safe_key = hashlib.md5(key.encode()).hexdigest()
-        return os.path.join(self.cache_dir, f"{safe_key}.cache")
+    def _init_database(self):
+        """Open the L2 store and create the entry table and expiry index"""
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key_hash TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expiry REAL NOT NULL,
+                created REAL NOT NULL
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_expiry ON cache_entries(expiry)")
+        self.conn.commit()
+    
+    def _migrate_legacy_files(self):
+        """Import unexpired entries from the old one-JSON-file-per-key layout"""
+        legacy = [f for f in os.listdir(self.cache_dir) if f.endswith('.cache')]
+        if not legacy:
+            return
+        imported = 0
+        now = time.time()
+        for filename in legacy:
+            cache_path = os.path.join(self.cache_dir, filename)
+            try:
+                with open(cache_path, 'r') as f:
+                    cache_data = json.load(f)
+                if cache_data['expiry'] > now:
+                    self._write(cache_data['key'], cache_data['value'], cache_data['expiry'], cache_data['created'])
+                    imported += 1
+            except Exception as e:
+                # Leave files we could not read in place rather than lose them
+                logger.warning(f"Skipping legacy cache file {filename}: {e}")
+                continue
+            # Imported or confirmed expired
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+        logger.info(f"Migrated {imported} legacy cache files into {self.db_path}")
+    
+    def _key_hash(self, key: str) -> str:
+        """Get the index key for a cache key"""
+        return hashlib.md5(key.encode()).hexdigest()
+    
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        """JSON encoding, with the file cache's str() fallback for other types"""
+        return json.dumps(value, default=str).encode()
+    
+    def _remember(self, key_hash: str, expiry: float, blob: bytes):
+        """Put an encoded entry in L1 (caller holds the lock)"""
+        self._l1[key_hash] = (expiry, blob)
+        self._l1.move_to_end(key_hash)
+        while len(self._l1) > self.l1_max_entries:
+            self._l1.popitem(last=False)
+    
+    def _write(self, key: str, value: Any, expiry: float, created: float):
+        key_hash = self._key_hash(key)
+        blob = self._encode(value)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key_hash, key, value, expiry, created) VALUES (?, ?, ?, ?, ?)",
+                (key_hash, key, sqlite3.Binary(blob), expiry, created)
+            )
+            self.conn.commit()
+            self._remember(key_hash, expiry, blob)
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """Set a value in cache with TTL"""
         try:
             ttl = ttl or self.default_ttl
-            expiry = time.time() + ttl
-            
-            cache_data = {
-                'value': value,
-                'expiry': expiry,
-                'created': time.time(),
-                'key': key
-            }
-            
-            cache_path = self._get_cache_path(key)
-            with open(cache_path, 'w') as f:
-                json.dump(cache_data, f, default=str)
-            
+            now = time.time()
+            self._write(key, value, now + ttl, now)
+            self.stats['sets'] += 1
             return True
         except Exception as e:
             logger.error(f"Error setting cache for {key}: {str(e)}")
@@ -59,20 +135,34 @@ class CacheManager:
     def get(self, key: str) -> Optional[Any]:
         """Get a value from cache"""
         try:
-            cache_path = self._get_cache_path(key)
+            key_hash = self._key_hash(key)
             
-            if not os.path.exists(cache_path):
-                return None
-            
-            with open(cache_path, 'r') as f:
-                cache_data = json.load(f)
+            with self._lock:
+                entry = self._l1.get(key_hash)
+                if entry is not None:
+                    self._l1.move_to_end(key_hash)
+                    tier = 'l1_hits'
+                else:
+                    row = self.conn.execute(
+                        "SELECT expiry, value FROM cache_entries WHERE key_hash = ?", (key_hash,)
+                    ).fetchone()
+                    if row is None:
+                        self.stats['misses'] += 1
+                        return None
+                    entry = (row[0], bytes(row[1]))
+                    self._remember(key_hash, *entry)
+                    tier = 'l2_hits'
             
             # Check if expired
-            if time.time() > cache_data['expiry']:
+            expiry, blob = entry
+            if time.time() > expiry:
                 self.delete(key)
+                self.stats['misses'] += 1
                 return None
             
-            return cache_data['value']
+            self.stats[tier] += 1
+            # Decoding per read hands each caller its own copy, as the file cache did
+            return json.loads(blob)
         except Exception as e:
             logger.error(f"Error getting cache for {key}: {str(e)}")
             return None
@@ -80,9 +170,11 @@ class CacheManager:
     def delete(self, key: str) -> bool:
         """Delete a value from cache"""
         try:
-            cache_path = self._get_cache_path(key)
-            if os.path.exists(cache_path):
-                os.remove(cache_path)
+            key_hash = self._key_hash(key)
+            with self._lock:
+                self._l1.pop(key_hash, None)
+                self.conn.execute("DELETE FROM cache_entries WHERE key_hash = ?", (key_hash,))
+                self.conn.commit()
             return True
         except Exception as e:
             logger.error(f"Error deleting cache for {key}: {str(e)}")
@@ -96,20 +188,13 @@ class CacheManager:
         """Clear all expired cache entries"""
         cleared = 0
         try:
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.cache'):
-                    cache_path = os.path.join(self.cache_dir, filename)
-                    try:
-                        with open(cache_path, 'r') as f:
-                            cache_data = json.load(f)
-                        
-                        if time.time() > cache_data['expiry']:
-                            os.remove(cache_path)
-                            cleared += 1
-                    except:
-                        # If we can't read the file, remove it
-                        os.remove(cache_path)
-                        cleared += 1
+            now = time.time()
+            with self._lock:
+                cursor = self.conn.execute("DELETE FROM cache_entries WHERE expiry < ?", (now,))
+                cleared = cursor.rowcount
+                self.conn.commit()
+                for key_hash in [k for k, (expiry, _) in self._l1.items() if expiry < now]:
+                    del self._l1[key_hash]
         except Exception as e:
             logger.error(f"Error clearing expired cache: {str(e)}")
         
@@ -118,35 +203,31 @@ class CacheManager:
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         try:
-            total_files = 0
-            total_size = 0
-            expired_count = 0
-            
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.cache'):
-                    cache_path = os.path.join(self.cache_dir, filename)
-                    total_files += 1
-                    total_size += os.path.getsize(cache_path)
-                    
-                    try:
-                        with open(cache_path, 'r') as f:
-                            cache_data = json.load(f)
-                        
-                        if time.time() > cache_data['expiry']:
-                            expired_count += 1
-                    except:
-                        expired_count += 1
+            with self._lock:
+                total_entries, total_size, expired_count = self.conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0), "
+                    "COALESCE(SUM(CASE WHEN expiry < ? THEN 1 ELSE 0 END), 0) FROM cache_entries",
+                    (time.time(),)
+                ).fetchone()
+                l1_entries = len(self._l1)
             
             return {
-                'total_entries': total_files,
+                'total_entries': total_entries,
                 'total_size_bytes': total_size,
                 'expired_entries': expired_count,
-                'active_entries': total_files - expired_count,
-                'cache_directory': self.cache_dir
+                'active_entries': total_entries - expired_count,
+                'cache_directory': self.cache_dir,
+                'l1_entries': l1_entries,
+                **self.stats
             }
         except Exception as e:
             logger.error(f"Error getting cache stats: {str(e)}")
             return {}
+    
+    def close(self):
+        """Close the L2 store"""
+        with self._lock:
+            self.conn.close()
 
 # Global cache manager instance
 _global_cache = None
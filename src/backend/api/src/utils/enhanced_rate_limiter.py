@@ -136,10 +136,15 @@ class EnhancedRateLimiter:
         """
         Wait if rate limiting is needed
         
+        The slot is reserved under the lock and the wait happens after it is
+        released, so concurrent callers queue up on one shared budget instead
+        of blocking the event loop.
+        
         Returns:
             True if request can proceed, False if should be skipped
         """
         current_time = time.time()
+        wait_time = 0.0
         
         with self.lock:
             # Ensure API is initialized
@@ -163,7 +168,6 @@ class EnhancedRateLimiter:
                 if current_time < self.backoff_until[api_name]:
                     wait_time = self.backoff_until[api_name] - current_time
                     logger.warning(f"API {api_name} in backoff, waiting {wait_time:.2f}s")
-                    await asyncio.sleep(wait_time)
                 else:
                     # Backoff period ended
                     del self.backoff_until[api_name]
@@ -172,24 +176,26 @@ class EnhancedRateLimiter:
             # Clean old requests
             self._clean_old_requests(api_name, current_time)
             
-            # Check rate limits
+            # Check rate limits - history is kept in send order, so the request
+            # max_requests positions back decides when the next slot opens
             config = self.api_configs.get(api_name, self.api_configs['default'])
-            current_requests = len(self.request_history[api_name])
+            history = self.request_history[api_name]
             
-            if current_requests >= config.max_requests:
-                # Rate limit exceeded
-                oldest_request = min(self.request_history[api_name])
-                wait_time = (oldest_request + config.time_window) - current_time
-                
-                if wait_time > 0:
+            if len(history) >= config.max_requests:
+                slot_time = history[-config.max_requests] + config.time_window
+                if slot_time - current_time > wait_time:
+                    wait_time = slot_time - current_time
                     logger.warning(f"Rate limit exceeded for {api_name}, waiting {wait_time:.2f}s")
                     self.statistics[api_name]['rate_limited_requests'] += 1
-                    await asyncio.sleep(wait_time)
             
-            # Record the request
-            self.request_history[api_name].append(current_time)
+            # Record the request at the time it will actually be sent
+            send_time = current_time + wait_time
+            history.append(max(send_time, history[-1]) if history else send_time)
             self.statistics[api_name]['total_requests'] += 1
-            self.statistics[api_name]['last_request_time'] = current_time
+            self.statistics[api_name]['last_request_time'] = send_time
+        
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
         
         return True
     
@@ -4,7 +4,9 @@ Event-driven communication system for inter-component messaging
 """
 import asyncio
 import logging
-from typing import Dict, List, Any, Callable, Optional
+import time
+from collections import deque
+from typing import Dict, List, Any, Callable, Optional, Hashable
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -77,15 +79,153 @@ class Event:
         """Convert event to JSON string"""
         return json.dumps(self.to_dict())
 
+class BackpressurePolicy(Enum):
+    """What a lane does when its queue is full"""
+    BLOCK = "block"              # emit() waits for space
+    DROP_NEWEST = "drop_newest"  # the incoming event is dropped
+    DROP_OLDEST = "drop_oldest"  # the oldest queued event is dropped
+    COALESCE = "coalesce"        # a queued event with the same key is replaced; drop oldest when full
+
+# Event.priority values double as lane ids
+PRIORITY_LOW = 1
+PRIORITY_NORMAL = 2
+PRIORITY_HIGH = 3
+PRIORITY_CRITICAL = 4
+
+# Minimum priority per event type. Most emitters leave Event.priority at its
+# default, so the lane comes from max(event.priority, type priority).
+DEFAULT_TYPE_PRIORITIES: Dict[EventType, int] = {
+    EventType.RISK_THRESHOLD_EXCEEDED: PRIORITY_CRITICAL,
+    EventType.RISK_SCORE_UPDATED: PRIORITY_CRITICAL,
+    EventType.CIRCUIT_BREAKER_TRIGGERED: PRIORITY_CRITICAL,
+    EventType.SYSTEM_SHUTDOWN: PRIORITY_CRITICAL,
+    EventType.SYSTEM_ERROR: PRIORITY_CRITICAL,
+    EventType.TRADE_EXECUTED: PRIORITY_HIGH,
+    EventType.TRADE_CANCELLED: PRIORITY_HIGH,
+    EventType.POSITION_OPENED: PRIORITY_HIGH,
+    EventType.POSITION_CLOSED: PRIORITY_HIGH,
+    EventType.POSITION_UPDATED: PRIORITY_HIGH,
+    EventType.SIGNAL_GENERATED: PRIORITY_NORMAL,
+    EventType.SIGNAL_PROCESSED: PRIORITY_NORMAL,
+    EventType.SIGNAL_REJECTED: PRIORITY_NORMAL,
+    EventType.AGENT_STARTED: PRIORITY_NORMAL,
+    EventType.AGENT_STOPPED: PRIORITY_NORMAL,
+    EventType.AGENT_TASK_COMPLETED: PRIORITY_NORMAL,
+    EventType.AGENT_TASK_FAILED: PRIORITY_NORMAL,
+    EventType.SYSTEM_STARTUP: PRIORITY_NORMAL,
+    EventType.USER_LOGIN: PRIORITY_NORMAL,
+    EventType.USER_LOGOUT: PRIORITY_NORMAL,
+    EventType.USER_ACTION: PRIORITY_NORMAL,
+    EventType.AGENT_HEARTBEAT: PRIORITY_LOW,
+    EventType.MARKET_DATA_UPDATED: PRIORITY_LOW,
+    EventType.MARKET_VOLATILITY_CHANGED: PRIORITY_LOW,
+}
+
+@dataclass
+class LaneConfig:
+    """Queue bound, worker count and backpressure policy for one priority lane"""
+    maxsize: int = 10000
+    workers: int = 1
+    policy: BackpressurePolicy = BackpressurePolicy.BLOCK
+
+DEFAULT_LANES: Dict[int, LaneConfig] = {
+    PRIORITY_CRITICAL: LaneConfig(maxsize=1000, policy=BackpressurePolicy.BLOCK),
+    PRIORITY_HIGH: LaneConfig(maxsize=5000, policy=BackpressurePolicy.BLOCK),
+    PRIORITY_NORMAL: LaneConfig(maxsize=10000, policy=BackpressurePolicy.DROP_OLDEST),
+    PRIORITY_LOW: LaneConfig(maxsize=10000, policy=BackpressurePolicy.COALESCE),
+}
+
+def default_coalesce_key(event: Event) -> Hashable:
+    """Events of the same type, source and symbol supersede each other"""
+    return (event.type, event.source, event.data.get("symbol"))
+
+class _QueuedEvent:
+    """Queue slot; coalescing swaps the event in place"""
+    __slots__ = ("event", "enqueued_at", "key")
+
+    def __init__(self, event: Event, key: Optional[Hashable] = None):
+        self.event = event
+        self.enqueued_at = time.perf_counter()
+        self.key = key
+
+class _EventTypeMetrics:
+    """Counters and recent latencies for one event type"""
+    __slots__ = ("emitted", "processed", "dropped", "coalesced", "depth",
+                 "latency_total", "latency_max", "recent")
+
+    def __init__(self):
+        self.emitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.recent = deque(maxlen=512)
+
+    def record_latency(self, latency: float):
+        self.processed += 1
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+        self.recent.append(latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            "emitted": self.emitted,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "queue_depth": self.depth,
+            "avg_latency_ms": round(self.latency_total / self.processed * 1000, 3) if self.processed else 0.0,
+            "p95_latency_ms": round(p95 * 1000, 3),
+            "max_latency_ms": round(self.latency_max * 1000, 3)
+        }
+
+class _Lane:
+    """Bounded queue and workers for one priority level"""
+
+    def __init__(self, priority: int, config: LaneConfig):
+        self.priority = priority
+        self.config = config
+        self.queue: Optional[asyncio.Queue] = None
+        self.pending: Dict[Hashable, _QueuedEvent] = {}
+        self.workers: List[asyncio.Task] = []
+        self.high_water = 0
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
 class EventBus:
-    """Event bus for inter-component communication"""
+    """
+    Event bus for inter-component communication
+
+    Events are sharded into priority lanes, each with its own bounded queue,
+    worker tasks and backpressure policy, so a flood of market ticks in the
+    low lane never delays risk or trade events in the lanes above it.
+    """
     
-    def __init__(self):
+    def __init__(self, lanes: Optional[Dict[int, LaneConfig]] = None,
+                 type_priorities: Optional[Dict[EventType, int]] = None,
+                 max_history_size: int = 1000,
+                 coalesce_key: Callable[[Event], Hashable] = default_coalesce_key):
         self.subscribers: Dict[EventType, List[Callable]] = {}
-        self.event_history: List[Event] = []
-        self.max_history_size = 1000
+        self.max_history_size = max_history_size
+        self.event_history: deque = deque(maxlen=max_history_size)
         self.is_running = False
-        self.event_queue = asyncio.Queue()
+        self.type_priorities = dict(DEFAULT_TYPE_PRIORITIES)
+        if type_priorities:
+            self.type_priorities.update(type_priorities)
+        self.coalesce_key = coalesce_key
+
+        lanes = lanes or DEFAULT_LANES
+        self.lanes: Dict[int, _Lane] = {
+            priority: _Lane(priority, config) for priority, config in sorted(lanes.items())
+        }
+        self._lane_priorities = sorted(self.lanes)
+        self.type_metrics: Dict[EventType, _EventTypeMetrics] = {}
         
         logger.info("Event bus initialized")
     
@@ -97,13 +237,34 @@ class EventBus:
         self.is_running = True
         logger.info("Starting event bus")
         
-        # Start event processing loop
-        asyncio.create_task(self._process_events())
+        # Queues are created here so they bind to the running loop
+        for lane in self.lanes.values():
+            lane.queue = asyncio.Queue(maxsize=lane.config.maxsize)
+            lane.pending.clear()
+            lane.workers = [
+                asyncio.create_task(self._process_events(lane))
+                for _ in range(max(1, lane.config.workers))
+            ]
     
     async def stop(self):
         """Stop the event bus"""
         self.is_running = False
         logger.info("Stopping event bus")
+
+        workers = [task for lane in self.lanes.values() for task in lane.workers]
+        for task in workers:
+            task.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        for lane in self.lanes.values():
+            lane.workers = []
+
+    async def join(self):
+        """Wait until every queued event has been processed"""
+        for priority in reversed(self._lane_priorities):
+            lane = self.lanes[priority]
+            if lane.queue is not None:
+                await lane.queue.join()
     
     def subscribe(self, event_type: EventType, callback: Callable):
         """Subscribe to an event type"""
@@ -118,6 +279,14 @@ class EventBus:
         if event_type in self.subscribers and callback in self.subscribers[event_type]:
             self.subscribers[event_type].remove(callback)
             logger.debug(f"Unsubscribed from event type: {event_type.value}")
+
+    def lane_for(self, event: Event) -> _Lane:
+        """Lane for an event: the higher of its own and its type's priority"""
+        priority = max(event.priority, self.type_priorities.get(event.type, PRIORITY_LOW))
+        for lane_priority in reversed(self._lane_priorities):
+            if priority >= lane_priority:
+                return self.lanes[lane_priority]
+        return self.lanes[self._lane_priorities[0]]
     
     async def emit(self, event: Event):
         """Emit an event"""
@@ -125,55 +294,127 @@ class EventBus:
             logger.warning("Event bus not running, cannot emit event")
             return
         
-        # Add to history
+        # Add to history (ring buffer)
         self.event_history.append(event)
-        if len(self.event_history) > self.max_history_size:
-            self.event_history.pop(0)
+        metrics = self._metrics(event.type)
+        metrics.emitted += 1
         
-        # Add to processing queue
-        await self.event_queue.put(event)
+        lane = self.lane_for(event)
+        policy = lane.config.policy
+        queue = lane.queue
+
+        if policy == BackpressurePolicy.COALESCE:
+            key = self.coalesce_key(event)
+            slot = lane.pending.get(key)
+            if slot is not None:
+                # Supersede the queued event; it is counted as coalesced
+                self._metrics(slot.event.type).coalesced += 1
+                if slot.event.type != event.type:
+                    self._metrics(slot.event.type).depth -= 1
+                    metrics.depth += 1
+                slot.event = event
+                return
+            slot = _QueuedEvent(event, key)
+        else:
+            slot = _QueuedEvent(event)
+
+        if policy == BackpressurePolicy.BLOCK:
+            await queue.put(slot)
+        elif queue.full():
+            if policy == BackpressurePolicy.DROP_NEWEST:
+                metrics.dropped += 1
+                return
+            self._drop_oldest(lane)
+            queue.put_nowait(slot)
+        else:
+            queue.put_nowait(slot)
+
+        if slot.key is not None:
+            lane.pending[slot.key] = slot
+        metrics.depth += 1
+        depth = queue.qsize()
+        if depth > lane.high_water:
+            lane.high_water = depth
         
         logger.debug(f"Emitted event: {event.type.value}")
-    
+
     async def emit_sync(self, event: Event):
         """Emit an event synchronously (immediate processing)"""
         if not self.is_running:
             logger.warning("Event bus not running, cannot emit event")
             return
         
-        # Add to history
+        # Add to history (ring buffer)
         self.event_history.append(event)
-        if len(self.event_history) > self.max_history_size:
-            self.event_history.pop(0)
+        metrics = self._metrics(event.type)
+        metrics.emitted += 1
         
         # Process immediately
+        started = time.perf_counter()
         await self._process_event(event)
+        metrics.record_latency(time.perf_counter() - started)
+
+    def _drop_oldest(self, lane: _Lane):
+        try:
+            dropped = lane.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        lane.queue.task_done()
+        if dropped.key is not None and lane.pending.get(dropped.key) is dropped:
+            del lane.pending[dropped.key]
+        metrics = self._metrics(dropped.event.type)
+        metrics.dropped += 1
+        metrics.depth -= 1
+
+    def _metrics(self, event_type: EventType) -> _EventTypeMetrics:
+        metrics = self.type_metrics.get(event_type)
+        if metrics is None:
+            metrics = self.type_metrics[event_type] = _EventTypeMetrics()
+        return metrics
     
-    async def _process_events(self):
-        """Process events from the queue"""
+    async def _process_events(self, lane: _Lane):
+        """Process events from one lane's queue"""
+        queue = lane.queue
         while self.is_running:
             try:
-                event = await self.event_queue.get()
+                slot = await queue.get()
+            except asyncio.CancelledError:
+                break
+            try:
+                if slot.key is not None and lane.pending.get(slot.key) is slot:
+                    del lane.pending[slot.key]
+                event = slot.event
+                metrics = self._metrics(event.type)
+                metrics.depth -= 1
                 await self._process_event(event)
-                self.event_queue.task_done()
+                metrics.record_latency(time.perf_counter() - slot.enqueued_at)
             except asyncio.CancelledError:
+                queue.task_done()
                 break
             except Exception as e:
                 logger.error(f"Error processing event: {e}")
+            queue.task_done()
+            # A queue.get() on a non-empty queue never suspends; yield so the
+            # other lanes' workers run between events
+            await asyncio.sleep(0)
     
     async def _process_event(self, event: Event):
         """Process a single event"""
         try:
-            if event.type in self.subscribers:
-                # Create tasks for all subscribers
-                tasks = []
-                for callback in self.subscribers[event.type]:
-                    task = asyncio.create_task(self._call_subscriber(callback, event))
-                    tasks.append(task)
+            callbacks = self.subscribers.get(event.type)
+            if callbacks:
+                # Sync subscribers run inline; coroutines run concurrently
+                coroutines = []
+                for callback in tuple(callbacks):
+                    if asyncio.iscoroutinefunction(callback):
+                        coroutines.append(self._call_subscriber(callback, event))
+                    else:
+                        self._call_sync_subscriber(callback, event)
                 
-                # Wait for all subscribers to complete
-                if tasks:
-                    await asyncio.gather(*tasks, return_exceptions=True)
+                if len(coroutines) == 1:
+                    await coroutines[0]
+                elif coroutines:
+                    await asyncio.gather(*coroutines, return_exceptions=True)
             
             logger.debug(f"Processed event: {event.type.value}")
             
@@ -189,6 +430,13 @@ class EventBus:
                 callback(event)
         except Exception as e:
             logger.error(f"Error in event subscriber: {e}")
+
+    @staticmethod
+    def _call_sync_subscriber(callback: Callable, event: Event):
+        try:
+            callback(event)
+        except Exception as e:
+            logger.error(f"Error in event subscriber: {e}")
     
     def get_subscribers(self, event_type: EventType) -> List[Callable]:
         """Get all subscribers for an event type"""
@@ -196,18 +444,44 @@ class EventBus:
     
     def get_event_history(self, event_type: Optional[EventType] = None, limit: int = 100) -> List[Event]:
         """Get event history, optionally filtered by type"""
-        history = self.event_history
-        
-        if event_type:
-            history = [event for event in history if event.type == event_type]
-        
-        return history[-limit:] if limit else history
+        if event_type is None:
+            history = list(self.event_history)
+            return history[-limit:] if limit else history
+
+        matches = []
+        for event in reversed(self.event_history):
+            if event.type == event_type:
+                matches.append(event)
+                if limit and len(matches) >= limit:
+                    break
+        matches.reverse()
+        return matches
     
     def clear_history(self):
         """Clear event history"""
         self.event_history.clear()
         logger.info("Event history cleared")
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-lane queue depth and per-type throughput/latency metrics"""
+        return {
+            "is_running": self.is_running,
+            "lanes": {
+                priority: {
+                    "policy": lane.config.policy.value,
+                    "maxsize": lane.config.maxsize,
+                    "workers": len(lane.workers),
+                    "queue_depth": lane.depth(),
+                    "high_water": lane.high_water
+                }
+                for priority, lane in self.lanes.items()
+            },
+            "event_types": {
+                event_type.value: metrics.to_dict() for event_type, metrics in self.type_metrics.items()
+            },
+            "history_size": len(self.event_history)
+        }
+
 # Global event bus instance
 event_bus = EventBus()
 
@@ -4,19 +4,157 @@ Provides real-time price updates and alert notifications
 """
 
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Set, Any, Optional
+from typing import Dict, List, Set, Any, Optional, Callable, Tuple
+from collections import OrderedDict
 import json
 import asyncio
 import logging
+import time
 from datetime import datetime
 import uuid
 
 logger = logging.getLogger(__name__)
 
+class ClientChannel:
+    """
+    Outbound queue and sender task for one WebSocket connection
+
+    Messages arrive pre-serialized. Price updates are keyed by symbol, so a
+    client that falls behind gets the latest price per symbol instead of a
+    backlog; other messages keep their order. When the queue is full the
+    oldest message is dropped. Sends are timed by the manager's watchdog
+    instead of a timer per message; a send running longer than send_timeout
+    is cancelled, and since a cancelled send leaves the socket in an unknown
+    state the client is then closed and disconnected.
+    """
+
+    def __init__(self, websocket: WebSocket, on_failure: Callable[[WebSocket], None],
+                 max_queue: int = 256, send_timeout: float = 1.0):
+        self.websocket = websocket
+        self.connection_id = str(uuid.uuid4())
+        self.on_failure = on_failure
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+
+        # key -> (text, enqueued_at); price keys are ("price", symbol)
+        self.pending: "OrderedDict[Any, Tuple[str, float]]" = OrderedDict()
+        self._sequence = 0
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sending_since: Optional[float] = None
+        self._timed_out = False
+
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    def enqueue(self, text: str, coalesce_key: Optional[Any] = None, now: Optional[float] = None) -> bool:
+        """Queue a serialized message; never blocks the broadcaster. False if the channel is closed"""
+        if self.closed:
+            return False
+        if now is None:
+            now = time.perf_counter()
+        if coalesce_key is not None and coalesce_key in self.pending:
+            # Keep the queued slot (and its age) but deliver the newest payload
+            self.pending[coalesce_key] = (text, self.pending[coalesce_key][1])
+            self.coalesced += 1
+            return True
+
+        if coalesce_key is None:
+            self._sequence += 1
+            coalesce_key = self._sequence
+        if len(self.pending) >= self.max_queue:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self.pending[coalesce_key] = (text, now)
+        self._ready.set()
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._sender())
+        return True
+
+    async def _sender(self):
+        while not self.closed:
+            if not self.pending:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            _, (text, enqueued_at) = self.pending.popitem(last=False)
+            self.sending_since = time.perf_counter()
+            try:
+                await self.websocket.send_text(text)
+            except asyncio.CancelledError:
+                if not self._timed_out:
+                    raise
+                self._timed_out = False
+                self.sending_since = None
+                task = asyncio.current_task()
+                if hasattr(task, "uncancel"):
+                    task.uncancel()
+                self.timeouts += 1
+                logger.warning(f"Disconnecting WebSocket client {self.connection_id} after a send timed out")
+                self._fail()
+                return
+            except Exception as e:
+                logger.error(f"Error sending to WebSocket client {self.connection_id}: {e}")
+                self._fail()
+                return
+            self.sending_since = None
+
+            lag = time.perf_counter() - enqueued_at
+            self.sent += 1
+            self.last_lag = lag
+            self.total_lag += lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    def check_timeout(self, now: float):
+        """Cancel the in-flight send if it has run past send_timeout"""
+        if (self.sending_since is not None and not self._timed_out
+                and now - self.sending_since > self.send_timeout and self._task is not None):
+            self._timed_out = True
+            self._task.cancel()
+
+    def _fail(self):
+        self.closed = True
+        self.pending.clear()
+        self.on_failure(self.websocket)
+
+    def close(self):
+        """Stop the sender task and discard queued messages"""
+        self.closed = True
+        self.pending.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connection_id": self.connection_id,
+            "queue_depth": len(self.pending),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "avg_lag_ms": round(self.total_lag / self.sent * 1000, 3) if self.sent else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 3)
+        }
+
 class ConnectionManager:
-    """Manages WebSocket connections for real-time updates"""
+    """
+    Manages WebSocket connections for real-time updates
+
+    Broadcasts serialize each message once and hand the text to every
+    recipient's ClientChannel, so one slow client never stalls the others.
+    """
     
-    def __init__(self):
+    def __init__(self, max_queue: int = 256, send_timeout: float = 1.0):
         # Active connections by user_id
         self.user_connections: Dict[str, Set[WebSocket]] = {}
         
@@ -28,6 +166,13 @@ class ConnectionManager:
         # Connection metadata
         self.connection_metadata: Dict[WebSocket, Dict[str, Any]] = {}
         
+        # Outbound channels (one sender task per connection)
+        self.channels: Dict[WebSocket, ClientChannel] = {}
+        self._watchdog: Optional[asyncio.Task] = None
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.broadcast_stats = {"broadcasts": 0, "recipients": 0, "serialize_ms": 0.0, "fanout_ms": 0.0}
+        
         # Background tasks
         self.background_tasks: Set[asyncio.Task] = set()
         
@@ -41,7 +186,9 @@ class ConnectionManager:
         self.user_connections[user_id].add(websocket)
         
         # Store connection metadata
+        channel = self._channel(websocket)
         self.connection_metadata[websocket] = {
+            "connection_id": channel.connection_id,
             "user_id": user_id,
             "connected_at": datetime.now(),
             "subscriptions": set(),
@@ -60,6 +207,9 @@ class ConnectionManager:
     
     def disconnect(self, websocket: WebSocket):
         """Handle WebSocket disconnection"""
+        channel = self.channels.pop(websocket, None)
+        if channel is not None:
+            channel.close()
         if websocket not in self.connection_metadata:
             return
             
@@ -88,47 +238,85 @@ class ConnectionManager:
         
         logger.info(f"❌ WebSocket disconnected for user {user_id}")
     
-    async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
-        """Send message to specific WebSocket connection"""
+    def _channel(self, websocket: WebSocket) -> ClientChannel:
+        channel = self.channels.get(websocket)
+        if channel is None:
+            channel = ClientChannel(websocket, self._on_send_failure, self.max_queue, self.send_timeout)
+            self.channels[websocket] = channel
+            if self._watchdog is None or self._watchdog.done():
+                self._watchdog = asyncio.create_task(self._send_watchdog())
+        return channel
+
+    async def _send_watchdog(self):
+        """Enforce send_timeout for every channel from one task"""
+        interval = max(self.send_timeout / 4, 0.005)
+        while self.channels:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            for channel in tuple(self.channels.values()):
+                channel.check_timeout(now)
+
+    def _on_send_failure(self, websocket: WebSocket):
+        """Called by a channel whose client errored or timed out"""
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close_quietly(websocket))
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket):
         try:
-            await websocket.send_text(json.dumps(message, default=str))
-        except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+            await websocket.close()
+        except Exception:
+            pass
+    
+    async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket) -> bool:
+        """
+        Queue a message for a specific WebSocket connection
+
+        Returns False if the connection is gone. True means the message was
+        queued; delivery is asynchronous, and a failed or timed-out send
+        disconnects the client rather than raising here.
+        """
+        channel = self.channels.get(websocket)
+        if channel is None:
+            return False
+        return channel.enqueue(json.dumps(message, default=str))
     
     async def send_to_user(self, message: Dict[str, Any], user_id: str):
         """Send message to all connections for a specific user"""
         if user_id not in self.user_connections:
             return
-            
-        disconnected = set()
-        for websocket in self.user_connections[user_id].copy():
-            try:
-                await websocket.send_text(json.dumps(message, default=str))
-            except Exception as e:
-                logger.error(f"Error sending to user {user_id}: {e}")
-                disconnected.add(websocket)
         
-        # Clean up disconnected sockets
-        for websocket in disconnected:
-            self.disconnect(websocket)
+        await self.broadcast_to_subscribers(message, self.user_connections[user_id])
     
-    async def broadcast_to_subscribers(self, message: Dict[str, Any], subscriber_set: Set[WebSocket]):
-        """Broadcast message to a set of subscribers"""
+    async def broadcast_to_subscribers(self, message: Dict[str, Any], subscriber_set: Set[WebSocket],
+                                       coalesce_key: Optional[Any] = None):
+        """
+        Broadcast message to a set of subscribers
+
+        The message is serialized once and queued on every subscriber's
+        channel; queued messages sharing a coalesce_key are replaced.
+        """
         if not subscriber_set:
             return
-            
-        disconnected = set()
-        for websocket in subscriber_set.copy():
-            try:
-                await websocket.send_text(json.dumps(message, default=str))
-            except Exception as e:
-                logger.error(f"Error broadcasting: {e}")
-                disconnected.add(websocket)
         
-        # Clean up disconnected sockets
-        for websocket in disconnected:
-            self.disconnect(websocket)
+        started = time.perf_counter()
+        text = json.dumps(message, default=str)
+        serialized = time.perf_counter()
+        
+        channels = self.channels
+        for websocket in tuple(subscriber_set):
+            channel = channels.get(websocket)
+            if channel is not None:
+                # A socket without a channel has disconnected; don't revive it
+                channel.enqueue(text, coalesce_key, serialized)
+        
+        stats = self.broadcast_stats
+        stats["broadcasts"] += 1
+        stats["recipients"] += len(subscriber_set)
+        stats["serialize_ms"] += (serialized - started) * 1000
+        stats["fanout_ms"] += (time.perf_counter() - serialized) * 1000
     
     async def subscribe_to_price_updates(self, websocket: WebSocket, symbol: str):
         """Subscribe connection to price updates for a symbol"""
@@ -193,7 +381,7 @@ class ConnectionManager:
             "timestamp": datetime.now().isoformat()
         }
         
-        await self.broadcast_to_subscribers(message, self.price_subscribers[symbol])
+        await self.broadcast_to_subscribers(message, self.price_subscribers[symbol], ("price", symbol))
     
     async def broadcast_alert_notification(self, alert_data: Dict[str, Any]):
         """Broadcast alert notification to alert subscribers"""
@@ -289,6 +477,14 @@ class ConnectionManager:
     
     def get_connection_stats(self) -> Dict[str, Any]:
         """Get WebSocket connection statistics"""
+        connections = []
+        for websocket, channel in self.channels.items():
+            entry = channel.get_stats()
+            entry["user_id"] = self.connection_metadata.get(websocket, {}).get("user_id")
+            connections.append(entry)
+        lags = sorted(entry["last_lag_ms"] for entry in connections)
+        broadcasts = self.broadcast_stats["broadcasts"]
+        
         return {
             "total_connections": sum(len(connections) for connections in self.user_connections.values()),
             "total_users": len(self.user_connections),
@@ -297,7 +493,17 @@ class ConnectionManager:
             },
             "alert_subscribers": len(self.alert_subscribers),
             "system_subscribers": len(self.system_subscribers),
-            "active_symbols": list(self.price_subscribers.keys())
+            "active_symbols": list(self.price_subscribers.keys()),
+            "broadcast": {
+                "broadcasts": broadcasts,
+                "recipients": self.broadcast_stats["recipients"],
+                "avg_serialize_ms": round(self.broadcast_stats["serialize_ms"] / broadcasts, 3) if broadcasts else 0.0,
+                "avg_fanout_ms": round(self.broadcast_stats["fanout_ms"] / broadcasts, 3) if broadcasts else 0.0,
+                "queued_messages": sum(entry["queue_depth"] for entry in connections),
+                "p95_lag_ms": lags[min(len(lags) - 1, int(len(lags) * 0.95))] if lags else 0.0,
+                "max_lag_ms": lags[-1] if lags else 0.0
+            },
+            "connections": connections
         }
 
 # Global connection manager instance
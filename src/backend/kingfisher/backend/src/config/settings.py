@@ -33,6 +33,20 @@ class Settings(BaseSettings):
     IMAGE_PROCESSING_ENABLED: bool = True
     MAX_IMAGE_SIZE: int = 10 * 1024 * 1024  # 10MB
     SUPPORTED_FORMATS: str = "jpg,jpeg,png,webp"
+    IMAGE_PROCESSING_WORKERS: int = 4  # threads decoding and segmenting images
+    
+    # Workflow result cache for reposted images
+    WORKFLOW_CACHE_ENABLED: bool = True
+    WORKFLOW_CACHE_TTL_SECONDS: float = 900.0
+    WORKFLOW_CACHE_MAX_ENTRIES: int = 512
+    WORKFLOW_CACHE_MAX_DISTANCE: int = 12  # differing bits of the 256-bit perceptual hash
+    WORKFLOW_CACHE_REFRESH_MARKET_DATA: bool = True
+    
+    # Airtable write-behind queue
+    AIRTABLE_WRITE_BATCH_SIZE: int = 10  # records per request; Airtable's maximum
+    AIRTABLE_REQUESTS_PER_SECOND: float = 5.0  # per-base request rate limit
+    AIRTABLE_WRITE_LINGER_SECONDS: float = 0.5  # wait for a burst to fill a batch
+    AIRTABLE_JOURNAL_DIR: str = "data/airtable_journal"
     
     @property
     def supported_formats(self) -> list:
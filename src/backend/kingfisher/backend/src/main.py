@@ -18,6 +18,8 @@ from src.config.settings import settings
 from src.services.telegram_service import TelegramService
 from src.services.image_processing_service import ImageProcessingService
 from src.services.liquidation_service import LiquidationService
+from src.services.enhanced_airtable_service import enhanced_airtable_service
+from src.services.airtable_write_queue import close_write_queues
 from src.routes.telegram import router as telegram_router
 from src.routes.images import router as images_router
 from src.routes.liquidation import router as liquidation_router
@@ -71,6 +73,9 @@ async def startup_event():
     # Initialize monitoring
     await init_monitoring()
     
+    # Load the Airtable record index and resend writes journaled before a restart
+    await enhanced_airtable_service.airtable_service.write_queue.start()
+    
     # Initialize Telegram service
     telegram_initialized = await telegram_service.initialize()
     if telegram_initialized:
@@ -86,6 +91,7 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down KingFisher module")
+    await close_write_queues()
     await close_database()
 
 # Include API routes
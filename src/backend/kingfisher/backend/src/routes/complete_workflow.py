@@ -85,10 +85,13 @@ async def get_workflow_stats() -> Dict[str, Any]:
     
     try:
         stats = workflow_orchestrator.processing_stats
+        cache = workflow_orchestrator.result_cache
         
         return {
             "success": True,
             "workflow_statistics": stats,
+            "result_cache": cache.get_stats() if cache is not None else {"enabled": False},
+            "airtable_queue": workflow_orchestrator.airtable_queue.get_stats(),
             "performance_metrics": {
                 "avg_symbols_per_image": (
                     stats['symbols_analyzed'] / max(stats['total_images_processed'], 1)
@@ -2,6 +2,9 @@
 """
 Airtable Service for KingFisher Analysis
 Stores analysis data in CryptoTrade base
+
+Writes go through the table's shared write-behind queue, which batches them
+into 10-record requests within the rate limit and journals them until sent.
 """
 
 import asyncio
@@ -12,6 +15,8 @@ from typing import Dict, List, Optional, Any
 import logging
 from dataclasses import asdict
 
+from .airtable_write_queue import get_write_queue
+
 logger = logging.getLogger(__name__)
 
 class AirtableService:
@@ -26,9 +31,15 @@ class AirtableService:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.write_queue = get_write_queue(self.base_url, self.table_name, self.headers)
     
     async def store_image_analysis(self, analysis_data: Dict[str, Any]) -> bool:
-        """Store image analysis in Airtable"""
+        """
+        Store image analysis in Airtable
+        
+        The record is queued on the write-behind queue; True means it was
+        queued and journaled, not that Airtable has accepted it yet.
+        """
         try:
             # Prepare record data using actual KingFisher table fields
             record = {
@@ -43,27 +54,22 @@ class AirtableService:
                 }
             }
             
-            # Create record in Airtable
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/{self.table_name}",
-                    headers=self.headers,
-                    json={"records": [record]}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"✅ Stored analysis for {analysis_data.get('symbol')} in Airtable")
-                    return True
-                else:
-                    logger.error(f"❌ Failed to store in Airtable: {response.status_code} - {response.text}")
-                    return False
-                    
+            # Queue the record; the write-behind queue batches it into a create request
+            self.write_queue.create(record["fields"])
+            logger.info(f"📝 Queued analysis for {analysis_data.get('symbol')} in Airtable")
+            return True
+            
         except Exception as e:
             logger.error(f"Error storing analysis in Airtable: {e}")
             return False
     
     async def store_symbol_summary(self, summary_data: Dict[str, Any]) -> bool:
-        """Store symbol summary in Airtable"""
+        """
+        Store symbol summary in Airtable
+        
+        The record is queued on the write-behind queue; True means it was
+        queued and journaled, not that Airtable has accepted it yet.
+        """
         try:
             # Prepare record data
             record = {
@@ -81,27 +87,22 @@ class AirtableService:
                 }
             }
             
-            # Create or update record in Airtable
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/{self.table_name}",
-                    headers=self.headers,
-                    json={"records": [record]}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"✅ Stored summary for {summary_data.get('symbol')} in Airtable")
-                    return True
-                else:
-                    logger.error(f"❌ Failed to store summary in Airtable: {response.status_code} - {response.text}")
-                    return False
-                    
+            # Queue the record; the write-behind queue batches it into a create request
+            self.write_queue.create(record["fields"])
+            logger.info(f"📝 Queued summary for {summary_data.get('symbol')} in Airtable")
+            return True
+            
         except Exception as e:
             logger.error(f"Error storing summary in Airtable: {e}")
             return False
     
     async def store_high_significance_alert(self, alert_data: Dict[str, Any]) -> bool:
-        """Store high significance alert in Airtable"""
+        """
+        Store high significance alert in Airtable
+        
+        The record is queued on the write-behind queue; True means it was
+        queued and journaled, not that Airtable has accepted it yet.
+        """
         try:
             # Prepare record data
             record = {
@@ -119,21 +120,11 @@ class AirtableService:
                 }
             }
             
-            # Create record in Airtable
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/{self.table_name}",
-                    headers=self.headers,
-                    json={"records": [record]}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"✅ Stored high significance alert for {alert_data.get('symbol')} in Airtable")
-                    return True
-                else:
-                    logger.error(f"❌ Failed to store alert in Airtable: {response.status_code} - {response.text}")
-                    return False
-                    
+            # Queue the record; the write-behind queue batches it into a create request
+            self.write_queue.create(record["fields"])
+            logger.info(f"📝 Queued high significance alert for {alert_data.get('symbol')} in Airtable")
+            return True
+            
         except Exception as e:
             logger.error(f"Error storing alert in Airtable: {e}")
             return False
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Airtable Write-Behind Queue for KingFisher
+Takes record writes off the request path and sends them to Airtable in
+batched, rate-limited requests
+
+Writes are applied to an in-memory queue and appended to a JSON-lines
+journal; a background task sends them in requests of up to 10 records (the
+Airtable maximum) no faster than the per-base request rate. Successive
+writes to the same record are merged into one, so a record touched several
+times between flushes costs a single slot in one request.
+
+Records that belong to a symbol are tracked in a local symbol -> record id
+index, filled once from the table and then from create responses. Writes to
+a symbol with a known record id are PATCHed by that id; Symbol is not unique
+in the table (analyses, summaries and alerts all carry it), so Airtable's
+performUpsert cannot be used to merge on it. A symbol with no row yet is
+created, and until its record id comes back callers get a
+"pending:<symbol>" placeholder that later updates can target. The index is
+always loaded before such a create is sent, so an existing row is never
+duplicated.
+
+After every successful request the journal is compacted to a snapshot of
+what is still pending; on start-up the journal is replayed, so a restart
+loses nothing. Delivery is at-least-once: updates are idempotent, a create
+can be repeated if the process dies while its request is in flight.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+import httpx
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PENDING_PREFIX = "pending:"
+
+# Statuses that mean the request itself is wrong; resending it cannot help
+REJECTED_STATUSES = (400, 404, 413, 422)
+
+
+class AirtableWriteQueue:
+    """
+    Batching, merging, journaled write queue for one Airtable table
+
+    upsert/create/update only touch memory and the journal, so they are
+    plain methods callable from request handlers; call them from the event
+    loop that runs the queue.
+    """
+
+    def __init__(self, base_url: str, table_name: str, headers: Dict[str, str],
+                 journal_path: Optional[str] = None, batch_size: int = 10,
+                 requests_per_second: float = 5.0, linger_seconds: float = 0.5,
+                 retry_after_seconds: float = 30.0, max_backoff_seconds: float = 60.0,
+                 key_field: str = "Symbol", transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.url = f"{base_url}/{table_name}"
+        self.table_name = table_name
+        self.headers = headers
+        self.journal_path = journal_path
+        self.batch_size = max(1, min(batch_size, 10))
+        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.linger_seconds = linger_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.key_field = key_field
+        self._transport = transport
+
+        # Pending writes: symbol records not yet created, plain creates, updates by record id
+        self._upserts: Dict[str, Dict[str, Any]] = {}
+        self._creates: List[Dict[str, Any]] = []
+        self._updates: Dict[str, Dict[str, Any]] = {}
+
+        # Local symbol -> record id index
+        self.record_ids: Dict[str, str] = {}
+        self.index_loaded = False
+
+        self._journal = None
+        self._worker: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._flush_requested = False
+        self._next_request_at = 0.0
+        self._backoff = 0.0
+
+        self.stats = {
+            'queued': 0,
+            'merged': 0,
+            'requests': 0,
+            'records_written': 0,
+            'rate_limited': 0,
+            'retries': 0,
+            'dropped': 0,
+            'replayed': 0,
+            'duplicate_keys': 0
+        }
+
+        if journal_path:
+            os.makedirs(os.path.dirname(journal_path) or ".", exist_ok=True)
+            self._replay()
+
+    # Queueing
+
+    def upsert(self, key: str, fields: Dict[str, Any]) -> str:
+        """Create or update the record of a symbol; returns its record id or a pending placeholder"""
+        self._record({'op': 'upsert', 'key': key, 'fields': fields})
+        return self.record_id_for(key)
+
+    def create(self, fields: Dict[str, Any]):
+        """Queue a new record that is not tracked by symbol"""
+        self._record({'op': 'create', 'fields': fields})
+
+    def update(self, record_id: str, fields: Dict[str, Any]):
+        """Queue field changes for a record id or pending placeholder"""
+        self._record({'op': 'update', 'id': record_id, 'fields': fields})
+
+    def record_id_for(self, key: str) -> str:
+        """Known record id of a symbol, or the placeholder its pending upsert answers to"""
+        return self.record_ids.get(key) or f"{PENDING_PREFIX}{key}"
+
+    def has_record(self, key: str) -> bool:
+        return key in self.record_ids or key in self._upserts
+
+    # Lifecycle
+
+    async def start(self):
+        """Warm the symbol index and start sending anything replayed from the journal"""
+        try:
+            await self.load_index()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load Airtable record index for {self.table_name}: {e}")
+        self._ensure_worker()
+
+    async def load_index(self, client: Optional[httpx.AsyncClient] = None):
+        """
+        Fill the symbol -> record id index from the table, one page request per 100 records
+        
+        Several rows can share a symbol; like the table scan this replaces,
+        the first listed row is the symbol's record and the others are only
+        counted in the 'duplicate_keys' stat.
+        """
+        if client is None:
+            async with httpx.AsyncClient(transport=self._transport, timeout=30.0) as client:
+                return await self.load_index(client)
+        
+        params = {'fields[]': self.key_field, 'pageSize': 100}
+        duplicates = 0
+        while True:
+            await self._throttle()
+            response = await client.get(self.url, headers=self.headers, params=params)
+            self.stats['requests'] += 1
+            response.raise_for_status()
+            data = response.json()
+            for record in data.get('records', []):
+                key = record.get('fields', {}).get(self.key_field)
+                if not key:
+                    continue
+                if key in self.record_ids and self.record_ids[key] != record['id']:
+                    duplicates += 1
+                else:
+                    self.record_ids[key] = record['id']
+            if not data.get('offset'):
+                break
+            params['offset'] = data['offset']
+        self.stats['duplicate_keys'] = duplicates
+        self.index_loaded = True
+        logger.info(f"📇 Indexed {len(self.record_ids)} Airtable records of {self.table_name}")
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send everything pending now; False if it did not drain within timeout"""
+        if not self.pending_count():
+            return True
+        self._flush_requested = True
+        self._ensure_worker()
+        self._idle.clear()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout: float = 10.0):
+        """Flush, stop the worker and close the journal; unsent writes stay journaled"""
+        await self.flush(timeout)
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._compact()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def pending_count(self) -> int:
+        return len(self._upserts) + len(self._creates) + len(self._updates)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'pending_upserts': len(self._upserts),
+            'pending_creates': len(self._creates),
+            'pending_updates': len(self._updates),
+            'indexed_records': len(self.record_ids),
+            'journal_path': self.journal_path
+        }
+
+    # State
+
+    def _record(self, op: Dict[str, Any]):
+        self._append_journal(op)
+        self._apply(op)
+        self.stats['queued'] += 1
+        self._ensure_worker()
+
+    def _apply(self, op: Dict[str, Any]):
+        """Apply one journal operation to the pending state (live writes and replay alike)"""
+        kind = op['op']
+        if kind == 'upsert':
+            self._write_key(op['key'], op['fields'])
+        elif kind == 'create':
+            self._creates.append(dict(op['fields']))
+        elif kind == 'update':
+            if op['id'].startswith(PENDING_PREFIX):
+                self._write_key(op['id'][len(PENDING_PREFIX):], op['fields'])
+            else:
+                self._merge(self._updates, op['id'], op['fields'])
+        elif kind == 'snapshot':
+            self._upserts = {key: dict(fields) for key, fields in op['upserts'].items()}
+            self._creates = [dict(fields) for fields in op['creates']]
+            self._updates = {record_id: dict(fields) for record_id, fields in op['updates'].items()}
+            self.record_ids = dict(op['record_ids'])
+    
+    def _write_key(self, key: str, fields: Dict[str, Any]):
+        """Route a write for a symbol: PATCH its known record, else merge into its pending create"""
+        if key in self.record_ids and key not in self._upserts:
+            self._merge(self._updates, self.record_ids[key], fields)
+        else:
+            self._merge(self._upserts, key, fields)
+
+    def _merge(self, pending: Dict[str, Dict[str, Any]], target: str, fields: Dict[str, Any]):
+        if target in pending:
+            pending[target].update(fields)
+            self.stats['merged'] += 1
+        else:
+            pending[target] = dict(fields)
+
+    def _resolve_known_keys(self):
+        """Turn pending creates of symbols whose record id is now known into updates of that id"""
+        for key in [key for key in self._upserts if key in self.record_ids]:
+            record_id = self.record_ids[key]
+            # Updates to the id were queued after the create, so they win
+            self._updates[record_id] = {**self._upserts.pop(key), **self._updates.get(record_id, {})}
+
+    def _take_batch(self) -> Optional[Tuple[str, List[Any]]]:
+        """Remove the next request's worth of writes; symbol creates first so placeholders resolve early"""
+        self._resolve_known_keys()
+        if self._upserts:
+            keys = list(self._upserts)[:self.batch_size]
+            return 'upsert', [(key, self._upserts.pop(key)) for key in keys]
+        if self._creates:
+            items, self._creates = self._creates[:self.batch_size], self._creates[self.batch_size:]
+            return 'create', items
+        if self._updates:
+            record_ids = list(self._updates)[:self.batch_size]
+            return 'update', [(record_id, self._updates.pop(record_id)) for record_id in record_ids]
+        return None
+
+    def _requeue(self, kind: str, items: List[Any]):
+        """Put an unsent batch back, under any writes that arrived meanwhile"""
+        if kind == 'create':
+            self._creates[:0] = items
+            return
+        pending = self._upserts if kind == 'upsert' else self._updates
+        for target, fields in items:
+            pending[target] = {**fields, **pending.get(target, {})}
+
+    # Journal
+
+    def _append_journal(self, op: Dict[str, Any]):
+        if not self.journal_path:
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._journal.write(json.dumps(op, default=str) + "\n")
+        self._journal.flush()
+
+    def _replay(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    op = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from a crash mid-write
+                    logger.warning(f"⚠️ Skipping unreadable Airtable journal line in {self.journal_path}")
+                    continue
+                self._apply(op)
+        self.stats['replayed'] = self.pending_count()
+        if self.stats['replayed']:
+            logger.info(f"📒 Replayed {self.stats['replayed']} pending Airtable writes for {self.table_name}")
+        self._compact()
+
+    def _compact(self):
+        """Rewrite the journal as a snapshot of the pending state"""
+        if not self.journal_path:
+            return
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        snapshot = {
+            'op': 'snapshot',
+            'upserts': self._upserts,
+            'creates': self._creates,
+            'updates': self._updates,
+            'record_ids': self.record_ids
+        }
+        temp_path = f"{self.journal_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as journal:
+            journal.write(json.dumps(snapshot, default=str) + "\n")
+        os.replace(temp_path, self.journal_path)
+
+    # Sending
+
+    def _ensure_worker(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet: the write is journaled and goes out once a loop starts the worker
+            return
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+        self._wake.set()
+
+    async def _run(self):
+        async with httpx.AsyncClient(transport=self._transport, timeout=30.0) as client:
+            while True:
+                if not self.pending_count():
+                    self._flush_requested = False
+                    self._idle.set()
+                    await self._wake.wait()
+                self._idle.clear()
+                await self._linger()
+                await self._drain(client)
+
+    async def _linger(self):
+        """Give a burst of writes a moment to merge and fill a batch"""
+        deadline = time.monotonic() + self.linger_seconds
+        while not self._flush_requested and self.pending_count() < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    async def _drain(self, client: httpx.AsyncClient):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            kind, items = batch
+            try:
+                if kind == 'upsert' and not self.index_loaded:
+                    # Never create a symbol's row before checking the table for one
+                    await self.load_index(client)
+                    self._requeue(kind, items)
+                    continue
+                outcome = await self._send(client, kind, items)
+            except asyncio.CancelledError:
+                self._requeue(kind, items)
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Airtable {kind} request failed: {e}")
+                outcome = 'retry'
+
+            if outcome in ('sent', 'dropped'):
+                self._backoff = 0.0
+                self._compact()
+                continue
+
+            self._requeue(kind, items)
+            if outcome == 'retry':
+                self.stats['retries'] += 1
+                self._backoff = min(max(1.0, self._backoff * 2), self.max_backoff_seconds)
+                await asyncio.sleep(self._backoff)
+
+    async def _throttle(self):
+        """Space requests to stay under the per-base rate limit"""
+        now = time.monotonic()
+        wait = self._next_request_at - now
+        if wait > 0:
+            await asyncio.sleep(wait)
+            now = time.monotonic()
+        self._next_request_at = max(now, self._next_request_at) + self.min_interval
+
+    async def _send(self, client: httpx.AsyncClient, kind: str, items: List[Any]) -> str:
+        """Send one batch: 'sent', 'throttled' (429, retry after the pause) or 'retry'"""
+        if kind == 'upsert':
+            method = 'POST'
+            payload = {'records': [{'fields': {**fields, self.key_field: key}} for key, fields in items]}
+        elif kind == 'create':
+            method = 'POST'
+            payload = {'records': [{'fields': fields} for fields in items]}
+        else:
+            method = 'PATCH'
+            payload = {'records': [{'id': record_id, 'fields': fields} for record_id, fields in items]}
+
+        await self._throttle()
+        response = await client.request(method, self.url, headers=self.headers, json=payload)
+        self.stats['requests'] += 1
+
+        if response.status_code == 200:
+            if kind == 'upsert':
+                # Created records come back in request order
+                for (key, _), record in zip(items, response.json().get('records', [])):
+                    self.record_ids[key] = record['id']
+            self.stats['records_written'] += len(items)
+            return 'sent'
+
+        if response.status_code == 429:
+            self.stats['rate_limited'] += 1
+            pause = float(response.headers.get('Retry-After', self.retry_after_seconds))
+            self._next_request_at = time.monotonic() + pause
+            logger.warning(f"⚠️ Airtable rate limit hit, pausing writes for {pause:.0f}s")
+            return 'throttled'
+
+        if response.status_code in REJECTED_STATUSES:
+            if len(items) > 1:
+                # Airtable rejects the whole request for one bad record; isolate it
+                for index, item in enumerate(items):
+                    outcome = await self._send(client, kind, [item])
+                    if outcome not in ('sent', 'dropped'):
+                        self._requeue(kind, items[index:])
+                        break
+                return 'sent'
+            self.stats['dropped'] += 1
+            logger.error(f"❌ Airtable rejected {kind} {items[0] if kind == 'create' else items[0][0]}: "
+                         f"{response.status_code} - {response.text}")
+            return 'dropped'
+
+        logger.warning(f"⚠️ Airtable {kind} request failed: {response.status_code} - {response.text}")
+        return 'retry'
+
+
+_queues: Dict[Tuple[str, str], AirtableWriteQueue] = {}
+
+
+def get_write_queue(base_url: str, table_name: str, headers: Dict[str, str]) -> AirtableWriteQueue:
+    """Shared write queue of a table, so every service instance batches into the same requests"""
+    key = (base_url, table_name)
+    if key not in _queues:
+        name = re.sub(r'\W+', '_', f"{base_url.rstrip('/').rsplit('/', 1)[-1]}_{table_name}")
+        _queues[key] = AirtableWriteQueue(
+            base_url, table_name, headers,
+            journal_path=os.path.join(settings.AIRTABLE_JOURNAL_DIR, f"{name}.jsonl"),
+            batch_size=settings.AIRTABLE_WRITE_BATCH_SIZE,
+            requests_per_second=settings.AIRTABLE_REQUESTS_PER_SECOND,
+            linger_seconds=settings.AIRTABLE_WRITE_LINGER_SECONDS
+        )
+    return _queues[key]
+
+
+async def close_write_queues(timeout: float = 10.0):
+    """Flush and close every shared write queue"""
+    for queue in list(_queues.values()):
+        await queue.close(timeout)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Single-pass colour segmentation for KingFisher images
+Classifies every pixel into all liquidation colour bins at once and extracts
+each bin's zones a single time, so the scoring helpers share one result
+instead of re-scanning the image per metric
+
+Bins are HSV boxes with the same bounds the analysis has always used. Each
+channel goes through a 256-entry lookup table holding a bit per HSV box whose
+range covers that value; AND-ing the three looked-up planes gives every
+pixel's bin membership, the same test as cv2.inRange for every bin in one
+pass. OpenCV releases the GIL in all of these calls, so segment_image can run
+on a thread pool without blocking the event loop.
+"""
+
+import cv2
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List, Tuple
+
+# Colour bins: name -> HSV boxes ((h_lo, h_hi), (s_lo, s_hi), (v_lo, v_hi)), bounds inclusive
+COLOR_BINS: Dict[str, List[Tuple[Tuple[int, int], Tuple[int, int], Tuple[int, int]]]] = {
+    "red": [((0, 10), (50, 255), (50, 255)), ((170, 180), (50, 255), (50, 255))],
+    "green": [((40, 80), (50, 255), (50, 255))],
+    "blue": [((100, 130), (50, 255), (50, 255))],
+}
+
+# Smallest zone any scoring helper keeps; smaller contours are dropped here
+MIN_ZONE_AREA = 50
+
+
+def _build_channel_luts() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-channel bit tables for the colour bins
+
+    A bin with several HSV boxes (red wraps around hue 0) gets one bit per
+    box in the tables, folded back into the bin's bit after the AND.
+    """
+    luts = [np.zeros(256, dtype=np.uint8) for _ in range(3)]
+    bit = 1
+    for boxes in COLOR_BINS.values():
+        for box in boxes:
+            for lut, (low, high) in zip(luts, box):
+                lut[low:high + 1] |= bit
+            bit <<= 1
+    if bit > 256:
+        raise ValueError("Too many colour ranges for 8-bit lookup tables")
+    return tuple(luts)
+
+
+def _build_box_masks() -> Dict[str, int]:
+    """Bin name -> the table bits of its HSV boxes"""
+    masks = {}
+    bit = 1
+    for name, boxes in COLOR_BINS.items():
+        masks[name] = 0
+        for _ in boxes:
+            masks[name] |= bit
+            bit <<= 1
+    return masks
+
+
+HUE_LUT, SAT_LUT, VAL_LUT = _build_channel_luts()
+BOX_MASKS = _build_box_masks()
+
+
+@dataclass
+class ColorZone:
+    """An external contour of one colour bin"""
+    area: float
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def position(self) -> Dict[str, int]:
+        return {"x": self.x, "y": self.y, "width": self.width, "height": self.height}
+
+
+@dataclass
+class SegmentationResult:
+    """Colour bin pixel counts and zones for one image"""
+    width: int
+    height: int
+    pixel_counts: Dict[str, int] = field(default_factory=dict)
+    zones: Dict[str, List[ColorZone]] = field(default_factory=dict)
+
+    @property
+    def total_pixels(self) -> int:
+        return self.width * self.height
+
+    def zones_for(self, color: str, min_area: float) -> List[ColorZone]:
+        """Zones of a bin larger than min_area, in contour order"""
+        return [zone for zone in self.zones.get(color, []) if zone.area > min_area]
+
+
+def classify_pixels(hsv: np.ndarray) -> np.ndarray:
+    """Per-pixel table bits for every HSV box at once"""
+    h, s, v = cv2.split(hsv)
+    bits = cv2.LUT(h, HUE_LUT)
+    cv2.bitwise_and(bits, cv2.LUT(s, SAT_LUT), dst=bits)
+    cv2.bitwise_and(bits, cv2.LUT(v, VAL_LUT), dst=bits)
+    return bits
+
+
+def segment(image: np.ndarray, min_zone_area: float = MIN_ZONE_AREA) -> SegmentationResult:
+    """Segment a BGR image into colour bins and their zones"""
+    height, width = image.shape[:2]
+    result = SegmentationResult(width=width, height=height)
+
+    bits = classify_pixels(cv2.cvtColor(image, cv2.COLOR_BGR2HSV))
+    for name, box_mask in BOX_MASKS.items():
+        # Non-zero wherever any of the bin's boxes matched
+        mask = cv2.bitwise_and(bits, box_mask)
+        result.pixel_counts[name] = cv2.countNonZero(mask)
+        if result.pixel_counts[name] == 0:
+            result.zones[name] = []
+            continue
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        zones = []
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area > min_zone_area:
+                x, y, w, h = cv2.boundingRect(contour)
+                zones.append(ColorZone(area, x, y, w, h))
+        result.zones[name] = zones
+
+    return result
+
+
+def segment_image(image_data: bytes) -> Optional[SegmentationResult]:
+    """Decode and segment encoded image bytes; None if they do not decode"""
+    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    return segment(image)
+
+
+def segment_file(image_path: str) -> Optional[SegmentationResult]:
+    """Load and segment an image file; None if it cannot be read"""
+    image = cv2.imread(image_path)
+    if image is None:
+        return None
+    return segment(image)
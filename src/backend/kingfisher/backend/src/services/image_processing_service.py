@@ -4,25 +4,53 @@ Image Processing Service for KingFisher Screenshots
 Analyzes KingFisher automation images for liquidation data
 """
 
+import asyncio
 import logging
 import cv2
 import numpy as np
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable
 from pathlib import Path
 import json
 import io
 
 from src.config.settings import settings
+from src.services.heatmap_segmentation import SegmentationResult, segment_image, segment_file
 
 logger = logging.getLogger(__name__)
 
 class ImageProcessingService:
-    """Service for processing KingFisher automation images"""
+    """
+    Service for processing KingFisher automation images
     
-    def __init__(self):
+    Decoding and colour segmentation run once per image on a thread pool
+    (OpenCV releases the GIL); the scoring helpers read the shared
+    SegmentationResult instead of re-scanning the pixels.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None):
         self.is_ready_flag = True
         self.supported_formats = settings.SUPPORTED_FORMATS
         self.max_image_size = settings.MAX_IMAGE_SIZE
+        self.max_workers = max_workers or settings.IMAGE_PROCESSING_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="kingfisher-image")
+        return self._executor
+    
+    async def _segment(self, func: Callable[[Any], Optional[SegmentationResult]], source: Any) -> Optional[SegmentationResult]:
+        """Run a segmentation function on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), func, source)
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
     
     async def process_image(self, image_path: str) -> Dict[str, Any]:
         """Process a KingFisher automation image"""
@@ -33,19 +61,19 @@ class ImageProcessingService:
             if not self._validate_image(image_path):
                 return {"error": "Invalid image format or size"}
             
-            # Load image
-            image = cv2.imread(image_path)
-            if image is None:
+            # Load and segment image
+            segmentation = await self._segment(segment_file, image_path)
+            if segmentation is None:
                 return {"error": "Failed to load image"}
             
             # Analyze image
-            analysis_result = await self._analyze_image(image)
+            analysis_result = self._analyze_image(segmentation)
             
             # Add metadata
             analysis_result.update({
                 "image_path": image_path,
                 "processed_at": self._get_timestamp(),
-                "image_size": self._get_image_size(image),
+                "image_size": self._get_image_size(segmentation),
                 "analysis_version": "1.0.0"
             })
             
@@ -59,18 +87,14 @@ class ImageProcessingService:
     async def analyze_liquidation_heatmap(self, image_data: bytes) -> Dict[str, Any]:
         """Analyze liquidation heatmap image"""
         try:
-            # Convert bytes to numpy array
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Decode and segment colours off the event loop
+            segmentation = await self._segment(segment_image, image_data)
             
-            if image is None:
+            if segmentation is None:
                 return {"error": "Failed to decode image data"}
             
-            # Convert to HSV for color analysis
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-            
             # Analyze thermal zones (red = high liquidation, blue = low)
-            thermal_zones = self._analyze_thermal_zones(hsv)
+            thermal_zones = self._analyze_thermal_zones(segmentation)
             
             # Calculate concentration ratios
             long_concentration = self._calculate_long_concentration(thermal_zones)
@@ -100,18 +124,14 @@ class ImageProcessingService:
     async def analyze_liquidation_map(self, image_data: bytes) -> Dict[str, Any]:
         """Analyze liquidation map image"""
         try:
-            # Convert bytes to numpy array
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Decode and segment colours off the event loop
+            segmentation = await self._segment(segment_image, image_data)
             
-            if image is None:
+            if segmentation is None:
                 return {"error": "Failed to decode image data"}
             
-            # Convert to HSV for color analysis
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-            
             # Detect liquidation zones
-            liquidation_zones = self._detect_liquidation_zones(hsv)
+            liquidation_zones = self._detect_liquidation_zones(segmentation)
             
             # Calculate cluster density
             cluster_density = self._calculate_cluster_density(liquidation_zones)
@@ -169,15 +189,14 @@ class ImageProcessingService:
     async def analyze_general_image(self, image_data: bytes) -> Dict[str, Any]:
         """Analyze general trading image"""
         try:
-            # Convert bytes to numpy array
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Decode and segment colours off the event loop
+            segmentation = await self._segment(segment_image, image_data)
             
-            if image is None:
+            if segmentation is None:
                 return {"error": "Failed to decode image data"}
             
             # General analysis
-            analysis = await self._analyze_image(image)
+            analysis = self._analyze_image(segmentation)
             
             # Add general image specific metrics
             analysis.update({
@@ -216,7 +235,7 @@ class ImageProcessingService:
             logger.error(f"Error validating image: {e}")
             return False
     
-    async def _analyze_image(self, image: np.ndarray) -> Dict[str, Any]:
+    def _analyze_image(self, segmentation: SegmentationResult) -> Dict[str, Any]:
         """Analyze KingFisher image for liquidation data"""
         try:
             analysis = {
@@ -228,24 +247,20 @@ class ImageProcessingService:
                 "analysis_confidence": 0.0
             }
             
-            # Convert to different color spaces for analysis
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
             # Detect liquidation clusters (red areas)
-            liquidation_clusters = self._detect_liquidation_clusters(hsv)
+            liquidation_clusters = self._detect_liquidation_clusters(segmentation)
             analysis["liquidation_clusters"] = liquidation_clusters
             
             # Detect toxic flow
-            toxic_flow = self._detect_toxic_flow(hsv)
+            toxic_flow = self._detect_toxic_flow(segmentation)
             analysis["toxic_flow"] = toxic_flow
             
             # Analyze market sentiment
-            market_sentiment = self._analyze_market_sentiment(image, liquidation_clusters, toxic_flow)
+            market_sentiment = self._analyze_market_sentiment(segmentation, liquidation_clusters, toxic_flow)
             analysis["market_sentiment"] = market_sentiment
             
             # Detect trading symbols
-            detected_symbols = self._detect_trading_symbols(gray)
+            detected_symbols = self._detect_trading_symbols(segmentation)
             analysis["detected_symbols"] = detected_symbols
             
             # Calculate significance score
@@ -263,56 +278,29 @@ class ImageProcessingService:
             return {"error": str(e)}
 
     # Helper methods for liquidation heatmap analysis
-    def _analyze_thermal_zones(self, hsv: np.ndarray) -> List[Dict[str, Any]]:
+    def _analyze_thermal_zones(self, segmentation: SegmentationResult) -> List[Dict[str, Any]]:
         """Analyze thermal zones in heatmap"""
         zones = []
         
-        # Define color ranges for thermal analysis
-        # Red zones (high liquidation)
-        lower_red1 = np.array([0, 50, 50])
-        upper_red1 = np.array([10, 255, 255])
-        lower_red2 = np.array([170, 50, 50])
-        upper_red2 = np.array([180, 255, 255])
-        
-        # Blue zones (low liquidation)
-        lower_blue = np.array([100, 50, 50])
-        upper_blue = np.array([130, 255, 255])
-        
-        # Create masks
-        red_mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-        red_mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-        red_mask = cv2.bitwise_or(red_mask1, red_mask2)
-        blue_mask = cv2.inRange(hsv, lower_blue, upper_blue)
-        
-        # Find contours
-        red_contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        blue_contours, _ = cv2.findContours(blue_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
         # Analyze red zones (high liquidation)
-        for contour in red_contours:
-            area = cv2.contourArea(contour)
-            if area > 100:  # Minimum area threshold
-                x, y, w, h = cv2.boundingRect(contour)
-                zones.append({
-                    "type": "high_liquidation",
-                    "intensity": "high",
-                    "area": area,
-                    "position": {"x": x, "y": y, "width": w, "height": h},
-                    "color": "red"
-                })
+        for zone in segmentation.zones_for("red", 100):  # Minimum area threshold
+            zones.append({
+                "type": "high_liquidation",
+                "intensity": "high",
+                "area": zone.area,
+                "position": zone.position,
+                "color": "red"
+            })
         
         # Analyze blue zones (low liquidation)
-        for contour in blue_contours:
-            area = cv2.contourArea(contour)
-            if area > 100:  # Minimum area threshold
-                x, y, w, h = cv2.boundingRect(contour)
-                zones.append({
-                    "type": "low_liquidation",
-                    "intensity": "low",
-                    "area": area,
-                    "position": {"x": x, "y": y, "width": w, "height": h},
-                    "color": "blue"
-                })
+        for zone in segmentation.zones_for("blue", 100):  # Minimum area threshold
+            zones.append({
+                "type": "low_liquidation",
+                "intensity": "low",
+                "area": zone.area,
+                "position": zone.position,
+                "color": "blue"
+            })
         
         return zones
 
@@ -420,56 +408,29 @@ class ImageProcessingService:
         return (area_score + count_score) / 2
 
     # Helper methods for liquidation map analysis
-    def _detect_liquidation_zones(self, hsv: np.ndarray) -> List[Dict[str, Any]]:
+    def _detect_liquidation_zones(self, segmentation: SegmentationResult) -> List[Dict[str, Any]]:
         """Detect liquidation zones in map"""
         zones = []
         
-        # Define color ranges for liquidation zones
-        # Red zones (long liquidation)
-        lower_red1 = np.array([0, 50, 50])
-        upper_red1 = np.array([10, 255, 255])
-        lower_red2 = np.array([170, 50, 50])
-        upper_red2 = np.array([180, 255, 255])
-        
-        # Green zones (short liquidation)
-        lower_green = np.array([40, 50, 50])
-        upper_green = np.array([80, 255, 255])
-        
-        # Create masks
-        red_mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-        red_mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-        red_mask = cv2.bitwise_or(red_mask1, red_mask2)
-        green_mask = cv2.inRange(hsv, lower_green, upper_green)
-        
-        # Find contours
-        red_contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        green_contours, _ = cv2.findContours(green_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
         # Analyze red zones (long liquidation)
-        for contour in red_contours:
-            area = cv2.contourArea(contour)
-            if area > 50:  # Minimum area threshold
-                x, y, w, h = cv2.boundingRect(contour)
-                zones.append({
-                    "direction": "long",
-                    "size": area,
-                    "position": {"x": x, "y": y, "width": w, "height": h},
-                    "color": "red",
-                    "intensity": "high" if area > 500 else "medium"
-                })
+        for zone in segmentation.zones_for("red", 50):  # Minimum area threshold
+            zones.append({
+                "direction": "long",
+                "size": zone.area,
+                "position": zone.position,
+                "color": "red",
+                "intensity": "high" if zone.area > 500 else "medium"
+            })
         
         # Analyze green zones (short liquidation)
-        for contour in green_contours:
-            area = cv2.contourArea(contour)
-            if area > 50:  # Minimum area threshold
-                x, y, w, h = cv2.boundingRect(contour)
-                zones.append({
-                    "direction": "short",
-                    "size": area,
-                    "position": {"x": x, "y": y, "width": w, "height": h},
-                    "color": "green",
-                    "intensity": "high" if area > 500 else "medium"
-                })
+        for zone in segmentation.zones_for("green", 50):  # Minimum area threshold
+            zones.append({
+                "direction": "short",
+                "size": zone.area,
+                "position": zone.position,
+                "color": "green",
+                "intensity": "high" if zone.area > 500 else "medium"
+            })
         
         return zones
 
@@ -717,57 +678,32 @@ class ImageProcessingService:
             "analysis_confidence": 0.3
         }
 
-    def _detect_liquidation_clusters(self, hsv: np.ndarray) -> List[Dict[str, Any]]:
+    def _detect_liquidation_clusters(self, segmentation: SegmentationResult) -> List[Dict[str, Any]]:
         """Detect liquidation clusters in image"""
         clusters = []
         
-        # Define color ranges for liquidation clusters
         # Red areas (high liquidation)
-        lower_red1 = np.array([0, 50, 50])
-        upper_red1 = np.array([10, 255, 255])
-        lower_red2 = np.array([170, 50, 50])
-        upper_red2 = np.array([180, 255, 255])
-        
-        # Create masks
-        red_mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-        red_mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-        red_mask = cv2.bitwise_or(red_mask1, red_mask2)
-        
-        # Find contours
-        contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > 100:  # Minimum area threshold
-                x, y, w, h = cv2.boundingRect(contour)
-                clusters.append({
-                    "area": area,
-                    "position": {"x": x, "y": y, "width": w, "height": h},
-                    "intensity": "high" if area > 500 else "medium"
-                })
+        for zone in segmentation.zones_for("red", 100):  # Minimum area threshold
+            clusters.append({
+                "area": zone.area,
+                "position": zone.position,
+                "intensity": "high" if zone.area > 500 else "medium"
+            })
         
         return clusters
     
-    def _detect_toxic_flow(self, hsv: np.ndarray) -> float:
+    def _detect_toxic_flow(self, segmentation: SegmentationResult) -> float:
         """Detect toxic flow in image"""
-        # Define color ranges for toxic flow detection
-        # Green areas (toxic flow)
-        lower_green = np.array([40, 50, 50])
-        upper_green = np.array([80, 255, 255])
-        
-        # Create mask
-        green_mask = cv2.inRange(hsv, lower_green, upper_green)
-        
-        # Calculate toxic flow percentage
-        total_pixels = hsv.shape[0] * hsv.shape[1]
-        toxic_pixels = np.count_nonzero(green_mask)
+        # Green areas (toxic flow) as a share of all pixels
+        total_pixels = segmentation.total_pixels
+        toxic_pixels = segmentation.pixel_counts.get("green", 0)
         
         if total_pixels == 0:
             return 0.0
         
         return min(toxic_pixels / total_pixels, 1.0)
     
-    def _analyze_market_sentiment(self, image: np.ndarray, clusters: List[Dict], toxic_flow: float) -> str:
+    def _analyze_market_sentiment(self, segmentation: SegmentationResult, clusters: List[Dict], toxic_flow: float) -> str:
         """Analyze market sentiment based on clusters and toxic flow"""
         if not clusters:
             return "neutral"
@@ -784,7 +720,7 @@ class ImageProcessingService:
         else:
             return "neutral"
     
-    def _detect_trading_symbols(self, gray: np.ndarray) -> List[str]:
+    def _detect_trading_symbols(self, segmentation: SegmentationResult) -> List[str]:
         """Detect trading symbols in image"""
         # This is a simplified implementation
         # In a real scenario, you'd use OCR to extract text
@@ -845,10 +781,9 @@ class ImageProcessingService:
         from datetime import datetime
         return datetime.now().isoformat()
     
-    def _get_image_size(self, image: np.ndarray) -> Dict[str, int]:
+    def _get_image_size(self, segmentation: SegmentationResult) -> Dict[str, int]:
         """Get image dimensions"""
-        height, width = image.shape[:2]
-        return {"width": width, "height": height}
+        return {"width": segmentation.width, "height": segmentation.height}
     
     def is_ready(self) -> bool:
         """Check if service is ready"""
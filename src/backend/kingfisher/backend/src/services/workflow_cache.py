@@ -0,0 +1,251 @@
+"""
+KingFisher Workflow Result Cache
+Content-addressed cache in front of the image workflow so reposted liquidation
+maps and heatmaps reuse the first run's result
+
+Entries are keyed by the image's SHA-256 plus the symbols named in the
+message text (a repost captioned with a different symbol is a different
+request). Near-duplicates - recompressed or rescaled copies - are found with
+a difference hash (dHash) of the downscaled grayscale image: a stored entry
+matches when its hash is within max_distance bits and its aspect ratio
+agrees. Hashes are split into max_distance + 1 bands and indexed per band;
+by the pigeonhole principle any hash within max_distance bits shares at
+least one band exactly, so lookups only compare against that bucket.
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ContextKey = Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ImageFingerprint:
+    """Exact and perceptual identity of an image"""
+    sha256: str
+    dhash: Optional[int]  # None when the bytes do not decode as an image
+    aspect: float = 0.0
+
+
+def fingerprint_image(image_data: bytes, hash_size: int = 16) -> ImageFingerprint:
+    """SHA-256 of the bytes plus a hash_size**2-bit difference hash of the pixels"""
+    sha256 = hashlib.sha256(image_data).hexdigest()
+    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None or image.size == 0:
+        return ImageFingerprint(sha256, None)
+
+    height, width = image.shape
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    dhash = int.from_bytes(np.packbits(bits).tobytes(), 'big')
+    return ImageFingerprint(sha256, dhash, width / height)
+
+
+@dataclass
+class CacheEntry:
+    fingerprint: ImageFingerprint
+    context_key: ContextKey
+    result: Any
+    created_at: float
+    hits: int = 0
+
+
+@dataclass
+class CacheHit:
+    entry: CacheEntry
+    match: str       # 'exact' or 'near'
+    distance: int    # differing dHash bits; 0 for exact matches
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.entry.created_at
+
+
+class WorkflowResultCache:
+    """
+    Exact and near-duplicate result cache with TTL and LRU retention
+    """
+
+    def __init__(self, ttl_seconds: float = 900.0, max_entries: int = 512, max_distance: int = 12,
+                 hash_size: int = 16, max_aspect_delta: float = 0.02):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.max_aspect_delta = max_aspect_delta
+
+        self._entries: "OrderedDict[Tuple[str, ContextKey], CacheEntry]" = OrderedDict()
+        self._bands = self._band_layout(hash_size * hash_size, max_distance + 1)
+        self._band_index: List[Dict[int, set]] = [{} for _ in self._bands]
+        self._inflight: Dict[Tuple[str, ContextKey], asyncio.Future] = {}
+        self._last_sweep = time.monotonic()
+
+        self.stats = {
+            'lookups': 0,
+            'exact_hits': 0,
+            'near_hits': 0,
+            'coalesced': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+    @staticmethod
+    def _band_layout(total_bits: int, bands: int) -> List[Tuple[int, int]]:
+        """(shift, mask) for each band of a total_bits hash"""
+        bands = max(1, min(bands, total_bits))
+        width, extra = divmod(total_bits, bands)
+        layout, shift = [], 0
+        for band in range(bands):
+            bits = width + (1 if band < extra else 0)
+            layout.append((shift, (1 << bits) - 1))
+            shift += bits
+        return layout
+
+    def fingerprint(self, image_data: bytes) -> ImageFingerprint:
+        return fingerprint_image(image_data, self.hash_size)
+
+    def lookup(self, fingerprint: ImageFingerprint, context_key: ContextKey = ()) -> Optional[CacheHit]:
+        """Find a live entry for the image, exact match first"""
+        self.stats['lookups'] += 1
+        self._expire()
+
+        key = (fingerprint.sha256, context_key)
+        entry = self._entries.get(key)
+        if entry is not None and self._live(key, entry):
+            return self._hit(key, entry, 'exact', 0)
+
+        if fingerprint.dhash is not None:
+            best: Optional[Tuple[int, Tuple[str, ContextKey]]] = None
+            for candidate_key in self._candidates(fingerprint.dhash):
+                candidate = self._entries[candidate_key]
+                if candidate.context_key != context_key:
+                    continue
+                if abs(candidate.fingerprint.aspect - fingerprint.aspect) > self.max_aspect_delta * fingerprint.aspect:
+                    continue
+                distance = (candidate.fingerprint.dhash ^ fingerprint.dhash).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, candidate_key)
+            if best is not None and not self._live(best[1], self._entries[best[1]]):
+                best = None
+            if best is not None:
+                return self._hit(best[1], self._entries[best[1]], 'near', best[0])
+
+        self.stats['misses'] += 1
+        return None
+
+    def store(self, fingerprint: ImageFingerprint, context_key: ContextKey, result: Any):
+        """Cache a workflow result, evicting the least recently used entries beyond max_entries"""
+        key = (fingerprint.sha256, context_key)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CacheEntry(fingerprint, context_key, result, time.monotonic())
+        if fingerprint.dhash is not None:
+            for band_index, band in zip(self._band_index, self._band_values(fingerprint.dhash)):
+                band_index.setdefault(band, set()).add(key)
+        self.stats['stores'] += 1
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.stats['evictions'] += 1
+
+    def inflight(self, fingerprint: ImageFingerprint, context_key: ContextKey = ()) -> Optional[asyncio.Future]:
+        """Future of an identical image already being processed; call after a missed lookup"""
+        future = self._inflight.get((fingerprint.sha256, context_key))
+        if future is not None:
+            # Served by the in-flight run, not a miss after all
+            self.stats['misses'] -= 1
+            self.stats['coalesced'] += 1
+        return future
+
+    def begin(self, fingerprint: ImageFingerprint, context_key: ContextKey = ()) -> asyncio.Future:
+        """Mark an image as being processed; identical requests wait on the returned future"""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[(fingerprint.sha256, context_key)] = future
+        return future
+
+    def finish(self, fingerprint: ImageFingerprint, context_key: ContextKey, result: Any = None,
+               error: Optional[BaseException] = None):
+        """Resolve waiters of an in-flight image"""
+        future = self._inflight.pop((fingerprint.sha256, context_key), None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+            future.exception()  # Mark retrieved; there may be no waiters
+        else:
+            future.set_result(result)
+
+    def clear(self):
+        self._entries.clear()
+        for band_index in self._band_index:
+            band_index.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats['exact_hits'] + self.stats['near_hits'] + self.stats['coalesced']
+        served = self.stats['lookups']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'inflight': len(self._inflight),
+            'hit_rate': round(hits / served, 4) if served else 0.0,
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries': self.max_entries,
+            'max_distance': self.max_distance
+        }
+
+    def _hit(self, key: Tuple[str, ContextKey], entry: CacheEntry, match: str, distance: int) -> CacheHit:
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        self.stats['exact_hits' if match == 'exact' else 'near_hits'] += 1
+        return CacheHit(entry, match, distance)
+
+    def _band_values(self, dhash: int) -> List[int]:
+        return [(dhash >> shift) & mask for shift, mask in self._bands]
+
+    def _candidates(self, dhash: int) -> set:
+        candidates = set()
+        for band_index, band in zip(self._band_index, self._band_values(dhash)):
+            candidates.update(band_index.get(band, ()))
+        return candidates
+
+    def _remove(self, key: Tuple[str, ContextKey]):
+        entry = self._entries.pop(key)
+        if entry.fingerprint.dhash is None:
+            return
+        for band_index, band in zip(self._band_index, self._band_values(entry.fingerprint.dhash)):
+            bucket = band_index.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del band_index[band]
+
+    def _live(self, key: Tuple[str, ContextKey], entry: CacheEntry) -> bool:
+        if self.ttl_seconds > 0 and time.monotonic() - entry.created_at > self.ttl_seconds:
+            self._remove(key)
+            self.stats['expirations'] += 1
+            return False
+        return True
+
+    def _expire(self):
+        """Drop expired entries; sweeps at most every tenth of the TTL since hits check age themselves"""
+        now = time.monotonic()
+        if self.ttl_seconds <= 0 or now - self._last_sweep < self.ttl_seconds / 10:
+            return
+        self._last_sweep = now
+        cutoff = now - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            self._remove(key)
+        self.stats['expirations'] += len(expired)
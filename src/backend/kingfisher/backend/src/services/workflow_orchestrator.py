@@ -6,7 +6,7 @@ Coordinates all agents for complete image processing workflow
 import asyncio
 import logging
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
 import json
 
@@ -14,6 +14,9 @@ from .image_classification_agent import image_classification_agent, ImageType
 from .enhanced_airtable_service import enhanced_airtable_service
 from .market_data_service import market_data_service
 from .premium_report_generator import premium_report_generator
+from .workflow_cache import WorkflowResultCache, CacheHit
+from .airtable_write_queue import AirtableWriteQueue
+from src.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +32,30 @@ class WorkflowResult:
     metadata: Dict[str, Any]
 
 class WorkflowOrchestrator:
-    """Orchestrates the complete KingFisher workflow"""
+    """
+    Orchestrates the complete KingFisher workflow
     
-    def __init__(self):
+    Reposted images are answered from a content-addressed result cache
+    (exact hash or near-duplicate perceptual hash); identical images that
+    arrive while the first copy is still processing wait for its result.
+    
+    Airtable writes are queued on the table's write-behind queue rather than
+    awaited, so workflow latency does not include Airtable round trips.
+    """
+    
+    def __init__(self, result_cache: Optional[WorkflowResultCache] = None,
+                 refresh_market_data: Optional[bool] = None,
+                 airtable_queue: Optional[AirtableWriteQueue] = None):
+        self.result_cache = result_cache if result_cache is not None else (
+            WorkflowResultCache(
+                ttl_seconds=settings.WORKFLOW_CACHE_TTL_SECONDS,
+                max_entries=settings.WORKFLOW_CACHE_MAX_ENTRIES,
+                max_distance=settings.WORKFLOW_CACHE_MAX_DISTANCE
+            ) if settings.WORKFLOW_CACHE_ENABLED else None
+        )
+        self.refresh_market_data = (settings.WORKFLOW_CACHE_REFRESH_MARKET_DATA
+                                    if refresh_market_data is None else refresh_market_data)
+        self.airtable_queue = airtable_queue or enhanced_airtable_service.airtable_service.write_queue
         self.processing_stats = {
             'total_images_processed': 0,
             'liquidation_maps_processed': 0,
@@ -44,8 +68,93 @@ class WorkflowOrchestrator:
     
     async def process_image_workflow(self, image_data: bytes, 
                                    image_filename: str = "",
-                                   context_text: str = "") -> WorkflowResult:
-        """Execute the complete KingFisher workflow for an image"""
+                                   context_text: str = "",
+                                   use_cache: bool = True) -> WorkflowResult:
+        """Execute the complete KingFisher workflow for an image, or reuse the result for a repost"""
+        
+        if not use_cache or self.result_cache is None:
+            return await self._execute_workflow(image_data, image_filename, context_text)
+        
+        start_time = datetime.now()
+        fingerprint = await asyncio.to_thread(self.result_cache.fingerprint, image_data)
+        context_key = tuple(sorted(await self._extract_symbols_from_context(context_text, max_symbols=20)))
+        
+        hit = self.result_cache.lookup(fingerprint, context_key)
+        if hit is not None:
+            logger.info(f"♻️ Reusing cached workflow result for {image_filename} "
+                       f"({hit.match} match, {hit.age_seconds:.0f}s old)")
+            return await self._serve_cached(hit.entry.result, start_time, hit)
+        
+        inflight = self.result_cache.inflight(fingerprint, context_key)
+        if inflight is not None:
+            logger.info(f"♻️ Waiting for in-flight workflow of identical image {image_filename}")
+            result = await asyncio.shield(inflight)
+            if result is not None:
+                return await self._serve_cached(result, start_time)
+            # The identical run failed; process this copy normally
+            return await self._execute_workflow(image_data, image_filename, context_text)
+        
+        self.result_cache.begin(fingerprint, context_key)
+        result = None
+        try:
+            result = await self._execute_workflow(image_data, image_filename, context_text)
+            if result.success:
+                self.result_cache.store(fingerprint, context_key, result)
+            return result
+        finally:
+            # Waiters only share a successful result
+            self.result_cache.finish(fingerprint, context_key,
+                                     result if result is not None and result.success else None)
+    
+    async def _serve_cached(self, result: WorkflowResult, start_time: datetime,
+                            hit: Optional[CacheHit] = None) -> WorkflowResult:
+        """Copy of a cached result with fresh market data and cache metadata"""
+        reports = result.reports_generated
+        if self.refresh_market_data and reports:
+            reports = await self._refresh_report_market_data(reports)
+        
+        return replace(
+            result,
+            processing_time=(datetime.now() - start_time).total_seconds(),
+            reports_generated=reports,
+            metadata={
+                **result.metadata,
+                'cache': {
+                    'hit': hit.match if hit is not None else 'inflight',
+                    'distance': hit.distance if hit is not None else 0,
+                    'age_seconds': round(hit.age_seconds, 1) if hit is not None else 0.0,
+                    'original_processing_time': result.processing_time,
+                    'market_data_refreshed': reports is not result.reports_generated
+                }
+            }
+        )
+    
+    async def _refresh_report_market_data(self, reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Regenerate cached reports against current prices, keeping the image analysis"""
+        try:
+            symbols = list(dict.fromkeys(report['symbol'] for report in reports))
+            async with market_data_service as market_service:
+                prices = await market_service.get_multiple_prices(symbols)
+            
+            refreshed = []
+            for report in reports:
+                market_data = prices.get(report['symbol'])
+                if market_data is None:
+                    refreshed.append(report)
+                    continue
+                refreshed.append(await self._generate_symbol_report(
+                    report['symbol'], market_data,
+                    report['analysis_data']['liquidation_analysis'], report['analysis_type']
+                ))
+            return refreshed
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Could not refresh market data for cached reports: {e}")
+            return reports
+    
+    async def _execute_workflow(self, image_data: bytes, image_filename: str = "",
+                                context_text: str = "") -> WorkflowResult:
+        """Run classification, analysis, reports and Airtable updates for an image"""
         
         start_time = datetime.now()
         errors = []
@@ -369,15 +478,12 @@ class WorkflowOrchestrator:
         """Find existing Airtable record or create new one"""
         
         try:
-            # Try to find existing record
-            existing_records = await enhanced_airtable_service.get_comprehensive_analyses()
-            
-            for record in existing_records:
-                if record.get('Symbol') == symbol:
-                    logger.info(f"📝 Found existing Airtable record for {symbol}")
-                    return record['id']
+            # Look up the local symbol index instead of listing the table
+            if self.airtable_queue.has_record(symbol):
+                logger.info(f"📝 Found existing Airtable record for {symbol}")
+                return self.airtable_queue.record_id_for(symbol)
             
-            # Create new record if not found
+            # Queue an upsert on Symbol; the id is a placeholder until it is sent
             logger.info(f"📝 Creating new Airtable record for {symbol}")
             
             # Create basic record structure
@@ -390,8 +496,7 @@ class WorkflowOrchestrator:
                 'Score(24h48h_7Days_1Month)': 'Calculating...'
             }
             
-            record_id = await enhanced_airtable_service.create_symbol_record(new_record_data)
-            return record_id
+            return self.airtable_queue.upsert(symbol, new_record_data)
             
         except Exception as e:
             logger.error(f"❌ Error finding/creating Airtable record for {symbol}: {e}")
@@ -501,23 +606,23 @@ class WorkflowOrchestrator:
             'Score(24h48h_7Days_1Month)': f"({analysis_data['timeframes']['1d']['long_ratio']*100:.0f}, {analysis_data['timeframes']['7d']['long_ratio']*100:.0f}, {analysis_data['timeframes']['1m']['long_ratio']*100:.0f})"
         }
         
-        await enhanced_airtable_service.update_symbol_record(record_id, update_data)
-        logger.info(f"📝 Updated Airtable liquidation map data for {symbol}")
+        self.airtable_queue.update(record_id, update_data)
+        logger.info(f"📝 Queued Airtable liquidation map data for {symbol}")
     
     async def _update_airtable_liquidation_heatmap(self, record_id: str, symbol: str, report: Dict[str, Any]):
         """Update Airtable with liquidation heatmap data"""
         await self._update_airtable_liquidation_map(record_id, symbol, report)  # Same structure
-        logger.info(f"📝 Updated Airtable liquidation heatmap data for {symbol}")
+        logger.info(f"📝 Queued Airtable liquidation heatmap data for {symbol}")
     
     async def _update_airtable_multi_symbol_data(self, record_id: str, symbol: str, report: Dict[str, Any]):
         """Update Airtable with multi-symbol data"""
         await self._update_airtable_liquidation_map(record_id, symbol, report)  # Same structure
-        logger.info(f"📝 Updated Airtable multi-symbol data for {symbol}")
+        logger.info(f"📝 Queued Airtable multi-symbol data for {symbol}")
     
     async def _update_airtable_basic_data(self, record_id: str, symbol: str, report: Dict[str, Any]):
         """Update Airtable with basic analysis data"""
         await self._update_airtable_liquidation_map(record_id, symbol, report)  # Same structure
-        logger.info(f"📝 Updated Airtable basic analysis data for {symbol}")
+        logger.info(f"📝 Queued Airtable basic analysis data for {symbol}")
     
     async def _generate_master_summary(self, symbols: List[str], reports: List[Dict[str, Any]], 
                                      image_data: bytes) -> Dict[str, Any]:
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Test the Airtable write-behind queue
+Writes must leave in merged 10-record requests within the rate limit, reach
+symbol records by record id even when rows share a symbol, and survive a restart
+"""
+
+import asyncio
+import json
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.airtable_write_queue import AirtableWriteQueue, PENDING_PREFIX
+from src.services.market_data_service import MarketData
+from src.services.workflow_orchestrator import WorkflowOrchestrator
+
+BASE_URL = "https://api.airtable.test/v0/appTest"
+
+
+class FakeAirtable:
+    """Local stand-in for one Airtable table, with per-request latency and Airtable's rules"""
+
+    def __init__(self, latency: float = 0.0, known_fields=None, rate_limit: int = 0):
+        self.latency = latency
+        self.known_fields = known_fields
+        self.rate_limit = rate_limit  # 429 for requests beyond this many per second; 0 disables
+        self.records = {}
+        self.requests = []  # accepted requests
+        self.rejected = 0
+        self._next_id = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def add(self, fields) -> str:
+        self._next_id += 1
+        record_id = f"rec{self._next_id:05d}"
+        self.records[record_id] = dict(fields)
+        return record_id
+
+    def by_field(self, name, value):
+        return [(record_id, fields) for record_id, fields in self.records.items() if fields.get(name) == value]
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        if self.rate_limit and sum(1 for _, t in self.requests if now - t < 1.0) >= self.rate_limit:
+            self.rejected += 1
+            return httpx.Response(429, headers={'Retry-After': '0.3'}, json={'error': 'RATE_LIMIT_REACHED'})
+        self.requests.append((request.method, now))
+
+        if request.method == 'GET':
+            page = sorted(self.records.items())
+            start = int(request.url.params.get('offset', 0))
+            size = int(request.url.params.get('pageSize', 100))
+            body = {'records': [{'id': rid, 'fields': f} for rid, f in page[start:start + size]]}
+            if start + size < len(page):
+                body['offset'] = str(start + size)
+            return httpx.Response(200, json=body)
+
+        payload = json.loads(request.content)
+        records = payload['records']
+        if len(records) > 10:
+            return httpx.Response(422, json={'error': 'INVALID_RECORDS'})
+        for record in records:
+            unknown = set(record['fields']) - self.known_fields if self.known_fields else set()
+            if unknown or (record.get('id') and record['id'] not in self.records):
+                return httpx.Response(422, json={'error': 'UNKNOWN_FIELD_NAME' if unknown else 'ROW_DOES_NOT_EXIST'})
+
+        written = []
+        for record in records:
+            if request.method == 'POST':
+                record_id = self.add(record['fields'])
+            elif 'performUpsert' in payload:
+                merge_on = payload['performUpsert']['fieldsToMergeOn'][0]
+                matches = self.by_field(merge_on, record['fields'][merge_on])
+                if len(matches) > 1:
+                    return httpx.Response(422, json={'error': 'INVALID_VALUE_FOR_COLUMN'})
+                record_id = matches[0][0] if matches else self.add({})
+                self.records[record_id].update(record['fields'])
+            else:
+                record_id = record['id']
+                self.records[record_id].update(record['fields'])
+            written.append({'id': record_id, 'fields': self.records[record_id]})
+        return httpx.Response(200, json={'records': written})
+
+
+def make_queue(table: FakeAirtable, journal_path=None, **kwargs) -> AirtableWriteQueue:
+    options = {'requests_per_second': 1000.0, 'linger_seconds': 0.01, **kwargs}
+    return AirtableWriteQueue(BASE_URL, "KingFisher", {}, journal_path=journal_path,
+                              transport=table.transport(), **options)
+
+
+def test_writes_are_batched_and_merged():
+    table = FakeAirtable()
+
+    async def scenario():
+        queue = make_queue(table)
+        existing = [table.add({'Symbol': f'OLD{i}', 'Result': ''}) for i in range(3)]
+        for i in range(25):
+            queue.create({'Symbol': f'NEW{i}', 'Result': 'analysis'})
+        for step in range(10):
+            for record_id in existing:
+                queue.update(record_id, {'Result': f'step {step}', f'Field{step % 2}': step})
+        assert queue.stats['merged'] == 27
+        await queue.flush()
+        return queue
+
+    queue = asyncio.run(scenario())
+    methods = [method for method, _ in table.requests]
+    assert methods == ['POST', 'POST', 'POST', 'PATCH']  # 25 creates in 10/10/5, 30 updates merged to 3
+    assert len(table.records) == 28
+    assert all(table.records[rid] == {'Symbol': f'OLD{i}', 'Result': 'step 9', 'Field0': 8, 'Field1': 9}
+               for i, rid in enumerate(sorted(table.records)[:3]))
+    assert queue.stats['records_written'] == 28 and queue.pending_count() == 0
+
+
+def test_symbol_records_are_written_by_record_id():
+    table = FakeAirtable()
+    existing = table.add({'Symbol': 'ETHUSDT', 'Result': 'old'})
+
+    async def scenario():
+        queue = make_queue(table)
+        record_id = queue.upsert('BTCUSDT', {'Result': 'Processing...'})
+        queue.update(record_id, {'Result': 'report'})
+        eth_id = queue.upsert('ETHUSDT', {'Result': 'Processing...'})
+        queue.update(eth_id, {'Result': 'eth report'})
+        placeholders = (record_id, eth_id, queue.pending_count())
+        await queue.flush()
+        queue.update(queue.record_id_for('BTCUSDT'), {'Result': 'second report'})
+        await queue.flush()
+        return queue, placeholders
+
+    queue, (btc_placeholder, eth_placeholder, pending) = asyncio.run(scenario())
+    assert (btc_placeholder, eth_placeholder, pending) == (f'{PENDING_PREFIX}BTCUSDT', f'{PENDING_PREFIX}ETHUSDT', 2)
+    # One index listing, then BTCUSDT is created and ETHUSDT patched by id
+    assert [method for method, _ in table.requests] == ['GET', 'POST', 'PATCH', 'PATCH']
+    assert queue.record_ids['ETHUSDT'] == existing and len(table.by_field('Symbol', 'ETHUSDT')) == 1
+    assert table.records[existing]['Result'] == 'eth report'
+    assert table.records[queue.record_ids['BTCUSDT']]['Result'] == 'second report'
+
+
+def test_rows_sharing_a_symbol_are_not_lost():
+    table = FakeAirtable()
+    # Analyses, summaries and alerts all create rows carrying the symbol
+    symbol_record = table.add({'Symbol': 'BTCUSDT', 'Result': 'old'})
+    table.add({'Symbol': 'BTCUSDT', 'Liquidation_Map': '[]'})
+    table.add({'Symbol': 'BTCUSDT', 'Alert Type': 'High Significance'})
+
+    async def scenario():
+        queue = make_queue(table)
+        record_id = queue.upsert('BTCUSDT', {'Result': 'Processing...'})
+        await queue.flush()
+        queue.update(queue.record_id_for('BTCUSDT'), {'Result': 'report'})
+        queue.create({'Symbol': 'BTCUSDT', 'Liquidation_Map': '[1]'})
+        await queue.flush()
+        return queue, record_id
+
+    queue, record_id = asyncio.run(scenario())
+    assert record_id == f'{PENDING_PREFIX}BTCUSDT'
+    assert queue.record_ids['BTCUSDT'] == symbol_record
+    assert queue.stats['dropped'] == 0 and queue.stats['duplicate_keys'] == 2
+    assert table.records[symbol_record]['Result'] == 'report'
+    assert len(table.by_field('Symbol', 'BTCUSDT')) == 4
+
+
+def test_journal_survives_a_restart():
+    table = FakeAirtable()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'journal', 'kingfisher.jsonl')
+
+        # No event loop: writes are only journaled, as if the process died before sending
+        crashed = make_queue(table, path)
+        crashed.upsert('SOLUSDT', {'Result': 'queued before crash'})
+        crashed.create({'Symbol': 'ALERT', 'Result': 'alert'})
+        crashed._journal.write('{"op": "upd')  # torn final write
+        crashed._journal.flush()
+
+        async def restart():
+            queue = make_queue(table, path)
+            replayed = queue.stats['replayed']
+            await queue.flush()
+            await queue.close()
+            return queue, replayed
+
+        queue, replayed = asyncio.run(restart())
+        assert replayed == 2 and len(table.records) == 2
+        assert table.by_field('Symbol', 'SOLUSDT')[0][1]['Result'] == 'queued before crash'
+
+        reopened = make_queue(table, path)
+        assert reopened.pending_count() == 0 and reopened.stats['replayed'] == 0
+        assert reopened.record_ids == {'SOLUSDT': table.by_field('Symbol', 'SOLUSDT')[0][0]}
+
+
+def test_rate_limit_and_rejected_records():
+    table = FakeAirtable(known_fields={'Symbol', 'Result'}, rate_limit=4)
+
+    async def scenario():
+        queue = make_queue(table, requests_per_second=10.0)
+        for i in range(60):
+            queue.create({'Symbol': f'S{i}', 'Result': 'ok'})
+            if i == 4:
+                queue.create({'Symbol': 'BAD', 'Lie_Heatmap': 'unknown field'})
+        await asyncio.wait_for(queue.flush(), 10)
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert len(table.records) == 60 and not table.by_field('Symbol', 'BAD')
+    assert queue.stats['dropped'] == 1 and queue.stats['rate_limited'] == table.rejected >= 1
+    # The rejected batch is retried record by record; its nine good records still land
+    posts = [t for method, t in table.requests if method == 'POST']
+    assert len(posts) <= 6 + 1 + 10
+    assert all(b - a >= 0.09 for a, b in zip(posts, posts[1:]))  # paced at 10 req/s
+
+
+class FakeMarketService:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return None
+
+    async def get_real_time_price(self, symbol):
+        return MarketData(symbol, 100.0, 1e6, 1.0, 1.0, None, 101.0, 99.0, datetime.now(), 'test')
+
+
+def test_workflow_does_not_wait_for_airtable():
+    from src.services import workflow_orchestrator as orchestrator_module
+    from src.services.image_classification_agent import ImageClassification, ImageType
+    orchestrator_module.market_data_service = FakeMarketService()
+    table = FakeAirtable(latency=0.2)
+
+    async def scenario():
+        orchestrator = WorkflowOrchestrator(result_cache=None, airtable_queue=make_queue(table))
+        classification = ImageClassification(ImageType.LIQUIDATION_MAP, 0.9, ['BTCUSDT'], 'liquidation_map', {})
+        start = time.perf_counter()
+        results = [await orchestrator._process_liquidation_map_workflow(b'', classification, '') for _ in range(3)]
+        elapsed = time.perf_counter() - start
+        await orchestrator.airtable_queue.flush()
+        return orchestrator, results, elapsed
+
+    orchestrator, results, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.2, elapsed
+    assert results[0]['airtable_records'] == [f'{PENDING_PREFIX}BTCUSDT']
+    assert len(table.requests) == 2  # index listing, then three reports merged into one create
+    [(record_id, fields)] = table.by_field('Symbol', 'BTCUSDT')
+    assert orchestrator.airtable_queue.record_ids['BTCUSDT'] == record_id and fields['Result'] != 'Analyzing...'
+
+
+def benchmark(records: int = 200, latency: float = 0.05):
+    """Per-record awaited requests vs the write-behind queue, against a stand-in with fixed latency"""
+    async def inline():
+        table = FakeAirtable(latency=latency)
+        start = time.perf_counter()
+        async with httpx.AsyncClient(transport=table.transport()) as client:
+            for i in range(records):
+                await client.post(f"{BASE_URL}/KingFisher", json={'records': [{'fields': {'Symbol': f'S{i}'}}]})
+        return time.perf_counter() - start, len(table.requests)
+
+    async def queued():
+        table = FakeAirtable(latency=latency)
+        queue = make_queue(table, requests_per_second=5.0, linger_seconds=0.5)
+        start = time.perf_counter()
+        for i in range(records):
+            queue.create({'Symbol': f'S{i}'})
+        enqueue = time.perf_counter() - start
+        await queue.flush()
+        return enqueue, time.perf_counter() - start, len(table.requests)
+
+    inline_time, inline_requests = asyncio.run(inline())
+    enqueue_time, drain_time, queued_requests = asyncio.run(queued())
+
+    print(f"📊 {records} record writes, {latency * 1000:.0f}ms Airtable latency")
+    print(f"inline: {inline_time:.2f}s caller time, {inline_requests} requests (over the 5 req/s limit)")
+    print(f"queued: {enqueue_time * 1000:.1f}ms caller time ({inline_time / enqueue_time:.0f}x), "
+          f"{queued_requests} requests drained in {drain_time:.2f}s at 5 req/s")
+
+
+if __name__ == "__main__":
+    test_writes_are_batched_and_merged()
+    test_symbol_records_are_written_by_record_id()
+    test_rows_sharing_a_symbol_are_not_lost()
+    test_journal_survives_a_restart()
+    test_rate_limit_and_rejected_records()
+    test_workflow_does_not_wait_for_airtable()
+    print("✅ Airtable writes are batched, merged and journaled behind the workflow")
+    benchmark()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test single-pass heatmap segmentation
+The shared segmentation must give the same zones as the per-helper inRange
+passes it replaces, and a burst of images must not block the event loop
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services.heatmap_segmentation import segment
+from src.services.image_processing_service import ImageProcessingService
+
+SAMPLE_IMAGE = os.path.join(os.path.dirname(__file__), 'test_images', 'sample_kingfisher.jpg')
+
+
+def make_heatmap(seed: int, width: int = 1200, height: int = 800) -> np.ndarray:
+    """Synthetic liquidation heatmap: colour blobs over a dark gradient"""
+    rng = np.random.default_rng(seed)
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    image[:] = (40, 20, 20)
+    colors = [(0, 0, 255), (40, 40, 220), (0, 200, 0), (60, 220, 60), (255, 0, 0), (220, 80, 40), (0, 220, 220)]
+    for _ in range(rng.integers(20, 60)):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        axes = (int(rng.integers(3, 60)), int(rng.integers(3, 40)))
+        color = colors[rng.integers(len(colors))]
+        cv2.ellipse(image, center, axes, float(rng.uniform(0, 180)), 0, 360, color, -1)
+    noise = rng.integers(0, 30, image.shape, dtype=np.uint8)
+    return cv2.GaussianBlur(cv2.add(image, noise), (5, 5), 0)
+
+
+def corpus(n: int = 12):
+    images = [make_heatmap(seed) for seed in range(n)]
+    sample = cv2.imread(SAMPLE_IMAGE)
+    if sample is not None:
+        images.append(sample)
+    return images
+
+
+def legacy_zones(image: np.ndarray, lower, upper, min_area: float):
+    """Zones the way each helper used to find them: its own inRange and findContours pass"""
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    mask = None
+    for low, high in zip(lower, upper):
+        part = cv2.inRange(hsv, np.array(low), np.array(high))
+        mask = part if mask is None else cv2.bitwise_or(mask, part)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return [(cv2.contourArea(c), cv2.boundingRect(c)) for c in contours if cv2.contourArea(c) > min_area], mask
+
+
+RED = ([[0, 50, 50], [170, 50, 50]], [[10, 255, 255], [180, 255, 255]])
+GREEN = ([[40, 50, 50]], [[80, 255, 255]])
+BLUE = ([[100, 50, 50]], [[130, 255, 255]])
+
+
+def legacy_analysis(image: np.ndarray):
+    """Per-pass equivalent of every HSV helper in ImageProcessingService"""
+    red_100, _ = legacy_zones(image, *RED, 100)
+    red_50, _ = legacy_zones(image, *RED, 50)
+    blue_100, _ = legacy_zones(image, *BLUE, 100)
+    green_50, green_mask = legacy_zones(image, *GREEN, 50)
+    toxic = min(np.count_nonzero(green_mask) / (image.shape[0] * image.shape[1]), 1.0)
+    return red_100, red_50, blue_100, green_50, toxic
+
+
+def shared_analysis(image: np.ndarray):
+    result = segment(image)
+    zones = lambda color, area: [(z.area, (z.x, z.y, z.width, z.height)) for z in result.zones_for(color, area)]
+    toxic = min(result.pixel_counts['green'] / result.total_pixels, 1.0)
+    return zones('red', 100), zones('red', 50), zones('blue', 100), zones('green', 50), toxic
+
+
+def test_segmentation_matches_per_helper_passes():
+    for image in corpus():
+        assert shared_analysis(image) == legacy_analysis(image)
+
+
+def test_service_reads_the_shared_result():
+    async def scenario():
+        service = ImageProcessingService(max_workers=2)
+        data = cv2.imencode('.png', make_heatmap(3))[1].tobytes()
+        heatmap = await service.analyze_liquidation_heatmap(data)
+        liquidation_map = await service.analyze_liquidation_map(data)
+        general = await service.analyze_general_image(data)
+        broken = await service.analyze_liquidation_heatmap(b'not an image')
+        service.shutdown()
+        return heatmap, liquidation_map, general, broken
+
+    heatmap, liquidation_map, general, broken = asyncio.run(scenario())
+    red_100, red_50, blue_100, green_50, toxic = legacy_analysis(cv2.imdecode(
+        cv2.imencode('.png', make_heatmap(3))[1], cv2.IMREAD_COLOR))
+
+    assert [z['area'] for z in heatmap['thermal_zones']] == [a for a, _ in red_100 + blue_100]
+    assert [z['size'] for z in liquidation_map['liquidation_zones']] == [a for a, _ in red_50 + green_50]
+    assert liquidation_map['liquidation_zones'][0]['position'] == dict(zip(('x', 'y', 'width', 'height'), red_50[0][1]))
+    assert len(general['liquidation_clusters']) == len(red_100) and general['toxic_flow'] == toxic
+    assert broken == {"error": "Failed to decode image data"}
+
+
+def test_burst_does_not_block_the_event_loop():
+    blobs = [cv2.imencode('.png', make_heatmap(seed, 2400, 1600))[1].tobytes() for seed in range(8)]
+
+    async def scenario():
+        service = ImageProcessingService(max_workers=4)
+        gaps = []
+
+        async def heartbeat():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        beat = asyncio.create_task(heartbeat())
+        results = await asyncio.gather(*(service.analyze_liquidation_heatmap(blob) for blob in blobs))
+        await asyncio.sleep(0.02)
+        beat.cancel()
+        service.shutdown()
+        return results, max(gaps)
+
+    results, max_gap = asyncio.run(scenario())
+    assert all('error' not in r and r['thermal_zones'] for r in results)
+    assert max_gap < 0.1, max_gap
+
+
+def benchmark():
+    """Colour analysis per image: one inRange/findContours pass per helper vs one shared segmentation"""
+    images = corpus(24)
+    blobs = [cv2.imencode('.png', image)[1].tobytes() for image in images]
+
+    start = time.perf_counter()
+    for image in images:
+        legacy_analysis(image)
+    legacy = (time.perf_counter() - start) / len(images)
+
+    start = time.perf_counter()
+    for image in images:
+        shared_analysis(image)
+    shared = (time.perf_counter() - start) / len(images)
+
+    async def burst(workers: int):
+        service = ImageProcessingService(max_workers=workers)
+        start = time.perf_counter()
+        await asyncio.gather(*(service.analyze_liquidation_heatmap(blob) for blob in blobs))
+        elapsed = time.perf_counter() - start
+        service.shutdown()
+        return elapsed
+
+    one_worker = asyncio.run(burst(1))
+    four_workers = asyncio.run(burst(4))
+
+    print(f"📊 {len(images)} heatmaps (1200x800 synthetic + sample)")
+    print(f"per-helper passes: {legacy * 1000:.1f}ms/image  shared segmentation: {shared * 1000:.1f}ms/image "
+          f"({legacy / shared:.1f}x)")
+    print(f"burst of {len(blobs)} uploads: 1 worker {one_worker * 1000:.0f}ms, 4 workers {four_workers * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    test_segmentation_matches_per_helper_passes()
+    test_service_reads_the_shared_result()
+    test_burst_does_not_block_the_event_loop()
+    print("✅ Heatmap segmentation runs once per image off the event loop")
+    benchmark()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Test the KingFisher workflow result cache
+Exact and near-duplicate reposts must reuse the first result, different
+images and captions must not, and identical uploads in flight must share one
+workflow run
+"""
+
+import asyncio
+import sys
+import os
+import random
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.services import workflow_orchestrator as orchestrator_module
+from src.services.market_data_service import MarketData
+from src.services.workflow_cache import WorkflowResultCache, ImageFingerprint, fingerprint_image
+from src.services.workflow_orchestrator import WorkflowOrchestrator, WorkflowResult
+
+
+def make_image(seed: int, width: int = 1000, height: int = 700) -> np.ndarray:
+    """Liquidation-map-like image: same dark template, different bars and blobs per seed"""
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), (30, 20, 20), dtype=np.uint8)
+    for x in range(0, width, 8):
+        bar = int(rng.integers(0, height // 2))
+        cv2.rectangle(image, (x, height - bar), (x + 5, height), (0, 0, 200) if rng.random() < 0.5 else (0, 180, 0), -1)
+    for _ in range(20):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        cv2.circle(image, center, int(rng.integers(5, 40)), (0, 220, 220), -1)
+    return image
+
+
+def encode(image: np.ndarray, ext: str = '.png', quality: int = 95) -> bytes:
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext == '.jpg' else []
+    return cv2.imencode(ext, image, params)[1].tobytes()
+
+
+def repost(image: np.ndarray, scale: float = 0.8) -> bytes:
+    """What a Telegram repost looks like: rescaled and recompressed"""
+    resized = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return encode(resized, '.jpg', 70)
+
+
+def test_exact_and_near_duplicates_hit_and_different_images_miss():
+    cache = WorkflowResultCache()
+    original = make_image(1)
+    cache.store(cache.fingerprint(encode(original)), ('BTCUSDT',), 'btc-result')
+
+    exact = cache.lookup(cache.fingerprint(encode(original)), ('BTCUSDT',))
+    near = cache.lookup(cache.fingerprint(repost(original)), ('BTCUSDT',))
+    assert exact.match == 'exact' and exact.entry.result == 'btc-result'
+    assert near.match == 'near' and 0 < near.distance <= cache.max_distance
+
+    assert cache.lookup(cache.fingerprint(repost(original)), ('ETHUSDT',)) is None  # other caption symbol
+    assert cache.lookup(cache.fingerprint(encode(original[:, :600])), ('BTCUSDT',)) is None  # cropped
+    for seed in range(2, 30):  # same template, different map
+        assert cache.lookup(cache.fingerprint(encode(make_image(seed))), ('BTCUSDT',)) is None
+
+    stats = cache.get_stats()
+    assert stats['exact_hits'] == 1 and stats['near_hits'] == 1 and stats['misses'] == 30
+    assert stats['hit_rate'] == round(2 / 32, 4)
+
+
+def test_band_index_finds_every_hash_within_distance():
+    rng = random.Random(3)
+    cache = WorkflowResultCache(max_distance=12)
+    stored = []
+    for i in range(300):
+        dhash = rng.getrandbits(256)
+        fingerprint = ImageFingerprint(f"sha{i}", dhash, 1.5)
+        cache.store(fingerprint, (), i)
+        stored.append(fingerprint)
+
+    for i in range(300):
+        base = stored[rng.randrange(len(stored))]
+        flips = rng.sample(range(256), rng.randrange(0, 20))
+        dhash = base.dhash
+        for bit in flips:
+            dhash ^= 1 << bit
+        hit = cache.lookup(ImageFingerprint(f"probe{i}", dhash, 1.5))
+        nearest = min(stored, key=lambda f: (f.dhash ^ dhash).bit_count())
+        distance = (nearest.dhash ^ dhash).bit_count()
+        if distance <= 12:
+            assert hit is not None and hit.distance == distance
+        else:
+            assert hit is None
+
+
+def test_retention_by_ttl_and_size():
+    cache = WorkflowResultCache(ttl_seconds=0.05, max_entries=3)
+    fingerprints = [fingerprint_image(encode(make_image(seed, 200, 140))) for seed in range(4)]
+    for i, fingerprint in enumerate(fingerprints):
+        cache.store(fingerprint, (), i)
+    assert cache.lookup(fingerprints[0]) is None and cache.get_stats()['evictions'] == 1
+    assert cache.lookup(fingerprints[3]).entry.result == 3
+
+    time.sleep(0.06)
+    assert cache.lookup(fingerprints[3]) is None
+    assert cache.get_stats()['expirations'] >= 1
+
+
+class FakeMarketService:
+    price = 100.0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return None
+
+    async def get_multiple_prices(self, symbols):
+        return {symbol: MarketData(symbol, self.price, 1e6, 1.0, 1.0, None, self.price, self.price,
+                                   datetime.now(), 'test') for symbol in symbols}
+
+
+class CountingOrchestrator(WorkflowOrchestrator):
+    """Orchestrator whose expensive workflow is a timed stand-in"""
+
+    def __init__(self, delay: float = 0.05, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.runs = 0
+
+    async def _execute_workflow(self, image_data, image_filename="", context_text=""):
+        self.runs += 1
+        await asyncio.sleep(self.delay)
+        prices = await FakeMarketService().get_multiple_prices(['BTCUSDT'])
+        report = await self._generate_symbol_report('BTCUSDT', prices['BTCUSDT'],
+                                                    {'sentiment': 'bullish', 'confidence': 0.7}, 'liquidation_map')
+        return WorkflowResult(True, 'liquidation_map', ['BTCUSDT'], ['rec1'], self.delay, [report], [], {})
+
+
+def test_orchestrator_reuses_results_and_coalesces_in_flight_copies():
+    original = make_image(7)
+
+    async def scenario():
+        orchestrator_module.market_data_service = FakeMarketService()
+        orchestrator = CountingOrchestrator(result_cache=WorkflowResultCache(), refresh_market_data=True)
+
+        # Three identical uploads at once: one run, two waiters
+        burst = await asyncio.gather(*(orchestrator.process_image_workflow(encode(original), 'map.png', 'BTCUSDT')
+                                       for _ in range(3)))
+        FakeMarketService.price = 125.0
+        reposted = await orchestrator.process_image_workflow(repost(original), 'copy.jpg', 'BTCUSDT')
+        other = await orchestrator.process_image_workflow(encode(make_image(8)), 'map.png', 'BTCUSDT')
+        uncached = await orchestrator.process_image_workflow(encode(original), 'map.png', 'BTCUSDT', use_cache=False)
+        return orchestrator, burst, reposted, other, uncached
+
+    orchestrator, burst, reposted, other, uncached = asyncio.run(scenario())
+
+    assert orchestrator.runs == 3  # first burst copy, the different image, the uncached call
+    assert sorted(r.metadata.get('cache', {}).get('hit', 'run') for r in burst) == ['inflight', 'inflight', 'run']
+    first = next(r for r in burst if 'cache' not in r.metadata)
+    assert reposted.metadata['cache']['hit'] == 'near' and reposted.metadata['cache']['market_data_refreshed']
+    assert reposted.reports_generated[0]['analysis_data']['current_price'] == 125.0
+    assert first.reports_generated[0]['analysis_data']['current_price'] == 100.0  # cached copy untouched
+    assert reposted.symbols_processed == ['BTCUSDT'] and 'cache' not in other.metadata
+
+    stats = orchestrator.result_cache.get_stats()
+    assert stats['coalesced'] == 2 and stats['near_hits'] == 1 and stats['misses'] == 2
+
+
+def benchmark(uploads: int = 200, repost_share: float = 0.8, workflow_seconds: float = 0.05):
+    """A volatile-period upload stream: every image processed vs content-addressed cache"""
+    rng = random.Random(11)
+    originals = [make_image(seed) for seed in range(int(uploads * (1 - repost_share)))]
+    stream = [encode(image) for image in originals]
+    while len(stream) < uploads:
+        stream.append(repost(rng.choice(originals), rng.choice([0.6, 0.75, 0.9])))
+    rng.shuffle(stream)
+
+    async def run(cached: bool):
+        orchestrator_module.market_data_service = FakeMarketService()
+        orchestrator = CountingOrchestrator(delay=workflow_seconds, result_cache=WorkflowResultCache(),
+                                            refresh_market_data=True)
+        start = time.perf_counter()
+        for image_data in stream:
+            await orchestrator.process_image_workflow(image_data, 'upload.jpg', 'BTCUSDT', use_cache=cached)
+        return time.perf_counter() - start, orchestrator
+
+    plain, _ = asyncio.run(run(False))
+    cached, orchestrator = asyncio.run(run(True))
+    stats = orchestrator.result_cache.get_stats()
+
+    start = time.perf_counter()
+    for image_data in stream[:50]:
+        fingerprint_image(image_data)
+    fingerprint_ms = (time.perf_counter() - start) / 50 * 1000
+
+    print(f"📊 {uploads} uploads, {repost_share:.0%} reposts, {workflow_seconds * 1000:.0f}ms simulated workflow")
+    print(f"no cache: {plain:.2f}s  cached: {cached:.2f}s ({plain / cached:.1f}x), "
+          f"hit rate {stats['hit_rate']:.0%} ({stats['exact_hits']} exact, {stats['near_hits']} near), "
+          f"workflow runs {orchestrator.runs}")
+    print(f"fingerprint cost: {fingerprint_ms:.2f}ms/image")
+
+
+if __name__ == "__main__":
+    test_exact_and_near_duplicates_hit_and_different_images_miss()
+    test_band_index_finds_every_hash_within_distance()
+    test_retention_by_ttl_and_size()
+    test_orchestrator_reuses_results_and_coalesces_in_flight_copies()
+    print("✅ Reposted images reuse cached workflow results")
+    benchmark()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test the threshold-indexed alert matching engine
+A price move must trigger exactly the alerts whose condition it made true,
+alerts created while their condition already holds must still fire, and each
+technical condition must be evaluated once per indicator snapshot however
+many alerts share it
+"""
+
+import asyncio
+import random
+import sys
+import os
+import time
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.services.alert_matching_engine import AlertMatchingEngine, PRICE_OPERATORS, price_condition_met
+from src.services.real_alert_engine import RealAlertEngine
+
+
+def became_true(previous, price, threshold, operator):
+    """Reference: the condition holds now and did not hold at the previous price"""
+    if operator == 'crosses':
+        return previous is not None and (became_true(previous, price, threshold, 'above') or
+                                         became_true(previous, price, threshold, 'below'))
+    was = previous is not None and price_condition_met(previous, threshold, operator)
+    return price_condition_met(price, threshold, operator) and not was
+
+
+def test_matches_equal_the_brute_force_transitions():
+    rng = random.Random(21)
+    engine = AlertMatchingEngine()
+    alerts = {}
+    for i in range(3000):
+        symbol = rng.choice(["BTCUSDT", "ETH/USDT:USDT", "SOLUSDT"])
+        operator = rng.choice(PRICE_OPERATORS)
+        threshold = round(rng.uniform(90, 110), rng.choice([0, 2]))
+        engine.add_price_alert(f"a{i}", symbol, threshold, operator)
+        alerts[f"a{i}"] = (symbol.replace('/USDT:USDT', 'USDT'), operator, threshold)
+
+    previous = {"BTCUSDT": 100.0}
+    engine.update_price("BTCUSDT", 100.0)
+    for step in range(600):
+        symbol = rng.choice(["BTCUSDT", "ETHUSDT", "SOLUSDT"])
+        price = previous.get(symbol, 100.0) + rng.choice([0, rng.gauss(0, 2), round(rng.gauss(0, 2))])
+        matched = engine.update_price(symbol, price)
+        expected = {
+            alert_id for alert_id, (alert_symbol, operator, threshold) in alerts.items()
+            if alert_symbol == symbol and became_true(previous.get(symbol), price, threshold, operator)
+        }
+        assert len(matched) == len(set(matched)) and set(matched) == expected, (step, symbol, price)
+        previous[symbol] = price
+
+        if step % 50 == 0:  # churn: removals, and new alerts checked against the next price once
+            for alert_id in rng.sample(sorted(alerts), 100):
+                assert engine.remove(alert_id)
+                del alerts[alert_id]
+            fresh = {}
+            for i in range(100):
+                alert_id = f"s{step}_{i}"
+                fresh[alert_id] = ("BTCUSDT", rng.choice(PRICE_OPERATORS), round(rng.uniform(90, 110), 1))
+                engine.add_price_alert(alert_id, "BTCUSDT", fresh[alert_id][2], fresh[alert_id][1])
+            price = previous["BTCUSDT"] + 0.5
+            expected = {
+                alert_id for alert_id, (_, operator, threshold) in fresh.items()
+                if price_condition_met(price, threshold, operator)
+                or became_true(previous["BTCUSDT"], price, threshold, operator)
+            } | {
+                alert_id for alert_id, (alert_symbol, operator, threshold) in alerts.items()
+                if alert_symbol == "BTCUSDT" and became_true(previous["BTCUSDT"], price, threshold, operator)
+            }
+            assert set(engine.update_price("BTCUSDT", price)) == expected
+            previous["BTCUSDT"] = price
+            alerts.update(fresh)
+
+    assert len(engine) == len(alerts) and not engine.update_price("DOGEUSDT", 1.0)
+
+
+def test_real_alert_engine_triggers_crossed_and_shared_technical_alerts():
+    engine = RealAlertEngine()
+    sent, fetches = [], []
+
+    async def send(trigger):
+        sent.append(trigger)
+
+    async def fetch(symbol):
+        fetches.append(symbol)
+        return {'rsi': 75.0, 'macd': 1.0, 'macd_signal': 2.0}
+
+    engine._send_notification = send
+    engine._fetch_technical_indicators = fetch
+
+    async def scenario():
+        await engine.add_alert("above", {'symbol': 'BTCUSDT', 'alert_type': 'PRICE',
+                                         'conditions': {'threshold': 65000, 'operator': 'above'}})
+        await engine.add_alert("cross", {'symbol': 'BTC/USDT:USDT', 'alert_type': 'PRICE',
+                                         'conditions': {'threshold': 64000, 'operator': 'crosses'}})
+        for i in range(200):
+            await engine.add_alert(f"rsi{i}", {'symbol': 'BTCUSDT', 'alert_type': 'TECHNICAL',
+                                               'conditions': {'rsi': 70 if i % 2 else 80}})
+        rounds = [await engine.process_prices({'BTCUSDT': 63000.0})]
+        await engine._check_technical_alerts()
+        rounds.append(await engine.process_prices({'BTCUSDT': 65500.0}))
+        rounds.append(await engine.process_prices({'BTCUSDT': 65600.0}))
+        await engine._check_technical_alerts()  # same snapshot: nothing new
+        return rounds
+
+    rounds = asyncio.run(scenario())
+    assert rounds == [0, 2, 0]  # above and crosses fire once, on the move through their thresholds
+    assert {t.alert_id for t in sent if t.alert_type == 'PRICE'} == {"above", "cross"}
+    technical = [t for t in sent if t.alert_type == 'TECHNICAL']
+    assert len(technical) == 100 and all(t.alert_id in {f"rsi{i}" for i in range(1, 200, 2)} for t in technical)
+    assert fetches == ['BTCUSDT'] and engine.matcher.stats['technical_evaluations'] == 2
+
+    assert asyncio.run(engine.remove_alert("above")) and engine.get_status()['matching']['alerts'] == 201
+    for i in range(200):
+        asyncio.run(engine.remove_alert(f"rsi{i}"))
+    asyncio.run(engine.remove_alert("cross"))
+    assert not engine.monitored_symbols and not engine.matcher.symbols
+
+
+def benchmark(alerts: int = 100000, symbols: int = 100, ticks: int = 20000):
+    """One price tick: per-alert condition loop vs threshold index"""
+    rng = random.Random(1)
+    names = [f"S{i}USDT" for i in range(symbols)]
+    engine = RealAlertEngine()
+    matcher = engine.matcher
+    conditions = []
+    for i in range(alerts):
+        symbol, operator = rng.choice(names), rng.choice(('above', 'below'))
+        threshold = rng.uniform(50, 150)
+        matcher.add_price_alert(f"a{i}", symbol, threshold, operator)
+        conditions.append((symbol, threshold, operator))
+    prices = {name: 100.0 for name in names}
+    for name in names:
+        matcher.update_price(name, 100.0)
+
+    start = time.perf_counter()
+    for symbol, threshold, operator in conditions:
+        engine._check_price_condition(prices[symbol], threshold, operator)
+    loop_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        symbol = rng.choice(names)
+        prices[symbol] *= 1 + rng.gauss(0, 0.001)
+        matcher.update_price(symbol, prices[symbol])
+    tick_us = (time.perf_counter() - start) / ticks * 1e6
+
+    print(f"📊 {alerts} price alerts over {symbols} symbols")
+    print(f"per-alert loop: {loop_ms:.1f}ms per check round; indexed: {tick_us:.1f}us per tick "
+          f"({matcher.stats['price_matches']} alerts crossed in {ticks} ticks)")
+
+
+if __name__ == "__main__":
+    test_matches_equal_the_brute_force_transitions()
+    test_real_alert_engine_triggers_crossed_and_shared_technical_alerts()
+    print("✅ Alerts match by threshold index and share technical evaluations")
+    benchmark()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test Cache Manager
+Two-tier (memory + SQLite) cache keeps the CacheManager API and answers expiry
+and stats from its index
+"""
+
+import json
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.utils.cache_manager import CacheManager
+
+
+def test_round_trip_and_tiers():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheManager(cache_dir=tmp)
+        value = {'symbol': 'BTCUSDT', 'scores': [1.5, 2.5], 'nested': {'ok': True}}
+        assert cache.set('analysis:BTC', value)
+        assert cache.get('analysis:BTC') == value
+        assert cache.get('analysis:BTC') is not cache.get('analysis:BTC')
+        assert cache.exists('analysis:BTC')
+        assert cache.get('missing') is None
+
+        # A fresh instance reads the same entries from L2
+        reopened = CacheManager(cache_dir=tmp)
+        assert reopened.get('analysis:BTC') == value
+        assert reopened.get_stats()['l2_hits'] == 1
+        reopened.get('analysis:BTC')
+        assert reopened.get_stats()['l1_hits'] == 1
+
+        assert cache.delete('analysis:BTC')
+        assert CacheManager(cache_dir=tmp).get('analysis:BTC') is None
+
+
+def test_expiry_is_index_driven():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheManager(cache_dir=tmp)
+        cache.set('short', 1, ttl=1)
+        cache.set('long', 2, ttl=60)
+        cache.set('when', datetime(2025, 1, 1), ttl=60)
+        time.sleep(1.1)
+
+        stats = cache.get_stats()
+        assert stats['total_entries'] == 3
+        assert stats['expired_entries'] == 1
+        assert stats['active_entries'] == 2
+        assert cache.clear_expired() == 1
+        assert cache.get('short') is None
+        assert cache.get('long') == 2
+        # Values are JSON-encoded, as in the file cache: a datetime comes back as its str()
+        assert cache.get('when') == str(datetime(2025, 1, 1))
+
+
+def test_legacy_json_files_are_migrated():
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = {'value': {'a': 1}, 'expiry': time.time() + 60, 'created': time.time(), 'key': 'legacy'}
+        expired = {'value': 2, 'expiry': time.time() - 60, 'created': time.time() - 120, 'key': 'expired'}
+        for filename, data in (('abc.cache', legacy), ('old.cache', expired)):
+            with open(os.path.join(tmp, filename), 'w') as f:
+                json.dump(data, f)
+        with open(os.path.join(tmp, 'torn.cache'), 'w') as f:
+            f.write('{"value": ')
+
+        cache = CacheManager(cache_dir=tmp)
+        assert cache.get('legacy') == {'a': 1}
+        assert cache.get('expired') is None
+        # Only the unreadable file is left behind
+        assert [f for f in os.listdir(tmp) if f.endswith('.cache')] == ['torn.cache']
+
+
+if __name__ == "__main__":
+    test_round_trip_and_tiers()
+    test_expiry_is_index_driven()
+    test_legacy_json_files_are_migrated()
+    print("✅ Cache manager round-trips values through both tiers")
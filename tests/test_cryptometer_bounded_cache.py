@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test Bounded Cryptometer Cache
+Checks the memory budget, eviction policies and stale-while-revalidate serving
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.utils.bounded_cache import BoundedTTLCache
+from test_cryptometer_concurrent_collection import start_fixture, make_system, upstream_hits
+
+
+def test_memory_budget_and_lru_eviction():
+    cache = BoundedTTLCache(max_bytes=10_000)
+    for i in range(100):
+        cache.set(f"k{i}", {'payload': 'x' * 500}, ttl=60)
+        if i == 5:
+            cache.get('k0')  # keep k0 recently used
+
+    stats = cache.get_stats()
+    assert stats['memory_bytes'] <= 10_000
+    assert stats['evictions'] > 0
+    assert 'k99' in cache
+    assert 'k1' not in cache
+
+
+def test_lfu_keeps_frequently_read_entries():
+    cache = BoundedTTLCache(max_bytes=10_000, policy='lfu')
+    cache.set('hot', {'payload': 'x' * 500}, ttl=60)
+    for _ in range(10):
+        cache.get('hot')
+    for i in range(50):
+        cache.set(f"cold{i}", {'payload': 'x' * 500}, ttl=60)
+    assert 'hot' in cache
+
+
+def test_stale_entries_back_fallback_until_retention_ends():
+    cache = BoundedTTLCache(max_stale=0.2)
+    cache.set('k', {'v': 1}, ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get('k') == (None, 'miss')
+    assert cache.get('k', serve_stale_for=1.0) == ({'v': 1}, 'stale')
+    assert cache.freshness()['fallback'] == 0
+    assert cache.get_fallback('k') == {'v': 1}
+    assert cache.freshness()['fallback'] == 1
+    time.sleep(0.2)
+    assert cache.purge_expired() == 1
+    assert cache.get_fallback('k') is None
+    cache.set('k', {'v': 2}, ttl=60)
+    assert cache.freshness() == {'fresh': 1, 'stale': 0, 'fallback': 0}
+
+
+def test_stale_while_revalidate_serves_immediately():
+    server = start_fixture()
+    upstream_hits.clear()
+    try:
+        system = make_system(server)
+        system.cache_ttl['ticker'] = 0.2
+
+        url = f"{system.base_url}/ticker/"
+        params = {'e': 'binance', 'symbol': 'BTC-USDT'}
+
+        async def scenario():
+            first, _ = await system._safe_request(url, params, 'ticker')
+            await asyncio.sleep(0.25)
+            start = time.perf_counter()
+            stale, success = await system._safe_request(url, params, 'ticker')
+            elapsed = time.perf_counter() - start
+            await asyncio.sleep(0.1)  # let the background refresh land
+            return first, stale, success, elapsed, system.get_cache_stats()
+
+        first, stale, success, elapsed, stats = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    assert success and stale == first
+    assert elapsed < 0.03  # fixture latency is 0.05s
+    assert stats['stale_serves'] == 1
+    assert sum(upstream_hits.values()) == 2
+    assert stats['fresh_entries'] == 1
+    assert stats['fallback_entries'] == 0
+
+
+if __name__ == "__main__":
+    test_memory_budget_and_lru_eviction()
+    test_lfu_keeps_frequently_read_entries()
+    test_stale_entries_back_fallback_until_retention_ends()
+    test_stale_while_revalidate_serves_immediately()
+    print("✅ Bounded cache respects its budget and serves stale data while revalidating")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test Concurrent Cryptometer Collection
+Runs the collector against a local HTTP fixture with fixed latency and checks
+that identical requests are coalesced and that fan-out beats the sequential loop
+"""
+
+import asyncio
+import json
+import sys
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.services.cryptometer_service import MultiTimeframeCryptometerSystem
+from src.utils.enhanced_rate_limiter import global_rate_limiter, RateLimitConfig
+
+LATENCY = 0.05
+upstream_hits: Counter = Counter()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        upstream_hits[self.path.split('api_key')[0]] += 1
+        time.sleep(LATENCY)
+        body = json.dumps({'success': 'true', 'data': [{'path': self.path}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fixture() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_system(server: ThreadingHTTPServer) -> MultiTimeframeCryptometerSystem:
+    global_rate_limiter.configure_api('cryptometer', RateLimitConfig(max_requests=10_000, time_window=60))
+    system = MultiTimeframeCryptometerSystem(api_key='test')
+    system.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return system
+
+
+def test_concurrent_collection_coalesces_and_is_faster():
+    server = start_fixture()
+    symbols = ['BTC', 'ETH', 'SOL', 'XRP', 'ADA']
+    endpoints = ['ticker', 'ls_ratio', 'ai_screener', 'coinlist', 'rapid_movements']
+    try:
+        sequential = make_system(server)
+        start = time.perf_counter()
+        asyncio.run(sequential.batch_collect_symbols(symbols, endpoints))
+        sequential_time = time.perf_counter() - start
+
+        upstream_hits.clear()
+        concurrent = make_system(server)
+        start = time.perf_counter()
+        results = asyncio.run(concurrent.batch_collect_symbols(symbols, endpoints, concurrent=True))
+        concurrent_time = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    # 2 per-symbol endpoints x 5 symbols + 3 symbol-independent endpoints
+    assert sum(upstream_hits.values()) == 13
+    assert all(count == 1 for count in upstream_hits.values())
+    assert all(results[s][e]['success'] for s in symbols for e in endpoints)
+    assert concurrent_time < sequential_time / 3
+    print(f"sequential {sequential_time:.2f}s, concurrent {concurrent_time:.2f}s")
+
+
+def test_in_flight_requests_are_shared():
+    server = start_fixture()
+    upstream_hits.clear()
+    try:
+        system = make_system(server)
+
+        async def collect_twice():
+            return await asyncio.gather(
+                system.collect_symbol_data('BTC'),
+                system.collect_symbol_data('BTC'),
+            )
+
+        first, second = asyncio.run(collect_twice())
+    finally:
+        server.shutdown()
+
+    assert first == second
+    assert all(count == 1 for count in upstream_hits.values())
+    assert system.get_cache_stats()['coalesced_requests'] == len(system.endpoints)
+
+
+if __name__ == "__main__":
+    test_concurrent_collection_coalesces_and_is_faster()
+    test_in_flight_requests_are_shared()
+    print("✅ Concurrent collection coalesces identical requests")
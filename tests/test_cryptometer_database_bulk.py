@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test Cryptometer Database Bulk Ingest
+Bulk executemany ingest must write the same rows as store_complete_analysis,
+and the read paths must use their indexes. The benchmark ingests a day of
+15-minute analyses for 50 symbols both ways.
+"""
+
+import sqlite3
+import sys
+import os
+import tempfile
+import time
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.database.cryptometer_database import CryptometerDatabase, CHILD_TABLES
+
+TABLES = ['cryptometer_analysis'] + list(CHILD_TABLES)
+
+
+def make_analysis(symbol: str, n: int) -> dict:
+    return {
+        'symbol': symbol,
+        'overall_score': 50 + n % 50,
+        'current_price': 100.0 + n,
+        'risk_level': 'HIGH' if n % 3 == 0 else 'LOW',
+        'position_type': 'LONG' if n % 2 else 'SHORT',
+        'professional_report': f"Report {symbol} #{n}",
+        'endpoint_data': [
+            {'endpoint_name': name, 'endpoint_url': f"/{name}", 'response_data': {'n': n},
+             'response_status': 200, 'response_time_ms': 120}
+            for name in ('ticker', 'ls_ratio', 'open_interest', 'ai_screener', 'liquidation_data_v2')
+        ],
+        'trend_indicators': [{'timeframe': tf, 'trend_type': 'bullish', 'ema_9': 1.0 + n} for tf in ('1h', '4h')],
+        'ai_predictions': [{'model_name': 'ensemble', 'prediction_timeframe': '24h', 'key_factors': ['oi', 'ls']}],
+        'market_patterns': [{'pattern_name': 'flag', 'pattern_type': 'continuation', 'pattern_confidence': 0.7}],
+        'trading_signals': [{'signal_type': 'buy' if n % 2 else 'sell', 'timeframe': '4h', 'confidence': 0.8}],
+    }
+
+
+def make_day(n_symbols: int = 50, interval_minutes: int = 15):
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    return [make_analysis(symbol, n) for n in range(24 * 60 // interval_minutes) for symbol in symbols]
+
+
+def dump(db: CryptometerDatabase):
+    """Table contents without ids and insert timestamps"""
+    result = {}
+    for table in TABLES:
+        rows = db.conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+        result[table] = [
+            {k: row[k] for k in row.keys() if k not in ('id', 'timestamp')} for row in rows
+        ]
+    return result
+
+
+def count_rows(db: CryptometerDatabase) -> int:
+    return sum(db.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES)
+
+
+def test_bulk_matches_single_inserts():
+    analyses = [make_analysis(f"SYM{i % 4}", i) for i in range(12)]
+    with tempfile.TemporaryDirectory() as tmp:
+        single = CryptometerDatabase(os.path.join(tmp, 'single.db'))
+        single_ids = [single.store_complete_analysis(a) for a in analyses]
+
+        bulk = CryptometerDatabase(os.path.join(tmp, 'bulk.db'))
+        bulk_ids = bulk.store_analyses_bulk(analyses)
+
+        assert bulk_ids == single_ids
+        assert dump(bulk) == dump(single)
+
+        # IDs keep counting after single inserts and deletions
+        bulk.store_complete_analysis(analyses[0])
+        bulk.conn.execute("DELETE FROM cryptometer_analysis WHERE id = 13")
+        bulk.conn.commit()
+        assert bulk.store_analyses_bulk(analyses[:2]) == [14, 15]
+        single.close()
+        bulk.close()
+
+
+def test_queue_and_flush():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CryptometerDatabase(os.path.join(tmp, 'queued.db'), bulk_batch_size=5)
+        for i in range(7):
+            db.queue_analysis(make_analysis('BTC', i))
+        assert db.conn.execute("SELECT COUNT(*) FROM cryptometer_analysis").fetchone()[0] == 5
+        db.close()
+
+        reopened = CryptometerDatabase(os.path.join(tmp, 'queued.db'))
+        assert reopened.conn.execute("SELECT COUNT(*) FROM cryptometer_analysis").fetchone()[0] == 7
+        assert len(reopened.search_analyses(symbol='BTC')) == 7
+        reopened.close()
+
+
+def test_bulk_after_single_row_helpers():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CryptometerDatabase(os.path.join(tmp, 'mixed.db'))
+        analysis_id = db.store_complete_analysis(make_analysis('ETH', 0))
+        # The single-row helpers leave an implicit transaction open
+        db.store_trading_signal(analysis_id, 'ETH', {'signal_type': 'buy', 'timeframe': '1h', 'confidence': 0.6})
+        assert db.conn.in_transaction
+        assert db.store_analyses_bulk([make_analysis('ETH', 1)]) == [analysis_id + 1]
+        assert db.conn.execute("SELECT COUNT(*) FROM trading_signals").fetchone()[0] == 3
+        db.close()
+
+
+def test_close_releases_the_connection_when_flush_fails():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CryptometerDatabase(os.path.join(tmp, 'closing.db'), bulk_batch_size=10)
+        db.queue_analysis({'overall_score': 1})  # no symbol: the flush raises
+        conn = db.conn
+        try:
+            db.close()
+        except sqlite3.IntegrityError:
+            pass
+        else:
+            raise AssertionError("flush error should propagate")
+        assert db.conn is None
+        try:
+            conn.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            pass
+        else:
+            raise AssertionError("connection should be closed")
+
+
+def test_read_paths_use_indexes():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CryptometerDatabase(os.path.join(tmp, 'plans.db'))
+
+        def plan(sql, params):
+            return ' '.join(row[3] for row in db.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+        signals = plan("SELECT * FROM trading_signals WHERE symbol = ? ORDER BY timestamp DESC LIMIT 10", ('BTC',))
+        assert 'idx_signals_symbol_time' in signals and 'TEMP B-TREE' not in signals
+        typed = plan("SELECT * FROM trading_signals WHERE symbol = ? AND signal_type = ? ORDER BY timestamp DESC LIMIT 10",
+                     ('BTC', 'buy'))
+        assert 'idx_signals_symbol_type_time' in typed and 'TEMP B-TREE' not in typed
+        latest = plan("SELECT * FROM cryptometer_analysis WHERE symbol = ? ORDER BY timestamp DESC LIMIT 1", ('BTC',))
+        assert 'TEMP B-TREE' not in latest
+        search = plan("SELECT * FROM cryptometer_analysis WHERE risk_level = ? ORDER BY timestamp DESC", ('HIGH',))
+        assert 'idx_crypto_risk_level' in search and 'TEMP B-TREE' not in search
+        db.close()
+
+
+def benchmark():
+    """A day of 15-minute analyses for 50 symbols: per-analysis vs bulk ingest"""
+    analyses = make_day()
+    print("🚀 CRYPTOMETER DATABASE INGEST BENCHMARK")
+    print(f"📊 {len(analyses)} analyses")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, legacy_pragmas in (('per-analysis, previous pragmas', True), ('per-analysis, WAL', False)):
+            single = CryptometerDatabase(os.path.join(tmp, f"single_{legacy_pragmas}.db"))
+            if legacy_pragmas:
+                single.conn.execute('PRAGMA journal_mode=DELETE')
+                single.conn.execute('PRAGMA synchronous=FULL')
+            start = time.perf_counter()
+            for analysis in analyses:
+                single.store_complete_analysis(analysis)
+            results[label] = time.perf_counter() - start
+            rows = count_rows(single)
+            single.close()
+
+        bulk = CryptometerDatabase(os.path.join(tmp, 'bulk.db'))
+        start = time.perf_counter()
+        for i in range(0, len(analyses), bulk.bulk_batch_size):
+            bulk.store_analyses_bulk(analyses[i:i + bulk.bulk_batch_size])
+        bulk_time = time.perf_counter() - start
+        bulk.close()
+
+    results['bulk executemany, WAL'] = bulk_time
+    for label, elapsed in results.items():
+        print(f"{label:<32} {rows / elapsed:>10,.0f} rows/s ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    test_bulk_matches_single_inserts()
+    test_queue_and_flush()
+    test_bulk_after_single_row_helpers()
+    test_close_releases_the_connection_when_flush_fails()
+    test_read_paths_use_indexes()
+    print("✅ Bulk ingest matches single inserts")
+    benchmark()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test Sharded Event Bus
+Priority lanes must keep risk events ahead of a flood of market ticks, and each
+backpressure policy must bound its queue
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.utils.event_bus import (
+    EventBus, Event, EventType, LaneConfig, BackpressurePolicy,
+    PRIORITY_LOW, PRIORITY_HIGH, PRIORITY_CRITICAL
+)
+
+
+def tick(symbol: str, price: float) -> Event:
+    return Event(type=EventType.MARKET_DATA_UPDATED, data={'symbol': symbol, 'price': price}, source='feed')
+
+
+def risk(symbol: str) -> Event:
+    return Event(type=EventType.RISK_THRESHOLD_EXCEEDED, data={'symbol': symbol}, source='risk_manager')
+
+
+def test_risk_events_skip_the_tick_flood():
+    async def scenario():
+        bus = EventBus(lanes={
+            PRIORITY_LOW: LaneConfig(maxsize=20000, policy=BackpressurePolicy.BLOCK),
+            PRIORITY_CRITICAL: LaneConfig(maxsize=100),
+        })
+        seen = []
+        bus.subscribe(EventType.MARKET_DATA_UPDATED, lambda e: (time.sleep(0.0001), seen.append('tick')))
+        bus.subscribe(EventType.RISK_THRESHOLD_EXCEEDED, lambda e: seen.append('risk'))
+        await bus.start()
+
+        for i in range(5000):
+            await bus.emit(tick(f"S{i}", float(i)))
+        await bus.emit(risk('BTC'))
+        await bus.join()
+        metrics = bus.get_metrics()
+        await bus.stop()
+        return seen, metrics
+
+    seen, metrics = asyncio.run(scenario())
+    assert len(seen) == 5001
+    assert seen.index('risk') < 5
+    risk_metrics = metrics['event_types']['risk.threshold_exceeded']
+    assert risk_metrics['processed'] == 1 and risk_metrics['max_latency_ms'] < 50
+    assert metrics['event_types']['market.data_updated']['queue_depth'] == 0
+
+
+def test_coalesce_keeps_latest_per_symbol():
+    async def scenario():
+        bus = EventBus()
+        prices = {}
+        bus.subscribe(EventType.MARKET_DATA_UPDATED, lambda e: prices.__setitem__(e.data['symbol'], e.data['price']))
+        await bus.start()
+        for price in range(100):
+            for symbol in ('BTC', 'ETH'):
+                await bus.emit(tick(symbol, float(price)))
+        await bus.join()
+        metrics = bus.get_metrics()['event_types']['market.data_updated']
+        await bus.stop()
+        return prices, metrics
+
+    prices, metrics = asyncio.run(scenario())
+    assert prices == {'BTC': 99.0, 'ETH': 99.0}
+    assert metrics['emitted'] == 200
+    assert metrics['processed'] + metrics['coalesced'] == 200
+    assert metrics['coalesced'] >= 190
+
+
+def test_drop_policies_bound_the_queue():
+    async def scenario(policy):
+        bus = EventBus(lanes={PRIORITY_LOW: LaneConfig(maxsize=10, policy=policy),
+                              PRIORITY_HIGH: LaneConfig(maxsize=10)})
+        received = []
+        bus.subscribe(EventType.MARKET_DATA_UPDATED, lambda e: received.append(e.data['price']))
+        await bus.start()
+        # No await between emits: the worker cannot drain until the loop yields
+        for price in range(50):
+            await bus.emit(Event(type=EventType.MARKET_DATA_UPDATED, data={'price': price}))
+        assert bus.get_metrics()['lanes'][PRIORITY_LOW]['queue_depth'] == 10
+        await bus.join()
+        metrics = bus.get_metrics()['event_types']['market.data_updated']
+        await bus.stop()
+        return received, metrics
+
+    newest, metrics = asyncio.run(scenario(BackpressurePolicy.DROP_NEWEST))
+    assert newest == list(range(10)) and metrics['dropped'] == 40
+
+    oldest, metrics = asyncio.run(scenario(BackpressurePolicy.DROP_OLDEST))
+    assert oldest == list(range(40, 50)) and metrics['dropped'] == 40
+
+
+def test_block_policy_applies_backpressure():
+    async def scenario():
+        bus = EventBus(lanes={PRIORITY_LOW: LaneConfig(maxsize=5), PRIORITY_HIGH: LaneConfig(maxsize=5)})
+        received = []
+
+        async def slow(event):
+            await asyncio.sleep(0.001)
+            received.append(event.data['n'])
+
+        bus.subscribe(EventType.TRADE_EXECUTED, slow)
+        await bus.start()
+        for n in range(30):
+            await bus.emit(Event(type=EventType.TRADE_EXECUTED, data={'n': n}))
+            assert bus.get_metrics()['lanes'][PRIORITY_HIGH]['queue_depth'] <= 5
+        await bus.join()
+        await bus.stop()
+        return received
+
+    assert asyncio.run(scenario()) == list(range(30))
+
+
+def test_ring_buffer_history():
+    async def scenario():
+        bus = EventBus(max_history_size=50)
+        await bus.start()
+        for i in range(120):
+            await bus.emit(tick('BTC', float(i)) if i % 2 else risk('BTC'))
+        await bus.stop()
+        return bus
+
+    bus = asyncio.run(scenario())
+    assert len(bus.event_history) == 50
+    assert [e.data.get('price') for e in bus.get_event_history(limit=3)] == [117.0, None, 119.0]
+    risks = bus.get_event_history(EventType.RISK_THRESHOLD_EXCEEDED, limit=10)
+    assert len(risks) == 10 and risks[-1] is bus.event_history[-2]
+
+
+def benchmark(n_ticks: int = 50000):
+    """Risk event latency during a tick flood: one shared FIFO lane vs priority lanes"""
+    async def scenario(bus):
+        bus.subscribe(EventType.MARKET_DATA_UPDATED, lambda e: sum(range(50)))
+        bus.subscribe(EventType.RISK_THRESHOLD_EXCEEDED, lambda e: None)
+        await bus.start()
+        start = time.perf_counter()
+        for i in range(n_ticks):
+            await bus.emit(tick(f"S{i % 500}", float(i)))
+            if i % 1000 == 0:
+                await bus.emit(risk('BTC'))
+            if i % 100 == 0:
+                await asyncio.sleep(0)  # the feed yields between websocket frames
+        await bus.join()
+        elapsed = time.perf_counter() - start
+        metrics = bus.get_metrics()['event_types']
+        await bus.stop()
+        return elapsed, metrics
+
+    print(f"📊 {n_ticks} market ticks over 500 symbols, a risk event every 1000 ticks")
+    single_lane = EventBus(lanes={PRIORITY_LOW: LaneConfig(maxsize=n_ticks * 2)})
+    for label, bus in (('single FIFO lane', single_lane), ('priority lanes', EventBus())):
+        elapsed, metrics = asyncio.run(scenario(bus))
+        ticks = metrics['market.data_updated']
+        risks = metrics['risk.threshold_exceeded']
+        print(f"{label:<18} {elapsed:.2f}s  ticks delivered: {ticks['processed']:>6}  "
+              f"risk p95: {risks['p95_latency_ms']:>8.3f}ms  max: {risks['max_latency_ms']:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    test_risk_events_skip_the_tick_flood()
+    test_coalesce_keeps_latest_per_symbol()
+    test_drop_policies_bound_the_queue()
+    test_block_policy_applies_backpressure()
+    test_ring_buffer_history()
+    print("✅ Sharded event bus keeps risk events ahead of market ticks")
+    benchmark()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Test Learning Feature Store
+Feature columns must be stable by name across restarts, training sets must
+come from the memmap instead of JSON, and predictions recorded before the
+store existed must be migrated into it
+"""
+
+import asyncio
+import json
+import multiprocessing
+import sqlite3
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.learning.feature_store import FeatureStore, encode_features
+from src.learning.self_learning_system import SelfLearningSystem, Prediction
+
+
+def make_features(i: int) -> dict:
+    return {'rsi': float(i % 100), 'trend': 'up' if i % 2 else 'down', 'bullish': i % 3 == 0,
+            'volumes': [float(i), float(i + 1)], 'meta': None}
+
+
+def test_columns_are_stable_by_name_across_reopen():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore(tmp)
+        store.append('agent', {'rsi': 70.0, 'trend': 'up'})
+        store.append('agent', {'macd': 1.5, 'rsi': 30.0})
+        columns = store.columns('agent')
+        assert columns == {'rsi': 0, 'trend': 1, 'macd': 2}
+
+        reopened = FeatureStore(tmp)
+        assert reopened.columns('agent') == columns
+        assert reopened.row_count('agent') == 2
+        # Key order no longer matters, unknown names are ignored at inference
+        vector = reopened.vectorize('agent', {'macd': 2.0, 'unseen': 9.0, 'rsi': 50.0})
+        assert vector[:3].tolist() == [50.0, 0.0, 2.0] and vector.sum() == 52.0
+        assert reopened.matrix('agent')[1, :3].tolist() == [30.0, 0.0, 1.5]
+
+
+def test_encoding_matches_legacy_value_rules():
+    encoded = dict(encode_features(make_features(4)))
+    assert encoded['rsi'] == 4.0 and encoded['bullish'] == 0.0 and encoded['meta'] == 0.0
+    assert encoded['volumes#len'] == 2.0 and encoded['volumes#mean'] == 4.5
+    assert 0.0 <= encoded['trend'] < 1.0
+    # Stable string codes: same value in a fresh interpreter gives the same number
+    assert encoded['trend'] == dict(encode_features({'trend': 'down'}))['trend']
+
+
+def test_growth_keeps_rows_and_views_are_zero_copy():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore(tmp)
+        rows = store.append_many('agent', [make_features(i) for i in range(3000)])
+        assert rows == list(range(3000))
+        matrix = store.matrix('agent')
+        assert isinstance(matrix, np.memmap) and matrix.dtype == np.float32 and matrix.shape == (3000, 50)
+        assert matrix[2999, 0] == 99.0
+        assert np.array_equal(store.ref('agent', [5, 2999]).load(), store.take('agent', [5, 2999]))
+
+
+def test_learning_system_trains_from_store_and_migrates_legacy_rows():
+    async def scenario(tmp):
+        db_path = os.path.join(tmp, 'learning.db')
+        # A database written before the feature store: no feature_row column
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            CREATE TABLE predictions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, prediction_id TEXT UNIQUE, agent_name TEXT,
+                symbol TEXT, prediction_type TEXT, predicted_value REAL, confidence REAL, features TEXT,
+                timestamp TEXT, actual_value REAL, outcome_timestamp TEXT, accuracy REAL, error REAL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        for i in range(60):
+            conn.execute(
+                "INSERT INTO predictions (prediction_id, agent_name, symbol, prediction_type, predicted_value, "
+                "confidence, features, timestamp, actual_value, accuracy, error) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                (f"old-{i}", 'agent', 'BTC', 'score', 50.0, 0.7, json.dumps(make_features(i)),
+                 datetime.now().isoformat(), 50.0 + i % 10, 0.9, i % 10)
+            )
+        conn.commit()
+        conn.close()
+
+        system = SelfLearningSystem(db_path=db_path, training_workers=1)
+        for i in range(60, 100):
+            await system.record_prediction(Prediction(
+                agent_name='agent', symbol='BTC', prediction_type='score', predicted_value=50.0,
+                confidence=0.7, features=make_features(i), timestamp=datetime.now(), prediction_id=f"new-{i}"
+            ))
+            await system.record_outcome(f"new-{i}", 50.0 + i % 10)
+        await system.trainer.wait_idle()
+
+        rows = sqlite3.connect(db_path).execute(
+            "SELECT COUNT(*), COUNT(feature_row), COUNT(DISTINCT feature_row) FROM predictions").fetchone()
+        corrected = await system.get_learning_correction('agent', 'score', make_features(7), 50.0)
+        system.trainer.shutdown()
+
+        # A restarted system vectorizes the same features identically
+        restarted = SelfLearningSystem(db_path=db_path, training_workers=1)
+        same = np.array_equal(restarted.feature_store.vectorize('agent', make_features(7)),
+                              system.feature_store.vectorize('agent', make_features(7)))
+        return rows, corrected, system.get_training_stats(), same
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows, corrected, stats, same = asyncio.run(scenario(tmp))
+
+    assert rows == (100, 100, 100)
+    assert stats['completed'] == 1
+    assert corrected[0] != 50.0
+    assert same
+
+
+def test_rerecorded_prediction_reuses_its_feature_row():
+    async def scenario(tmp):
+        system = SelfLearningSystem(db_path=os.path.join(tmp, 'learning.db'), training_workers=1)
+        for features in (make_features(1), {'rsi': 12.0}):
+            await system.record_prediction(Prediction(
+                agent_name='agent', symbol='BTC', prediction_type='score', predicted_value=50.0,
+                confidence=0.7, features=features, timestamp=datetime.now(), prediction_id='same-id'
+            ))
+        system.trainer.shutdown()
+        row = sqlite3.connect(system.db_path).execute(
+            "SELECT feature_row FROM predictions WHERE prediction_id = 'same-id'").fetchone()[0]
+        return row, system.feature_store
+
+    with tempfile.TemporaryDirectory() as tmp:
+        row, store = asyncio.run(scenario(tmp))
+        assert row == 0 and store.row_count('agent') == 1
+        # The row holds the second recording only
+        assert np.array_equal(store.take('agent', [0])[0], store.vectorize('agent', {'rsi': 12.0}))
+
+
+def _append_from_process(root: str, worker: int, count: int):
+    store = FeatureStore(root)
+    for i in range(count):
+        store.append('agent', {'shared': float(worker), f'worker{worker}': float(i)})
+
+
+def test_concurrent_writer_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        context = multiprocessing.get_context('spawn')
+        # Enough rows to force several file growths while the writers interleave
+        workers = [context.Process(target=_append_from_process, args=(tmp, w, 700)) for w in range(4)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        assert all(process.exitcode == 0 for process in workers)
+
+        store = FeatureStore(tmp)
+        columns = store.columns('agent')
+        assert store.row_count('agent') == 2800
+        assert sorted(columns) == ['shared'] + [f'worker{w}' for w in range(4)]
+        matrix = np.asarray(store.matrix('agent'))
+        for w in range(4):
+            mine = matrix[matrix[:, columns['shared']] == w]
+            # Every row landed once, in order, with its own worker column
+            assert mine[:, columns[f'worker{w}']].tolist() == [float(i) for i in range(700)]
+
+
+def test_store_directories_are_created_lazily():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, 'feature_store')
+        store = FeatureStore(root)
+        assert not os.path.exists(root)
+        store.append('agent', {'rsi': 1.0})
+        assert os.path.isdir(os.path.join(root, 'agent'))
+
+
+def benchmark(n_rows: int = 1000, repeats: int = 20):
+    """Assembling a 1000-row training set: JSON decode + vectorize vs memmap gather"""
+    features = [make_features(i) for i in range(n_rows)]
+    blobs = [json.dumps(f) for f in features]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore(tmp)
+        rows = store.append_many('agent', features)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            np.stack([store.vectorize('agent', json.loads(blob)) for blob in blobs])
+        decode = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            store.ref('agent', rows).load()
+        gather = (time.perf_counter() - start) / repeats
+
+    print(f"📊 {n_rows} rows x 50 features")
+    print(f"JSON decode + vectorize: {decode * 1000:.2f}ms  memmap gather: {gather * 1000:.2f}ms "
+          f"({decode / gather:.0f}x)")
+
+
+if __name__ == "__main__":
+    test_columns_are_stable_by_name_across_reopen()
+    test_encoding_matches_legacy_value_rules()
+    test_growth_keeps_rows_and_views_are_zero_copy()
+    test_learning_system_trains_from_store_and_migrates_legacy_rows()
+    test_rerecorded_prediction_reuses_its_feature_row()
+    test_concurrent_writer_processes()
+    test_store_directories_are_created_lazily()
+    print("✅ Feature store keeps stable columns and feeds training from the memmap")
+    benchmark()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Test Historical Pattern Aggregate Index
+Statistics and top-k rankings must be maintained in memory, written behind
+to SQLite in batches, and reload identically after a restart
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.services.historical_pattern_database import (
+    HistoricalPatternDatabase, HistoricalPattern, TimeFrame, Direction
+)
+
+
+def make_pattern(outcome: str, patterns, symbol: str = 'ETH', direction: Direction = Direction.LONG,
+                 timeframe: TimeFrame = TimeFrame.DAYS_7, profit: float = 5.0, drawdown: float = -2.0,
+                 age_days: int = 0) -> HistoricalPattern:
+    return HistoricalPattern(
+        id=str(uuid.uuid4()), symbol=symbol, timestamp=datetime(2025, 1, 1) + timedelta(days=age_days),
+        direction=direction, timeframe=timeframe, endpoint_scores={'ticker': 60.0},
+        endpoint_patterns={'ticker': ['high_volume']}, price_at_entry=3000.0, volume_data={'24h_volume': 1e6},
+        market_conditions={'volatility': 0.02}, price_changes={timeframe.value: profit}, max_profit=profit,
+        max_drawdown=drawdown, final_outcome=outcome, win_rate_score=0.8 if outcome == 'WIN' else 0.2,
+        confidence_at_entry=0.7, patterns_identified=list(patterns), trigger_conditions={'day': age_days}
+    )
+
+
+def random_patterns(n: int, seed: int = 5):
+    rng = random.Random(seed)
+    return [
+        make_pattern(rng.choice(['WIN', 'WIN', 'LOSS', 'BREAKEVEN']),
+                     rng.sample([f'pattern_{i}' for i in range(40)], 3),
+                     symbol=rng.choice(['ETH', 'BTC']), direction=rng.choice([Direction.LONG, Direction.SHORT]),
+                     timeframe=rng.choice(list(TimeFrame)), profit=rng.uniform(0.5, 12), drawdown=-rng.uniform(0.2, 5),
+                     age_days=i)
+        for i in range(n)
+    ]
+
+
+def test_statistics_follow_the_ema_rules():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = HistoricalPatternDatabase(os.path.join(tmp, 'patterns.db'))
+        db.store_historical_patterns([
+            make_pattern('WIN', ['breakout'], profit=5.0),
+            make_pattern('LOSS', ['breakout'], drawdown=-3.0),
+            make_pattern('WIN', ['breakout'], profit=7.0),
+            make_pattern('WIN', ['breakout'], profit=7.0),
+        ])
+        row = sqlite3.connect(db.db_path).execute('''
+            SELECT total_occurrences, successful_trades, avg_profit, avg_loss, max_consecutive_wins,
+                   max_consecutive_losses, confidence_level
+            FROM pattern_statistics WHERE pattern_type = 'breakout'
+        ''').fetchone()
+        db.close()
+
+    avg_profit = 0.9 * (0.9 * 5.0 + 0.1 * 7.0) + 0.1 * 7.0
+    assert row[:2] == (4, 3)
+    assert abs(row[2] - avg_profit) < 1e-9 and abs(row[3] - 0.3) < 1e-9
+    assert row[4:] == (2, 1, 0.04)
+
+
+def test_top_k_matches_a_full_ranking():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = HistoricalPatternDatabase(os.path.join(tmp, 'patterns.db'), flush_batch_size=100)
+        patterns = random_patterns(3000)
+        # Interleave reads so the heap is exercised between updates, not only rebuilt at the end
+        for start in range(0, len(patterns), 250):
+            db.store_historical_patterns(patterns[start:start + 250])
+            db.get_top_patterns('ETH', Direction.LONG, TimeFrame.DAYS_7)
+
+        for (symbol, direction, timeframe), aggregates in db._aggregates.items():
+            expected = sorted(aggregates.values(), reverse=True,
+                              key=lambda s: (s.probability_score, s.win_rate, s.total_occurrences, s.pattern_type))
+            top = db.get_top_patterns(symbol, Direction(direction), TimeFrame(timeframe))
+            assert [t.pattern_signature for t in top] == [s.pattern_type for s in expected[:10]]
+            assert [t.rank for t in top] == list(range(1, len(top) + 1))
+
+        stored = sqlite3.connect(db.db_path).execute(
+            "SELECT pattern_signature FROM top_patterns WHERE symbol = 'BTC' AND direction = 'SHORT' "
+            "AND timeframe = '1m' ORDER BY rank").fetchall()
+        assert [s for (s,) in stored] == [t.pattern_signature for t in
+                                          db.get_top_patterns('BTC', Direction.SHORT, TimeFrame.MONTH_1)]
+        db.close()
+
+
+def test_writes_are_batched_and_reads_answer_from_memory():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'patterns.db')
+        db = HistoricalPatternDatabase(path, flush_batch_size=50, flush_interval=3600)
+        for pattern in random_patterns(49):
+            db.store_historical_pattern(pattern)
+
+        count = lambda: sqlite3.connect(path).execute('SELECT COUNT(*) FROM historical_patterns').fetchone()[0]
+        assert count() == 0 and db.write_stats['flushes'] == 0
+        stats = next(iter(db._aggregates[('ETH', 'LONG', '7d')].values()))
+        score = db.get_pattern_probability_score('ETH', [stats.pattern_type, 'unknown'], Direction.LONG, TimeFrame.DAYS_7)
+        assert score == stats.probability_score * stats.confidence_level
+
+        db.store_historical_pattern(random_patterns(50, seed=9)[0])
+        assert count() == 50 and db.write_stats['flushes'] == 1
+
+        db.store_historical_pattern(random_patterns(51, seed=11)[0])
+        assert db.get_database_stats()['historical_patterns_count'] == 51  # SQL reads flush first
+        db.close()
+
+
+def test_restart_reloads_the_same_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'patterns.db')
+        db = HistoricalPatternDatabase(path)
+        db.store_historical_patterns(random_patterns(2000))
+        query = ('ETH', ['pattern_3', 'pattern_7', 'pattern_11'], Direction.SHORT, TimeFrame.H24_48)
+        before = (db.get_pattern_probability_score(*query),
+                  db.get_top_patterns('ETH', Direction.SHORT, TimeFrame.H24_48),
+                  db.get_historical_analysis('BTC')['reliability_assessment'])
+        db.close()
+
+        reopened = HistoricalPatternDatabase(path)
+        after = (reopened.get_pattern_probability_score(*query),
+                 reopened.get_top_patterns('ETH', Direction.SHORT, TimeFrame.H24_48),
+                 reopened.get_historical_analysis('BTC')['reliability_assessment'])
+        reopened.close()
+
+    assert before == after
+    assert before[1] and all(top.trigger_conditions for top in before[1])
+
+
+def test_quiet_periods_are_flushed_in_the_background():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'patterns.db')
+        db = HistoricalPatternDatabase(path, flush_batch_size=256, flush_interval=0.05)
+        for pattern in random_patterns(10):
+            db.store_historical_pattern(pattern)
+        # No further store call arrives; the flusher thread writes the batch on its own
+        deadline = time.monotonic() + 2.0
+        count = lambda: sqlite3.connect(path).execute('SELECT COUNT(*) FROM historical_patterns').fetchone()[0]
+        while count() < 10 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert count() == 10
+        db.close()
+        assert db._flusher is None
+
+
+def test_streaks_continue_across_restarts():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'patterns.db')
+        db = HistoricalPatternDatabase(path)
+        db.store_historical_patterns([make_pattern('WIN', ['breakout']) for _ in range(2)])
+        db.close()
+
+        reopened = HistoricalPatternDatabase(path)
+        reopened.store_historical_patterns([make_pattern('WIN', ['breakout']) for _ in range(2)])
+        stats = reopened._aggregates[('ETH', 'LONG', '7d')]['breakout']
+        reopened.close()
+
+    assert stats.max_consecutive_wins == 4
+
+
+def benchmark(n: int = 3000):
+    """Backfilling patterns: one transaction per pattern vs batched write-behind"""
+    patterns = random_patterns(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        per_pattern = HistoricalPatternDatabase(os.path.join(tmp, 'single.db'), flush_batch_size=1)
+        start = time.perf_counter()
+        for pattern in patterns:
+            per_pattern.store_historical_pattern(pattern)
+        single = time.perf_counter() - start
+        per_pattern.close()
+
+        batched = HistoricalPatternDatabase(os.path.join(tmp, 'bulk.db'))
+        start = time.perf_counter()
+        batched.store_historical_patterns(patterns)
+        bulk = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(10000):
+            batched.get_pattern_probability_score('ETH', ['pattern_1', 'pattern_2'], Direction.LONG, TimeFrame.DAYS_7)
+        lookup = (time.perf_counter() - start) / 10000
+        batched.close()
+
+    print(f"📊 {n} patterns x 3 pattern types")
+    print(f"per-pattern commits: {single * 1000:.0f}ms  batched: {bulk * 1000:.0f}ms ({single / bulk:.1f}x)")
+    print(f"probability score lookup: {lookup * 1e6:.1f}µs")
+
+
+if __name__ == "__main__":
+    test_statistics_follow_the_ema_rules()
+    test_top_k_matches_a_full_ranking()
+    test_writes_are_batched_and_reads_answer_from_memory()
+    test_restart_reloads_the_same_index()
+    test_quiet_periods_are_flushed_in_the_background()
+    test_streaks_continue_across_restarts()
+    print("✅ Pattern statistics are indexed in memory and written behind in batches")
+    benchmark()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test Incremental Indicators Engine
+Streaming updates must match the full-window engine, and saved state must
+resume exactly where it stopped
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.services.technical_indicators_engine import TechnicalIndicatorsEngine
+from src.services.incremental_indicators_engine import IncrementalIndicatorsEngine
+from src.services.technical_indicators_alerts import TechnicalIndicatorsAlertService
+
+
+def make_candles(n: int = 400, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    volume = rng.uniform(1_000, 10_000, n)
+    return [{'timestamp': i, 'close': c, 'volume': v} for i, (c, v) in enumerate(zip(close, volume))]
+
+
+def test_streaming_matches_full_window():
+    candles = make_candles()
+    engine = IncrementalIndicatorsEngine()
+    for candle in candles:
+        snapshot = engine.update('BTCUSDT', '1h', candle)
+
+    frame = pd.DataFrame(candles)
+    frame['open'] = frame['high'] = frame['low'] = frame['close']
+    reference = TechnicalIndicatorsEngine().calculate_all_indicators(frame)
+
+    for key in ('ema_9', 'ema_21', 'ema_50', 'ema_200'):
+        assert np.isclose(snapshot['ema']['values'][key], reference['ema']['values'][key])
+    assert np.isclose(snapshot['rsi']['rsi_current'], reference['rsi']['rsi_current'])
+    for key in ('macd', 'signal', 'histogram'):
+        assert np.isclose(snapshot['macd']['values'][key], reference['macd']['values'][key])
+    assert snapshot['macd']['cross_signal'] == reference['macd']['cross_signal']
+    for key in ('upper', 'middle', 'lower'):
+        assert np.isclose(snapshot['bollinger']['values'][key], reference['bollinger']['values'][key])
+    assert np.isclose(snapshot['volume']['values']['obv'], reference['volume']['values']['obv'])
+    assert np.isclose(snapshot['stoch_rsi']['values']['k'], reference['stoch_rsi']['values']['k'])
+
+
+def test_state_round_trip():
+    candles = make_candles()
+    continuous = IncrementalIndicatorsEngine()
+    for candle in candles:
+        expected = continuous.update('ETHUSDT', '4h', candle)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'indicator_state.json')
+        first = IncrementalIndicatorsEngine(path)
+        first.warm_up('ETHUSDT', '4h', candles[:250])
+        first.save_state()
+
+        resumed = IncrementalIndicatorsEngine(path)
+        for candle in candles[250:]:
+            snapshot = resumed.update('ETHUSDT', '4h', candle)
+
+    assert snapshot == expected
+
+
+def test_duplicate_candles_are_ignored():
+    engine = IncrementalIndicatorsEngine()
+    candles = make_candles(50)
+    for candle in candles:
+        engine.update('SOLUSDT', '15m', candle)
+    before = engine.get_snapshot('SOLUSDT', '15m')
+    assert engine.update('SOLUSDT', '15m', dict(candles[-1], close=1.0)) is None
+    assert engine.get_snapshot('SOLUSDT', '15m') == before
+
+
+def trend_reversal_candles():
+    """A slide then a recovery: a MACD bullish signal cross lands on candle 60"""
+    closes = list(np.linspace(200, 100, 60)) + list(np.linspace(100, 160, 30))
+    return [{'timestamp': i, 'close': c, 'volume': 1_000.0} for i, c in enumerate(closes)]
+
+
+def count_rows(db_path: str, table: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_closed_candle_fires_a_real_cross_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'alerts.db')
+        service = TechnicalIndicatorsAlertService(db_path=db_path)
+        fired = {}
+        for candle in trend_reversal_candles():
+            for alert in service.process_closed_candle('BTCUSDT', '1h', candle):
+                fired.setdefault((alert.indicator, alert.condition), []).append(candle['timestamp'])
+
+        assert fired[('MACD', 'signal_bullish')] == [60]
+        assert fired[('EMA', 'golden_cross')] == [71]
+        stored = sum(len(timestamps) for timestamps in fired.values())
+        assert count_rows(db_path, 'technical_alerts') == stored
+
+
+def test_replayed_candles_do_not_refire_alerts():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'alerts.db')
+        service = TechnicalIndicatorsAlertService(db_path=db_path)
+        candles = trend_reversal_candles()
+        for candle in candles[:61]:
+            service.process_closed_candle('BTCUSDT', '1h', candle)
+        alerts, crosses = count_rows(db_path, 'technical_alerts'), count_rows(db_path, 'cross_events')
+        snapshot = service.streaming_engine.get_snapshot('BTCUSDT', '1h')
+
+        # The crossing candle and an older one arrive again, e.g. after a reconnect
+        assert service.process_closed_candle('BTCUSDT', '1h', candles[60]) == []
+        assert service.process_closed_candle('BTCUSDT', '1h', candles[42]) == []
+        assert count_rows(db_path, 'technical_alerts') == alerts
+        assert count_rows(db_path, 'cross_events') == crosses
+        assert service.streaming_engine.get_snapshot('BTCUSDT', '1h') == snapshot
+
+
+def test_same_candle_ema_crosses_are_stored_separately():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'alerts.db')
+        service = TechnicalIndicatorsAlertService(db_path=db_path)
+        engine = service.streaming_engine
+        for candle in make_candles(220):
+            snapshot = engine.update('BTCUSDT', '1d', candle)
+        # 9/21 and 50/200 both turning bullish on one candle
+        snapshot['ema'].update(signal='golden_cross', short_signal='bullish_cross')
+        snapshot['macd'].update(cross_signal='none', zero_cross='none')
+
+        alerts = [alert for alert in service._check_streaming_alerts('BTCUSDT', '1d', snapshot)
+                  if alert.indicator == 'EMA']
+        service._store_alerts(alerts)
+
+        assert len(alerts) == 2 and len({alert.alert_id for alert in alerts}) == 2
+        assert 'EMA 50/200' in alerts[0].message and 'EMA 9/21' in alerts[1].message
+        with sqlite3.connect(db_path) as conn:
+            stored = conn.execute("SELECT COUNT(*) FROM technical_alerts WHERE indicator = 'EMA'").fetchone()[0]
+        assert stored == 2
+
+
+if __name__ == "__main__":
+    test_streaming_matches_full_window()
+    test_state_round_trip()
+    test_duplicate_candles_are_ignored()
+    test_closed_candle_fires_a_real_cross_once()
+    test_replayed_candles_do_not_refire_alerts()
+    test_same_candle_ema_crosses_are_stored_separately()
+    print("✅ Incremental indicators match the full-window engine")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test the vectorized min/max batch engine
+Batch recalibration must reproduce calculate_min_max and the Cowen full-cycle
+regression for every symbol, and incremental updates from running sums must
+track a full refit as new daily closes arrive
+"""
+
+import logging
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from scipy import stats
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.services.min_max_calculator import MinMaxCalculator
+from src.services.min_max_batch_engine import MinMaxBatchEngine
+from src.services.cowen_cycle_based_calculator import CowenCycleBasedCalculator
+
+logging.disable(logging.INFO)
+
+
+def make_history(seed: int, days: int) -> list:
+    """Log-growth trend with a four-year cycle and noise, one close a day"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(1, days + 1)
+    log_price = (1.5 + seed % 7) + 0.9 * np.log(t) + 0.6 * np.sin(t / 230.0 + seed) + np.cumsum(rng.normal(0, 0.02, days))
+    start = datetime(2018, 1, 1, 6 if seed % 2 else 0)
+    return [{'date': start + timedelta(days=int(i)), 'close': float(price)} for i, price in enumerate(np.exp(log_price))]
+
+
+def close(a: float, b: float) -> bool:
+    return np.isclose(a, b, rtol=1e-7, atol=1e-9)
+
+
+def test_batch_matches_the_per_symbol_calculator():
+    histories = {f"S{i}": make_history(i, 60 + i * 97) for i in range(12)}
+    calculator = MinMaxCalculator()
+    engine = MinMaxBatchEngine(calculator)
+    for symbol, history in histories.items():
+        engine.add_history(symbol, history)
+
+    results = engine.recalibrate()
+    for symbol, history in histories.items():
+        expected = calculator.calculate_min_max(symbol, history)
+        if not expected:
+            assert results[symbol] == {} and symbol not in calculator.regression_states
+            continue
+        result = results[symbol]
+        for field in ('min_price', 'max_price', 'current_price', 'current_risk', 'confidence_score'):
+            assert close(result[field], expected[field]), (symbol, field, result[field], expected[field])
+        for name, bounds in expected['methods'].items():
+            assert close(result['methods'][name]['min'], bounds['min']) and close(result['methods'][name]['max'], bounds['max']), (symbol, name)
+
+    cowen = CowenCycleBasedCalculator()
+    for symbol, fit in engine.full_cycle_regressions().items():
+        history = histories[symbol]
+        expected = cowen.calculate_full_cycle_regression([p['date'] for p in history], [p['close'] for p in history])
+        assert fit.keys() == expected.keys() and all(close(fit[key], expected[key]) for key in fit), symbol
+    assert engine.get_stats()['symbols_calibrated'] == 11 and engine.get_stats()['symbols_skipped'] == 1
+
+
+def test_incremental_updates_follow_a_full_refit():
+    history = make_history(3, 900)
+    calculator = MinMaxCalculator()
+    engine = MinMaxBatchEngine(calculator)
+    engine.add_history("ETH", history[:800])
+    bounds = engine.recalibrate()["ETH"]
+    recalibrated = bounds['methods']
+
+    for day in history[800:]:
+        bounds = calculator.update_bounds_incrementally("ETH", bounds, [day['close']], [day['date']])
+    state = calculator.regression_states["ETH"]
+    prices = [p['close'] for p in history]
+    days = np.arange(1, len(history) + 1)
+
+    reference = stats.linregress(np.log(days), np.log(prices))
+    fit = state.regression()
+    assert close(fit['slope'], reference.slope) and close(fit['intercept'], reference.intercept)
+    assert close(fit['r_squared'], reference.rvalue ** 2) and fit['days_analyzed'] == 900
+    for name, method in (('statistical_distribution', calculator.statistical_distribution_bounds),
+                         ('fibonacci_levels', calculator.fibonacci_bounds)):
+        low, high = method(prices)
+        assert close(bounds['methods'][name]['min'], low) and close(bounds['methods'][name]['max'], high), name
+    assert bounds['update_type'] == 'incremental' and bounds['current_price'] == prices[-1]
+    for name in ('support_resistance', 'cycle_analysis'):  # kept until the next batch run
+        assert bounds['methods'][name] == recalibrated[name]
+
+    # Undated closes are the following days; symbols without running sums keep the EMA update
+    calculator.update_bounds_incrementally("ETH", bounds, [prices[-1] * 1.01, prices[-1] * 1.02])
+    assert state.last_day == 902 and state.n == 902
+    legacy = calculator.update_bounds_incrementally("XRP", {'min_price': 1.0, 'max_price': 2.0}, [2.5])
+    assert legacy['max_price'] == 2.5 * 1.05 and 'methods' not in legacy
+
+
+def benchmark(symbols: int = 300, days: int = 1500, ticks: int = 10000):
+    """Nightly recalibration: per-symbol calculate_min_max vs one batch run"""
+    histories = {f"S{i}": make_history(i, days) for i in range(symbols)}
+    calculator = MinMaxCalculator()
+
+    start = time.perf_counter()
+    for symbol, history in histories.items():
+        calculator.calculate_min_max(symbol, history)
+    loop_s = time.perf_counter() - start
+
+    engine = MinMaxBatchEngine(calculator)
+    start = time.perf_counter()
+    for symbol, history in histories.items():
+        engine.add_history(symbol, history)
+    load_s = time.perf_counter() - start
+    start = time.perf_counter()
+    results = engine.recalibrate()
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fits = engine.full_cycle_regressions()
+    regression_ms = (time.perf_counter() - start) * 1000
+
+    bounds = results["S0"]
+    start = time.perf_counter()
+    for i in range(ticks):
+        bounds = calculator.update_bounds_incrementally("S0", bounds, [bounds['current_price'] * 1.0001])
+    tick_us = (time.perf_counter() - start) / ticks * 1e6
+
+    print(f"📊 {symbols} symbols x {days} daily closes")
+    print(f"per-symbol calculate_min_max: {loop_s:.2f}s; batch recalibrate: {batch_s:.2f}s (+{load_s:.2f}s loading)")
+    print(f"full-cycle regressions for {len(fits)} symbols: {regression_ms:.0f}ms; incremental update: {tick_us:.1f}us per close")
+
+
+if __name__ == "__main__":
+    test_batch_matches_the_per_symbol_calculator()
+    test_incremental_updates_follow_a_full_refit()
+    print("✅ Batch recalibration matches the calculator and running sums track new closes")
+    benchmark()
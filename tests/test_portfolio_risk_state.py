@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test the incremental portfolio risk state
+Running exposure, cluster, drawdown and correlation aggregates must match a
+from-scratch recomputation after any sequence of position updates, removals
+and price ticks, and RiskGuardAgent's pre-trade check must read them without
+scanning positions
+"""
+
+import asyncio
+import math
+import random
+import sys
+import os
+import time
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.agents.risk_guard.portfolio_risk_state import PortfolioRiskState, base_asset
+from src.agents.risk_guard.risk_guard_agent import RiskGuardAgent
+
+SYMBOLS = ["BTCUSDT", "ETH/USDT:USDT", "SOLUSDT", "AVAXUSDT", "ADAUSDT", "DOGEUSDT", "PEPEUSDT", "XYZUSDT"]
+
+
+def brute_force(state: PortfolioRiskState) -> dict:
+    """Recompute every aggregate from the positions"""
+    positions = list(state.positions.values())
+    variance = 0.0
+    for a in positions:
+        for b in positions:
+            if a is b:
+                rho = 1.0
+            elif a.cluster == b.cluster:
+                rho = state.intra_cluster_correlation
+            else:
+                rho = state.cross_cluster_correlation
+            variance += rho * a.exposure * b.exposure
+    clusters = {}
+    for position in positions:
+        clusters[position.cluster] = clusters.get(position.cluster, 0.0) + abs(position.exposure)
+    return {
+        'gross': sum(abs(p.exposure) for p in positions),
+        'net': sum(p.exposure for p in positions),
+        'pnl': sum(p.unrealized_pnl for p in positions),
+        'largest': max((abs(p.exposure) for p in positions), default=0.0),
+        'correlated': math.sqrt(max(variance, 0.0)),
+        'clusters': clusters
+    }
+
+
+def close(a: float, b: float) -> bool:
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+
+def test_running_aggregates_match_a_full_recomputation():
+    rng = random.Random(24)
+    state = PortfolioRiskState()
+    peak = 0.0
+    for step in range(3000):
+        symbol = rng.choice(SYMBOLS)
+        action = rng.random()
+        if action < 0.45:
+            entry = rng.uniform(1, 100)
+            state.set_position(symbol, rng.uniform(10, 1000), side=rng.choice(["long", "short"]),
+                               entry_price=entry if rng.random() < 0.7 else None)
+        elif action < 0.6:
+            state.remove(symbol)
+        else:
+            state.update_price(symbol, rng.uniform(1, 100))
+
+        expected = brute_force(state)
+        peak = max(peak, expected['gross'])
+        assert close(state.gross_exposure, expected['gross']) and close(state.net_exposure, expected['net']), step
+        assert close(state.unrealized_pnl, expected['pnl']) and close(state.largest_position(), expected['largest'])
+        assert close(state.correlated_risk, expected['correlated']), step
+        assert {c: round(v, 6) for c, v in state.cluster_gross.items()} == {c: round(v, 6) for c, v in expected['clusters'].items()}
+        assert close(state.peak_value, peak)
+        assert close(state.drawdown, (peak - expected['gross']) / peak if peak else 0.0)
+
+        if step % 100 == 0 and symbol in state:  # what-if matches actually adding the trade
+            position = state.positions[symbol]
+            what_if = state.correlated_risk_after(symbol, 250.0, "short")
+            trial = PortfolioRiskState()
+            for other in state.positions.values():
+                trial.set_position(other.symbol, abs(other.exposure), "short" if other.direction < 0 else "long")
+            trial.set_position(symbol, abs(position.exposure - 250.0), "short" if position.exposure - 250.0 < 0 else "long")
+            assert close(what_if, trial.correlated_risk)
+
+    state.rebuild()
+    assert close(state.correlated_risk, brute_force(state)['correlated'])
+    assert base_asset("ETH/USDT:USDT") == "ETH" and state.cluster_of("SOLUSDT") == state.cluster_of("AVAXUSDT")
+
+
+def test_risk_guard_reads_the_aggregates():
+    agent = RiskGuardAgent()
+
+    async def scenario():
+        for symbol, size in (("SOLUSDT", 200.0), ("AVAXUSDT", 300.0), ("ADAUSDT", 100.0), ("BTCUSDT", 400.0)):
+            await agent.update_position({"symbol": symbol, "position_size": size, "entry_price": 10.0})
+        same_cluster = await agent.check_trade_risk({"symbol": "DOTUSDT", "position_size": 100.0})
+        other_cluster = await agent.check_trade_risk({"symbol": "DOGEUSDT", "position_size": 100.0})
+        before = agent.portfolio.correlated_risk
+        await agent.update_price("BTCUSDT", 5.0)  # BTC halves: 1000 -> 800
+        status = await agent.get_risk_status()
+        await agent._update_risk_metrics()
+        await agent.remove_position("SOLUSDT")
+        return same_cluster, other_cluster, before, status
+
+    same_cluster, other_cluster, before, status = asyncio.run(scenario())
+    assert not same_cluster["approved"] and "correlation" in same_cluster["reason"]
+    assert other_cluster["approved"] and before < other_cluster["correlated_risk_after"] < before + 100.0
+    assert status["current_drawdown"] == 0.2 and status["portfolio"]["unrealized_pnl"] == -200.0
+    assert agent.active_positions["BTCUSDT"].position_size == 200.0
+    assert agent.risk_metrics["largest_position"] == 300.0 and agent.risk_metrics["total_exposure"] == 800.0
+    assert agent.current_portfolio_value == 600.0 and agent.peak_portfolio_value == 1000.0
+
+
+def benchmark(sizes=(10, 1000, 10000), checks: int = 2000):
+    """Pre-trade check cost as the portfolio grows"""
+    print("📊 check_trade_risk latency by portfolio size")
+    for size in sizes:
+        agent = RiskGuardAgent()
+        agent.max_drawdown = 1.0
+
+        async def scenario():
+            for i in range(size):
+                await agent.update_position({"symbol": f"C{i}USDT", "position_size": 1.0})
+            positions = list(agent.active_positions.values())
+
+            start = time.perf_counter()
+            for _ in range(checks):
+                # What each check used to do: sum every position twice
+                sum(p.position_size for p in positions)
+                sum(p.position_size for p in positions)
+            scan_us = (time.perf_counter() - start) / checks * 1e6
+
+            start = time.perf_counter()
+            for i in range(checks):
+                await agent.check_trade_risk({"symbol": "BTCUSDT", "position_size": 20.0})
+            check_us = (time.perf_counter() - start) / checks * 1e6
+
+            start = time.perf_counter()
+            for i in range(checks):
+                agent.portfolio.update_price(f"C{i % size}USDT", 1.0)
+                agent.portfolio.set_position(f"C{i % size}USDT", 1.0 + i % 3)
+            update_us = (time.perf_counter() - start) / checks / 2 * 1e6
+            return scan_us, check_us, update_us
+
+        scan_us, check_us, update_us = asyncio.run(scenario())
+        print(f"{size:>6} positions: from-scratch sums {scan_us:8.1f}us; incremental check {check_us:5.1f}us; "
+              f"position update {update_us:4.1f}us")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    test_running_aggregates_match_a_full_recomputation()
+    test_risk_guard_reads_the_aggregates()
+    print("✅ Portfolio risk aggregates stay exact and pre-trade checks read them in O(1)")
+    benchmark()
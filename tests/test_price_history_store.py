@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Test the columnar price history store
+Range reads must match a scan of the source data, daily updates must only
+ever append (or replace today's bar), the legacy CSV layouts must import
+into one merged series per symbol, and CSV history older than a synced
+series must still reach the store and the historical price reads
+"""
+
+import asyncio
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.services.price_history_store import (
+    PriceHistoryStore, PriceBars, INITIAL_CAPACITY, symbol_for_csv, import_csv_directory,
+    bars_from_coingecko, bars_from_binance_klines
+)
+
+DAY = 86400
+EPOCH = int(datetime(2015, 1, 1, tzinfo=timezone.utc).timestamp())
+
+
+def make_bars(symbol: str, days: int, start: int = EPOCH, seed: int = 0) -> PriceBars:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    records = [(start + i * DAY + 3600, c * 0.99, c * 1.02, c * 0.97, c, 1e6 + i, c * 1e7)
+               for i, c in enumerate(close.tolist())]
+    return PriceBars.from_records(symbol, '1d', records)
+
+
+def test_range_reads_match_a_scan_and_survive_growth_and_reopen():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceHistoryStore(tmp)
+        bars = make_bars('BTCUSDT', INITIAL_CAPACITY * 3 + 17)
+        assert (bars.timestamp % DAY == 0).all()  # floored to the bar open
+        # Appended in chunks so the file grows through several capacities
+        for lo in range(0, len(bars), 500):
+            chunk = PriceBars('BTCUSDT', '1d', *(getattr(bars, name)[lo:lo + 500] for name in
+                                                 ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'market_cap')))
+            store.append(chunk)
+
+        reopened = PriceHistoryStore(tmp)
+        rng = np.random.default_rng(1)
+        for _ in range(200):
+            start, end = sorted(rng.integers(EPOCH - 10 * DAY, EPOCH + (len(bars) + 10) * DAY, 2).tolist())
+            mask = (bars.timestamp >= start) & (bars.timestamp <= end)
+            got = reopened.read('btcusdt', start, end)
+            assert np.array_equal(got.timestamp, bars.timestamp[mask])
+            assert np.array_equal(got.close, bars.close[mask]) and np.array_equal(got.volume, bars.volume[mask])
+
+        window = reopened.read('BTCUSDT', datetime(2016, 3, 1), '2016-03-31')
+        assert len(window) == 31 and window.dates[0] == np.datetime64('2016-03-01')
+        assert reopened.read('ETHUSDT') is None and reopened.symbols() == ['BTCUSDT']
+        assert len(reopened.read('BTCUSDT').to_frame()) == len(bars)
+
+
+def test_updates_are_append_only():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceHistoryStore(tmp)
+        assert store.append(make_bars('ETHUSDT', 100)) == 100
+
+        # Overlapping refetch: old days ignored, the last day replaced, new days appended
+        refetch = make_bars('ETHUSDT', 10, start=EPOCH + 95 * DAY, seed=5)
+        assert store.append(refetch) == 5
+        series = store.read('ETHUSDT')
+        assert len(series) == 105 and series.close[99] == refetch.close[4]
+        assert series.close[94] == make_bars('ETHUSDT', 100).close[94]
+        assert store.append(refetch) == 0  # idempotent
+        assert store.last_timestamp('ETHUSDT') == datetime.fromtimestamp(EPOCH + 104 * DAY, tz=timezone.utc)
+
+        # Today's partial bar from CoinGecko is replaced by the next run
+        now = EPOCH + 105 * DAY
+        store.append(bars_from_coingecko('ETHUSDT', {'prices': [[now * 1000, 10.0], [(now + 600) * 1000, 11.0]],
+                                                     'total_volumes': [[now * 1000, 5.0]]}))
+        store.append(bars_from_binance_klines('ETHUSDT', [[now * 1000, '11', '13', '9', '12', '7']]))
+        last = store.read('ETHUSDT', now)
+        assert len(last) == 1 and (last.open[0], last.high[0], last.close[0], last.volume[0]) == (11, 13, 12, 7)
+        assert np.isnan(last.market_cap[0])
+
+
+def test_legacy_csvs_import_into_one_series_per_symbol():
+    files = {
+        # CoinMarketCap export: ';', quoted, newest first, with a snapshot timestamp column
+        'Bitcoin_7_1_2008-7_1_2025_historical_data_coinmarketcap.csv': (
+            '"timeOpen";"timeClose";"timeHigh";"timeLow";"name";"open";"high";"low";"close";"volume";"marketCap";"timestamp"\n'
+            '"2025-01-03T00:00:00.000Z";"2025-01-03T23:59:59.999Z";"";"";"2781";3.0;3.5;2.5;3.2;300;3000;"2025-01-03T23:59:59.999Z"\n'
+            '"2025-01-02T00:00:00.000Z";"2025-01-02T23:59:59.999Z";"";"";"2781";2.0;2.5;1.5;2.2;200;2000;"2025-01-02T23:59:59.999Z"\n'
+        ),
+        # CoinGecko export: price only, overlaps the CoinMarketCap days and extends them
+        'btc-usd-max.csv': (
+            'snapped_at,price,market_cap,total_volume\n'
+            '2025-01-01 00:00:00 UTC,1.0,1000,100\n'
+            '2025-01-02 00:00:00 UTC,9.9,9999,999\n'
+            '2025-01-04 00:00:00 UTC,4.0,4000,400\n'
+        ),
+        # The updater's own output
+        'Eth_binance_365d_historical_data.csv': 'Date;Open;High;Low;Close;Volume;Market_Cap\n2025-01-01;1;2;0.5;1.5;10;0\n',
+        'atom-usd-max.csv': 'snapped_at,price,market_cap,total_volume\n2025-01-01 00:00:00 UTC,7.0,70,7\n',
+        'notes.csv': 'a,b\n1,2\n'
+    }
+    assert symbol_for_csv('Avalanche_1_1_2020-1_1_2025_historical_data_coinmarketcap.csv') == 'AVAXUSDT'
+    assert symbol_for_csv('XRP_1_1_2020-1_1_2025_historical_data_coinmarketcap.csv') == 'XRPUSDT'
+    assert symbol_for_csv('BTCUSDT_historical.csv') == 'BTCUSDT' and symbol_for_csv('notes.csv') is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'csv')
+        os.makedirs(source)
+        for name, content in files.items():
+            with open(os.path.join(source, name), 'w') as f:
+                f.write(content)
+        store = PriceHistoryStore(os.path.join(tmp, 'store'))
+
+        imported = import_csv_directory(store, source)
+        assert imported == {'BTCUSDT': 4, 'ETHUSDT': 1, 'ATOMUSDT': 1}
+        btc = store.read('BTCUSDT')
+        assert btc.dates.astype('datetime64[D]').astype(str).tolist() == ['2025-01-01', '2025-01-02', '2025-01-03', '2025-01-04']
+        assert btc.close.tolist() == [1.0, 2.2, 3.2, 4.0]  # CoinMarketCap OHLC wins on overlapping days
+        assert btc.high.tolist()[1:3] == [2.5, 3.5] and btc.market_cap.tolist()[1] == 2000
+        assert store.read('ETHUSDT').low.tolist() == [0.5]
+
+        assert import_csv_directory(store, source) == {'BTCUSDT': 0, 'ETHUSDT': 0, 'ATOMUSDT': 0}
+
+
+def write_history_csv(path: str, bars: PriceBars):
+    bars.to_frame().rename_axis('timestamp').tz_localize(None).to_csv(path)
+
+
+def test_csv_history_older_than_a_synced_series_is_merged_in_front():
+    from src.services.daily_price_updater import DailyPriceUpdater
+
+    history = make_bars('BTCUSDT', INITIAL_CAPACITY + 700)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'csv')
+        os.makedirs(source)
+        store = PriceHistoryStore(os.path.join(tmp, 'store'))
+        # A sync seeded only the last year before the CSVs were imported
+        synced = PriceBars('BTCUSDT', '1d', *(getattr(history, name)[-365:] for name in
+                                              ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'market_cap')))
+        store.append(synced)
+        write_history_csv(os.path.join(source, 'BTCUSDT_historical.csv'), history)
+
+        updater = DailyPriceUpdater(history_data_path=source, db_path=os.path.join(tmp, 'none.db'), price_store=store)
+        assert updater.import_existing_files(['BTCUSDT', 'ETHUSDT']) == {'BTCUSDT': len(history) - 365}
+        merged = PriceHistoryStore(os.path.join(tmp, 'store')).read('BTCUSDT')
+        assert np.array_equal(merged.timestamp, history.timestamp)
+        assert np.allclose(merged.close, history.close) and np.array_equal(merged.volume, history.volume)
+
+        # Unchanged files are not re-read; a changed one is merged again
+        assert updater.import_existing_files(['BTCUSDT']) == {}
+        extended = make_bars('BTCUSDT', 30, start=EPOCH - 30 * DAY, seed=9)
+        write_history_csv(os.path.join(source, 'BTCUSDT_historical.csv'), extended)
+        os.utime(os.path.join(source, 'BTCUSDT_historical.csv'), (time.time() + 5, time.time() + 5))
+        assert updater.import_existing_files() == {'BTCUSDT': 30}
+        assert store.read('BTCUSDT').timestamp[0] == EPOCH - 30 * DAY and len(store.read('BTCUSDT')) == len(history) + 30
+
+
+def test_historical_reads_fall_back_when_the_store_starts_late():
+    from src.services import real_time_price_service as service_module
+
+    history = make_bars('SOLUSDT', 900, start=int(time.time()) // DAY * DAY - 899 * DAY)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceHistoryStore(os.path.join(tmp, 'store'))
+        store.append(PriceBars('SOLUSDT', '1d', *(getattr(history, name)[-365:] for name in
+                                                  ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'market_cap'))))
+        service = service_module.RealTimePriceService()
+        service.historical_data_path = tmp
+        end = datetime.utcnow()
+
+        original = service_module.price_history_store
+        service_module.price_history_store = store
+        try:
+            # No CSV: the truncated store slice is still the best answer
+            assert len(asyncio.run(service.get_historical_prices('SOLUSDT', end - timedelta(days=800), end))) == 365
+
+            write_history_csv(os.path.join(tmp, 'SOLUSDT_historical.csv'), history)
+            long_range = asyncio.run(service.get_historical_prices('SOLUSDT', end - timedelta(days=800), end))
+            short_range = asyncio.run(service.get_historical_prices('SOLUSDT', end - timedelta(days=100), end))
+        finally:
+            service_module.price_history_store = original
+
+    assert len(long_range) == 800 and long_range[0].timestamp <= end - timedelta(days=799)
+    assert len(short_range) == 100
+
+
+def benchmark(symbols: int = 20, days: int = 3650, queries: int = 500):
+    """90-day range reads: pandas re-reading per-symbol CSVs vs the memory-mapped store"""
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceHistoryStore(os.path.join(tmp, 'store'))
+        names = [f"S{i}USDT" for i in range(symbols)]
+        for i, symbol in enumerate(names):
+            bars = make_bars(symbol, days, seed=i)
+            bars.to_frame().rename_axis('timestamp').to_csv(os.path.join(tmp, f"{symbol}_historical.csv"))
+            store.append(bars)
+
+        rng = np.random.default_rng(2)
+        picks = [(names[rng.integers(symbols)], int(rng.integers(days - 90))) for _ in range(queries)]
+
+        start = time.perf_counter()
+        for symbol, offset in picks:
+            df = pd.read_csv(os.path.join(tmp, f"{symbol}_historical.csv"))
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            low = pd.Timestamp(EPOCH + offset * DAY, unit='s', tz='UTC')
+            df.loc[(df['timestamp'] >= low) & (df['timestamp'] <= low + timedelta(days=90))]
+        csv_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for symbol, offset in picks:
+            store.read(symbol, EPOCH + offset * DAY, EPOCH + (offset + 90) * DAY)
+        store_time = time.perf_counter() - start
+
+        print(f"📊 {queries} 90-day range reads over {symbols} symbols x {days} daily bars")
+        print(f"CSV re-read: {csv_time * 1000 / queries:.2f}ms/read  store: {store_time * 1000 / queries:.3f}ms/read "
+              f"({csv_time / store_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    test_range_reads_match_a_scan_and_survive_growth_and_reopen()
+    test_updates_are_append_only()
+    test_legacy_csvs_import_into_one_series_per_symbol()
+    test_csv_history_older_than_a_synced_series_is_merged_in_front()
+    test_historical_reads_fall_back_when_the_store_starts_late()
+    print("✅ Price history is stored columnar with append-only updates and a merging CSV import")
+    benchmark()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test the shared price snapshot service
+Every symbol must come from one bulk ticker call shared by concurrent readers,
+published snapshots must be immutable, and mini-ticker stream messages must
+update the snapshot and push the changed symbols to the alert engine. A local
+HTTP server stands in for Binance.
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.services.price_snapshot_service import PriceSnapshotService
+from src.services.real_alert_engine import RealAlertEngine
+from src.utils.enhanced_rate_limiter import EnhancedRateLimiter, RateLimitConfig
+
+
+class FakeBinance:
+    """Bulk and per-symbol /ticker/24hr plus the all-market mini-ticker stream"""
+
+    def __init__(self, symbols: int = 300, latency: float = 0.0):
+        self.latency = latency
+        self.prices = {f"C{i}USDT": 10.0 + i for i in range(symbols)}
+        self.prices["BTCUSDT"] = 64000.0
+        self.requests = []
+        self.fail = False
+        self.stream_messages = []
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/api/v3/ticker/24hr', self.ticker)
+        app.router.add_get('/ws/all', self.stream)
+        return app
+
+    def _ticker(self, symbol: str) -> dict:
+        price = self.prices[symbol]
+        return {'symbol': symbol, 'lastPrice': str(price), 'openPrice': str(price / 1.02), 'highPrice': str(price * 1.01),
+                'lowPrice': str(price * 0.97), 'priceChangePercent': '2.000', 'volume': '1000', 'quoteVolume': '5000',
+                'count': 42}
+
+    async def ticker(self, request: web.Request) -> web.Response:
+        self.requests.append(dict(request.query))
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            return web.json_response({'code': -1003}, status=503)
+        if 'symbol' in request.query:
+            return web.json_response(self._ticker(request.query['symbol']))
+        return web.json_response([self._ticker(symbol) for symbol in self.prices])
+
+    async def stream(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for message in self.stream_messages:
+            await ws.send_str(json.dumps(message))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(10)
+        return ws
+
+
+def make_service(server: TestServer, **kwargs) -> PriceSnapshotService:
+    limiter = EnhancedRateLimiter()
+    limiter.configure_api('binance', RateLimitConfig(max_requests=1000, time_window=60, jitter=False))
+    return PriceSnapshotService(
+        base_url=str(server.make_url('/api/v3')),
+        stream_url=str(server.make_url('/ws/all')),
+        rate_limiter=limiter,
+        **kwargs
+    )
+
+
+def mini(symbol: str, close: float, open_price: float) -> dict:
+    return {'e': '24hrMiniTicker', 'E': 0, 's': symbol, 'c': str(close), 'o': str(open_price),
+            'h': str(close), 'l': str(open_price), 'v': '10', 'q': '20'}
+
+
+def test_one_bulk_call_shared_by_concurrent_readers():
+    binance = FakeBinance(latency=0.05)
+
+    async def scenario():
+        server = TestServer(binance.app())
+        await server.start_server()
+        service = make_service(server, max_age_seconds=0.2)
+        try:
+            snapshots = await asyncio.gather(*[service.get_snapshot() for _ in range(50)])
+            cached = await service.get_ticker('BTCUSDT')
+            requests_when_fresh = len(binance.requests)
+            await asyncio.sleep(0.25)
+            binance.prices['BTCUSDT'] = 65000.0
+            refreshed = await service.get_snapshot()
+            binance.fail = True
+            await asyncio.sleep(0.25)
+            stale = await service.get_snapshot()
+            return service, snapshots, cached, requests_when_fresh, refreshed, stale
+        finally:
+            await service.close()
+            await server.close()
+
+    service, snapshots, cached, requests_when_fresh, refreshed, stale = asyncio.run(scenario())
+    assert requests_when_fresh == 1 and binance.requests[0] == {}  # one bulk call, no symbol parameter
+    assert all(snapshot is snapshots[0] for snapshot in snapshots) and len(snapshots[0]) == 301
+    assert cached['lastPrice'] == 64000.0 and cached['priceChangePercent'] == 2.0 and 'count' not in cached
+    assert refreshed.price('BTCUSDT') == 65000.0 and snapshots[0].price('BTCUSDT') == 64000.0
+    assert stale is refreshed and service.stats['refresh_errors'] == 1  # failed refresh serves the last snapshot
+    assert service.stats['coalesced_reads'] == 49
+
+    for mapping, key in ((snapshots[0].tickers, 'X'), (cached, 'lastPrice')):
+        try:
+            mapping[key] = 1.0
+            assert False, "snapshots must be read-only"
+        except TypeError:
+            pass
+
+
+def test_stream_updates_push_to_the_alert_engine():
+    binance = FakeBinance(symbols=5)
+    binance.stream_messages = [
+        [mini('BTCUSDT', 64500.0, 63000.0), mini('C1USDT', 11.5, 11.0)],
+        [mini('BTCUSDT', 65100.0, 63000.0)]
+    ]
+    sent, changes = [], []
+
+    async def scenario():
+        server = TestServer(binance.app())
+        await server.start_server()
+        service = make_service(server)
+        engine = RealAlertEngine(price_feed=service)
+
+        async def send(trigger):
+            sent.append(trigger)
+
+        engine._send_notification = send
+        service.subscribe(lambda snapshot, changed: changes.append(list(changed)))
+        try:
+            await engine.add_alert('btc', {'symbol': 'BTC/USDT:USDT', 'alert_type': 'PRICE',
+                                           'conditions': {'threshold': 65000, 'operator': 'above'}})
+            await engine.start()
+            deadline = time.monotonic() + 5
+            while service.stats['stream_messages'] < 2 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            await engine.stop()
+            # Stopping the engine ends the stream task; the HTTP session stays for REST reads
+            assert service._stream_task is None and not service.stats['stream_connected']
+            assert service._session is not None and not service._session.closed
+            return service.snapshot, service.get_stats(), len(binance.requests)
+        finally:
+            await service.close()
+            await server.close()
+
+    snapshot, stats, bulk_calls = asyncio.run(scenario())
+    assert bulk_calls == 1 and stats['stream_messages'] == 2 and snapshot.source == 'stream'
+    assert snapshot.price('BTCUSDT') == 65100.0 and snapshot.get('C1USDT')['priceChangePercent'] == 4.545
+    assert len(snapshot) == 6 and snapshot.price('C2USDT') == 12.0  # unchanged symbols carried over
+    assert changes[-2:] == [['BTCUSDT', 'C1USDT'], ['BTCUSDT']]
+    assert [t.alert_id for t in sent] == ['btc'] and sent[0].trigger_price == 65100.0  # pushed, fired once
+
+
+def benchmark(symbols: int = 200, latency: float = 0.02):
+    """Alert refresh: one ticker request per symbol vs one bulk snapshot call"""
+    binance = FakeBinance(symbols=symbols, latency=latency)
+    names = list(binance.prices)[:symbols]
+
+    async def scenario():
+        server = TestServer(binance.app())
+        await server.start_server()
+        service = make_service(server)
+        try:
+            async with aiohttp.ClientSession() as session:
+                start = time.perf_counter()
+                for name in names:
+                    async with session.get(server.make_url('/api/v3/ticker/24hr'), params={'symbol': name}) as response:
+                        await response.json()
+                sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            snapshot = await service.get_snapshot()
+            prices = snapshot.prices(names)
+            bulk = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(1000):
+                (await service.get_snapshot()).prices(names)
+            cached_us = (time.perf_counter() - start) / 1000 * 1e6
+            return sequential, bulk, cached_us, len(prices)
+        finally:
+            await service.close()
+            await server.close()
+
+    sequential, bulk, cached_us, count = asyncio.run(scenario())
+    print(f"📊 {count} alert symbols, {latency * 1000:.0f}ms exchange latency")
+    print(f"per-symbol requests: {sequential * 1000:.0f}ms; bulk snapshot: {bulk * 1000:.0f}ms; "
+          f"fresh snapshot read: {cached_us:.0f}us")
+
+
+if __name__ == "__main__":
+    test_one_bulk_call_shared_by_concurrent_readers()
+    test_stream_updates_push_to_the_alert_engine()
+    print("✅ One bulk ticker call and the mini-ticker stream feed every alert path")
+    benchmark()
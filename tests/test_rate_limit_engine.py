@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test the sliding-window rate limit engine
+Windows must slide exactly, idle keys must be evicted, and with Redis every
+sync must be one batched script call that lets processes share a limit -
+while a Redis outage only falls back to in-process limits
+"""
+
+import asyncio
+import math
+import random
+import sys
+import os
+import time
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.middleware.rate_limit_engine import SlidingWindowRateLimiter, SYNC_SCRIPT, SYNC_BUCKETS, get_rate_limit_metrics
+
+LIMITS = {
+    "auth": {"requests": 5, "window": 300},
+    "api": {"requests": 100, "window": 600}
+}
+
+
+class FakeRedis:
+    """Stand-in for Redis running SYNC_SCRIPT: the same bucket arithmetic in Python"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.calls = []
+        self.down = False
+
+    def register_script(self, script):
+        assert script == SYNC_SCRIPT
+
+        def run(keys, args):
+            if self.down:
+                raise ConnectionError("Redis unavailable")
+            self.calls.append((list(keys), list(args)))
+            now = float(args[0])
+            totals = []
+            for i, key in enumerate(keys):
+                window, added = float(args[1 + 2 * i]), int(args[2 + 2 * i])
+                bucket = math.floor(now * SYNC_BUCKETS / window)
+                buckets = self.hashes.setdefault(key, {})
+                if added:
+                    buckets[bucket] = buckets.get(bucket, 0) + added
+                for old in [b for b in buckets if b <= bucket - SYNC_BUCKETS]:
+                    del buckets[old]
+                totals.append(sum(buckets.values()))
+            return totals
+        return run
+
+
+def test_window_slides_exactly():
+    limiter = SlidingWindowRateLimiter(LIMITS)
+    rng = random.Random(5)
+    accepted = []
+    now = 0.0
+    for _ in range(5000):
+        now += rng.expovariate(1 / 40)
+        decision = limiter.check("auth", "1.2.3.4", now)
+        in_window = sum(1 for t in accepted if t > now - 300)
+        assert decision.allowed == (in_window < 5), (now, in_window)
+        if decision.allowed:
+            accepted.append(now)
+            assert decision.remaining == 4 - in_window
+        else:
+            oldest = [t for t in accepted if t > now - 300][0]
+            assert abs(decision.retry_after - (oldest + 300 - now)) < 1e-9
+    assert limiter.stats["allowed"] == len(accepted) and limiter.stats["rejected"] == 5000 - len(accepted)
+    assert limiter.stats["by_category"]["auth"]["rejected"] > 0
+
+
+def test_streaks_and_eviction():
+    limiter = SlidingWindowRateLimiter(LIMITS, eviction_interval=10)
+    for _ in range(5):
+        assert limiter.check("auth", "a", 0.0).allowed
+    streak = [limiter.check("auth", "a", 1.0).rejected_streak for _ in range(6)]
+    assert streak == [1, 2, 3, 4, 5, 6]
+    limiter.check("api", "b", 1.0)
+
+    limiter.check("api", "c", 400.0)  # past the eviction interval: "a" idle for > 300s, "b" still inside 600s
+    assert set(limiter.windows) == {("api", "b"), ("api", "c")} and limiter.stats["evicted_keys"] == 1
+    assert limiter.check("auth", "a", 400.0).remaining == 4  # fresh window after eviction
+    assert get_rate_limit_metrics()  # registered for the monitoring route
+
+
+def test_processes_share_the_limit_through_batched_syncs():
+    redis = FakeRedis()
+    workers = [SlidingWindowRateLimiter(LIMITS, redis_client=redis) for _ in range(2)]
+
+    async def scenario():
+        # 60 requests on each worker for one client, then 40 clients on worker 0
+        for worker in workers:
+            for _ in range(60):
+                worker.check("api", "9.9.9.9", time.monotonic())
+        for i in range(40):
+            workers[0].check("api", f"10.0.0.{i}", time.monotonic())
+        synced = [await worker.sync() for worker in workers]
+        await workers[0].sync()
+        return synced
+
+    synced = asyncio.run(scenario())
+    assert synced == [41, 1] and len(redis.calls) == 3  # one script call per sync, all keys batched
+    assert redis.hashes["rate_limit:api:9.9.9.9"] and sum(redis.hashes["rate_limit:api:9.9.9.9"].values()) == 120
+    assert workers[0].windows[("api", "9.9.9.9")].remote == 60
+
+    # The shared limit of 100 is already exceeded: both workers now reject the client
+    assert not workers[0].check("api", "9.9.9.9").allowed and not workers[1].check("api", "9.9.9.9").allowed
+    assert workers[0].check("api", "10.0.0.1").allowed
+
+
+def test_redis_outage_falls_back_to_local_limits():
+    redis = FakeRedis()
+    limiter = SlidingWindowRateLimiter(LIMITS, redis_client=redis, retry_seconds=0.05)
+    for _ in range(3):
+        limiter.check("auth", "x")
+    limiter.windows[("auth", "x")].remote = 2  # another worker's traffic from an earlier sync
+    redis.down = True
+
+    async def scenario():
+        assert await limiter.sync() == 0
+        metrics = limiter.get_metrics()
+        local = [limiter.check("auth", "x").allowed for _ in range(3)]
+        redis.down = False
+        await asyncio.sleep(0.06)
+        return metrics, local, await limiter.sync()
+
+    metrics, local, recovered = asyncio.run(scenario())
+    assert metrics["sync_errors"] == 1 and metrics["redis_available"] is False
+    assert local == [True, True, False]  # stale remote counts dropped, local limit of 5 still holds
+    assert recovered == 1 and limiter.get_metrics()["redis_available"] is True
+    assert sum(redis.hashes["rate_limit:auth:x"].values()) == 5  # nothing accepted during the outage is lost
+
+
+def benchmark(requests: int = 20000, clients: int = 500):
+    """Per-request cost: in-process check vs three Redis round-trips (0.1ms each on localhost)"""
+    limiter = SlidingWindowRateLimiter(LIMITS)
+    ips = [f"10.0.{i // 256}.{i % 256}" for i in range(clients)]
+
+    start = time.perf_counter()
+    for i in range(requests):
+        limiter.check("api", ips[i % clients])
+    check_us = (time.perf_counter() - start) / requests * 1e6
+
+    redis = FakeRedis()
+    synced = SlidingWindowRateLimiter(LIMITS, redis_client=redis)
+    for i in range(requests):
+        synced.check("api", ips[i % clients])
+    start = time.perf_counter()
+    asyncio.run(synced.sync())
+    sync_ms = (time.perf_counter() - start) * 1000
+
+    metrics = limiter.get_metrics()
+    print(f"📊 {requests} requests from {clients} clients")
+    print(f"in-process check: {check_us:.2f}us/request (vs ~300us for get+increment+set against Redis)")
+    print(f"batched sync: 1 script call for {len(redis.calls[0][0])} keys ({sync_ms:.1f}ms incl. stand-in), "
+          f"ring buffers {metrics['memory_bytes'] / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    test_window_slides_exactly()
+    test_streaks_and_eviction()
+    test_processes_share_the_limit_through_batched_syncs()
+    test_redis_outage_falls_back_to_local_limits()
+    print("✅ Rate limits hold in process and sync to Redis in batches")
+    benchmark()
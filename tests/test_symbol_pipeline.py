@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the staged symbol pipeline
+Each stage must stay within its worker count and queue bound, My Symbols must
+go ahead of normal symbols, a symbol still in flight must not be queued twice,
+and only decisions that should trade may reach execution
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.agents.orchestration.symbol_pipeline import SymbolPipeline, StageConfig, PRIORITY_HIGH
+
+
+class FakeAgent:
+    """Stage functions that track how many calls overlap"""
+
+    def __init__(self, collect_delay: float = 0.005, analyze_delay: float = 0.01, execute_delay: float = 0.001):
+        self.delays = {'collect': collect_delay, 'analyze': analyze_delay, 'execute': execute_delay}
+        self.active = {name: 0 for name in self.delays}
+        self.peak = {name: 0 for name in self.delays}
+        self.order = []
+        self.executed = []
+        self.fail = set()
+
+    async def _enter(self, stage: str, symbol: str):
+        self.active[stage] += 1
+        self.peak[stage] = max(self.peak[stage], self.active[stage])
+        try:
+            await asyncio.sleep(self.delays[stage])
+            if (stage, symbol) in self.fail:
+                raise RuntimeError(f"{stage} failed")
+        finally:
+            self.active[stage] -= 1
+
+    async def collect(self, symbol):
+        self.order.append(symbol)
+        await self._enter('collect', symbol)
+        return {'symbol': symbol, 'payload': bytearray(1024)}
+
+    async def analyze(self, symbol, data):
+        await self._enter('analyze', symbol)
+        return {'symbol': symbol, 'should_trade': symbol.endswith('0'), 'sources': len(data)}
+
+    async def execute(self, symbol, decision):
+        await self._enter('execute', symbol)
+        self.executed.append(symbol)
+
+    def pipeline(self, collect=4, analyze=2, execute=1, maxsize=5) -> SymbolPipeline:
+        return SymbolPipeline(self.collect, self.analyze, self.execute, stages={
+            'collect': StageConfig(collect, maxsize),
+            'analyze': StageConfig(analyze, maxsize),
+            'execute': StageConfig(execute, maxsize)
+        })
+
+
+def test_stages_are_bounded_and_only_trades_execute():
+    agent = FakeAgent()
+    agent.fail = {('collect', 'S7'), ('analyze', 'S13')}
+    symbols = [f"S{i}" for i in range(60)]
+
+    async def scenario():
+        pipeline = agent.pipeline()
+        await pipeline.start()
+        try:
+            decisions = await pipeline.process_batch(symbols)
+            return decisions, pipeline.get_metrics()
+        finally:
+            await pipeline.stop()
+
+    decisions, metrics = asyncio.run(scenario())
+    assert agent.peak == {'collect': 4, 'analyze': 2, 'execute': 1}
+    assert all(stage['high_water'] <= 5 for stage in metrics['stages'].values())
+    assert decisions['S7'] is None and decisions['S13'] is None and decisions['S10']['should_trade']
+    assert sorted(agent.executed) == sorted(s for s in symbols if s.endswith('0'))
+    assert metrics['completed'] == 58 and metrics['failed'] == 2 and metrics['executed'] == 6
+    assert metrics['stages']['collect']['processed'] == 60 and metrics['stages']['collect']['errors'] == 1
+    assert metrics['stages']['analyze']['processed'] == 59 and metrics['in_flight'] == 0
+    assert metrics['lanes']['normal']['processed'] == 60 and metrics['lanes']['priority']['processed'] == 0
+
+
+def test_priority_lane_and_in_flight_joins():
+    agent = FakeAgent(collect_delay=0.01)
+    normal = [f"N{i}" for i in range(20)]
+    mine = ["BTCUSDT", "ETHUSDT"]
+
+    async def scenario():
+        pipeline = agent.pipeline(collect=1, maxsize=50)
+        await pipeline.start()
+        try:
+            first = [await pipeline.submit(symbol) for symbol in normal]
+            late = [await pipeline.submit(symbol, PRIORITY_HIGH) for symbol in mine]
+            again = await pipeline.submit("N5")  # still queued: joins the pending run
+            results = await asyncio.gather(*first, *late)
+            return again is first[5], results, pipeline.get_metrics()
+        finally:
+            await pipeline.stop()
+
+    joined, results, metrics = asyncio.run(scenario())
+    # Queued after every normal symbol, the priority symbols are still collected first
+    assert agent.order[:3] == ["BTCUSDT", "ETHUSDT", "N0"]
+    assert joined and metrics['joined'] == 1 and metrics['submitted'] == 22
+    assert agent.order.count("N5") == 1 and all(result is not None for result in results)
+    assert metrics['lanes']['priority']['processed'] == 2
+
+
+def benchmark(symbols: int = 1000):
+    """One scan: gather every symbol at once vs the bounded pipeline"""
+    names = [f"S{i}" for i in range(symbols)]
+
+    async def gathered(agent):
+        async def run(symbol):
+            data = await agent.collect(symbol)
+            decision = await agent.analyze(symbol, data)
+            if decision['should_trade']:
+                await agent.execute(symbol, decision)
+        await asyncio.gather(*[run(symbol) for symbol in names])
+
+    async def pipelined(agent):
+        pipeline = agent.pipeline(collect=8, analyze=2, execute=2, maxsize=50)
+        await pipeline.start()
+        try:
+            await pipeline.process_batch(names)
+            return pipeline.get_metrics()
+        finally:
+            await pipeline.stop()
+
+    baseline = FakeAgent(analyze_delay=0.001)
+    start = time.perf_counter()
+    asyncio.run(gathered(baseline))
+    gather_ms = (time.perf_counter() - start) * 1000
+
+    staged = FakeAgent(analyze_delay=0.001)
+    start = time.perf_counter()
+    metrics = asyncio.run(pipelined(staged))
+    pipeline_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📊 {symbols} symbols per scan")
+    print(f"gather: {gather_ms:.0f}ms, peak {baseline.peak['collect']} concurrent collections / "
+          f"{baseline.peak['analyze']} analyses")
+    print(f"pipeline: {pipeline_ms:.0f}ms, peak {staged.peak['collect']} collections / {staged.peak['analyze']} analyses, "
+          f"collect queue high water {metrics['stages']['collect']['high_water']}, "
+          f"analyze p95 {metrics['stages']['analyze']['p95_ms']}ms")
+
+
+if __name__ == "__main__":
+    test_stages_are_bounded_and_only_trades_execute()
+    test_priority_lane_and_in_flight_joins()
+    print("✅ Symbols flow through bounded stages with My Symbols first")
+    benchmark()
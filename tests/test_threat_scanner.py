@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test the request threat scanner
+The literal prefilter must never hide a match the per-pattern regex loop
+would find (including non-ASCII characters re.IGNORECASE folds to ASCII), bodies must be capped and binary uploads skipped, and every scan
+must report its time
+"""
+
+import json
+import random
+import re
+import sys
+import os
+import time
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.middleware.threat_scanner import ThreatScanner, normalize_case, prefilter_literals
+
+# The SecurityMiddleware pattern lists
+SQL_INJECTION_PATTERNS = [
+    r"(\bUNION\b|\bSELECT\b|\bINSERT\b|\bDELETE\b|\bUPDATE\b|\bDROP\b)",
+    r"(\bOR\b\s+\d+\s*=\s*\d+|\bAND\b\s+\d+\s*=\s*\d+)",
+    r"(--|#|\/\*|\*\/)",
+    r"(\bEXEC\b|\bEXECUTE\b|\bxp_cmdshell\b)"
+]
+XSS_PATTERNS = [
+    r"<script[^>]*>.*?</script>",
+    r"javascript:",
+    r"on\w+\s*=",
+    r"<iframe[^>]*>.*?</iframe>",
+    r"eval\s*\(",
+    r"document\.(cookie|write|location)"
+]
+
+
+def make_scanner(**kwargs) -> ThreatScanner:
+    return ThreatScanner({"sql_injection_attempt": SQL_INJECTION_PATTERNS, "xss_attempt": XSS_PATTERNS}, **kwargs)
+
+
+def loop_scan(text: str):
+    """The middleware's original check: every pattern, case-insensitive, in order"""
+    for threat, patterns in (("sql_injection_attempt", SQL_INJECTION_PATTERNS), ("xss_attempt", XSS_PATTERNS)):
+        for pattern in patterns:
+            if re.search(pattern, text, re.IGNORECASE):
+                return threat
+    return None
+
+
+def alert_body(n: int = 1) -> bytes:
+    return json.dumps([{"symbol": "BTCUSDT", "condition": "price_above", "threshold": 65000.5,
+                        "note": "breakout watch level for the order book"}] * n).encode()
+
+
+def test_prefilter_literals():
+    assert prefilter_literals(SQL_INJECTION_PATTERNS[0]) == {'union', 'select', 'insert', 'delete', 'update', 'drop'}
+    assert prefilter_literals(SQL_INJECTION_PATTERNS[1]) == {'or', 'and'}
+    assert prefilter_literals(XSS_PATTERNS[0]) == {'</script>'}
+    assert prefilter_literals(XSS_PATTERNS[5]) == {'document.'}
+    assert prefilter_literals(r"\d+\s*") is None and prefilter_literals(r"(a|\w)b+") == {'b'}
+    assert prefilter_literals(r"x?y{0,3}") is None  # optional parts are not required
+    assert prefilter_literals(r"ölçü") is None  # non-ASCII literals always run the regex
+
+
+def test_case_normalization_agrees_with_ignorecase():
+    # Every character re.IGNORECASE matches against ASCII must normalize to that ASCII character
+    matches_ascii = re.compile(r"[\x00-\x7f]", re.IGNORECASE)
+    for code in range(0x80, sys.maxunicode + 1):
+        char = chr(code)
+        normalized = normalize_case(char)
+        if matches_ascii.fullmatch(char):
+            assert normalized.isascii() and re.fullmatch(re.escape(normalized), char, re.IGNORECASE), hex(code)
+        else:
+            assert not any(c.isascii() for c in normalized), hex(code)
+
+
+def test_same_verdicts_as_the_pattern_loop():
+    scanner = make_scanner()
+    pieces = ["select", "SeLeCt", "ſelect", " or ", "OR 1=1", "and 2 = 2", "--", "#", "/*", "*/", "exec",
+              "<script>", "</SCRIPT>", "javascript:", "onload =", "ON", "<iframe src=x>", "</iframe>", "eval (",
+              "document.cookie", "DOCUMENT.write", "union", "price", "BTC", "=", "(", " ", "\n", "é", "1", "ü"]
+    rng = random.Random(4)
+    hits = 0
+    for _ in range(5000):
+        text = "".join(rng.choice(pieces) if rng.random() < 0.3 else rng.choice("abcdeorsn 1=") for _ in range(12))
+        expected = loop_scan(text)
+        result = scanner.scan(text)
+        assert (result.threat is None) == (expected is None), text
+        hits += expected is not None
+    assert 1000 < hits < 4900
+
+    # Characters re.IGNORECASE treats as ASCII letters must not slip past the prefilter
+    unicode_pieces = pieces + ["javascrİpt:", "ıNseRt", "ınto", "SELECİ", "ſelect", "eval(", "EXEC", "\u212a",
+                               "İ", "ı", "ſ", "ß", "ﬅ", "ǅ", "Ω", "ΐ"]
+    for _ in range(20000):
+        text = "".join(rng.choice(unicode_pieces) if rng.random() < 0.3 else rng.choice("İıſabcdeijkorsn 1=")
+                       for _ in range(rng.randint(1, 16)))
+        assert scanner.scan(text).threat == loop_scan(text), text
+    for text in ["javascrİpt:", "x=1 ıNseRt ınto y", "ONı =1", "unıon", "ſelect", "doCUMENT.wrİte", "evaL ("]:
+        assert loop_scan(text) is not None and scanner.scan(text).threat == loop_scan(text), text
+
+    for text in ["symbol=BTCUSDT&limit=10", "order=desc", "interval=1d&exchange=binance"]:
+        assert loop_scan(text) is None and scanner.scan(text).threat is None
+    blocked = scanner.scan("symbol=BTCUSDT", b'{"note": "1 UNION SELECT password"}', "application/json")
+    assert (blocked.threat, blocked.location, blocked.match) == ("sql_injection_attempt", "body", "UNION")
+    assert scanner.scan("q=<script>alert(1)</script>").location == "query"
+
+
+def test_body_cap_and_content_types():
+    scanner = make_scanner(max_scan_chars=1024)
+    payload = b"x" * 2000 + b"<script>alert(1)</script>"
+    assert scanner.scan(body=payload, content_type="application/json").threat is None  # beyond the cap
+    capped = scanner.scan(body=b"<script>alert(1)</script>" + b"x" * 2000, content_type="application/json")
+    assert capped.threat == "xss_attempt" and capped.truncated and capped.scanned_chars == 1024
+
+    upload = scanner.scan(body=payload[-30:], content_type="multipart/form-data; boundary=abc")
+    assert upload.threat is None and upload.body_skipped == "binary_content_type"
+    assert scanner.scan(body=b"\xff\xfe<script>x</script>").body_skipped == "not_utf8"
+    split = scanner.scan(body="é".encode() * 1000, content_type="text/plain")  # cap cuts a 2-byte char
+    assert split.body_skipped is None and split.scanned_chars == 512
+
+    stats = scanner.get_stats()
+    assert stats["scans"] == 5 and stats["bodies_skipped"] == 2 and stats["bodies_truncated"] == 3
+    assert stats["max_scan_ms"] >= stats["p50_scan_ms"] > 0 and stats["prefiltered_patterns"] == 10
+
+
+def benchmark(requests: int = 2000):
+    """Alert/signal POST bodies: per-pattern re.search loop vs the prefiltered scanner"""
+    scanner = make_scanner()
+    for label, body in (("1 alert", alert_body(1)), ("20 alerts", alert_body(20)), ("500 alerts", alert_body(500))):
+        text = body.decode()
+        count = requests if len(body) < 10000 else 50
+
+        start = time.perf_counter()
+        for _ in range(count):
+            for pattern in SQL_INJECTION_PATTERNS + XSS_PATTERNS:
+                re.search(pattern, "symbol=BTCUSDT", re.IGNORECASE)
+                re.search(pattern, text, re.IGNORECASE)
+        loop_ms = (time.perf_counter() - start) / count * 1000
+
+        start = time.perf_counter()
+        for _ in range(count):
+            scanner.scan("symbol=BTCUSDT", body, "application/json")
+        scan_ms = (time.perf_counter() - start) / count * 1000
+
+        print(f"📊 {label} ({len(body)} bytes): pattern loop {loop_ms:.3f}ms, scanner {scan_ms:.3f}ms "
+              f"({loop_ms / scan_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    test_prefilter_literals()
+    test_case_normalization_agrees_with_ignorecase()
+    test_same_verdicts_as_the_pattern_loop()
+    test_body_cap_and_content_types()
+    print("✅ Threat scanner matches the pattern loop with a fraction of the regex work")
+    benchmark()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test UnifiedRiskMetric Vectorized Batch Path
+batch_assess must match assess_risk field for field across every band, and the
+precomputed risk grid must agree with the scalar formulas
+"""
+
+import asyncio
+import sys
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.services.unified_riskmetric import UnifiedRiskMetric
+
+FIELDS = ('risk_band', 'risk_zone', 'coefficient', 'signal', 'tradeable', 'win_rate')
+
+
+def make_service(tmp: str) -> UnifiedRiskMetric:
+    return UnifiedRiskMetric(db_path=os.path.join(tmp, 'riskmetric.db'))
+
+
+def test_batch_matches_scalar_assessment():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        for symbol, bounds in service.SYMBOL_BOUNDS.items():
+            # Sweep below min, across every band and above max
+            sweep = np.geomspace(bounds['min'] * 0.5, bounds['max'] * 2, 57)
+            for price in list(sweep) + [bounds['min'], bounds['max']]:
+                service.clear_cache()
+                expected = asyncio.run(service.assess_risk(symbol, float(price)))
+                batch = asyncio.run(service.batch_assess([symbol], {symbol: float(price)}))[0]
+                for field in FIELDS:
+                    assert getattr(batch, field) == getattr(expected, field), (symbol, price, field)
+                assert np.isclose(batch.risk_value, expected.risk_value, rtol=0, atol=1e-12)
+                assert np.isclose(batch.score, expected.score, rtol=0, atol=1e-9)
+
+
+def test_batch_defaults_and_unknown_symbols():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        assessments = asyncio.run(service.batch_assess(['btc', 'NOPE', 'ETH']))
+        assert [a.symbol for a in assessments] == ['BTC', 'ETH']
+        expected = asyncio.run(service.assess_risk('BTC'))
+        assert assessments[0].current_price == expected.current_price
+        assert np.isclose(assessments[0].risk_value, expected.risk_value)
+
+
+def test_risk_grid_matches_scalar_formulas():
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        grid = service.get_risk_grid('SOL', points=101)
+        bounds = service.SYMBOL_BOUNDS['SOL']
+        for price, risk, score in zip(grid['prices'], grid['risk'], grid['score']):
+            scalar_risk = service.calculate_logarithmic_risk(price, bounds['min'], bounds['max'])
+            assert np.isclose(risk, scalar_risk)
+        assert grid['risk'][0] == 0.0 and grid['risk'][-1] == 1.0
+        assert service.get_risk_grid('SOL', points=101) is grid
+
+
+def test_route_bound_updates_reach_batch_path(monkeypatch):
+    from src.routes import riskmetric as routes
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        monkeypatch.setattr(routes, 'agent', service)
+        asyncio.run(routes.update_symbol_bounds('btc', 20000.0, 150000.0, reason='test'))
+        asyncio.run(routes.admin_update_symbol_bounds('newc', {'min_price': 1.0, 'max_price': 50.0}))
+
+        for symbol, price in (('BTC', 90000.0), ('NEWC', 7.5)):
+            service.clear_cache()
+            expected = asyncio.run(service.assess_risk(symbol, price))
+            batch = asyncio.run(service.batch_assess([symbol], {symbol: price}))
+            assert len(batch) == 1, symbol
+            assert batch[0].min_price == expected.min_price
+            assert np.isclose(batch[0].risk_value, expected.risk_value, rtol=0, atol=1e-12)
+            for field in FIELDS:
+                assert getattr(batch[0], field) == getattr(expected, field), (symbol, field)
+
+
+def benchmark(n_ticks: int = 200):
+    """Per-symbol assess_risk loop vs one vectorized batch_assess per tick"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(tmp)
+        symbols = list(service.SYMBOL_BOUNDS)
+        rng = np.random.default_rng(3)
+        ticks = [
+            {s: float(np.sqrt(b['min'] * b['max']) * rng.uniform(0.5, 2)) for s, b in service.SYMBOL_BOUNDS.items()}
+            for _ in range(n_ticks)
+        ]
+
+        async def scalar():
+            for prices in ticks:
+                for symbol in symbols:
+                    await service.assess_risk(symbol, prices[symbol])
+
+        async def batch():
+            for prices in ticks:
+                await service.batch_assess(symbols, prices)
+
+        start = time.perf_counter()
+        asyncio.run(scalar())
+        scalar_time = time.perf_counter() - start
+        start = time.perf_counter()
+        asyncio.run(batch())
+        batch_time = time.perf_counter() - start
+
+    print(f"📊 {len(symbols)} symbols x {n_ticks} ticks")
+    print(f"per-symbol: {scalar_time:.3f}s  batch: {batch_time:.3f}s  ({scalar_time / batch_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    test_batch_matches_scalar_assessment()
+    test_batch_defaults_and_unknown_symbols()
+    test_risk_grid_matches_scalar_formulas()
+    print("✅ Vectorized batch matches scalar risk assessment")
+    benchmark()
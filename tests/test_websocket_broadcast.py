@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Test WebSocket Broadcast Fan-out
+Broadcasts must serialize once, never wait on a slow client, coalesce queued
+prices per symbol and report per-connection lag
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+# Add the API directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'api'))
+
+from src.websocket import websocket_manager
+from src.websocket.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    """Records sent frames; optionally slow or broken"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.texts = []
+        self.send_calls = 0
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.send_calls += 1
+        if self.fail:
+            raise RuntimeError("connection reset")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.texts.append(text)
+
+    async def close(self):
+        self.closed = True
+
+    @property
+    def frames(self):
+        return [json.loads(text) for text in self.texts]
+
+    def prices(self):
+        return [f['data']['price'] for f in self.frames if f['type'] == 'price_update']
+
+
+async def connect(manager: ConnectionManager, websocket: FakeWebSocket, symbol: str = 'BTC'):
+    await manager.connect(websocket, f"user-{id(websocket)}")
+    await manager.subscribe_to_price_updates(websocket, symbol)
+
+
+async def settle(seconds: float = 0.05):
+    await asyncio.sleep(seconds)
+
+
+def test_slow_client_does_not_stall_broadcast():
+    async def scenario():
+        manager = ConnectionManager(send_timeout=0.5)
+        fast = [FakeWebSocket() for _ in range(20)]
+        slow = FakeWebSocket()
+        for websocket in fast + [slow]:
+            await connect(manager, websocket)
+        await settle()
+        slow.delay = 0.3
+
+        start = time.perf_counter()
+        await manager.broadcast_price_update('BTC', {'price': 100.0})
+        await settle(0.01)
+        elapsed = time.perf_counter() - start
+        fast_prices = [ws.prices() for ws in fast]
+        await settle(0.4)
+        stats = manager.get_connection_stats()
+        return elapsed, fast_prices, slow.prices(), stats
+
+    elapsed, fast_prices, slow_prices, stats = asyncio.run(scenario())
+    assert elapsed < 0.1
+    assert all(prices == [100.0] for prices in fast_prices)
+    assert slow_prices == [100.0]
+    assert len(stats['connections']) == 21
+    assert max(c['max_lag_ms'] for c in stats['connections']) >= 300
+
+
+def test_message_serialized_once():
+    calls = []
+    real_dumps = websocket_manager.json.dumps
+
+    def counting_dumps(*args, **kwargs):
+        calls.append(1)
+        return real_dumps(*args, **kwargs)
+
+    async def scenario():
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(50)]
+        for websocket in sockets:
+            await connect(manager, websocket)
+        await settle()
+        calls.clear()
+        await manager.broadcast_price_update('BTC', {'price': 1.0})
+        await settle()
+        return sockets
+
+    websocket_manager.json.dumps = counting_dumps
+    try:
+        sockets = asyncio.run(scenario())
+    finally:
+        websocket_manager.json.dumps = real_dumps
+    assert len(calls) == 1
+    assert all(ws.prices() == [1.0] for ws in sockets)
+
+
+def test_lagging_client_gets_latest_price_per_symbol():
+    async def scenario():
+        manager = ConnectionManager(send_timeout=1.0)
+        lagging = FakeWebSocket(delay=0.05)
+        await connect(manager, lagging, 'BTC')
+        await manager.subscribe_to_price_updates(lagging, 'ETH')
+        await manager.subscribe_to_alert_updates(lagging)
+        await settle(0.3)
+
+        for price in range(1, 51):
+            await manager.broadcast_price_update('BTC', {'price': float(price)})
+            await manager.broadcast_price_update('ETH', {'price': float(price) * 10})
+        await manager.broadcast_alert_notification({'alert': 'risk'})
+        await settle(0.3)
+        return lagging, manager.get_connection_stats()['connections'][0]
+
+    lagging, stats = asyncio.run(scenario())
+    updates = [(f['symbol'], f['data']['price']) for f in lagging.frames if f['type'] == 'price_update']
+    # Both symbols' first update was in flight or queued; everything after coalesced
+    assert updates[-2:] == [('BTC', 50.0), ('ETH', 500.0)]
+    assert len(updates) <= 4
+    assert lagging.frames[-1]['type'] == 'alert_triggered'
+    assert stats['coalesced'] >= 96 and stats['queue_depth'] == 0
+
+
+def test_failing_and_timed_out_clients_are_disconnected():
+    async def scenario():
+        manager = ConnectionManager(send_timeout=0.02)
+        healthy = FakeWebSocket()
+        broken = FakeWebSocket()
+        stuck = FakeWebSocket()
+        for websocket in (healthy, broken, stuck):
+            await connect(manager, websocket)
+        await settle()
+
+        broken.fail = True
+        stuck.delay = 10
+        stuck.send_calls = 0
+        for price in range(3):
+            await manager.broadcast_price_update('BTC', {'price': float(price)})
+            await settle(0.05)
+        return manager, healthy, broken, stuck
+
+    manager, healthy, broken, stuck = asyncio.run(scenario())
+    assert healthy.prices() == [0.0, 1.0, 2.0]
+    assert manager.price_subscribers['BTC'] == {healthy}
+    assert broken.closed and stuck.closed
+    # The timed-out socket is never written to again
+    assert stuck.send_calls == 1
+    assert manager.get_connection_stats()['total_connections'] == 1
+
+
+def test_disconnected_sockets_are_not_revived():
+    async def scenario():
+        manager = ConnectionManager()
+        live = FakeWebSocket()
+        gone = FakeWebSocket()
+        for websocket in (live, gone):
+            await connect(manager, websocket)
+        await settle()
+        manager.disconnect(gone)
+        sent_before = gone.send_calls
+
+        delivered = await manager.send_personal_message({'type': 'note'}, gone)
+        await manager.broadcast_to_subscribers({'type': 'note'}, {live, gone})
+        await settle()
+        return manager, live, gone, sent_before, delivered
+
+    manager, live, gone, sent_before, delivered = asyncio.run(scenario())
+    assert delivered is False
+    assert gone not in manager.channels and gone.send_calls == sent_before
+    assert live.frames[-1] == {'type': 'note'}
+
+
+def benchmark(n_clients: int = 5000, n_ticks: int = 20):
+    """Tick fan-out to 5k dashboard connections: sequential per-socket dumps vs channels"""
+    async def legacy(sockets, message):
+        for websocket in sockets:
+            await websocket.send_text(json.dumps(message, default=str))
+
+    async def scenario():
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(n_clients)]
+        sockets[0].delay = 0.05  # one slow dashboard
+        for websocket in sockets:
+            await connect(manager, websocket)
+        await settle(0.2)
+
+        payload = {'price': 100.0, 'volume': 12345.6, 'change_24h': 1.2, 'high': 101.0, 'low': 99.0}
+        start = time.perf_counter()
+        for _ in range(n_ticks):
+            await legacy(sockets, {'type': 'price_update', 'symbol': 'BTC', 'data': payload})
+        legacy_tick = (time.perf_counter() - start) / n_ticks
+
+        fanout = []
+        for _ in range(n_ticks):
+            target = len(sockets[-1].texts) + 1
+            start = time.perf_counter()
+            await manager.broadcast_price_update('BTC', payload)
+            while len(sockets[-1].texts) < target:
+                await asyncio.sleep(0)
+            fanout.append(time.perf_counter() - start)
+        await settle(0.2)
+        return legacy_tick, fanout, manager.get_connection_stats()['broadcast']
+
+    legacy_tick, fanout, stats = asyncio.run(scenario())
+    fanout.sort()
+    print(f"📊 {n_clients} connections (one slow), {n_ticks} ticks")
+    print(f"sequential: {legacy_tick * 1000:.1f}ms/tick  channels: p50 {fanout[len(fanout) // 2] * 1000:.1f}ms "
+          f"max {fanout[-1] * 1000:.1f}ms to the last client")
+    print(f"serialize: {stats['avg_serialize_ms']}ms  enqueue: {stats['avg_fanout_ms']}ms per broadcast")
+
+
+if __name__ == "__main__":
+    test_slow_client_does_not_stall_broadcast()
+    test_message_serialized_once()
+    test_lagging_client_gets_latest_price_per_symbol()
+    test_failing_and_timed_out_clients_are_disconnected()
+    test_disconnected_sockets_are_not_revived()
+    print("✅ Broadcasts fan out concurrently with per-client queues")
+    benchmark()